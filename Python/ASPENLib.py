@@ -8,7 +8,7 @@ __license__   = "All rights reserved"
 __category__  = "Common"
 __email__     = "support@aspeninc.com"
 __status__    = "Release"
-__version__   = "2.1.5"
+__version__   = "2.1.6"
 
 #
 import os,sys,time, uuid
@@ -267,6 +267,22 @@ def OlrConverter(pi,olxpath,pyFile='',sizeSubprocess = {'.OLR':10,'.OLX':200,'.D
     logging.info(slog)
 
 #
+def OlrConverterBatch(jobs,olxpath,nProcess=2,force=False,verbose=True):
+    """
+    Convert a batch of files (same pi lists as OlrConverter) on a pool of nProcess workers,
+    olxapi.dll initialized once per worker, jobs with valid output (content hash of inputs) skipped
+
+    return list of OlrConvertService.CONVERT_RESULT (status,time,peakMB,pid,error)
+
+    samples:
+        OlrConverterBatch([['haha.OLR','haha.OLX'],['haha1.OLR','haha2.OLR','hoho.ADX']],olxpath)
+    """
+    import OlrConvertService
+    res = OlrConvertService.runJobs(jobs,OlrConvertService.DLL_BACKEND(olxpath),nProcess=nProcess,force=force)
+    if verbose:
+        OlrConvertService.printReport(res)
+    return res
+#
 def __OlrConverter(pi,olxpath):
     """
     Convert OLR <=>OLX,DXT
@@ -282,6 +298,7 @@ def __OlrConverter(pi,olxpath):
         OlrConverter(pi=['haha.OLR','hoho.OLX']) : 'haha.OLR' => 'hoho.OLX'
         OlrConverter(pi=['haha.OLX','hoho.OLR']) : 'haha.OLX' => 'hoho.OLR'
         OlrConverter(pi=['haha1.OLR','haha2.OLR','hoho.ADX']) : compare ('haha1.OLR','haha2.OLR') => 'hoho.ADX'
+        OlrConverter(pi=['haha1.OLX','haha2.OLX','hoho.ADX']) : compare ('haha1.OLX','haha2.OLX') => 'hoho.ADX' (OlxDiff, no DLL)
 
     """
     ext = []
@@ -311,6 +328,12 @@ def __OlrConverter(pi,olxpath):
             OlxAPILib.open_olrFile(pi[1],dllPath = olxpath,readonly=1,prt=True)
     #
     elif len(pi)==3:
+        if ext[0] == '.OLX' and ext[1] == '.OLX' and ext[2] == '.ADX':
+            # native diff 2OLX => ADX (no DLL)
+            import OlxDiff
+            OlxDiff.diff(pi[0],pi[1],pi[2])
+            return 0
+        #
         if ext[0] != '.OLR' or ext[1] != '.OLR' or ext[2] != '.ADX':
             raise Exception("ERROR format for compare 2OLR => ADX")
         #
@@ -508,6 +531,13 @@ class FilterOptions:
         return res
     #
     def runFilter(self,cr1):
+        # compiled filter (interval sets), same result as runFilter_1
+        if getattr(self,'olxFilter',None) is None:
+            import OlxFilter
+            self.olxFilter = OlxFilter.OLX_FILTER.fromOptions(self)
+        return self.olxFilter.runFilter(cr1)
+    #
+    def runFilter_1(self,cr1):
         scope    = cr1['OBJSCOPE']
         objtype1 = cr1['@OBJTYPE']
         action1  = cr1['@ACTION']
@@ -790,10 +820,44 @@ class Data1ADX:
         return s1
 #
 class DataASPEN_OLX:
-    def __init__(self, fxml,tagStop=None,encoding ='iso8859-1'):
-        self.xmlDict = xml2Dict(fxml, desc= 'Parsing ASPEN OLX', tagStop=tagStop,encoding =encoding)['ASPENOLXDB']
+    def __init__(self, fxml,tagStop=None,encoding ='iso8859-1',cache=False):
+        # cache=True: columnar cache of the OLX file (OlxCache), parsed only if the file changed
+        self.olxCache = None
+        self.__olxtables1__ = {} # cached: OLXDBTABLE by (OBJTYPE,fields), built on first use
+        if cache:
+            import OlxCache
+            self.olxCache = OlxCache.load(fxml,encoding=encoding)
+            self.xmlDict = __OlxCacheDict__(self.olxCache)
+        else:
+            self.xmlDict = xml2Dict(fxml, desc= 'Parsing ASPEN OLX', tagStop=tagStop,encoding =encoding)['ASPENOLXDB']
         # self.ERR = "Input file format required: ASPEN OLX"
     #
+    def get_TABLES(self):
+        # return OlxCache.OLX_TABLES (columnar tables by OBJTYPE), None if not cached
+        return self.olxCache
+    #
+    def __olxdbtables__(self,skip=(),fields=None):
+        # skip: OBJTYPE without records (OLXREC not built if cached)
+        # fields: columns of the records (None: all), only used if cached
+        if self.olxCache is None:
+            return self.xmlDict['OLXDBTABLE']
+        return (({'@NAME':t,'@RECCOUNT':str(self.olxCache.table(t).n)} if t in skip else self.__olxdbtable__(t,fields)) for t in self.olxCache.types)
+    #
+    def __olxdbtable__(self,objtype,fields=None):
+        # one OLXDBTABLE of the cache, kept by (OBJTYPE,fields)
+        k = (objtype,None if fields is None else tuple(sorted(fields)))
+        try:
+            return self.__olxtables1__[k]
+        except KeyError:
+            pass
+        t1 = self.olxCache.table(objtype)
+        olxrec = list(t1.olxrec(fields))
+        for r in olxrec:
+            if type(r.get('DATAFIELD'))==dict:
+                r['DATAFIELD'] = [r['DATAFIELD']]
+        self.__olxtables1__[k] = {'@NAME':objtype,'@RECCOUNT':str(t1.n),'OLXREC':olxrec}
+        return self.__olxtables1__[k]
+    #
     def get_OLRVERSION(self):
         # return String
         return self.xmlDict['@OLRVERSION']
@@ -818,268 +882,52 @@ class DataASPEN_OLX:
         return data1
     #
 
-    def export2XML(self, folx):
-        objcount = self.xmlDict['OBJCOUNT']
-
-        s0 = ''
-        try:
-            for key, value in objcount.items():
-                s0 += '%s="%s" ' %(str(key[1:]),str(value))
-        except:
-            pass
-
-        s1 = ''
-        try:
-            systemparams = self.xmlDict['SYSTEMPARAMS']
-            for key, value in systemparams.items():
-                if key != "FILECOMMENTS":
-                    s1 += '%s="%s" ' %(str(key[1:]),str(value))
-                else:
-                    s2 = value
-        except:
-            pass
-
-        xmlDict = self.xmlDict
-        fo = open(folx, "w", encoding="utf-8")
-        fo.write("<?xml version='1.0'?>\n")
-        fo.write('<ASPENOLXDB OLRVERSION="%s" DATETIME="%s">'%(self.xmlDict['@OLRVERSION'], self.xmlDict['@DATETIME']))
-        fo.write(sTab[1]+'<OBJCOUNT %s/>'%(s0))
-        try:
-            udftemplate = self.xmlDict['UDFTEMPLATE']
-            fo.write(sTab[1]+'<UDFTEMPLATE>')
-            if type(udftemplate['OLRXOBJ']) == list:
-                for olrxobj in udftemplate['OLRXOBJ']:
-                    fo.write(sTab[2]+'<OLRXOBJ OBJTYPE="%s">'%(olrxobj['@OBJTYPE']))
-                    for udf in olrxobj['UDFIELD']:
-                        fo.write(sTab[3]+'<UDFIELD ROWNO="%s" FNAME="%s" LABEL="%s"/>'%(udf['ROWNO'],udf['FNAME'],udf['LABEL']))
-                    fo.write(sTab[2]+'</OLRXOBJ>')
-            elif type(udftemplate['OLRXOBJ']) == dict:
-                olrxobj = udftemplate['OLRXOBJ']
-                fo.write(sTab[2]+'<OLRXOBJ OBJTYPE="%s">'%(olrxobj['@OBJTYPE']))
-                for udf in olrxobj['UDFIELD']:
-                    fo.write(sTab[3]+'<UDFIELD ROWNO="%s" FNAME="%s" LABEL="%s"/>'%(udf['@ROWNO'],udf['@FNAME'],udf['@LABEL']))
-                fo.write(sTab[2]+'</OLRXOBJ>')
-
-            fo.write(sTab[1]+'</UDFTEMPLATE>')
-        except:
-            pass
-
-        fo.write(sTab[1] + '<SYSTEMPARAMS %s>'%(s1))
-        fo.write(sTab[2] + '<FILECOMMENTS> %s </FILECOMMENTS>'%(s2))
-        fo.write(sTab[1] + '</SYSTEMPARAMS>')
-        for data in xmlDict['OLXDBTABLE']:
-            s1 = '<OLXDBTABLE NAME="%s" RECCOUNT="%s">'%(data['@NAME'], data['@RECCOUNT'])
-            fo.write(sTab[1] +s1)
-            olxtable = data['OLXREC']
-            if type(olxtable) != list:
-                olxtable = [data['OLXREC']]
-
-            for olxrec in olxtable:
-                fo.write(sTab[2] +'<OLXREC OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(olxrec['@OBJTYPE'],olxrec['@OLNETID'], olxrec['@OBJGUID']))
-                fo.write(sTab[3] +'<OLNET>')
-                for olnetfield in olxrec['OLNET']['OLNETFIELD']:
-                    fo.write(sTab[4] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(olnetfield['@NAME'],olnetfield['@VALUE']))
-                fo.write(sTab[3] +'</OLNET>')
-
-                try:
-                    if type(olxrec['DATAFIELD']) == dict:
-                        df = olxrec['DATAFIELD']
-                        if df['@NAME'] == "BK_OBJLST1" or df['@NAME'] == "BK_OBJLST2":
-                                fo.write(sTab[3] +'<DATAFIELD NAME="%s">'%(df['@NAME']))
-                                try:
-                                    OLRelements = df['VALUE']['OLNET']
-                                    if OLRelements != None:
-                                        fo.write(sTab[4] +'<VALUE>')
-                                        for elem in OLRelements:
-                                            typeOLR = elem['@OBJTYPE']
-                                            fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                            OBJLST1 = elem['OLNETFIELD']
-                                            for obj1 in  OBJLST1:
-                                                  fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                            fo.write(sTab[5] +'</OLNET>')
-                                        fo.write(sTab[4] +'</VALUE>')
-                                except:
-                                    fo.write(sTab[4] +'<VALUE/>')
-                                fo.write(sTab[3] +'</DATAFIELD>')
-                        else:
-                            fo.write(sTab[3] +'<DATAFIELD VALUE="%s" NAME="%s"/>'%(df['@VALUE'],df['@NAME']))
-                    elif type(olxrec['DATAFIELD']) == list:
-                        for df in olxrec['DATAFIELD']:
-                            if df['@NAME'] == "BK_OBJLST1" or df['@NAME'] == "BK_OBJLST2":
-                                fo.write(sTab[3] +'<DATAFIELD NAME="%s">'%(df['@NAME']))
-                                try:
-                                    OLRelements = df['VALUE']['OLNET']
-                                    if type(OLRelements) != list:
-                                        OLRelements = [df['VALUE']['OLNET']]
-                                    if OLRelements != None:
-                                        fo.write(sTab[4] +'<VALUE>')
-                                        for elem in OLRelements:
-                                            typeOLR = elem['@OBJTYPE']
-                                            fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                            OBJLST1 = elem['OLNETFIELD']
-                                            for obj1 in  OBJLST1:
-                                                  fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                            fo.write(sTab[5] +'</OLNET>')
-                                        fo.write(sTab[4] +'</VALUE>')
-                                except:
-                                    fo.write(sTab[4] +'<VALUE/>')
-                                fo.write(sTab[3] +'</DATAFIELD>')
-                            else:
-                                fo.write(sTab[3] +'<DATAFIELD VALUE="%s" NAME="%s"/>'%(df['@VALUE'],df['@NAME']))
-
-                except:
-                    pass
-                fo.write(sTab[2]+'</OLXREC>')
-            fo.write(sTab[1]+'</OLXDBTABLE>')
-
-        fo.write('\n</ASPENOLXDB>')
-        fo.close()
-
-        return fo
-
-    def exportData2XML(self, data_olx, folx):
+    def export2XML(self, folx, gz=None):
+        """
+        Export all data to OLX file (folx.gz: gzip), records streamed by OlxWriter
+        """
+        import OlxWriter
+        objcount = [(key[1:],value) for key,value in self.xmlDict['OBJCOUNT'].items()]
+        wr = OlxWriter.OLX_WRITER(folx,self.xmlDict,objcount=objcount,gz=gz)
+        for data in self.__olxdbtables__():
+            wr.beginTable(data['@NAME'],data['@RECCOUNT'])
+            for olxrec in OlxWriter.__list__(data.get('OLXREC')):
+                wr.writeOlxrec(olxrec)
+            wr.endTable()
+        return wr.close()
+
+    def exportData2XML(self, data_olx, folx, gz=None):
+        """
+        Export data (get_DATA()[0], filtered or modified) to OLX file (folx.gz: gzip),
+        records streamed by OlxWriter
+        """
+        import OlxWriter
         objlist = []
         count = 0
-        s0 = ''
-        try:
-            for key, value in data_olx.items():
-                if len(value) > 0:
-                    s0 += '%s="%s" ' %(str(key),str(len(value)))
-                    if key!= 'COUNT':
-                        objlist.append(key)
-                    count += len(value)
-        except:
-            pass
-
-        s1 = ''
-        s2 = ''
-        try:
-            systemparams = self.xmlDict['SYSTEMPARAMS']
-            for key, value in systemparams.items():
-                if key != "FILECOMMENTS":
-                    s1 += '%s="%s" ' %(str(key[1:]),str(value))
-                else:
-                    s2 = value
-        except:
-            pass
-
-
-
-        xmlDict = self.xmlDict
-        fo = open(folx, "w", encoding="utf-8")
-        fo.write("<?xml version='1.0'?>\n")
-        fo.write('<ASPENOLXDB OLRVERSION="%s" DATETIME="%s">'%(xmlDict['@OLRVERSION'], xmlDict['@DATETIME']))
-        fo.write(sTab[1]+'<OBJCOUNT COUNT="%s" %s/>'%(count,s0))
-        try:
-            udftemplate = xmlDict['UDFTEMPLATE']
-            fo.write(sTab[1]+'<UDFTEMPLATE>')
-            if type(udftemplate['OLRXOBJ']) == list:
-                for olrxobj in udftemplate['OLRXOBJ']:
-                    fo.write(sTab[2]+'<OLRXOBJ OBJTYPE="%s">'%(olrxobj['@OBJTYPE']))
-                    for udf in olrxobj['UDFIELD']:
-                        fo.write(sTab[3]+'<UDFIELD ROWNO="%s" FNAME="%s" LABEL="%s"/>'%(udf['@ROWNO'],udf['@FNAME'],udf['@LABEL']))
-                    fo.write(sTab[2]+'</OLRXOBJ>')
-            elif type(udftemplate['OLRXOBJ']) == dict:
-                olrxobj = udftemplate['OLRXOBJ']
-                fo.write(sTab[2]+'<OLRXOBJ OBJTYPE="%s">'%(olrxobj['@OBJTYPE']))
-                for udf in olrxobj['UDFIELD']:
-                    fo.write(sTab[3]+'<UDFIELD ROWNO="%s" FNAME="%s" LABEL="%s"/>'%(udf['@ROWNO'],udf['@FNAME'],udf['@LABEL']))
-                fo.write(sTab[2]+'</OLRXOBJ>')
-
-
-            fo.write(sTab[1]+'</UDFTEMPLATE>')
-        except:
-            pass
-
-
-        fo.write(sTab[1] + '<SYSTEMPARAMS %s>'%(s1))
-        fo.write(sTab[2] + '<FILECOMMENTS> %s </FILECOMMENTS>'%(s2))
-        fo.write(sTab[1] + '</SYSTEMPARAMS>')
-
-
-        for data in xmlDict['OLXDBTABLE']:
+        objcount = []
+        for key, value in data_olx.items():
+            if len(value) > 0:
+                objcount.append((key,len(value)))
+                if key!= 'COUNT':
+                    objlist.append(key)
+                count += len(value)
+        wr = OlxWriter.OLX_WRITER(folx,self.xmlDict,objcount=[('COUNT',count)]+objcount,gz=gz)
+        for data in self.__olxdbtables__():
             if data['@NAME'] not in objlist:
                 continue
             dataobjlist = data_olx[data['@NAME']]
             ind = 0
-            s1 = '<OLXDBTABLE NAME="%s" RECCOUNT="%s">'%(data['@NAME'], len(dataobjlist))
-            fo.write(sTab[1] +s1)
-
-            olxtable = data['OLXREC']
-            if type(olxtable) != list:
-                olxtable = [data['OLXREC']]
-            for olxrec in olxtable:
+            wr.beginTable(data['@NAME'],len(dataobjlist))
+            for olxrec in OlxWriter.__list__(data.get('OLXREC')):
                 if ind == len(dataobjlist):
                     break
                 dataobj = dataobjlist[ind]
                 if dataobj['OBJGUID'] != olxrec['@OBJGUID']:
                     continue
-
-
-                fo.write(sTab[2] +'<OLXREC OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(olxrec['@OBJTYPE'],olxrec['@OLNETID'], olxrec['@OBJGUID']))
-                fo.write(sTab[3] +'<OLNET>')
-                for olnetfield in olxrec['OLNET']['OLNETFIELD']:
-                    fo.write(sTab[4] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(olnetfield['@NAME'],olnetfield['@VALUE']))
-                fo.write(sTab[3] +'</OLNET>')
-
-                try:
-                    if type(olxrec['DATAFIELD']) == dict:
-                        df = olxrec['DATAFIELD']
-                        if df['@NAME'] == "BK_OBJLST1" or df['@NAME'] == "BK_OBJLST2":
-                                fo.write(sTab[3] +'<DATAFIELD NAME="%s">'%(df['@NAME']))
-                                try:
-                                    OLRelements = dataobj[df['@NAME']]['OLNET']
-                                    if OLRelements != None:
-                                        fo.write(sTab[4] +'<VALUE>')
-                                        for elem in OLRelements:
-                                            typeOLR = elem['@OBJTYPE']
-                                            fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                            OBJLST1 = elem['OLNETFIELD']
-                                            for obj1 in  OBJLST1:
-                                                  fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                            fo.write(sTab[5] +'</OLNET>')
-                                        fo.write(sTab[4] +'</VALUE>')
-                                except:
-                                    fo.write(sTab[4] +'<VALUE/>')
-                                fo.write(sTab[3] +'</DATAFIELD>')
-                        else:
-                            fo.write(sTab[3] +'<DATAFIELD VALUE="%s" NAME="%s"/>'%(dataobj[df['@NAME']],df['@NAME']))
-
-                    elif type(olxrec['DATAFIELD']) == list:
-                        for df in olxrec['DATAFIELD']:
-                            if df['@NAME'] == "BK_OBJLST1" or df['@NAME'] == "BK_OBJLST2":
-                                fo.write(sTab[3] +'<DATAFIELD NAME="%s">'%(df['@NAME']))
-                                try:
-                                    OLRelements = dataobj[df['@NAME']]['OLNET']
-                                    if type(OLRelements) != list:
-                                        OLRelements = [dataobj[df['@NAME']]['OLNET']]
-                                    if OLRelements != None:
-                                        fo.write(sTab[4] +'<VALUE>')
-                                        for elem in OLRelements:
-                                            typeOLR = elem['@OBJTYPE']
-                                            fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                            OBJLST1 = elem['OLNETFIELD']
-                                            for obj1 in  OBJLST1:
-                                                  fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                            fo.write(sTab[5] +'</OLNET>')
-                                        fo.write(sTab[4] +'</VALUE>')
-                                except:
-                                    fo.write(sTab[4] +'<VALUE/>')
-                                fo.write(sTab[3] +'</DATAFIELD>')
-                            else:
-                                fo.write(sTab[3] +'<DATAFIELD VALUE="%s" NAME="%s"/>'%(dataobj[df['@NAME']],df['@NAME']))
-
-                except:
-                    pass
-                fo.write(sTab[2]+'</OLXREC>')
+                wr.writeOlxrec(olxrec,dataobj)
                 ind += 1
-            fo.write(sTab[1]+'</OLXDBTABLE>')
-
-
-        fo.write('\n</ASPENOLXDB>')
-        fo.close()
-
-        return fo
+            wr.endTable()
+        return wr.close()
 
 
     def get_DATA(self,filterOptions=None,
@@ -1091,7 +939,8 @@ class DataASPEN_OLX:
                  BNO=[],                      # list of bus number
                  OBJGUID=[],                 # list of objguid
                  ckid = [],
-                 filter_data_out = False):
+                 filter_data_out = False,
+                 fields = None):              # list of fields in the records (None: all)
         """
         Get objects data from XML file (OLR objects)
 
@@ -1101,6 +950,10 @@ class DataASPEN_OLX:
             Filter Option object to filter area, zone, kv, BNO.... The default is None.
         filter_data_out : boolean, optional
             True to get the data filtered, False to get full data. The default is False.
+            With typ, records of the other types are not read (cache=True: not built).
+        fields : list, optional
+            Fields kept in the records (OBJGUID always kept), None for all. The default is None.
+            With cache=True only these columns (and the filter columns) are read.
 
         Returns
         -------
@@ -1128,9 +981,9 @@ class DataASPEN_OLX:
 
 
         if not checkrange:
-            arearange, zonerange, kvrange, BNOrange, CKTIDrange, checkrange =  get_filter_range(area, zone, kv, BNO, ckid)
+            arearange, zonerange, kvrange, BNOrange, CKTIDrange, checkrange =  get_filter_range(area, zone, kv, BNO, ckid, compiled=True)
         else:
-            arearange, zonerange, kvrange, BNOrange, CKTIDrange, _ =  get_filter_range(area, zone, kv, BNO, ckid)
+            arearange, zonerange, kvrange, BNOrange, CKTIDrange, _ =  get_filter_range(area, zone, kv, BNO, ckid, compiled=True)
 
 
         olnetKV = ['TERMKV1', 'TERMKV2', 'TERMKV3','TERMKV4']
@@ -1142,13 +995,29 @@ class DataASPEN_OLX:
         dictBUS_AR = dict()
         dictBUS_ZN = dict()
 
-        olxdbtables = self.xmlDict['OLXDBTABLE']
+        skip = set()
+        if typ and filter_data_out:
+            # records of the other types are all filtered out
+            skip = set(OBJTYPELIST)-set(typ)
+            if arearange or zonerange:
+                skip.discard('BUS') # area/zone of the terminals
+        keep = None
+        fields1 = None
+        if fields is not None:
+            keep = set(fields)|{'OBJGUID'}
+            fields1 = keep|set(olnetKV+olnetBNO+olnetTERMGUID+olnetCKTID+olnetAREA+olnetZONE)
+        olxdbtables = self.__olxdbtables__(skip,fields1)
         self.data_olx = dict()
         self.data_filtered = dict()
 
         for olxtable in olxdbtables:
             objtype = olxtable['@NAME']
             objcount = int(olxtable['@RECCOUNT'])
+            if objtype in skip:
+                if objcount > 0:
+                    self.data_olx[objtype] = []
+                    self.data_filtered[objtype] = [False]*objcount
+                continue
             if objcount > 0:
                 olxrecs = olxtable['OLXREC']
             if type(olxrecs) != list:
@@ -1263,7 +1132,7 @@ class DataASPEN_OLX:
                     else:
                         objguid_res = True
 
-                    if kvrange == [] or objtype == 'AREA' or objtype == 'ZONE' or objtype == 'ZCORRECT':
+                    if not kvrange or objtype == 'AREA' or objtype == 'ZONE' or objtype == 'ZCORRECT':
                         KVfilter = True
                     else:
                         try:
@@ -1271,18 +1140,18 @@ class DataASPEN_OLX:
                         except:
                             KVfilter = True
 
-                    if BNOrange == []:
+                    if not BNOrange:
                         BNOfilter = True
                     else:
                         BNOfilter = max(bno)
 
-                    if CKTIDrange ==[]:
+                    if not CKTIDrange:
                         CKTIDfilter = True
                     else:
                         if len(cktid) > 0:
                             CKTIDfilter = max(cktid)
 
-                    if arearange ==[] or objtype == 'ZONE' or objtype == 'ZCORRECT':
+                    if not arearange or objtype == 'ZONE' or objtype == 'ZCORRECT':
                         ARfilter = True
                     else:
                         if tie:
@@ -1296,7 +1165,7 @@ class DataASPEN_OLX:
                             else:
                                 ARfilter = False
 
-                    if zonerange ==[] or objtype == 'AREA' or objtype == 'ZCORRECT':
+                    if not zonerange or objtype == 'AREA' or objtype == 'ZCORRECT':
                         ZNfilter = True
                     else:
                         if tie:
@@ -1312,6 +1181,8 @@ class DataASPEN_OLX:
 
                     result = ARfilter & ZNfilter & KVfilter & BNOfilter & CKTIDfilter & typ_res & objguid_res
                     data_filtered.append(result)
+                    if keep is not None:
+                        data_elem = {k:v for k,v in data_elem.items() if k in keep}
                     if filter_data_out:
                         if result:
                             data_objs.append(data_elem)
@@ -1323,6 +1194,17 @@ class DataASPEN_OLX:
 
         return self.data_olx, self.data_filtered
 #
+class __OlxCacheDict__(dict):
+    # xmlDict of a cached OLX: header, tables are rebuilt only when used
+    def __init__(self,olxCache):
+        super().__init__(olxCache.header)
+        self.olxCache = olxCache
+    def __missing__(self,key):
+        if key=='OLXDBTABLE':
+            self[key] = self.olxCache.xmlDict()['OLXDBTABLE']
+            return self[key]
+        raise KeyError(key)
+#
 class DataASPEN_ADX:
     """
     read ASPEN ADX file
@@ -1356,6 +1238,22 @@ class DataASPEN_ADX:
         except:
             self.xmlDict['CHANGEREC'] = []
     #
+    def get_INDEX(self,rebuild=False):
+        """
+        byte-offset index of CHANGEREC (AdxIndex.ADX_INDEX, cached beside the ADX file)
+        """
+        if getattr(self,'adxIndex',None) is None or rebuild:
+            import AdxIndex
+            self.adxIndex = AdxIndex.ADX_INDEX(self.fadx,encoding=self.encoding,rebuild=rebuild)
+        return self.adxIndex
+    #
+    def iter_CHANGEREC(self,action=None,objtype=None,area=None,zone=None):
+        """
+        iterate CHANGEREC (dict) filtered by action/objtype/area/zone
+        without loading the whole ADX, records not selected are not parsed
+        """
+        return self.get_INDEX().iterRecords(action=action,objtype=objtype,area=area,zone=zone)
+    #
     def getValSum(self):
         source = open(self.fadx , 'r',encoding=self.encoding,errors = 'ignore')
         #
@@ -1383,7 +1281,8 @@ class DataASPEN_ADX:
             raise Exception ('\nADX: '+self.fadx +'\n\n'+'Path name of File A not found:\n'+self.valSum['FILEA'] +'\nor:\n'+self.fA)
         #
         self.fA_short = AppUtils.getShortNameFile(self.fA,27)
-        self.valSumA =  getValSum(self.fA,self.olxpath)
+        import ModelSummary # OLX header or sidecar summary, olxapi.dll only if none
+        self.valSumA =  ModelSummary.summary(self.fA,self.olxpath)
     #
     def getValFB(self):
         self.fB = self.valSum['FILEB']
@@ -1394,7 +1293,8 @@ class DataASPEN_ADX:
             raise Exception ('\nADX: '+self.fadx +'\n\n'+'Path name of File B not found:\n'+self.valSum['FILEB'] +'\nor:\n'+self.fB)
         #
         self.fB_short = AppUtils.getShortNameFile(self.fB,27)
-        self.valSumB =  getValSum(self.fB,self.olxpath)
+        import ModelSummary # OLX header or sidecar summary, olxapi.dll only if none
+        self.valSumB =  ModelSummary.summary(self.fB,self.olxpath)
 
     #
     def run1CHANGEREC_txt(self,cr1):
@@ -1515,127 +1415,12 @@ class DataASPEN_ADX:
         if ftxt:
             self.fftxt = open(ftxt, "a+")
 
-        # get total CHANGEREC
-        source = open(self.fadx , 'rb')
-        contents = source.read()
-        total = contents.count(b'<CHANGEREC ')
-        source.close()
-        #
-        source = open(self.fadx , 'r',encoding=self.encoding,errors = 'ignore') #,errors = 'replace'
-        #
-        parser = CET.XMLParser(encoding=self.encoding)
-        # Start iterating over the Element Tree.
-        context = CET.iterparse(source, events=('start', 'end'), parser = parser)
-
-        # This is the output dict.
-        output = {}
-
-        # Keeping track of the depth and position to store data in.
-        current_position = []
-        current_index = []
-        #
-        flag = False
-        #
-        with tqdm(total=total,unit=' CHANGEREC',ncols = 80,position=0,desc = 'Processing') as pbar:
-            for event, elem in context:
-                if event == 'start' and elem.tag=='CHANGEREC':
-                    if output:
-                        self.run1CHANGEREC(output['CHANGEREC'])
-                        pbar.update(1)
-                        output = {}
-                    flag = True
-                #
-                elif event == 'end' and elem.tag=='OLXDIFF':
-                    if output:
-                        self.run1CHANGEREC(output['CHANGEREC'])
-                        pbar.update(1)
-                    break
-                #
-                if flag:
-                    if event == 'start':# Start of new tag.
-                        # Extract the current endpoint so add the new element to it.
-                        tmp = output
-                        for cp, ci in zip(current_position, current_index):
-                            tmp = tmp[cp]
-                            if ci:
-                                tmp = tmp[ci]
-
-                        this_tag_name = elem.tag
-                        # If it is a previously unseen tag, create a new key and
-                        # stick an empty dict there. Set index of this level to None.
-                        if this_tag_name not in tmp:
-                            tmp[this_tag_name] = {}
-                            current_index.append(None)
-                        else:
-                            # The tag name already exists. This means that we have to change
-                            # the value of this element's key to a list if this hasn't
-                            # been done already and add an empty dict to the end of that
-                            # list. If it already is a list, just add an new dict and update
-                            # the current index.
-                            if isinstance(tmp[this_tag_name], list):
-                                current_index.append(len(tmp[this_tag_name]))
-                                tmp[this_tag_name].append({})
-                            else:
-                                tmp[this_tag_name] = [tmp[this_tag_name], {}]
-                                current_index.append(1)
-                        # Set the position of the iteration to this element's tag name.
-                        current_position.append(this_tag_name)
-                    elif event == 'end': # End of a tag.
-                        # Extract the current endpoint's parent so we can handle
-                        # the endpoint's data by reference.
-                        tmp = output
-                        for cp, ci in zip(current_position[:-1], current_index[:-1]):
-                            tmp = tmp[cp]
-                            if ci:
-                                tmp = tmp[ci]
-                        cp = current_position[-1]
-                        ci = current_index[-1]
-                        # If this current endpoint is a dict in a list or not has
-                        # implications on how to set data.
-                        if ci:
-                            setfcn = lambda x: setitem(tmp[cp], ci, x)
-                            for attr_name, attr_value in elem.attrib.items():
-                                tmp[cp][ci]["@{0}".format(attr_name)] = attr_value
-                        else:
-                            setfcn = lambda x: setitem(tmp, cp, x)
-                            for attr_name, attr_value in elem.attrib.items():
-                                tmp[cp]["@{0}".format(attr_name)] = attr_value
-
-                        # If there is any text in the tag, add it here.
-                        if elem.text and elem.text.strip():
-                            setfcn({'#text': elem.text.strip()})
-
-                        # Handle special cases:
-                        # 1) when the tag only harbours text, replace the dict content with
-                        #    that very text string.
-                        # 2) when no text, attributes or children are present, content
-                        #    is set to None
-                        # These are detailed in reference [3] in README.
-                        if ci:
-                            nk = len(tmp[cp][ci].keys())
-                            if nk == 1 and "#text" in tmp[cp][ci]:
-                                tmp[cp][ci] = tmp[cp][ci]["#text"]
-                            elif nk == 0:
-                                tmp[cp][ci] = None
-                        else:
-                            nk = len(tmp[cp].keys())
-                            if nk == 1 and "#text" in tmp[cp]:
-                                tmp[cp] = tmp[cp]["#text"]
-                            elif nk == 0:
-                                tmp[cp] = None
-
-                        # Remove the outermost position and index, since we just finished
-                        # handling that element.
-                        current_position.pop()
-                        current_index.pop()
-
-                        # Most important of all, release the element's memory allocations
-                        # so we actually benefit from the iterative processing!
-                        elem.clear()
-                        # while elem.getprevious() is not None:
-                        #     del elem.getparent()[0]
-        #
-        source.close()
+        # CHANGEREC index (cached beside ADX file): O(1) total, one record parsed at a time
+        index = self.get_INDEX()
+        with tqdm(total=len(index),unit=' CHANGEREC',ncols = 80,position=0,desc = 'Processing') as pbar:
+            for cr1 in index.iterRecords():
+                self.run1CHANGEREC(cr1)
+                pbar.update(1)
         #
         self.export_dxtrecs()
         #
@@ -1645,192 +1430,18 @@ class DataASPEN_ADX:
         OlxAPI.UnloadOlxAPI()
 
 
-    def export2XML(self, fadx):
-        info_dict = {}
-        options = ['OLRVERSION','DATETIME','FILEA','FILEB',
-                   'COMP_BUSES', 'COMP_AREAZONES', 'COMP_GENS', 'COMP_LOADS', 'COMP_SHUNTS', 'COMP_SVDS',
-                   'COMP_LINES', 'COMP_SHIFTERS', 'COMP_XFMRS', 'COMP_BREAKERS', 'COMP_MUS', 'COMP_OCRLYS',
-                   'COMP_DSRLYS', 'COMP_SWITCHES', 'COMP_DCLINE2S', 'COMP_SCHEMES', 'COMP_DEVICES',
-                   'EXTENT', 'CORRELATE', 'TIES', 'AZRANGE', 'KVRANGE',
-                    'BOUNDARYID', 'TAGS', 'CHANGECOUNT']
-
-        for key in options:
-            try:
-                info_dict[key] = self.xmlDict['@'+key]
-            except:
-                if key == 'FILEA' or key == 'FILEB':
-                    info_dict[key] = ""
-                elif key == 'OLRVERSION':
-                    info_dict[key] = "15.5"
-                else:
-                    pass
-
-        s0 = ''
-        for key, value in info_dict.items():
-            s0 += '%s="%s" ' %(str(key),str(value))
-
-        s1 = ''
-        try:
-            changestat = self.xmlDict['CHANGESTAT']
-            for key, value in changestat.items():
-                s1 += '%s="%s" ' %(str(key[1:]),str(value))
-        except:
-            pass
-
-        xmlDict = self.xmlDict
-        fo = open(fadx, "w", encoding="utf-8")
-        fo.write("<?xml version='1.0'?>\n")
-        fo.write('<ASPENOLX>')
-        fo.write(sTab[1]+'<OLXDIFF %s>'%(s0))
-        fo.write(sTab[2] + '<CHANGESTAT %s/>'%(s1))
-        for changerec in xmlDict['CHANGEREC']:
-            olnet = changerec['OLNET']
-
-            s1 = '<CHANGEREC ACTION="%s" OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(changerec['@ACTION'],changerec['@OBJTYPE'],changerec['@OLNETID'], changerec['@OBJGUID'])
-            fo.write(sTab[2] +s1)
-            fo.write(sTab[3] +'<OLNET OBJTYPE="%s">'% changerec['@OBJTYPE'])
-            for olnetfield in olnet['OLNETFIELD']:
-                fo.write(sTab[4] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(olnetfield['@NAME'],olnetfield['@VALUE']))
-            fo.write(sTab[3] +'</OLNET>')
-            try:
-                objscope = changerec['OBJSCOPE']
-                fo.write(sTab[3] +'<OBJSCOPE>')
-                for scope in objscope['SCOPEFIELD']:
-                    fo.write(sTab[4] +'<SCOPEFIELD NAME="%s" VALUE="%s"/>'%(scope['@NAME'],scope['@VALUE']))
-                fo.write(sTab[3] +'</OBJSCOPE>')
-            except:
-                pass
-            try:
-                if type(changerec['CHANGEFIELD']) == dict:
-                    chf = changerec['CHANGEFIELD']
-                    if chf['@NAME'] == "BK_OBJLST1" or chf['@NAME'] == "BK_OBJLST2":
-                        if changerec['@ACTION'] == "MODIFY":
-                            fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s">'%(chf['@LABEL'],chf['@NAME']))
-                            OLRelements = chf['VALUEA']['OLNET']
-                            if OLRelements != None:
-                                fo.write(sTab[4] +'<VALUEA>')
-                                for elem in OLRelements:
-                                    typeOLR = elem['@OBJTYPE']
-                                    fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                    OBJLST1 = elem['OLNETFIELD']
-                                    for obj1 in  OBJLST1:
-                                         fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                    fo.write(sTab[5] +'</OLNET>')
-                                fo.write(sTab[4] +'</VALUEA>')
-                            else:
-                                fo.write(sTab[4] +'<VALUEA/>')
-
-                            OLRelements = chf['VALUEB']['OLNET']
-                            if OLRelements != None:
-                                fo.write(sTab[4] +'<VALUEB>')
-                                for elem in OLRelements:
-                                    typeOLR = elem['@OBJTYPE']
-                                    fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                    OBJLST2 = elem['OLNETFIELD']
-                                    for obj2 in  OBJLST2:
-                                         fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj2['@NAME'], obj2['@VALUE']))
-                                    fo.write(sTab[5] +'</OLNET>')
-                                fo.write(sTab[4] +'</VALUEB>')
-                            else:
-                                fo.write(sTab[4] +'<VALUEB/>')
-                            fo.write(sTab[3] +'</CHANGEFIELD>')
-                        elif changerec['@ACTION'] == "ADD":
-                            fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s">'%(chf['@LABEL'],chf['@NAME']))
-                            try:
-                                OLRelements = chf['VALUE']['OLNET']
-                                if OLRelements != None:
-                                    fo.write(sTab[4] +'<VALUE>')
-                                    for elem in OLRelements:
-                                        typeOLR = elem['@OBJTYPE']
-                                        fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                        OBJLST1 = elem['OLNETFIELD']
-                                        for obj1 in  OBJLST1:
-                                             fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                        fo.write(sTab[5] +'</OLNET>')
-                                    fo.write(sTab[4] +'</VALUE>')
-                            except:
-                                fo.write(sTab[4] +'<VALUE/>')
-                            fo.write(sTab[3] +'</CHANGEFIELD>')
-                    else:
-                        if changerec['@ACTION'] == "MODIFY":
-                            fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s" VALUEA="%s" VALUEB="%s"/>'%(chf['@LABEL'],chf['@NAME'],chf['@VALUEA'],chf['@VALUEB']))
-                        if changerec['@ACTION'] == "ADD":
-                            fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s" VALUE="%s"/>'%(chf['@LABEL'],chf['@NAME'],chf['@VALUE']))
-
-                elif type(changerec['CHANGEFIELD']) == list:
-                    for chf in changerec['CHANGEFIELD']:
-                        if chf['@NAME'] == "BK_OBJLST1" or chf['@NAME'] == "BK_OBJLST2":
-                            if changerec['@ACTION'] == "MODIFY":
-                                fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s">'%(chf['@LABEL'],chf['@NAME']))
-                                OLRelements = chf['VALUEA']['OLNET']
-                                if type(OLRelements) != list:
-                                    OLRelements = [chf['VALUEA']['OLNET']]
-                                if OLRelements != None:
-                                    fo.write(sTab[4] +'<VALUEA>')
-                                    for elem in OLRelements:
-                                        typeOLR = elem['@OBJTYPE']
-                                        fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                        OBJLST1 = elem['OLNETFIELD']
-                                        for obj1 in  OBJLST1:
-                                             fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                        fo.write(sTab[5] +'</OLNET>')
-                                    fo.write(sTab[4] +'</VALUEA>')
-                                else:
-                                    fo.write(sTab[4] +'<VALUEA/>')
-
-                                OLRelements = chf['VALUEB']['OLNET']
-                                if type(OLRelements) != list:
-                                    OLRelements = [chf['VALUEB']['OLNET']]
-                                if OLRelements != None:
-                                    fo.write(sTab[4] +'<VALUEB>')
-                                    for elem in OLRelements:
-                                        typeOLR = elem['@OBJTYPE']
-                                        fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                        OBJLST2 = elem['OLNETFIELD']
-                                        for obj2 in  OBJLST2:
-                                             fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj2['@NAME'], obj2['@VALUE']))
-                                        fo.write(sTab[5] +'</OLNET>')
-                                    fo.write(sTab[4] +'</VALUEB>')
-                                else:
-                                    fo.write(sTab[4] +'<VALUEB/>')
-                                fo.write(sTab[3] +'</CHANGEFIELD>')
-                            elif changerec['@ACTION'] == "ADD":
-                                fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s">'%(chf['@LABEL'],chf['@NAME']))
-                                try:
-                                    OLRelements = chf['VALUE']['OLNET']
-                                    if type(OLRelements) != list:
-                                        OLRelements = [chf['VALUE']['OLNET']]
-                                    if OLRelements != None:
-                                        fo.write(sTab[4] +'<VALUE>')
-                                        for elem in OLRelements:
-                                            typeOLR = elem['@OBJTYPE']
-                                            fo.write(sTab[5] +'<OLNET OBJTYPE="%s">'%typeOLR)
-                                            OBJLST1 = elem['OLNETFIELD']
-                                            for obj1 in  OBJLST1:
-                                                 fo.write(sTab[6] +'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'], obj1['@VALUE']))
-                                            fo.write(sTab[5] +'</OLNET>')
-                                        fo.write(sTab[4] +'</VALUE>')
-                                except:
-                                    fo.write(sTab[4] +'<VALUE/>')
-                                fo.write(sTab[3] +'</CHANGEFIELD>')
-                        else:
-                            if changerec['@ACTION'] == "MODIFY":
-                                fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s" VALUEA="%s" VALUEB="%s"/>'%(chf['@LABEL'],chf['@NAME'],chf['@VALUEA'],chf['@VALUEB']))
-                            if changerec['@ACTION'] == "ADD":
-                                fo.write(sTab[3] +'<CHANGEFIELD LABEL="%s" NAME="%s" VALUE="%s"/>'%(chf['@LABEL'],chf['@NAME'],chf['@VALUE']))
-            except:
-                pass
-
-            fo.write(sTab[2]+'</CHANGEREC>')
-
-        fo.write(sTab[1]+'</OLXDIFF>')
-        fo.write('\n</ASPENOLX>')
-        fo.close()
-
-        return fo
-
+    def export2XML(self, fadx, gz=None):
+        """
+        Export CHANGEREC to ADX file (fadx.gz: gzip), records streamed by OlxWriter
+        """
+        import OlxWriter
+        if self.xmlDict == None:
+            self.getAll_CHANGEREC()
+        wr = OlxWriter.ADX_WRITER(fadx,self.xmlDict,self.xmlDict.get('CHANGESTAT'),gz=gz)
+        for changerec in self.xmlDict['CHANGEREC']:
+            wr.writeChangeRec(changerec)
+        return wr.close()
 
-    #
     def get_CHANGESTAT(self, action = None, objtype = None):
         """
         Get statistic of changes for object and action
@@ -1857,27 +1468,51 @@ class DataASPEN_ADX:
         dictACTION = {'ADD':'ADD','DELETE':'DEL','MODIFY':'MOD'}
 
         if self.xmlDict == None:
-            self.getAll_CHANGEREC()
-
+            # header from CHANGEREC index, ADX not loaded
+            xmlDict = self.get_INDEX().header
+        else:
+            xmlDict = self.xmlDict
 
         if  objtype in OBJTYPELIST:
             if action in ACTION_ADX:
-                return self.xmlDict['CHANGESTAT']['@{}_{}'.format(dictACTION[action], objtype)]
+                return xmlDict['CHANGESTAT']['@{}_{}'.format(dictACTION[action], objtype)]
             elif action == None:
-                add = self.xmlDict['CHANGESTAT']['@ADD_{}'.format(objtype)]
-                modify = self.xmlDict['CHANGESTAT']['@MOD_{}'.format(objtype)]
-                delete = self.xmlDict['CHANGESTAT']['@DEL_{}'.format(objtype)]
+                add = xmlDict['CHANGESTAT']['@ADD_{}'.format(objtype)]
+                modify = xmlDict['CHANGESTAT']['@MOD_{}'.format(objtype)]
+                delete = xmlDict['CHANGESTAT']['@DEL_{}'.format(objtype)]
                 return {'OBJTYPE': objtype, 'CHANGECOUNT' :{'ADD':add, 'MOD':modify, 'DEL': delete}}
             else:
                 raise Exception(" Action must be in {} and  object type in {}".format(ACTION_ADX, OBJTYPELIST))
         else:
-            return self.xmlDict['CHANGESTAT']
+            return xmlDict['CHANGESTAT']
+
 
+    def get_DIFF_MODEL(self, olrmodel = None):
+        """
+        Get OLX DIFF MODEL in columnar form (OlxDiffModel.OLX_DIFF_MODEL),
+        object types are parsed on demand from the CHANGEREC index
+        """
+        import OlxDiffModel
+        return OlxDiffModel.OLX_DIFF_MODEL(self, olrmodel)
 
     def get_OLX_DIFF_MODEL(self, olrmodel = None):
         """
         Get OLX DIFF MODEL
 
+        Returns
+        -------
+        olx_diff_model : dict
+            Dictionary of differences File A/ File B from ADX file.
+
+        """
+        if self.xmlDict != None: # CHANGEREC already in memory
+            return self.get_OLX_DIFF_MODEL_1(olrmodel)
+        return self.get_DIFF_MODEL(olrmodel).toDict()
+
+    def get_OLX_DIFF_MODEL_1(self, olrmodel = None):
+        """
+        Get OLX DIFF MODEL
+
         Returns
         -------
         olx_diff_model : dict
@@ -2082,6 +1717,8 @@ class DataASPEN_ADX:
         #
         # data list
         #     one value :  .OLNET, .CHANGEFIELD
+        if self.xmlDict == None:
+            self.getAll_CHANGEREC()
 
         row = len(self.xmlDict['CHANGEREC'])
         result = [True] * row
@@ -2109,9 +1746,9 @@ class DataASPEN_ADX:
             return result
 
         if not checkrange:
-            arearange, zonerange, kvrange, BNOrange, CKTIDrange, checkrange =  get_filter_range(area, zone, kv, BNO, ckid)
+            arearange, zonerange, kvrange, BNOrange, CKTIDrange, checkrange =  get_filter_range(area, zone, kv, BNO, ckid, compiled=True)
         else:
-            arearange, zonerange, kvrange, BNOrange, CKTIDrange, _ =  get_filter_range(area, zone, kv, BNO, ckid)
+            arearange, zonerange, kvrange, BNOrange, CKTIDrange, _ =  get_filter_range(area, zone, kv, BNO, ckid, compiled=True)
 
 
         result = []
@@ -2176,23 +1813,23 @@ class DataASPEN_ADX:
                     else:
                         BNOfilter = True
 
-                if kvrange == []:
+                if not kvrange:
                     KVfilter = True
                 else:
                     KVfilter = min(kvmax)
 
-                if BNOrange == []:
+                if not BNOrange:
                     BNOfilter = True
                 else:
                     BNOfilter = max(bno)
 
-                if CKTIDrange ==[]:
+                if not CKTIDrange:
                     CKTIDfilter = True
                 else:
                     if len(cktid) > 0:
                         CKTIDfilter = max(cktid)
 
-                if arearange ==[]:
+                if not arearange:
                     ARfilter = True
                 else:
                     if tie:
@@ -2206,7 +1843,7 @@ class DataASPEN_ADX:
                         else:
                             ARfilter = False
 
-                if zonerange ==[]:
+                if not zonerange:
                     ZNfilter = True
                 else:
                     if tie:
@@ -2244,15 +1881,32 @@ class DataASPEN_CIMREF:
     read ASPEN ASPENCIMREF file
     """
     def __init__(self, fREF, encoding = 'utf-8'):
-        # self.fREF = fREF
+        self.fREF = fREF
+        self.encoding = encoding
+        self.cimrefIndex = None
+        self.dictRef = None # parsed by get_CIMREF_1 only
+
+    def get_INDEX(self, rebuild = False):
+        """
+        GUID <=> mRID hash index of CIMREF (CimRefIndex.CIMREF_INDEX, memory-mapped from <fREF>.idx)
+        """
+        if self.cimrefIndex is None or rebuild:
+            import CimRefIndex
+            self.cimrefIndex = CimRefIndex.CIMREF_INDEX(self.fREF, encoding = self.encoding, rebuild = rebuild)
+        return self.cimrefIndex
+
+    def get_CIMREF(self):
         try:
-            self.dictRef = xml2Dict(fREF, desc= 'Parsing ASPEN CIMREF', encoding = encoding)['ASPENCIMREF']
+            return self.get_INDEX().toDict(OBJTYPELIST)
         except:
-            self.dictRef = None
+            return None
 
-    def get_CIMREF(self):
+    def get_CIMREF_1(self):
         if self.dictRef == None:
-            return None
+            try:
+                self.dictRef = xml2Dict(self.fREF, desc= 'Parsing ASPEN CIMREF', encoding = self.encoding)['ASPENCIMREF']
+            except:
+                return None
 
         refdbtables = self.dictRef['REFDBTABLE']
         self.data_cimref = dict()
@@ -2312,7 +1966,16 @@ class DataASPEN_CIMREF:
 
         return self.data_cimref
 
-def get_filter_range(area, zone, kv, BNO, ckid):
+def get_filter_range(area, zone, kv, BNO, ckid, compiled=False):
+    """
+    filter ranges from specs ['1-10',20,...]
+    compiled=True: area/zone/BNO as OlxFilter.INTERVAL_SET (no expansion of ranges, bisect lookup)
+                   and CKTID as set
+    """
+    if compiled:
+        import OlxFilter
+        _, _, kvrange, _, _, checkrangeKV = get_filter_range(None, None, kv, None, None)
+        return OlxFilter.INTERVAL_SET(area), OlxFilter.INTERVAL_SET(zone), kvrange, OlxFilter.INTERVAL_SET(BNO), set(ckid or []), checkrangeKV
 
     arearange = []
     if (area != None) and (area != []) :
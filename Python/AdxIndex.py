@@ -0,0 +1,265 @@
+"""
+Purpose: Byte-offset index of CHANGEREC in ASPEN ADX (OLX DIFF) files
+
+    One streaming scan of the ADX file records for each CHANGEREC:
+        byte offset, length, ACTION, OBJTYPE, OBJGUID, OLNETID, AREA/ZONE of OBJSCOPE
+    plus the OLXDIFF/CHANGESTAT header. The index is cached beside the ADX file (<fadx>.idx.npz)
+    and rebuilt when the size/time of the ADX file changes.
+
+    Counts are O(1) (table of ACTION x OBJTYPE), records are read by random access and only
+    the selected records are parsed (same dict format as ASPENLib.xml2Dict).
+
+    samples:
+        idx = AdxIndex.ADX_INDEX('diff.ADX')
+        n = len(idx)
+        n = idx.count(action='MODIFY',objtype='LINE')
+        for cr1 in idx.iterRecords(action=['ADD','DELETE'],objtype='BUS',area=[1,2]):
+            ...
+        cr1 = idx.record(10)                            # 11th CHANGEREC
+        for sel in idx.chunks(4):                       # parallel chunked processing
+            pool.apply_async(fun,(idx.fadx,sel))
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,re,json
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import unescape
+import numpy as np
+from OlxReader import elem2Dict
+
+ACTIONS = ['ADD','DELETE','MODIFY']
+NSCOPE = 4          # max terminals kept for AREA/ZONE
+CHUNK = 1<<23       # bytes read per scan step
+#
+__ATTR__ = re.compile(rb'([\w:.-]+)\s*=\s*"([^"]*)"')
+__SCOPE__ = re.compile(rb'<SCOPEFIELD\s[^>]*>')
+__UNESCAPE__ = {'&quot;':'"','&apos;':"'"}
+#
+class ADX_INDEX:
+    """
+    CHANGEREC index of one ADX file
+
+        .fadx      : ADX file
+        .header    : attributes of OLXDIFF ('@' keys) and CHANGESTAT (dict) as ASPENLib.xml2Dict
+        .offset    : int64 array, byte offset of each CHANGEREC
+        .length    : int32 array, byte length of each CHANGEREC
+        .action    : int8 array, index in ACTIONS (-1: other)
+        .objtype   : int16 array, index in .types
+        .guid      : str array OBJGUID
+        .olnetid   : str array OLNETID
+        .area,.zone: int32 array n x NSCOPE (-1: none)
+    """
+    def __init__(self,fadx,encoding='utf-8',rebuild=False,save=True):
+        self.fadx = fadx
+        self.encoding = encoding
+        self.fidx = fadx+'.idx.npz'
+        sig = signature(fadx)
+        if not rebuild and self.__load__(sig):
+            return
+        self.__scan__()
+        self.signature = sig
+        if save:
+            try:
+                self.__save__()
+            except OSError: # read-only folder: index kept in memory only
+                pass
+    #
+    def __len__(self):
+        return len(self.offset)
+    #
+    def __scan__(self):
+        """ one streaming pass over the ADX file """
+        offset,length,action,objtype,guid,olnetid,area,zone = [],[],[],[],[],[],[],[]
+        types,counts,header = {},{},None
+        with open(self.fadx,'rb') as f:
+            buf,base = b'',0   # base: file offset of buf[0]
+            while True:
+                chunk = f.read(CHUNK)
+                buf += chunk
+                pos = 0
+                while True:
+                    s = __findTag__(buf,b'<CHANGEREC',pos)
+                    if s<0:
+                        break
+                    if header is None:
+                        header = __header__(buf[:s])
+                    gt = buf.find(b'>',s)
+                    if gt<0:
+                        break
+                    if buf[gt-1:gt]==b'/':
+                        e = gt+1
+                    else:
+                        e = buf.find(b'</CHANGEREC>',gt)
+                        if e<0:
+                            break
+                        e += 12
+                    a1 = dict(__ATTR__.findall(buf[s+10:gt]))
+                    act = a1.get(b'ACTION',b'').decode()
+                    typ = a1.get(b'OBJTYPE',b'').decode()
+                    ar,zn = [-1]*NSCOPE,[-1]*NSCOPE
+                    ia = iz = 0
+                    for sf in __SCOPE__.findall(buf,gt,e):
+                        d1 = dict(__ATTR__.findall(sf))
+                        nm = d1.get(b'NAME')
+                        if nm==b'AREA' and ia<NSCOPE:
+                            ar[ia] = int(d1[b'VALUE'])
+                            ia += 1
+                        elif nm==b'ZONE' and iz<NSCOPE:
+                            zn[iz] = int(d1[b'VALUE'])
+                            iz += 1
+                    offset.append(base+s)
+                    length.append(e-s)
+                    action.append(ACTIONS.index(act) if act in ACTIONS else -1)
+                    objtype.append(types.setdefault(typ,len(types)))
+                    guid.append(a1.get(b'OBJGUID',b'').decode(self.encoding,'ignore'))
+                    olnetid.append(unescape(a1.get(b'OLNETID',b'').decode(self.encoding,'ignore'),__UNESCAPE__))
+                    area.append(ar)
+                    zone.append(zn)
+                    k1 = '%s/%s'%(act,typ)
+                    counts[k1] = counts.get(k1,0)+1
+                    pos = e
+                if not chunk:
+                    break
+                # keep the unfinished record (or the end of buffer for a split tag)
+                keep = s if s>=0 else max(pos,len(buf)-16)
+                if header is None:
+                    keep = 0
+                base += keep
+                buf = buf[keep:]
+        if header is None:
+            header = __header__(buf)
+        self.header = header
+        self.types = list(types.keys())
+        self.counts = counts
+        self.offset = np.array(offset,dtype=np.int64)
+        self.length = np.array(length,dtype=np.int32)
+        self.action = np.array(action,dtype=np.int8)
+        self.objtype = np.array(objtype,dtype=np.int16)
+        self.guid = np.array(guid,dtype=str)
+        self.olnetid = np.array(olnetid,dtype=str)
+        self.area = np.array(area,dtype=np.int32).reshape(-1,NSCOPE)
+        self.zone = np.array(zone,dtype=np.int32).reshape(-1,NSCOPE)
+    #
+    def __save__(self):
+        meta = {'version':__version__,'signature':self.signature,'types':self.types,'counts':self.counts,'header':self.header}
+        tmp = self.fidx+'.tmp.npz'
+        np.savez(tmp,meta=np.array(json.dumps(meta)),offset=self.offset,length=self.length,action=self.action,\
+                 objtype=self.objtype,guid=self.guid,olnetid=self.olnetid,area=self.area,zone=self.zone)
+        os.replace(tmp,self.fidx)
+    #
+    def __load__(self,sig):
+        if not os.path.isfile(self.fidx):
+            return False
+        try:
+            with np.load(self.fidx,allow_pickle=False) as z:
+                meta = json.loads(str(z['meta']))
+                if meta['version']!=__version__ or meta['signature']!=sig:
+                    return False
+                for k in ['offset','length','action','objtype','guid','olnetid','area','zone']:
+                    setattr(self,k,z[k])
+        except Exception:
+            return False
+        self.signature = sig
+        self.types = meta['types']
+        self.counts = meta['counts']
+        self.header = meta['header']
+        return True
+    #
+    def count(self,action=None,objtype=None):
+        """ number of CHANGEREC for action(s)/objtype(s) (None: all) """
+        acts,typs = __asSet__(action),__asSet__(objtype)
+        n = 0
+        for k1,v in self.counts.items():
+            a,t = k1.split('/',1)
+            if (acts is None or a in acts) and (typs is None or t in typs):
+                n += v
+        return n
+    #
+    def select(self,action=None,objtype=None,area=None,zone=None):
+        """ index array of CHANGEREC (file order) for action(s)/objtype(s)/area(s)/zone(s) (None: all) """
+        ok = np.ones(len(self),dtype=bool)
+        acts,typs = __asSet__(action),__asSet__(objtype)
+        if acts is not None:
+            ok &= np.isin(self.action,[ACTIONS.index(a) for a in acts if a in ACTIONS])
+        if typs is not None:
+            ok &= np.isin(self.objtype,[self.types.index(t) for t in typs if t in self.types])
+        if area is not None:
+            ok &= np.isin(self.area,list(__asSet__(area))).any(axis=1)
+        if zone is not None:
+            ok &= np.isin(self.zone,list(__asSet__(zone))).any(axis=1)
+        return np.flatnonzero(ok)
+    #
+    def raw(self,i,f=None):
+        """ bytes of CHANGEREC i """
+        if f is None:
+            with open(self.fadx,'rb') as f:
+                return self.raw(i,f)
+        f.seek(int(self.offset[i]))
+        return f.read(int(self.length[i]))
+    #
+    def parse(self,b):
+        """ bytes of one CHANGEREC => dict (ASPENLib.xml2Dict format) """
+        return elem2Dict(ET.fromstring(b.decode(self.encoding,'ignore')))
+    #
+    def record(self,i):
+        """ CHANGEREC i as dict """
+        return self.parse(self.raw(i))
+    #
+    def iterRecords(self,sel=None,action=None,objtype=None,area=None,zone=None):
+        """ yield CHANGEREC dict of sel (index array) or of select(action,objtype,area,zone), in file order """
+        if sel is None:
+            sel = self.select(action,objtype,area,zone)
+        with open(self.fadx,'rb') as f:
+            for i in sel:
+                yield self.parse(self.raw(i,f))
+    #
+    def chunks(self,nChunk,sel=None):
+        """ split sel (default: all) in nChunk contiguous index arrays of about the same byte size """
+        if sel is None:
+            sel = np.arange(len(self))
+        sel = np.asarray(sel)
+        if len(sel)==0:
+            return []
+        cum = np.cumsum(self.length[sel].astype(np.int64))
+        cut = np.searchsorted(cum,cum[-1]*np.arange(1,nChunk)/nChunk)
+        return [c for c in np.split(sel,cut) if len(c)]
+#
+def signature(fadx):
+    """ size and modification time of the file """
+    st = os.stat(fadx)
+    return [st.st_size,st.st_mtime_ns]
+#
+def __findTag__(buf,tag,pos):
+    """ position of tag (not a longer tag name) in buf from pos, -1 if not found """
+    while True:
+        s = buf.find(tag,pos)
+        if s<0 or s+len(tag)>=len(buf):
+            return -1
+        if buf[s+len(tag):s+len(tag)+1] in (b' ',b'\t',b'\r',b'\n',b'>',b'/'):
+            return s
+        pos = s+1
+#
+def __header__(b):
+    """ OLXDIFF/CHANGESTAT attributes from the bytes before the first CHANGEREC """
+    res = {}
+    m = re.search(rb'<OLXDIFF\s([^>]*)>',b)
+    if m:
+        for k,v in __ATTR__.findall(m.group(1)):
+            res['@'+k.decode()] = unescape(v.decode('utf-8','ignore'),__UNESCAPE__)
+    m = re.search(rb'<CHANGESTAT\s([^>]*?)/?>',b)
+    if m:
+        res['CHANGESTAT'] = {'@'+k.decode():v.decode() for k,v in __ATTR__.findall(m.group(1))}
+    return res
+#
+def __asSet__(v):
+    if v is None:
+        return None
+    if type(v) in (str,int):
+        return {v}
+    return set(v)
@@ -10,7 +10,7 @@ __category__  = "Common"
 __pyManager__ = "no"
 __email__     = "support@aspeninc.com"
 __status__    = "Realease"
-__version__   = "2.1.8"
+__version__   = "2.2.0"
 
 import logging
 import traceback
@@ -400,6 +400,21 @@ def read_File_csv(fileName, delim):
             res.append(row)
     return res
 #
+def read_File_csv_chunk(fileName, delim, chunk=1000):
+    """
+    read file csv by chunk of rows (generator of arrays of chunk rows)
+    """
+    with open(fileName, mode= 'r') as f:
+        reader = csv.reader(f, delimiter=delim)
+        res = []
+        for row in reader:
+            res.append(row)
+            if len(res)>=chunk:
+                yield res
+                res = []
+        if res:
+            yield res
+#
 def deleteFile(sfile):
     try:
         if os.path.isfile(sfile):
@@ -1016,45 +1031,59 @@ class TraceThread(threading.Thread):
 class ToolCSVExcell:
     """
     tool read excel csv using openpyxl
+        readOnly=True: rows streamed by iterRows (openpyxl read-only mode, CSV read by chunk)
+                       getVal: rows of the sheet read once up to the row asked, then kept
+                       Excel opened with data_only=True: cells with a formula give the value cached
+                       by Excel at the last save (None if never computed), not the formula
+                       call close() to release the file (read-only workbook kept open until then)
+        save2Excel   : openpyxl write-only mode (ToolExcelWriter)
     """
     def __init__(self):
         #
         self.guiErr = True
+        self.readOnly = False
     #
     def setguiErr(self,guiErr):
         self.guiErr = guiErr
 
     #
-    def readFile(self,fi,delim):
+    def readFile(self,fi,delim,readOnly=False):
         fi = correctNameFile(fi)
         ck = checkFileType(fi=fi,ext=[".CSV",".XLSX",".XLSM"],err=True,sTitle0="Openning Excel/CSV file")
         #
         if ck==0:
-            self.readFile_csv(fi,delim)
+            self.readFile_csv(fi,delim,readOnly)
         else:
-            self.readFile_EXCEL(fi)
+            self.readFile_EXCEL(fi,readOnly)
     #
-    def readFile_csv(self,fi,delim):
+    def readFile_csv(self,fi,delim,readOnly=False):
         self.isExcel =  False
         fi = correctNameFile(fi)
         #read file CSV
         checkFileType(fi=fi,ext=[".CSV"],err=True,sTitle0="Openning CSV file")
         #
         self.fi = fi
-        self.ws = read_File_csv(fileName=fi, delim=delim)
+        self.delim = delim
+        self.readOnly = readOnly
+        self.ws = None if readOnly else read_File_csv(fileName=fi, delim=delim) # readOnly: read by iterRows
         self.flag = 0
         self.currentSheet = None
 
     # read file EXCEL
-    def readFile_EXCEL(self,fi):
+    def readFile_EXCEL(self,fi,readOnly=False):
         from openpyxl import load_workbook
         fi = correctNameFile(fi)
         self.isExcel =  True
         checkFileType(fi=fi,ext=['.XLSX','.XLS','.XLSM'],err=True,sTitle0="Openning Excel file")
         #
         self.fi = fi
+        self.readOnly = readOnly
+        self.__rowsRO__ = {} # readOnly: sheet => [rows read,row iterator]
         #
-        self.wb = load_workbook(fi)
+        if readOnly:
+            self.wb = load_workbook(fi,read_only=True,data_only=True)
+        else:
+            self.wb = load_workbook(fi)
         self.ws = self.wb.active
         self.currentSheet = self.ws.title
         self.flag = 1
@@ -1062,6 +1091,12 @@ class ToolCSVExcell:
         return
 
     def close(self):
+        # read-only: row iterators partly read keep the file open
+        # (rows already read are kept: getVal of these rows after close, e.g. error messages)
+        for ra in getattr(self,'__rowsRO__',{}).values():
+            if ra[1] is not None:
+                ra[1].close()
+                ra[1] = None
         try:
             self.wb.close()
         except:
@@ -1069,14 +1104,55 @@ class ToolCSVExcell:
     #
     def getVal(self,row,column):
         if self.flag == 0: # CSV file
+            if self.ws is None:
+                self.ws = read_File_csv(fileName=self.fi, delim=self.delim)
             try:
                 return self.ws[row-1][column-1]
             except:
                 return None
         #
         if self.flag == 1: # openpyxl
+            if self.readOnly:
+                return self.__cellRO__(row,column)
             return self.ws.cell(row, column).value
     #
+    def __cellRO__(self,row,column):
+        # read-only sheet: no random access, rows read in order and kept
+        try:
+            ra = self.__rowsRO__[self.currentSheet]
+        except KeyError:
+            ra = self.__rowsRO__[self.currentSheet] = [[],self.ws.iter_rows(values_only=True)]
+        rows = ra[0]
+        while len(rows)<row and ra[1] is not None:
+            try:
+                rows.append(next(ra[1]))
+            except StopIteration:
+                ra[1] = None
+        try:
+            return rows[row-1][column-1] if row>0 and column>0 else None
+        except IndexError:
+            return None
+    #
+    def iterRows(self,minRow=1,maxCol=None,typed=False,chunk=1000):
+        """
+        rows of the current sheet from row minRow (generator of arrays)
+            maxCol: number of columns (None: all)
+            typed : values converted to int/float if possible (getValNumber)
+            chunk : number of rows read at once (CSV)
+        """
+        import itertools
+        if self.flag==0:
+            if self.ws is not None:
+                rows = itertools.islice(self.ws,minRow-1,None)
+            else:
+                rows = itertools.islice(itertools.chain.from_iterable(read_File_csv_chunk(self.fi,self.delim,chunk)),minRow-1,None)
+        else:
+            rows = self.ws.iter_rows(min_row=minRow,max_col=maxCol,values_only=True)
+        #
+        for r1 in rows:
+            r1 = list(r1) if maxCol is None else list(r1[:maxCol])
+            yield getValNumber(r1) if typed else r1
+    #
     def selectSheet(self,nameSheet):
         if self.currentSheet == nameSheet:
             return
@@ -1125,6 +1201,19 @@ class ToolCSVExcell:
         return res
     #
     def save2Excel(self,nameFileExcel,ares,nameSheet):
+        """
+        ares[i]: rows (array or generator) of sheet nameSheet[i], write-only (constant memory)
+        """
+        w = ToolExcelWriter(nameFileExcel)
+        for i in range(len(ares)):
+            try:
+                w.addSheet(nameSheet[i])
+            except:
+                w.addSheet()
+            w.appendRows(ares[i])
+        w.close()
+    #
+    def save2Excel_1(self,nameFileExcel,ares,nameSheet):
         from openpyxl import Workbook
         wb = Workbook()
         ws = wb.active
@@ -1149,6 +1238,135 @@ class ToolCSVExcell:
         #
         wb.close()
 #
+class ToolExcelWriter:
+    """
+    write Excel file using openpyxl write-only mode: rows appended sheet by sheet, constant memory
+        w = ToolExcelWriter(fo)
+        w.addSheet('result')
+        w.append(row)               # w.appendRows(rows): array or generator of rows
+        w.appendColumns([c1,c2])    # columnar bulk write (arrays or numpy arrays of same length)
+        w.close()
+    """
+    def __init__(self,nameFileExcel):
+        from openpyxl import Workbook
+        self.fo = nameFileExcel
+        self.wb = Workbook(write_only=True)
+        self.ws = None
+        self.nRow = 0
+    #
+    def addSheet(self,nameSheet=None):
+        try:
+            self.ws = self.wb.create_sheet(nameSheet)
+        except:
+            self.ws = self.wb.create_sheet()
+    #
+    def append(self,row,typed=True):
+        """ typed: values converted to int/float if possible (getValNumber) """
+        if self.ws is None:
+            self.addSheet()
+        self.ws.append(getValNumber(row) if typed else row)
+        self.nRow += 1
+    #
+    def appendRows(self,rows,typed=True):
+        for r1 in rows:
+            self.append(r1,typed)
+    #
+    def appendColumns(self,cols,typed=False):
+        """ cols: columns of values, written row by row (numpy arrays converted once) """
+        cols = [c.tolist() if hasattr(c,'tolist') else c for c in cols]
+        if self.ws is None:
+            self.addSheet()
+        ws = self.ws
+        if typed:
+            for r1 in zip(*cols):
+                ws.append(getValNumber(r1))
+                self.nRow += 1
+        else:
+            n = self.nRow
+            for r1 in zip(*cols):
+                ws.append(r1)
+                n += 1
+            self.nRow = n
+    #
+    def close(self):
+        if not self.wb.sheetnames:
+            self.addSheet()
+        self.wb.save(self.fo)
+        self.wb.close()
+#
+def __measure__(fn,mem):
+    """ (time s, peak memory MB (tracemalloc, 0 if not mem)) of fn() """
+    import tracemalloc
+    t0 = time.time()
+    fn()
+    t = time.time()-t0
+    peak = 0.0
+    if mem:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]/1e6
+        tracemalloc.stop()
+    return t,peak
+#
+def benchmarkExcel(nRow=100000,nCol=17,mem=True,prt=True):
+    """
+    write/read a generated result sheet of nRow x nCol: full mode (save2Excel_1, load_workbook+getValRowf,
+    read_File_csv) compared with streaming (save2Excel, readOnly+iterRows, read_File_csv_chunk)
+    returns {case:(time s,rows/s,peak MB)}
+    """
+    import shutil
+    tmp = tempfile.mkdtemp()
+    try:
+        def rows():
+            for i in range(nRow):
+                yield [i+1,'RG%i'%(i%500),'R%i'%i]+[round((i*7+j*13)%1000*0.37,1) for j in range(nCol-3)]
+        fx1,fx2,fc = [os.path.join(tmp,f) for f in ['full.xlsx','stream.xlsx','res.csv']]
+        tool = ToolCSVExcell()
+        def readFull():
+            t = ToolCSVExcell()
+            t.readFile(fx1,',')
+            for i in range(1,nRow+1):
+                t.getValRowf(i,1,nCol)
+            t.close()
+        def readStream():
+            t = ToolCSVExcell()
+            t.readFile(fx2,',',readOnly=True)
+            for r1 in t.iterRows(maxCol=nCol):
+                pass
+            t.close()
+        def readCsvChunk():
+            for ch in read_File_csv_chunk(fc,','):
+                for r1 in ch:
+                    getValNumber(r1)
+        def readCsv():
+            for r1 in read_File_csv(fc,','):
+                getValNumber(r1)
+        def writeColumns():
+            w = ToolExcelWriter(fx2)
+            w.addSheet('result')
+            w.appendColumns(cols)
+            w.close()
+        save2CSV(fc,rows(),',')
+        cols = [list(c) for c in zip(*rows())]
+        cases = [('write full',lambda:tool.save2Excel_1(fx1,[list(rows())],['result'])),
+                 ('write stream',lambda:tool.save2Excel(fx2,[rows()],['result'])),
+                 ('write columns',writeColumns),
+                 ('read full',readFull),
+                 ('read stream',readStream),
+                 ('csv read',readCsv),
+                 ('csv read chunk',readCsvChunk)]
+        res = {}
+        for name,fn in cases:
+            t,peak = __measure__(fn,mem)
+            res[name] = (t,nRow/t if t>0 else 0.0,peak)
+        if prt:
+            print('benchmarkExcel: %i rows x %i columns'%(nRow,nCol))
+            for name,(t,rs,peak) in res.items():
+                print('    %-15s %8.2fs %10.0f rows/s  peak %8.1f MB'%(name,t,rs,peak))
+        return res
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
+#
 class WIN_REGISTRY:
     def __init__(self,path,keyUser,nmax):
         #
@@ -53,10 +53,11 @@ import xml.etree.ElementTree as ET
 
 
 # CORE--------------------------------------------------------------------------
-def getStrBus(ws,i):
-    nBusNumber = int  (ws.getVal(row=i, column=1))
-    sBusName   = str  (ws.getVal(row=i, column=2))
-    dBusKv     = float(ws.getVal(row=i, column=3))
+def getStrBus(va):
+    # va: row of the template (Bus number, Bus name, kV,...)
+    nBusNumber = int  (va[0])
+    sBusName   = str  (va[1])
+    dBusKv     = float(va[2])
 
     #
     b1 = OLCase.findOBJ('BUS',[sBusName,dBusKv])
@@ -88,19 +89,20 @@ def run():
     ARGVS.fo = AppUtils.get_file_out(fo=ARGVS.fo , fi=OLCase.olrFile , subf='' , ad='' , ext='.csv')
     #
     ws = AppUtils.ToolCSVExcell()
-    ws.readFile(fi=ARGVS.ft, delim=',')
-    ws2 = AppUtils.ToolCSVExcell()
-    ws2.readFile(fi=ARGVS.ft, delim=',')
+    ws.readFile(fi=ARGVS.ft, delim=',', readOnly=True) # rows streamed
+    rows = ws.iterRows(minRow=6,maxCol=12)
+    sHeader = str((list(next(rows,[]))+[None]*4)[3]) # row 6 column 4
     #
     nSuccess = 0
     #
-    for i in range(7,10000):
-        if ws.getVal(row=i, column=1)==None:
+    for i,va in enumerate(rows,7):
+        va = va+[None]*(12-len(va))
+        if i>=10000 or va[0]==None:
             break
         #
-        sbus = getStrBus(ws,i)
+        sbus = getStrBus(va)
         if sbus:
-            if str(ws.getVal(row=6, column=4)) =="Electrode config":     # standardYear = 2018
+            if sHeader =="Electrode config":     # standardYear = 2018
                 data = ET.Element('ARCFLASHCALCULATOR2018')
                 data.set('REPFILENAME',ARGVS.fo)  # fo
                 data.set('OUTFILETYPE','2') # csv file
@@ -110,22 +112,22 @@ def run():
                     data.set('APPENDREPORT','1')
                 #
                 data.set('SELECTEDOBJ',sbus) # bus
-                data.set('ELECTRODECFG',str(ws.getVal(row=i, column=4)))
-                data.set('BOXH'        ,str(ws.getVal(row=i, column=5)))
-                data.set('BOXW'        ,str(ws.getVal(row=i, column=6)))
-                data.set('BOXD'        ,str(ws.getVal(row=i, column=7)))
-                data.set('CONDUCTORGAP',str(ws.getVal(row=i, column=8)))
-                data.set('WORKDIST'    ,str(ws.getVal(row=i, column=9)))
-                data.set('BRKINTTIME'  ,str(ws.getVal(row=i, column=10)))
-                data.set('ARCDURATION' ,str(ws.getVal(row=i, column=11)))
-                if str(ws.getVal(row=i, column=11)) =="FUSE":
-                    data.set('FUSECURVE',str(ws.getVal(row=i, column=12)))
-                elif str(ws.getVal(row=i, column=11)) =="FIXED":
-                    data.set('ARCTIME' ,str(ws.getVal(row=i, column=12)))
-                elif str(ws.getVal(row=i, column=11)) =="FASTEST":
-                    data.set('DEVICETIERS',str(ws.getVal(row=i, column=12)))
+                data.set('ELECTRODECFG',str(va[3]))
+                data.set('BOXH'        ,str(va[4]))
+                data.set('BOXW'        ,str(va[5]))
+                data.set('BOXD'        ,str(va[6]))
+                data.set('CONDUCTORGAP',str(va[7]))
+                data.set('WORKDIST'    ,str(va[8]))
+                data.set('BRKINTTIME'  ,str(va[9]))
+                data.set('ARCDURATION' ,str(va[10]))
+                if str(va[10]) =="FUSE":
+                    data.set('FUSECURVE',str(va[11]))
+                elif str(va[10]) =="FIXED":
+                    data.set('ARCTIME' ,str(va[11]))
+                elif str(va[10]) =="FASTEST":
+                    data.set('DEVICETIERS',str(va[11]))
             #-------------------------------------------------------------------
-            elif str(ws.getVal(row=6, column=4)) =="Equipment Category": # standardYear = 2012
+            elif sHeader =="Equipment Category": # standardYear = 2012
                 raise Exception("Not yet support for standardYear = 2012")
                 #
             else:
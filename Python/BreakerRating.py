@@ -0,0 +1,347 @@
+"""
+Purpose: Sharded breaker duty rating runner with structured result parsing
+
+    Breakers (BREAKER objects) are partitioned by area/zone/kV of their bus into shards.
+    OlxAPI.DoBreakerRating runs once per shard (scope = selected buses of the shard),
+    optionally in worker processes, and the CSV report of each shard is parsed into
+    a typed table. Shard tables are merged in a deterministic order (breaker, bus).
+
+    All shard reports and a manifest (BreakerRating.json) are kept in the work folder:
+    a run that was interrupted is resumed by calling runBreakerRating again with the
+    same work folder, shards already done (same buses, same options) are not run again.
+
+    samples:
+        res = BreakerRating.runBreakerRating('SAMPLE30.OLR','c:/tmp/bkr',olxpath=olxpath,by=['AREA','KV'],nProcess=4)
+        for r in res.data[res.data['flag']>0]:
+            print(res.breaker(r),res.bus(r),r['intDuty'],r['momDuty'])
+        res.toCSV('c:/tmp/bkr/rating.csv')
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,time,csv,re,json,hashlib
+import numpy as np
+
+BKR_DTYPE = np.dtype([('shard'     ,'i4'), # index of shard in BKR_RESULT.shards
+                      ('breaker'   ,'i4'), # index in string table
+                      ('bus'       ,'i4'), # index in string table
+                      ('intCurrent','f8'), # interrupting duty current (A)
+                      ('intRating' ,'f8'), # interrupting rating (A)
+                      ('intDuty'   ,'f8'), # interrupting duty (%)
+                      ('momCurrent','f8'), # momentary duty current (A)
+                      ('momRating' ,'f8'), # momentary rating (A)
+                      ('momDuty'   ,'f8'), # momentary duty (%)
+                      ('flag'      ,'i1')])# FLAG_INT|FLAG_MOM|FLAG_REPORT
+FLAG_INT    = 1 # interrupting duty >= threshold
+FLAG_MOM    = 2 # momentary duty >= threshold
+FLAG_REPORT = 4 # flagged (overduty) in the report
+#
+# column of the CSV report (header, lower case) => field, first match is used
+# exact names of the ASPEN report first (as read by GenShare), then generic names
+REPORT_COLUMNS = [
+(r'^bus_no$'                                                        , 'busNo'),
+(r'^bus$'                                                           , 'bus'),
+(r'^m_duty_p$'                                                      , 'momDuty'),
+(r'^duty_p$'                                                        , 'intDuty'),
+(r'momentary.*(duty|%|percent)|(c&l|close.*latch).*(duty|%|percent)', 'momDuty'),
+(r'momentary.*rating|(c&l|close.*latch).*rating'                    , 'momRating'),
+(r'momentary|c&l|close.*latch'                                      , 'momCurrent'),
+(r'interrupt.*(duty|%|percent)|^duty|duty.*%'                       , 'intDuty'),
+(r'interrupt.*rating|^rating'                                       , 'intRating'),
+(r'interrupt|current'                                               , 'intCurrent'),
+(r'over.?duty|status|flag'                                          , 'flagText'),
+(r'breaker|^name|^id$'                                              , 'breaker'),
+(r'bus|location'                                                    , 'bus')]
+MANIFEST = 'BreakerRating.json'
+FIXTURE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)),'BreakerRating_ut_REF.csv')
+FIXTURE_REF = os.path.join(os.path.dirname(os.path.abspath(__file__)),'BreakerRating_ut_REF.json')
+#
+class BKR_RESULT:
+    """
+    Merged breaker rating results
+
+        .data    : structured array (BKR_DTYPE), sorted by (breaker,bus)
+        .strings : string table referenced by breaker/bus
+        .shards  : list of shard keys (str)
+        .errors  : {shard key: error message}
+        .timing  : {shard key: s} time of DoBreakerRating (0 if reused from a previous run)
+    """
+    def __init__(self):
+        self.data = np.zeros(0,dtype=BKR_DTYPE)
+        self.strings = ['']
+        self.shards = []
+        self.errors = {}
+        self.timing = {}
+    #
+    def breaker(self,r):
+        return self.strings[r['breaker']]
+    #
+    def bus(self,r):
+        return self.strings[r['bus']]
+    #
+    def toCSV(self,fcsv):
+        with open(fcsv,'w',newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['Shard','Breaker','Bus','IntCurrent(A)','IntRating(A)','IntDuty(%)',\
+                        'MomCurrent(A)','MomRating(A)','MomDuty(%)','Flag'])
+            for r in self.data:
+                w.writerow([self.shards[r['shard']],self.breaker(r),self.bus(r),float(r['intCurrent']),\
+                            float(r['intRating']),float(r['intDuty']),float(r['momCurrent']),\
+                            float(r['momRating']),float(r['momDuty']),int(r['flag'])])
+#
+def getShards(by=['AREA','ZONE','KV'],maxBus=0):
+    """
+    Partition buses with breakers of the opened OLR file (OlxObj) into shards
+
+    by     : list of 'AREA','ZONE','KV' (bus attributes of the shard key)
+    maxBus : >0: split shards with more than maxBus buses
+
+    return : {shard key: [bus GUID]} sorted by key
+    """
+    import OlxObj
+    attr = {'AREA':'AREANO','ZONE':'ZONENO','KV':'KV'}
+    shards,seen = {},set()
+    for bk in OlxObj.OLCase.BREAKER:
+        b1 = bk.BUS
+        g = b1.GUID
+        if g in seen:
+            continue
+        seen.add(g)
+        k = '_'.join(['%s%s'%(s1,__fmt__(b1.getData(attr[s1]))) for s1 in by]) or 'ALL'
+        shards.setdefault(k,[]).append(g)
+    res = {}
+    for k in sorted(shards.keys()):
+        la = sorted(shards[k])
+        if maxBus>0 and len(la)>maxBus:
+            for i in range(0,len(la),maxBus):
+                res['%s_%i'%(k,i//maxBus+1)] = la[i:i+maxBus]
+        else:
+            res[k] = la
+    return res
+#
+def __fmt__(v):
+    return ('%g'%v) if type(v)==float else str(v)
+#
+def runBreakerRating(olrFile,workDir,olxpath='',by=['AREA','ZONE','KV'],maxBus=0,standard=0,\
+                     threshold=100.0,outputOpt=1,optionalReport=0,configFile='',nProcess=1,verbose=False):
+    """
+    Run breaker rating per shard and merge the results
+
+    Parameters
+    ----------
+    olrFile : str
+        OLR file, opened read-only (in each worker process if nProcess>1).
+    workDir : str
+        Folder of shard reports and manifest. Use the same folder to resume an interrupted run.
+    by,maxBus : see getShards
+    standard : 0-ANSI/IEEE; 1-IEC
+    threshold,outputOpt,optionalReport,configFile : see OlxAPI.DoBreakerRating
+    nProcess : int
+        Number of worker processes. The calling script must be guarded by
+        if __name__ == '__main__' when nProcess>1.
+
+    Returns
+    -------
+    BKR_RESULT
+    """
+    import OlxObj
+    os.makedirs(workDir,exist_ok=True)
+    OlxObj.OLCase.open(olrFile,1,olxpath=olxpath)
+    shards = getShards(by,maxBus)
+    opt = [standard,threshold,outputOpt,optionalReport,os.path.abspath(configFile) if configFile else '']
+    #
+    fman = os.path.join(workDir,MANIFEST)
+    manifest = {}
+    if os.path.isfile(fman):
+        with open(fman,'r') as f:
+            manifest = json.load(f)
+    jobs = []
+    for i,(k,buses) in enumerate(shards.items()):
+        sig = __signature__(olrFile,buses,opt)
+        m1 = manifest.get(k)
+        fcsv = os.path.join(workDir,'%03i_%s.csv'%(i+1,re.sub(r'[^\w\.\-]','_',k)))
+        if m1 and m1.get('signature')==sig and m1.get('status')=='done' and os.path.isfile(m1['csv']):
+            if verbose:
+                print('Shard %s: reused'%k)
+            continue
+        jobs.append((k,buses,fcsv,sig))
+    #
+    if jobs:
+        if nProcess<=1:
+            for k,buses,fcsv,sig in jobs:
+                r1 = __runShard__(buses,fcsv,opt)
+                __updateManifest__(fman,manifest,k,fcsv,sig,r1,verbose)
+        else:
+            import multiprocessing
+            args = [(os.path.abspath(olrFile),olxpath,buses,fcsv,opt) for k,buses,fcsv,sig in jobs]
+            with multiprocessing.Pool(min(nProcess,len(jobs))) as pool:
+                # manifest is updated as soon as each shard is done
+                for j,r1 in pool.imap_unordered(__runShardProcess__,enumerate(args)):
+                    k,buses,fcsv,sig = jobs[j]
+                    __updateManifest__(fman,manifest,k,fcsv,sig,r1,verbose)
+    #
+    res = BKR_RESULT()
+    dictStr = {'':0}
+    arrays,jobKeys = [],set([j[0] for j in jobs])
+    for k in shards.keys():
+        m1 = manifest.get(k,{})
+        res.shards.append(k)
+        res.timing[k] = m1.get('time',0.0) if k in jobKeys else 0.0
+        if m1.get('status')!='done':
+            res.errors[k] = m1.get('error','not run')
+            continue
+        arrays.append(readRatingReport(m1['csv'],threshold,len(res.shards)-1,res.strings,dictStr))
+    data = np.concatenate(arrays) if arrays else np.zeros(0,dtype=BKR_DTYPE)
+    # deterministic order, independent of shards and workers
+    keyB = np.array([res.strings[i] for i in data['breaker']],dtype=object)
+    keyBus = np.array([res.strings[i] for i in data['bus']],dtype=object)
+    order = sorted(range(len(data)),key=lambda i:(keyB[i],keyBus[i],int(data['shard'][i])))
+    res.data = data[np.array(order,dtype=np.int64)]
+    return res
+#
+def __signature__(olrFile,buses,opt):
+    """ shard is reused only if input file, buses and options did not change """
+    h = hashlib.sha1()
+    st = os.stat(olrFile)
+    h.update(('%s|%i|%i'%(os.path.abspath(olrFile),st.st_size,int(st.st_mtime))).encode())
+    h.update('|'.join(buses).encode())
+    h.update(str(opt).encode())
+    return h.hexdigest()
+#
+def __updateManifest__(fman,manifest,k,fcsv,sig,r1,verbose):
+    ok,t,err = r1
+    manifest[k] = {'signature':sig,'csv':fcsv,'time':t,'status':'done' if ok else 'error','error':err}
+    ftmp = fman+'.tmp'
+    with open(ftmp,'w') as f:
+        json.dump(manifest,f,indent=1,sort_keys=True)
+    os.replace(ftmp,fman)
+    if verbose:
+        print('Shard %s: %s %.1fs'%(k,'done' if ok else 'ERROR '+err,t))
+#
+def __runShardProcess__(args):
+    j,(olrFile,olxpath,buses,fcsv,opt) = args
+    import OlxObj
+    OlxObj.setVerbose(0)
+    OlxObj.OLCase.open(olrFile,1,olxpath=olxpath)
+    return j,__runShard__(buses,fcsv,opt)
+#
+def __runShard__(buses,fcsv,opt):
+    """ DoBreakerRating on selected buses, return (ok,time,error) """
+    from ctypes import c_int,c_double
+    import OlxAPI
+    import OlxObj
+    from OlxAPIConst import OLXAPI_OK
+    t0 = time.time()
+    try:
+        hnd = []
+        for g in buses:
+            b1 = OlxObj.OLCase.findOBJ(g)
+            if b1 is None:
+                raise Exception('Bus not found: '+g)
+            hnd.append(b1.__hnd__)
+        # Scope: standard, 3-selected buses, area/zone (unused), bus handles terminated with -1
+        la = [opt[0],3,0]+hnd+[-1]
+        scope = (c_int*len(la))(*la)
+        ftmp = fcsv+'.tmp'
+        ftxt = fcsv[:-4]+'.txt' if opt[3] else ''
+        if OLXAPI_OK != OlxAPI.DoBreakerRating(scope,c_double(opt[1]),c_double(opt[2]),c_int(opt[3]),ftxt,ftmp,opt[4]):
+            raise Exception(OlxAPI.ErrorString())
+        os.replace(ftmp,fcsv) # report is complete
+        return True,time.time()-t0,''
+    except Exception as e:
+        return False,time.time()-t0,str(e).strip()
+#
+def readRatingReport(fcsv,threshold=100.0,shard=0,strings=None,dictStr=None):
+    """
+    Parse the CSV report of DoBreakerRating into a structured array (BKR_DTYPE)
+
+    Columns are found by name (REPORT_COLUMNS) from the header row: first row starting with BUS_NO,BUS
+    (ASPEN report) or containing 'breaker'. The table ends at the first row with empty BUS_NO,BUS
+    (sections MAX_SC_CASE, FAULT DESCRIPTION TABLE that follow are not read).
+    strings/dictStr : shared string table (updated), None: new table
+    """
+    if strings is None:
+        strings,dictStr = [''],{'':0}
+    def sid(s1):
+        try:
+            return dictStr[s1]
+        except KeyError:
+            dictStr[s1] = len(strings)
+            strings.append(s1)
+            return dictStr[s1]
+    #
+    rows,col,aspen = [],None,False
+    with open(fcsv,'r',newline='',errors='replace') as f:
+        for r in csv.reader(f):
+            if col is None:
+                if len(r)>2 and r[0].strip()=='BUS_NO' and r[1].strip()=='BUS':
+                    col,aspen = __mapColumns__(r),True
+                elif any('breaker' in c.lower() for c in r) and len([c for c in r if c.strip()])>=3:
+                    col,aspen = __mapColumns__(r),False
+                continue
+            if aspen and (len(r)==0 or (len(r)>2 and r[0]=='' and r[1]=='')):
+                break
+            if not r or not ''.join(r).strip():
+                continue
+            v = {k:(r[i].strip() if i<len(r) else '') for k,i in col.items()}
+            if not v.get('breaker') and not (aspen and v.get('bus')):
+                continue
+            d = {k:__num__(v.get(k,'')) for k in ['intCurrent','intRating','intDuty','momCurrent','momRating','momDuty']}
+            for s1,s2,s3 in [['intDuty','intCurrent','intRating'],['momDuty','momCurrent','momRating']]:
+                if np.isnan(d[s1]) and d[s3]>0:
+                    d[s1] = 100.0*d[s2]/d[s3]
+            flag = 0
+            if d['intDuty']>=threshold:
+                flag |= FLAG_INT
+            if d['momDuty']>=threshold:
+                flag |= FLAG_MOM
+            if v.get('flagText','').strip() not in ['','0','NO','No','no','OK','Ok','ok']:
+                flag |= FLAG_REPORT
+            rows.append((shard,sid(v.get('breaker','')),sid(v.get('bus','')),d['intCurrent'],d['intRating'],d['intDuty'],\
+                         d['momCurrent'],d['momRating'],d['momDuty'],flag))
+    return np.array(rows,dtype=BKR_DTYPE)
+#
+def checkReport(fcsv=FIXTURE_CSV,fref=FIXTURE_REF,threshold=100.0,prt=True):
+    """
+    compare readRatingReport of the sample report fcsv with the expected rows fref
+    (json list of [breaker,bus,intDuty,momDuty,flag])
+    return list of differences (row,expected,found)
+    """
+    strings = ['']
+    data = readRatingReport(fcsv,threshold=threshold,strings=strings,dictStr={'':0})
+    found = [[strings[r['breaker']],strings[r['bus']],float(r['intDuty']),float(r['momDuty']),int(r['flag'])] for r in data]
+    with open(fref,'r') as f:
+        ref = json.load(f)
+    err = []
+    for i in range(max(len(ref),len(found))):
+        v1 = ref[i] if i<len(ref) else None
+        v2 = found[i] if i<len(found) else None
+        if v1 is None or v2 is None or v1[:2]!=v2[:2] or v1[4]!=v2[4] or \
+           any(abs(v1[j]-v2[j])>1e-6 for j in [2,3]):
+            err.append((i+1,v1,v2))
+    if prt:
+        print('checkReport: %i rows, %i differences'%(len(found),len(err)))
+        for e in err:
+            print('\t',e)
+    return err
+#
+def __mapColumns__(header):
+    col = {}
+    for i,h in enumerate(header):
+        h1 = h.strip().lower()
+        for pat,k in REPORT_COLUMNS:
+            if k not in col and re.search(pat,h1):
+                col[k] = i
+                break
+    return col
+#
+def __num__(s1):
+    try:
+        return float(s1.replace('%','').replace(',',''))
+    except:
+        return np.nan
@@ -0,0 +1,234 @@
+"""
+Purpose: Rule engine of CheckNetwork
+
+    Each rule declares the object types and fields it needs (RULE.needs).
+    The engine fetches the union of the needs once (one pass over each object list,
+    one getData by object and field) into columnar tables, then evaluates all rules
+    over the shared data. Fixes are posted through the table (object and column updated).
+    The report gives the count and time of each rule.
+
+        data = CheckEngine.NETWORK_DATA(OLCase)
+        eng = CheckEngine.ENGINE(rules,data)
+        eng.run(fwriter)
+
+    Tables can also be made from columns (no network) for tests and benchmarks:
+        data.addTable(CheckEngine.TABLE('BUS',cols={'NO':[..],'KV':[..]}))
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import time
+#
+def __value__(v):
+    """ object => handle, list of objects => list of handles """
+    if '__hnd__' in getattr(v,'__dict__',{}):
+        return v.__dict__['__hnd__']
+    if type(v)==list:
+        return [__value__(v1) for v1 in v]
+    return v
+#
+class TABLE:
+    """
+    columnar data of one object type
+
+        .objtype : object type (OlxObj name)
+        .objs    : list of objects (None if made from columns)
+        .hnd     : list of handles (row number if made from columns)
+        .cols    : dict field => list of values (objects as handles, None if getData failed)
+    """
+    def __init__(self,objtype,objs=None,cols=None,hnds=None):
+        self.objtype = objtype
+        self.objs = objs
+        self.cols = dict(cols) if cols else {}
+        if objs is not None:
+            self.hnd = [o.__dict__['__hnd__'] for o in objs]
+        elif hnds is not None:
+            self.hnd = list(hnds)
+        else:
+            n = len(next(iter(self.cols.values()))) if self.cols else 0
+            self.hnd = list(range(n))
+        self.row = {h:i for i,h in enumerate(self.hnd)}
+        self.__names = {}
+    #
+    def __len__(self):
+        return len(self.hnd)
+    #
+    def fetch(self,fields):
+        """ read fields not yet in the table (one getData by object and field) """
+        fields = [f for f in fields if f not in self.cols]
+        if not fields or self.objs is None:
+            for f in fields:
+                self.cols[f] = [None]*len(self)
+            return
+        cols = [[] for f in fields]
+        for o in self.objs:
+            for f,c in zip(fields,cols):
+                try:
+                    c.append(__value__(o.getData(f)))
+                except Exception:
+                    c.append(None)
+        for f,c in zip(fields,cols):
+            self.cols[f] = c
+    #
+    def col(self,field):
+        return self.cols[field]
+    #
+    def rowsOf(self,hnds):
+        """ rows of handles (-1 if not in the table) """
+        return [self.row.get(h,-1) for h in hnds]
+    #
+    def name(self,i):
+        """ toString() of row i (cached) """
+        try:
+            return self.__names[i]
+        except KeyError:
+            pass
+        if self.objs is not None:
+            s = self.objs[i].toString()
+        elif 'NAME' in self.cols:
+            s = str(self.cols['NAME'][i])
+        else:
+            s = '[%s] %s'%(self.objtype,self.hnd[i])
+        self.__names[i] = s
+        return s
+    #
+    def set(self,i,values,post=True,ignoreError=False):
+        """
+        change fields of row i: object (and postData if post), then columns
+            ignoreError: error of postData ignored (columns updated)
+        """
+        if self.objs is not None:
+            o = self.objs[i]
+            try:
+                for k,v in values.items():
+                    setattr(o,k,v)
+                if post:
+                    o.postData()
+            except Exception:
+                if not ignoreError:
+                    raise
+        for k,v in values.items():
+            if k in self.cols:
+                self.cols[k][i] = v
+#
+class NETWORK_DATA:
+    """
+    shared columnar data of the network for all rules
+        case : OlxObj.OLCase (None: tables added by addTable)
+    """
+    def __init__(self,case=None):
+        self.case = case
+        self.tables = {}
+        self.__incident = {}
+    #
+    def fetch(self,needs):
+        """ needs: dict objtype => fields; each object list read once, missing fields only """
+        for objtype,fields in needs.items():
+            if objtype not in self.tables:
+                objs = list(getattr(self.case,objtype)) if self.case is not None else None
+                self.tables[objtype] = TABLE(objtype,objs=objs,cols=None if objs is not None else {})
+            self.tables[objtype].fetch(fields)
+    #
+    def addTable(self,table):
+        self.tables[table.objtype] = table
+    #
+    def table(self,objtype):
+        return self.tables[objtype]
+    #
+    def incident(self,objtype,field='BUS'):
+        """ list by BUS row of rows of objtype connected to the bus (field: handle or list of handles) """
+        k = (objtype,field)
+        if k not in self.__incident:
+            tb,row = self.tables[objtype],self.tables['BUS'].row
+            res = [[] for i in range(len(self.tables['BUS']))]
+            for i,v in enumerate(tb.cols[field]):
+                for h in (v if type(v)==list else [v]):
+                    b = row.get(h,-1)
+                    if b>=0 and (not res[b] or res[b][-1]!=i):
+                        res[b].append(i)
+            self.__incident[k] = res
+        return self.__incident[k]
+    #
+    def resetIncident(self):
+        self.__incident = {}
+#
+class RULE:
+    """
+    one check of the network
+
+        code   : error code (E1,E11...)
+        title  : description
+        header : title row of the results
+        needs  : dict objtype => list of fields
+    """
+    code,title,header,needs = '','',[],{}
+    #
+    def evaluate(self,data):
+        """ list of result rows """
+        return []
+    #
+    def write(self,fwriter,res):
+        """ report rows of the rule, returns the count """
+        fwriter.writerow([self.code,self.title])
+        if res:
+            fwriter.writerow(self.header)
+            for r1 in res:
+                fwriter.writerow(r1)
+        fwriter.writerow(['COUNT',self.title,len(res)])
+        return len(res)
+#
+class ENGINE:
+    """
+    evaluate rules over shared data, timing of each rule
+
+        .report : list of (code,title,count,time)
+    """
+    def __init__(self,rules,data):
+        self.rules = rules
+        self.data = data
+        self.report = []
+        self.timeFetch = 0.0
+    #
+    def needs(self):
+        """ union of the needs of all rules """
+        res = {}
+        for r in self.rules:
+            for objtype,fields in r.needs.items():
+                s = res.setdefault(objtype,[])
+                for f in fields:
+                    if f not in s:
+                        s.append(f)
+        return res
+    #
+    def run(self,fwriter=None,verbose=False):
+        t0 = time.time()
+        self.data.fetch(self.needs())
+        self.timeFetch = time.time()-t0
+        if verbose:
+            print('fetch %.2fs'%self.timeFetch)
+        self.report = []
+        for r in self.rules:
+            t0 = time.time()
+            res = r.evaluate(self.data)
+            dt = time.time()-t0
+            n = r.write(fwriter,res) if fwriter is not None else len(res)
+            self.report.append((r.code,r.title,n,dt))
+            if verbose:
+                print('%-4s %6i %8.3fs %s'%(r.code,n,dt,r.title))
+        if fwriter is not None:
+            self.writeTiming(fwriter)
+        return self.report
+    #
+    def writeTiming(self,fwriter):
+        fwriter.writerow([])
+        fwriter.writerow(['RULE','Details','COUNT','TIME (s)'])
+        sn = ' '.join(['%s=%i'%(k,len(t)) for k,t in self.data.tables.items()])
+        fwriter.writerow(['FETCH',sn,'','%.3f'%self.timeFetch])
+        for code,title,n,dt in self.report:
+            fwriter.writerow([code,title,n,'%.3f'%dt])
+        fwriter.writerow(['TOTAL','',sum([r[2] for r in self.report]),'%.3f'%(self.timeFetch+sum([r[3] for r in self.report]))])
@@ -8,12 +8,13 @@ __category__  = "Common"
 __pyManager__ = "yes"
 __email__     = "support@aspeninc.com"
 __status__    = "Release"
-__version__   = "2.1.1"
+__version__   = "2.2.0"
 
 
 # IMPORT -----------------------------------------------------------------------
 from OlxObj import *
 import AppUtils
+import CheckEngine,CheckRules
 import os,math,time,csv
 PATH_FILE,PY_FILE = os.path.split(os.path.abspath(__file__))
 
@@ -685,33 +686,8 @@ class CHECK_MEMO:
         self.fwriter.writerow(['COUNT','Memo text contains leading and trailing blank spaces and tab characters',len(res)])
 
 #
-def run():
-    OLCase.checkInit(PY_FILE) # check if ASPEN OLR file is opened
-
-    #
-    if type(ARGVS.op)!=list:
-        op = [ARGVS.op]
-    else:
-        op = ARGVS.op
-
-    vd = {0:'Check All', 1:'-Check XFMR', 2:'-GEN34 VCCS', 3:'-Check Duplicate (CID, BusNumber)', 4:'-Check Line', 5:'-Check Memo'}
-    for op1 in op:
-        if op1 not in vd.keys():
-            se ='ValueError of op='+str(op1)
-            for k,v in vd.items():
-                se+='\n\top='+str(k)+':'+str(v)
-            AppUtils.gui_error(PY_FILE, se)
-        print('\nCheck: '+str(vd[op1]))
-
-    #
-    ARGVS.fr = AppUtils.get_file_out(fo=ARGVS.fr , fi=OLCase.olrFile , subf='' , ad='_CheckNetwork_Report', ext='.CSV')
-    f1 = open(ARGVS.fr, "w")
-    fwriter = csv.writer(f1,quotechar="'", lineterminator="\n")
-    fwriter.writerow(['','CheckNetwork version=%s Date:%s'%(__version__,time.asctime())])
-    fwriter.writerow(['','OLR file:%s'% OLCase.olrFile])
-    fwriter.writerow([])
-    fwriter.writerow(['CCODE','Details'])
-
+def runChecks_1(op,fwriter):
+    """ checks of CHECK_* classes (before CheckEngine) """
     #
     if (0 in op) or (1 in op):
         cx = CHECK_XFMR(fwriter)
@@ -743,6 +719,38 @@ def run():
     if (0 in op) or (5 in op):
         cx = CHECK_MEMO(fwriter)
         cx.check()
+
+#
+def run():
+    OLCase.checkInit(PY_FILE) # check if ASPEN OLR file is opened
+
+    #
+    if type(ARGVS.op)!=list:
+        op = [ARGVS.op]
+    else:
+        op = ARGVS.op
+
+    vd = {0:'Check All', 1:'-Check XFMR', 2:'-GEN34 VCCS', 3:'-Check Duplicate (CID, BusNumber)', 4:'-Check Line', 5:'-Check Memo'}
+    for op1 in op:
+        if op1 not in vd.keys():
+            se ='ValueError of op='+str(op1)
+            for k,v in vd.items():
+                se+='\n\top='+str(k)+':'+str(v)
+            AppUtils.gui_error(PY_FILE, se)
+        print('\nCheck: '+str(vd[op1]))
+
+    #
+    ARGVS.fr = AppUtils.get_file_out(fo=ARGVS.fr , fi=OLCase.olrFile , subf='' , ad='_CheckNetwork_Report', ext='.CSV')
+    f1 = open(ARGVS.fr, "w")
+    fwriter = csv.writer(f1,quotechar="'", lineterminator="\n")
+    fwriter.writerow(['','CheckNetwork version=%s Date:%s'%(__version__,time.asctime())])
+    fwriter.writerow(['','OLR file:%s'% OLCase.olrFile])
+    fwriter.writerow([])
+    fwriter.writerow(['CCODE','Details'])
+
+    #
+    eng = CheckEngine.ENGINE(CheckRules.getRules(op),CheckEngine.NETWORK_DATA(OLCase))
+    eng.run(fwriter)
     f1.close()
 
     ARGVS.fo = AppUtils.get_file_out(fo=ARGVS.fo , fi=OLCase.olrFile , subf='' , ad='_CheckNetwork', ext='.OLR')
@@ -0,0 +1,602 @@
+"""
+Purpose: Rules of CheckNetwork (CheckEngine.RULE)
+
+    Same checks and fixes as the CHECK_* classes of CheckNetwork.py, evaluated over the
+    shared columnar data of CheckEngine.NETWORK_DATA.
+
+        rules = CheckRules.getRules([0])      # op as CheckNetwork -op
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import math
+from CheckEngine import RULE
+
+GEN34 = ['GENW3','GENW4','CCGEN']
+MEMO_TYPES = ['BUS','GEN','GENUNIT','GENW3','GENW4','CCGEN','XFMR','XFMR3','SHIFTER','LINE','DCLINE2','MULINE',\
+              'SERIESRC','SWITCH','LOAD','LOADUNIT','SHUNT','SHUNTUNIT','SVD','BREAKER','RLYGROUP','RLYOCG',\
+              'RLYOCP','FUSE','RLYDSG','RLYDSP','RLYD','RLYV','SCHEME','ZCORRECT']
+#
+def __units__(data):
+    """ (objtype,row) of GenW3+GenW4+VCCS """
+    return [(t,i) for t in GEN34 for i in range(len(data.table(t)))]
+#
+def __busRow__(data,objtype,i):
+    return data.table('BUS').row.get(data.table(objtype).cols['BUS'][i],-1)
+#
+def __join__(names):
+    """ 'a ; b ; c' (same as the loops s+=name+' ; ' then s[:-2]) """
+    return ''.join([s+' ; ' for s in names])[:-2]
+#
+def __mvaX__(ma,mbase,xpu):
+    """ MVA of a step-up transformer (estimated from X if no rating) """
+    if ma>0 or mbase!=100.0:
+        return ma
+    if xpu>0.2:
+        return 100/(xpu/0.2)
+    if xpu<0.05:
+        return 100*xpu/0.05
+    return 100
+#
+def getP_CCGEN(v,i,ang,kv,vc):
+    k = 0
+    for i1 in range(len(v)):
+        if v[i1]>0:
+            k=i1
+        if vc>=v[i1]:
+            break
+    if k==0:
+        v0 = v[0]
+        i0 = i[0]
+        a0 = ang[0]
+    else:
+        v0 = vc
+        try:
+            i0 = i[k] +( i[k-1]-i[k])/( v[k-1]-v[k]) *(v0-v[k])
+            a0 = ang[k] +( ang[k-1]-ang[k])/( v[k-1]-v[k]) *(v0-v[k])
+        except:
+            i0 = i[k]
+            a0 = ang[k]
+    return v0*kv * i0 * math.cos(a0 *math.pi/180)/1e3
+#
+class RULE_XFMR_CONFIG(RULE):
+    """ 2 windings transformer config DGD => GGG, phase shift high side lead """
+    code = 'E1'
+    title = 'Check 2 Windings Transformer Config'
+    header = [code,'OBJ ID','PARAMETER','VALUE','CHANGED TO']
+    needs = {'XFMR':['CONFIGP','CONFIGS','CONFIGST','PRITAP','SECTAP']}
+    #
+    def evaluate(self,data):
+        tb = data.table('XFMR')
+        cp,cs,ct = tb.cols['CONFIGP'],tb.cols['CONFIGS'],tb.cols['CONFIGST']
+        res = []
+        for i in range(len(tb)):
+            c1 = cp[i]+cs[i]+ct[i]
+            if c1=='DGD':
+                res.append([self.code,tb.name(i).ljust(65),'CONFIG',c1,'GGG'])
+                tb.set(i,{'CONFIGP':'G','CONFIGS':'G','CONFIGST':'G'},ignoreError=True)
+        #
+        ta,tb2 = tb.cols['PRITAP'],tb.cols['SECTAP']
+        for i in range(len(tb)):
+            configA,configB,configC = cp[i],cs[i],ct[i]
+            c1 = configA+configB+configC
+            # low - hight  =>  low - hight
+            #   G   - D             G  - E
+            if ta[i]<tb2[i] and configA=='G' and configB=='D':
+                tb.set(i,{'CONFIGS':'E'},ignoreError=True)
+                res.append([self.code,tb.name(i).ljust(65),'CONFIG',c1,configA+cs[i]+configC])
+            # low - small  =>  low - small
+            #  G    - E              G - D
+            if ta[i]>tb2[i] and configA=='G' and configB=='E':
+                tb.set(i,{'CONFIGS':'D'},ignoreError=True)
+                res.append([self.code,tb.name(i).ljust(65),'CONFIG',c1,configA+cs[i]+configC])
+        return res
+#
+class RULE_GEN34_XFMR_RATING(RULE):
+    """ under-rated transformers near GenW3, GenW4 or VCCS """
+    code = 'E11'
+    title = 'Check Under-rated transformers near GenW3+GenW4+VCCS'
+    header = [code,'GEN ID','XFMR ID','MVA rating Gen','MVA StepUp Transf']
+    needs = {'BUS':[],'GENW3':['BUS','UNITS','MVA'],'GENW4':['BUS','UNITS','MVA'],'CCGEN':['BUS','MVARATE'],
+             'XFMR':['BUS','MVA1','MVA2','MVA3','BASEMVA','X'],'XFMR3':['BUS','MVA1','MVA2','MVA3','BASEMVA','XPS']}
+    #
+    def evaluate(self,data):
+        res = []
+        x2b,x3b = data.incident('XFMR'),data.incident('XFMR3')
+        tx = {t:data.table(t) for t in ['XFMR','XFMR3']}
+        for t,i in __units__(data):
+            tg = data.table(t)
+            if t=='CCGEN':
+                mva_i = tg.cols['MVARATE'][i]
+            else:
+                mva_i = tg.cols['UNITS'][i]*tg.cols['MVA'][i]
+            b = __busRow__(data,t,i)
+            mvaX,xs,nx = 0,[],0
+            for tt,fx in [('XFMR','X'),('XFMR3','XPS')]:
+                c = tx[tt].cols
+                for j in (x2b if tt=='XFMR' else x3b)[b] if b>=0 else []:
+                    ma = max(c['MVA1'][j],c['MVA2'][j],c['MVA3'][j])
+                    mvaX += __mvaX__(ma,c['BASEMVA'][j],c[fx][j])
+                    xs.append(tx[tt].name(j))
+                    nx += 1
+            if nx==0:
+                res.append([self.code,tg.name(i),'None',str(round(mva_i,1)),str(round(mvaX,1))])
+            elif mvaX<mva_i:
+                res.append([self.code,tg.name(i),__join__(xs),str(round(mva_i,1)),str(round(mvaX,1))])
+        return res
+#
+class RULE_GEN34_XFMR_WYE(RULE):
+    """ lack of a wye-connected transformer winding in front of a GenW3, GenW4 or VCCS """
+    code = 'E12'
+    title = 'Lack of a wye-connected transformer winding in front of a GenW3+GenW4+VCCS (unless it is a simple STATCOM)'
+    header = [code,'GEN ID','XFMR ID','Connections StepUp Transf']
+    needs = {'BUS':[],'GENW3':['BUS'],'GENW4':['BUS'],'CCGEN':['BUS'],'XFMR':['BUS','CONFIGP','CONFIGS']}
+    dictCon = {'GG':'YY/auto','GE':'Yd11','GD':'Yd1','DD':'dd','ZG':'zy11','ZX':'zy1','ZD':'zd0'}
+    #
+    def evaluate(self,data):
+        res = []
+        x2b = data.incident('XFMR')
+        tx = data.table('XFMR')
+        hb = data.table('BUS').hnd
+        for t,i in __units__(data):
+            b = __busRow__(data,t,i)
+            conX2,x2s,flag = [],[],False
+            for j in x2b[b] if b>=0 else []:
+                bus12 = tx.cols['BUS'][j]
+                con1,con2 = tx.cols['CONFIGP'][j],tx.cols['CONFIGS'][j]
+                if con1+con2 in self.dictCon:
+                    conX2.append(self.dictCon[con1+con2])
+                if hb[b]==bus12[0]:
+                    if con1 not in ['G']:
+                        flag = True
+                elif hb[b]==bus12[1]:
+                    if con2 not in ['G','X']:
+                        flag = True
+                x2s.append(tx.name(j))
+            if flag:
+                res.append([self.code,data.table(t).name(i),__join__(x2s),__join__(conX2)])
+        return res
+#
+class RULE_GEN34_NOLOAD(RULE):
+    """ significant prefault MW generation from GenW3, GenW4 or VCCS when there are no loads """
+    code = 'E13'
+    title = 'Have significant prefault MW generation from GenW3+GenW4+VCCS when there are no loads in the network'
+    header = [code,'GEN ID','MW generation']
+    needs = {'BUS':['KV'],'LOADUNIT':['FLAG','MW'],'GENW3':['BUS','UNITS','MW'],'GENW4':['BUS','UNITS','MW'],
+             'CCGEN':['BUS','V','I','A']}
+    vc = 1.0
+    #
+    def evaluate(self,data):
+        tl = data.table('LOADUNIT')
+        mwload = [0,0,0]
+        for f,l3 in zip(tl.cols['FLAG'],tl.cols['MW']):
+            if f==1:
+                for i in range(3):
+                    mwload[i] += l3[i]
+        self.mwload = sum(mwload)
+        self.mwgen = 0
+        res = []
+        kv = data.table('BUS').cols['KV']
+        for t,i in __units__(data):
+            c = data.table(t).cols
+            if t=='CCGEN':
+                m1 = getP_CCGEN(c['V'][i],c['I'][i],c['A'][i],kv[__busRow__(data,t,i)],self.vc)
+            else:
+                m1 = c['UNITS'][i]*c['MW'][i]
+            self.mwgen += m1
+            if m1>0.01:
+                res.append([self.code,data.table(t).name(i),str(round(m1,1))])
+        return res
+    #
+    def write(self,fwriter,res):
+        fwriter.writerow([self.code,self.title])
+        nc = 0
+        if res and self.mwgen>self.mwload:
+            fwriter.writerow([self.code,'sumGen='+str(round(self.mwgen,1)),'sumLoad='+str(round(self.mwload,1))])
+            fwriter.writerow(self.header)
+            for r1 in res:
+                fwriter.writerow(r1)
+            nc = len(res)
+        fwriter.writerow(['COUNT',self.title,nc])
+        return nc
+#
+class UNION_FIND:
+    """ disjoint sets of keys (path halving, union by size) """
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+    #
+    def find(self,x):
+        p = self.parent
+        if x not in p:
+            p[x] = x
+            self.size[x] = 1
+            return x
+        while p[x]!=x:
+            p[x] = p[p[x]]
+            x = p[x]
+        return x
+    #
+    def union(self,a,b):
+        ra,rb = self.find(a),self.find(b)
+        if ra==rb:
+            return ra
+        if self.size[ra]<self.size[rb]:
+            ra,rb = rb,ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return ra
+#
+def sharedClusters(unitBuses,branches):
+    """
+    units sharing a low impedance bus cluster with another unit
+        unitBuses: by unit, keys of its bus and of the buses of its transformers
+        branches : keys of buses of each low impedance branch (switch, line X<=xc)
+    returns list of bool by unit
+    clusters of the whole network computed once (union-find), then one group-by of cluster ids
+    """
+    uf = UNION_FIND()
+    for bs in branches:
+        for b in bs[1:]:
+            uf.union(bs[0],b)
+    cid = [set([uf.find(b) for b in bs]) for bs in unitBuses]
+    count = {}
+    for s in cid:
+        for c in s:
+            count[c] = count.get(c,0)+1
+    return [any([count[c]>1 for c in s]) for s in cid]
+#
+class RULE_GEN34_SHORTTIE(RULE):
+    """ GenW3, GenW4 or VCCS units connected with short lines or switches """
+    code = 'E14'
+    title = 'GenW3+GenW4+VCCS units that are connected with short lines or switches'
+    header = [code,'GEN ID']
+    needs = {'BUS':[],'GENW3':['BUS'],'GENW4':['BUS'],'CCGEN':['BUS'],'XFMR':['BUS'],'SWITCH':['BUS'],'LINE':['BUS','X']}
+    xc = 0.002
+    #
+    def evaluate(self,data):
+        x2b = data.incident('XFMR')
+        txb = data.table('XFMR').cols['BUS']
+        lnbus,lnx = data.table('LINE').cols['BUS'],data.table('LINE').cols['X']
+        branches = list(data.table('SWITCH').cols['BUS'])+[lnbus[j] for j in range(len(lnbus)) if lnx[j]<=self.xc]
+        units = __units__(data)
+        unitBuses = []
+        for t,i in units:
+            hb = data.table(t).cols['BUS'][i]
+            b = __busRow__(data,t,i)
+            bs = [hb]
+            for j in x2b[b] if b>=0 else []:
+                bs.extend(txb[j])
+            unitBuses.append(bs)
+        return [[self.code,data.table(t).name(i)] for (t,i),f in zip(units,sharedClusters(unitBuses,branches)) if f]
+#
+def __getNewCID__(vi,k):
+    try:
+        i1 = int(vi[:1])
+    except:
+        i1 = 0
+    return str(i1+k),k+1
+#
+def __changeCID__(tu,rows,cid):
+    """ new CID of units with a CID already seen (candidates in use skipped) """
+    sidOld = ' '.join(cid)
+    seen,used = set(cid[:1]),set(cid)
+    for i in range(1,len(cid)):
+        vi = cid[i]
+        if vi in seen:
+            k = 1
+            while k<89:
+                vn,k = __getNewCID__(vi,k)
+                if vn in used:
+                    continue
+                try:
+                    tu.set(rows[i],{'CID':vn})
+                    cid[i] = vn
+                    used.add(vn)
+                    break
+                except:
+                    pass
+        seen.add(cid[i])
+    return sidOld,' '.join(cid)
+#
+class RULE_DUPLICATE_UNIT(RULE):
+    """ buses with multiple units (load/generator/shunt) of the same ID """
+    def __init__(self,code,objtype,unittype,label):
+        self.code = code
+        self.objtype = objtype
+        self.unittype = unittype
+        self.label = label
+        self.title = 'Buses contain multiple %s units with the same ID'%label
+        self.header = [code,'BUS ID','PARAMETER','VALUE','CHANGED TO']
+        self.needs = {'BUS':[],objtype:['BUS',unittype],unittype:['CID']}
+    #
+    def evaluate(self,data):
+        res = []
+        tb,tu = data.table(self.objtype),data.table(self.unittype)
+        cid = tu.cols['CID']
+        for i,hu in enumerate(tb.cols[self.unittype]):
+            rows = tu.rowsOf(hu or [])
+            c1 = [cid[r] for r in rows]
+            if len(c1)>1 and len(c1)!=len(set(c1)):
+                sidOld,sidNew = __changeCID__(tu,rows,c1)
+                b = __busRow__(data,self.objtype,i)
+                res.append([self.code,data.table('BUS').name(b),self.label.upper()+' UNIT CID',sidOld,sidNew])
+        return res
+#
+class FREE_NUMBERS:
+    """
+    allocator of unused numbers (bus numbers)
+        next(n): smallest unused number > n, amortized O(1)
+    runs of consecutive used numbers are linked to their end (sorted used numbers),
+    allocated numbers are linked the same way (path compression)
+    """
+    def __init__(self,used):
+        self.used = set(used)
+        self.__next = {}
+        for v in sorted(self.used,reverse=True):
+            self.__next[v] = self.__next[v+1] if v+1 in self.used else v+1
+    #
+    def first(self,n):
+        """ smallest unused number >= n """
+        path = []
+        while n in self.used:
+            path.append(n)
+            n = self.__next.get(n,n+1)
+        for v in path:
+            self.__next[v] = n
+        return n
+    #
+    def next(self,n):
+        return self.first(n+1)
+    #
+    def take(self,n):
+        self.used.add(n)
+        self.__next[n] = n+1
+#
+def changeBusNumber(tb,i,bn,free,kmax=1e5):
+    """ bus number of row i => smallest unused number >bn (0 if not found) """
+    v = bn
+    while True:
+        v = free.next(v)
+        if v-bn>=kmax:
+            return 0
+        free.take(v)
+        try:
+            tb.set(i,{'NO':v})
+            return v
+        except:
+            pass
+#
+def groupDuplicate(values,valid=None):
+    """ {value:[rows]} of values found more than once (rows in order), one pass """
+    g = {}
+    for i,v in enumerate(values):
+        if valid is None or valid(v):
+            g.setdefault(v,[]).append(i)
+    return {v:r for v,r in g.items() if len(r)>1}
+#
+class RULE_DUPLICATE_BUSNUMBER(RULE):
+    """ buses with the same non-zero bus number """
+    code = 'E24'
+    title = 'Buses have the same non-zero bus number'
+    header = [code,'BUS ID','PARAMETER','VALUE','CHANGED TO']
+    needs = {'BUS':['NO']}
+    #
+    def evaluate(self,data):
+        tb = data.table('BUS')
+        bn = list(tb.cols['NO'])
+        dup = groupDuplicate(bn,lambda v:v is not None and v>0)
+        free = FREE_NUMBERS([v for v in bn if v is not None])
+        res = []
+        for bn1,rows in dup.items():
+            r1 = [self.code,tb.name(rows[0])]
+            sn = [str(bn1)]
+            for j in rows[1:]:
+                r1.append(tb.name(j))
+                sn.append(str(changeBusNumber(tb,j,bn1,free)))
+            r1.extend(['BUS NUMBER',bn1,' '.join(sn)])
+            res.append(r1)
+        return res
+#
+class RULE_LINE_RX(RULE):
+    """ lines with RX=0 or R0X0=0 """
+    code = 'E32'
+    title = 'Some line have RX=0 or R0X0=0'
+    header = [code,'LINE ID','PARAMETER','VALUE','CHANGED TO']
+    needs = {'LINE':['R','X','R0','X0']}
+    #
+    def write(self,fwriter,res):
+        fwriter.writerow([self.code,self.title])
+        if res:
+            fwriter.writerow(self.header)
+            for r1 in res:
+                fwriter.writerow(r1)
+        fwriter.writerow(['COUNT','Some line have R_X=0 or R0_X0=0',len(res)])
+        return len(res)
+    #
+    def evaluate(self,data):
+        tb = data.table('LINE')
+        c = tb.cols
+        res = []
+        for i in range(len(tb)):
+            r1,x1,r0,x0 = c['R'][i],c['X'][i],c['R0'][i],c['X0'][i]
+            z1 = abs(r1)<1e-6 and abs(x1)<1e-6
+            z0 = abs(r0)<1e-6 and abs(x0)<1e-6
+            if z1 or z0:
+                vi = [self.code,tb.name(i),'R X R0 X0',' '.join([str(round(v,6)) for v in (r1,x1,r0,x0)])]
+                if z1:
+                    r1 = x1 = 1e-6
+                    tb.set(i,{'R':r1,'X':x1},post=False)
+                if z0:
+                    r0 = x0 = 1e-6
+                    tb.set(i,{'R0':r0,'X0':x0},post=False)
+                vi.append(' '.join([str(round(v,6)) for v in (r1,x1,r0,x0)]))
+                res.append(vi)
+        return res
+#
+class RULE_LINE_TYPE(RULE):
+    """ line type with leading and trailing blank spaces """
+    code = 'E31'
+    title = 'Some line type field text contains leading and trailing blank spaces'
+    header = [code,'LINE ID','PARAMETER','VALUE','CHANGED TO']
+    needs = {'LINE':['TYPE']}
+    #
+    def evaluate(self,data):
+        tb = data.table('LINE')
+        res = []
+        for i,lt in enumerate(tb.cols['TYPE']):
+            if lt:
+                lt1 = lt.strip()
+                if lt!=lt1:
+                    res.append([self.code,tb.name(i),'LINE TYPE',lt,lt1])
+                    tb.set(i,{'TYPE':lt1})
+        return res
+#
+def getNewMemo(m1):
+    mx = m1.replace('\n',' ')
+    mx = mx.replace('\r',' ')
+    mx = mx.replace('\\t',' ')
+    return ''.join([mi+' ' for mi in mx.split()])
+#
+class RULE_MEMO(RULE):
+    """ memo with leading and trailing blank spaces and tab characters """
+    code = 'E41'
+    title = 'Memo text contains leading and trailing blank spaces and tab characters'
+    header = [code,'OBJ ID','PARAMETER','VALUE','CHANGED TO']
+    needs = dict([(t,['MEMO']) for t in MEMO_TYPES]+[('RECLSR',['GR_MEMO','PH_MEMO'])])
+    #
+    def evaluate(self,data):
+        res = []
+        for t in MEMO_TYPES:
+            tb = data.table(t)
+            for i,m1 in enumerate(tb.cols['MEMO']):
+                if type(m1)!=str:
+                    continue
+                if m1!=m1.strip() or '\t' in m1:
+                    mn = getNewMemo(m1)
+                    tb.set(i,{'MEMO':mn})
+                    res.append([self.code,tb.name(i),'MEMO',m1,mn])
+        #
+        tb = data.table('RECLSR')
+        for i in range(len(tb)):
+            for f in ['GR_MEMO','PH_MEMO']:
+                ma = tb.cols[f][i]
+                for m1 in ma or []:
+                    if m1!=m1.strip() or '\t' in m1:
+                        mn = [getNewMemo(ma[0]),getNewMemo(ma[1])]
+                        tb.set(i,{f:mn})
+                        r1 = [self.code,tb.name(i),'MEMO']
+                        r1.extend([mi.replace('\n',' ').replace('\r',' ') for mi in ma])
+                        r1.extend(mn)
+                        res.append(r1)
+                        break
+        return res
+#
+def getRules(op):
+    """ rules of operations op (list, CheckNetwork -op) in the order of the report """
+    rules = []
+    if (0 in op) or (1 in op):
+        rules.append(RULE_XFMR_CONFIG())
+    if (0 in op) or (2 in op):
+        rules.extend([RULE_GEN34_XFMR_RATING(),RULE_GEN34_XFMR_WYE(),RULE_GEN34_NOLOAD(),RULE_GEN34_SHORTTIE()])
+    if (0 in op) or (3 in op):
+        rules.extend([RULE_DUPLICATE_UNIT('E21','LOAD','LOADUNIT','load'),
+                      RULE_DUPLICATE_UNIT('E22','GEN','GENUNIT','Generator'),
+                      RULE_DUPLICATE_UNIT('E23','SHUNT','SHUNTUNIT','Shunt'),
+                      RULE_DUPLICATE_BUSNUMBER()])
+    if (0 in op) or (4 in op):
+        rules.extend([RULE_LINE_RX(),RULE_LINE_TYPE()])
+    if (0 in op) or (5 in op):
+        rules.append(RULE_MEMO())
+    return rules
+#
+def makeSyntheticData(nBus=100000,pDup=0.05,seed=1,pLowX=0.02):
+    """
+    CheckEngine.NETWORK_DATA of a synthetic network (no OLR), for tests and benchmarks
+        pDup : part of duplicate bus numbers
+        pLowX: part of lines with X<=0.002
+    """
+    import random
+    from CheckEngine import NETWORK_DATA,TABLE
+    rnd = random.Random(seed)
+    data = NETWORK_DATA()
+    base = {}
+    def add(objtype,n,cols):
+        base[objtype] = 1000000*(len(base)+1)
+        data.addTable(TABLE(objtype,cols=cols,hnds=[base[objtype]+i for i in range(n)]))
+    def bus(i):
+        return base['BUS']+i
+    def memo():
+        return rnd.choice(['','','note',' note ','a\tb'])
+    no = list(range(1,nBus+1))
+    for i in rnd.sample(range(nBus),int(nBus*pDup)):
+        no[i] = rnd.randint(1,nBus)
+    add('BUS',nBus,{'NO':no,'KV':[rnd.choice([13.8,69.0,132.0]) for i in range(nBus)],
+                    'NAME':["'B%i' 132kV"%i for i in range(nBus)],'MEMO':[memo() for i in range(nBus)]})
+    nl = int(nBus*1.5)
+    lb = [[bus(rnd.randrange(nBus)),bus(rnd.randrange(nBus))] for i in range(nl)]
+    add('LINE',nl,{'BUS':lb,'R':[rnd.choice([0,0.01]) for i in range(nl)],'X':[0.001 if rnd.random()<pLowX else rnd.choice([0.05,0.1]) for i in range(nl)],
+                   'R0':[0.03]*nl,'X0':[0.3]*nl,'TYPE':[rnd.choice(['','OH',' OH ']) for i in range(nl)],'MEMO':[memo() for i in range(nl)]})
+    nx = nBus//5
+    add('XFMR',nx,{'BUS':[[bus(rnd.randrange(nBus)),bus(rnd.randrange(nBus))] for i in range(nx)],
+                   'CONFIGP':[rnd.choice('GD') for i in range(nx)],'CONFIGS':[rnd.choice('GDE') for i in range(nx)],
+                   'CONFIGST':['G']*nx,'PRITAP':[rnd.choice([13.8,132.0]) for i in range(nx)],'SECTAP':[rnd.choice([13.8,132.0]) for i in range(nx)],
+                   'MVA1':[rnd.choice([0,50]) for i in range(nx)],'MVA2':[0]*nx,'MVA3':[0]*nx,'BASEMVA':[100.0]*nx,
+                   'X':[rnd.choice([0.01,0.1,0.3]) for i in range(nx)],'MEMO':[memo() for i in range(nx)]})
+    n3 = nBus//100
+    add('XFMR3',n3,{'BUS':[[bus(rnd.randrange(nBus)) for k in range(3)] for i in range(n3)],'MVA1':[100]*n3,'MVA2':[0]*n3,
+                    'MVA3':[0]*n3,'BASEMVA':[100.0]*n3,'XPS':[0.1]*n3,'MEMO':['']*n3})
+    ns = nBus//100
+    add('SWITCH',ns,{'BUS':[[bus(rnd.randrange(nBus)),bus(rnd.randrange(nBus))] for i in range(ns)],'MEMO':['']*ns})
+    ng = nBus//100
+    for t in GEN34:
+        add(t,ng,{'BUS':[bus(rnd.randrange(nBus)) for i in range(ng)],'UNITS':[1]*ng,'MVA':[rnd.choice([10,100]) for i in range(ng)],
+                  'MW':[rnd.choice([0,5]) for i in range(ng)],'MVARATE':[50]*ng,'V':[[1.0,0.5]]*ng,'I':[[1.0,0.8]]*ng,
+                  'A':[[0.0,10.0]]*ng,'MEMO':['']*ng})
+    for t,tu in [('LOAD','LOADUNIT'),('GEN','GENUNIT'),('SHUNT','SHUNTUNIT')]:
+        n = nBus//4
+        units = []
+        nu = 0
+        for i in range(n):
+            k = rnd.choice([1,1,2,3])
+            units.append([1000000*(len(base)+2)+nu+j for j in range(k)])
+            nu += k
+        add(t,n,{'BUS':[bus(rnd.randrange(nBus)) for i in range(n)],tu:units,'MEMO':['']*n})
+        add(tu,nu,{'CID':[rnd.choice(['1','1','2']) for i in range(nu)],'FLAG':[1]*nu,'MW':[[1.0,1.0,1.0]]*nu,'MEMO':['']*nu})
+    add('RECLSR',10,{'GR_MEMO':[['a ','b']]*10,'PH_MEMO':[['','']]*10})
+    return data
+#
+def benchmark(nBus=100000,op=[0],skip=[],prt=True,pLowX=0.02):
+    """ all rules of op on a synthetic network (fixes applied to the columns only), skip: codes not run """
+    import time
+    from CheckEngine import ENGINE
+    data = makeSyntheticData(nBus,pLowX=pLowX)
+    rules = [r for r in getRules(op) if r.code not in skip]
+    t0 = time.time()
+    rep = ENGINE(rules,data).run(verbose=prt)
+    if prt:
+        print('CheckNetwork rules benchmark: %i buses, %i rules, %.2fs'%(nBus,len(rules),time.time()-t0))
+    return rep
+#
+def benchmarkDuplicate(nBus=200000,pDup=0.05,prt=True):
+    """ duplicate rules (E21..E24) on a synthetic network with pDup of duplicate bus numbers """
+    import time
+    data = makeSyntheticData(nBus,pDup=pDup)
+    t = {}
+    for r in getRules([3]):
+        t0 = time.time()
+        res = r.evaluate(data)
+        t[r.code] = (len(res),time.time()-t0)
+    no = data.table('BUS').cols['NO']
+    t['unique'] = len(set(no))==len(no)
+    if prt:
+        print('CheckNetwork duplicate benchmark: %i buses, %.0f%% duplicate bus numbers'%(nBus,pDup*100))
+        for k in ['E21','E22','E23','E24']:
+            print('    %s %6i %8.3fs'%(k,t[k][0],t[k][1]))
+        print('    bus numbers unique after fix: %s'%t['unique'])
+    return t
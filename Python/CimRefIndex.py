@@ -0,0 +1,372 @@
+"""
+Purpose: Streaming index of ASPEN CIMREF files with GUID <=> mRID lookups
+
+    One streaming pass (iterparse, elements cleared) over the CIMREF file gives columnar arrays:
+        REFREC     : OBJGUID, OLNETID, object type
+        OBJGUID    : OBJGUID of the REFREC, NAME, VALUE (CIM mRID), one row by child
+    and 3 hash indexes (64-bit hash of the key, sorted):
+        GUID => mRID, mRID => GUID, bus 'name' kV => GUID (from OLNETID of BUS)
+    The arrays are saved as .npy files in <fref>.idx/ and memory-mapped when loaded again
+    (rebuilt when size/time of the CIMREF file changes).
+    Bulk lookups are vectorized (hash, searchsorted, key check).
+
+    samples:
+        ci = CimRefIndex.CIMREF_INDEX('model.CIMREF')
+        mrids = ci.toMRID(guids)                    # '' if not found
+        guids = ci.toGUID(mrids)
+        guids = ci.findBus(['NEVADA','OHIO'],[132,132])
+        lst = ci.mrids('{...guid...}')              # [(NAME,mRID)]
+        data_cimref = ci.toDict(ASPENLib.OBJTYPELIST) # = DataASPEN_CIMREF.get_CIMREF()
+        CimRefIndex.benchmark(nRec=500000,nLookup=1000000)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.1"
+
+import os,re,time,json
+from xml.etree import ElementTree as ET
+import numpy as np
+
+ARRAYS = ['rec_guid','rec_olnetid','rec_type','ref_guid','ref_name','ref_mrid','bus_key','bus_guid',\
+          'h_guid','o_guid','h_mrid','o_mrid','h_bus','o_bus']
+HASH_MUL = np.uint64(0x9E3779B97F4A7C15)
+HASH_SHIFT = np.uint64(29)
+__BUSID__ = re.compile(r"'(.*)'\s*([0-9.]+)\s*kV")
+#
+class CIMREF_INDEX:
+    """
+    index of one CIMREF file
+
+        .sysparams : dict NAME => VALUE of SYSTEMPARAMS/OBJGUID
+        .types     : object types (REFDBTABLE NAME), .rec_type is index in .types
+        .rec_guid,.rec_olnetid,.rec_type     : one row by REFREC
+        .ref_guid,.ref_name,.ref_mrid         : one row by OBJGUID of REFREC
+        .bus_key,.bus_guid                    : "'name' kVkV" of BUS
+    """
+    def __init__(self,fref,encoding='utf-8',rebuild=False,save=True):
+        self.fref = fref
+        self.encoding = encoding
+        self.fidx = fref+'.idx'
+        sig = signature(fref)
+        if not rebuild and self.__load__(sig):
+            return
+        self.__scan__()
+        self.__hashIndex__()
+        self.signature = sig
+        if save:
+            try:
+                self.__save__()
+            except OSError: # read-only folder: index kept in memory only
+                pass
+    #
+    def __len__(self):
+        return len(self.rec_guid)
+    #
+    def __scan__(self):
+        """ one streaming pass over the CIMREF file """
+        rg,ro,rt,fg,fn,fm,bk,bg = [],[],[],[],[],[],[],[]
+        types,sysparams = {},{}
+        it,typ,table = -1,None,None
+        root = None
+        with open(self.fref,'rb') as source:
+            for event,elem in ET.iterparse(source,events=('start','end'),parser=ET.XMLParser(encoding=self.encoding)):
+                if event=='start':
+                    if root is None:
+                        root = elem
+                    elif elem.tag=='REFDBTABLE':
+                        typ,table = elem.get('NAME',''),elem
+                        it = types.setdefault(typ,len(types))
+                    continue
+                if elem.tag=='REFREC':
+                    g,o = elem.get('OBJGUID',''),elem.get('OLNETID','')
+                    rg.append(g)
+                    ro.append(o)
+                    rt.append(it)
+                    for c in elem:
+                        if c.tag=='OBJGUID':
+                            fg.append(g)
+                            fn.append(c.get('NAME',''))
+                            fm.append(c.get('VALUE',''))
+                    if o and typ=='BUS':
+                        m = __BUSID__.search(o)
+                        if m:
+                            bk.append(busKey(m.group(1),m.group(2)))
+                            bg.append(g)
+                    if table is not None:
+                        del table[:]    # REFREC done
+                    else:
+                        elem.clear()
+                elif elem.tag=='SYSTEMPARAMS':
+                    for c in elem:
+                        if c.tag=='OBJGUID' and 'NAME' in c.attrib:
+                            sysparams[c.attrib['NAME']] = c.get('VALUE')
+                    elem.clear()
+                elif elem.tag=='REFDBTABLE':
+                    typ,table = None,None
+                    root.clear()
+        self.sysparams = sysparams
+        self.types = list(types.keys())
+        self.rec_guid = __bytes__(rg)
+        self.rec_olnetid = __bytes__(ro)
+        self.rec_type = np.array(rt,dtype=np.int16)
+        self.ref_guid = __bytes__(fg)
+        self.ref_name = __bytes__(fn)
+        self.ref_mrid = __bytes__(fm)
+        self.bus_key = __bytes__(bk)
+        self.bus_guid = __bytes__(bg)
+    #
+    def __hashIndex__(self):
+        for h,o,k in [('h_guid','o_guid','ref_guid'),('h_mrid','o_mrid','ref_mrid'),('h_bus','o_bus','bus_key')]:
+            hk = hash64(getattr(self,k))
+            order = np.argsort(hk,kind='stable')
+            setattr(self,h,hk[order])
+            setattr(self,o,order.astype(np.int64))
+    #
+    def __save__(self):
+        os.makedirs(self.fidx,exist_ok=True)
+        for k in ARRAYS:
+            np.save(os.path.join(self.fidx,k+'.npy'),getattr(self,k))
+        meta = {'version':__version__,'signature':self.signature,'types':self.types,'sysparams':self.sysparams}
+        tmp = os.path.join(self.fidx,'meta.json.tmp')
+        with open(tmp,'w') as f:
+            json.dump(meta,f)
+        os.replace(tmp,os.path.join(self.fidx,'meta.json'))    # written last: index complete
+    #
+    def __load__(self,sig):
+        fmeta = os.path.join(self.fidx,'meta.json')
+        if not os.path.isfile(fmeta):
+            return False
+        try:
+            with open(fmeta,'r') as f:
+                meta = json.load(f)
+            if meta['version']!=__version__ or meta['signature']!=sig:
+                return False
+            for k in ARRAYS:
+                setattr(self,k,np.load(os.path.join(self.fidx,k+'.npy'),mmap_mode='r'))
+        except Exception:
+            return False
+        self.signature = sig
+        self.types = meta['types']
+        self.sysparams = meta['sysparams']
+        return True
+    #
+    def __lookup__(self,keys,h,o,k):
+        """ row (in k) of first match of each key, -1 if not found """
+        q = __bytes__(keys)
+        hs,order,ks = getattr(self,h),getattr(self,o),getattr(self,k)
+        res = np.full(len(q),-1,dtype=np.int64)
+        if len(hs)==0 or len(q)==0:
+            return res
+        hq = hash64(q)
+        j = np.minimum(np.searchsorted(hs,hq),len(hs)-1)
+        ok = np.asarray(hs[j])==hq
+        row = np.asarray(order[j])
+        ok[ok] = np.asarray(ks[row[ok]])==q[ok]
+        # hash collision (or not the first of equal hashes): linear check in the run of equal hashes
+        for i in np.flatnonzero((~ok)&(np.asarray(hs[j])==hq)):
+            jj = j[i]
+            while jj<len(hs) and hs[jj]==hq[i]:
+                if ks[order[jj]]==q[i]:
+                    ok[i],row[i] = True,order[jj]
+                    break
+                jj += 1
+        res[ok] = row[ok]
+        return res
+    #
+    def toMRID(self,guids):
+        """ CIM mRID of ASPEN OBJGUID (first OBJGUID child), str array ('' if not found), bytes array for bytes array input """
+        r = self.__lookup__(guids,'h_guid','o_guid','ref_guid')
+        return __decode__(self.ref_mrid,r,__isBytes__(guids))
+    #
+    def toGUID(self,mrids):
+        """ ASPEN OBJGUID of CIM mRID, str array ('' if not found), bytes array for bytes array input """
+        r = self.__lookup__(mrids,'h_mrid','o_mrid','ref_mrid')
+        return __decode__(self.ref_guid,r,__isBytes__(mrids))
+    #
+    def findBus(self,names,kvs):
+        """ OBJGUID of buses by name and kV, str array, '' if not found """
+        keys = [busKey(n,k) for n,k in zip(names,kvs)]
+        r = self.__lookup__(keys,'h_bus','o_bus','bus_key')
+        return __decode__(self.bus_guid,r)
+    #
+    def mrids(self,guid):
+        """ list of (NAME,mRID) of one OBJGUID """
+        r = self.__lookup__([guid],'h_guid','o_guid','ref_guid')[0]
+        if r<0:
+            return []
+        hs,order = self.h_guid,self.o_guid
+        h1 = hash64(__bytes__([guid]))[0]
+        j = np.searchsorted(hs,h1)
+        g = guid.encode('utf-8')
+        res = []
+        while j<len(hs) and hs[j]==h1:
+            i = order[j]
+            if self.ref_guid[i]==g:
+                res.append((self.ref_name[i].decode('utf-8'),self.ref_mrid[i].decode('utf-8')))
+            j += 1
+        return res
+    #
+    def toDict(self,objtypes=None):
+        """ {sysparam:value,objtype:{OBJGUID:{NAME:mRID}}} as DataASPEN_CIMREF.get_CIMREF() """
+        res = dict(self.sysparams)
+        dec = 'utf-8'
+        refs = {}
+        for g,n,m in zip(self.ref_guid.tolist(),self.ref_name.tolist(),self.ref_mrid.tolist()):
+            try:
+                refs[g][n.decode(dec)] = m.decode(dec)
+            except KeyError:
+                refs[g] = {n.decode(dec):m.decode(dec)}
+        for it,typ in enumerate(self.types):
+            if objtypes is not None and typ not in objtypes:
+                continue
+            sel = np.flatnonzero(np.asarray(self.rec_type)==it)
+            if len(sel)==0:
+                continue
+            d = {}
+            for g in self.rec_guid[sel].tolist():
+                d[g.decode(dec)] = dict(refs.get(g,{}))
+            res[typ] = d
+        return res
+#
+def busKey(name,kv):
+    """ "'name' kVkV" as olrmodel.busid_dict (kV as %g) """
+    try:
+        kv = '%g'%float(kv)
+    except (TypeError,ValueError):
+        kv = str(kv)
+    return "'%s' %skV"%(name,kv)
+#
+def hash64(a):
+    """
+    64-bit hash of each item of a bytes array (8 bytes words, multiply/shift mixing)
+    words after the last non-zero word are not mixed: same hash for any width of the array
+    """
+    a = np.asarray(a)
+    w = max(8,(a.dtype.itemsize+7)//8*8)
+    u = np.ascontiguousarray(a.astype('S%i'%w)).view(np.uint64).reshape(len(a),-1)
+    nz = u!=0
+    nw = np.where(nz.any(axis=1),u.shape[1]-np.argmax(nz[:,::-1],axis=1),1)
+    x = np.zeros(len(a),dtype=np.uint64)
+    for c in range(u.shape[1]):
+        m = nw>c
+        if not m.any():
+            break
+        y = (x^u[:,c])*HASH_MUL
+        y ^= y>>HASH_SHIFT
+        x = np.where(m,y,x)
+    return x
+#
+def signature(fref):
+    """ size and modification time of the file """
+    st = os.stat(fref)
+    return [st.st_size,st.st_mtime_ns]
+#
+def __bytes__(v):
+    """ list/array of str or bytes => bytes array (utf-8) """
+    if isinstance(v,np.ndarray) and v.dtype.kind=='S':
+        return v
+    v = [s if type(s)==bytes else str(s).encode('utf-8') for s in v]
+    return np.array(v,dtype=bytes) if v else np.zeros(0,dtype='S1')
+#
+def __isBytes__(v):
+    return isinstance(v,np.ndarray) and v.dtype.kind=='S'
+#
+def __decode__(a,rows,asBytes=False):
+    """ a[rows] ('' for row -1) as str array (bytes array if asBytes) """
+    ok = rows>=0
+    res = np.asarray(a[np.where(ok,rows,0)]) if len(a) else np.zeros(len(rows),dtype='S1')
+    res[~ok] = b''
+    if asBytes:
+        return res
+    try:
+        return res.astype('U')      # ASCII
+    except UnicodeDecodeError:
+        return np.char.decode(res,'utf-8')
+#
+def makeSyntheticCIMREF(fref,nRec=100000,nBus=None):
+    """ write a synthetic CIMREF file (BUS and LINE tables, 2 mRID by record) """
+    nBus = nBus or nRec//3
+    with open(fref,'w',encoding='utf-8') as fo:
+        fo.write("<?xml version='1.0'?>\n<ASPENCIMREF>\n  <SYSTEMPARAMS>\n")
+        fo.write('    <OBJGUID NAME="BaseVoltage" VALUE="_BV0000"/>\n    <OBJGUID NAME="GeographicalRegion" VALUE="_GR0000"/>\n  </SYSTEMPARAMS>\n')
+        for typ,n in [('BUS',nBus),('LINE',nRec-nBus)]:
+            fo.write('  <REFDBTABLE NAME="%s" RECCOUNT="%i">\n'%(typ,n))
+            for i in range(n):
+                g = '{%s%07i-0000-0000-0000-000000000000}'%(typ[0],i)
+                if typ=='BUS':
+                    ol = "'BUS%i' %gkV"%(i,[13.8,69,132][i%3])
+                else:
+                    ol = "'BUS%i' 132kV-'BUS%i' 132kV 1"%(i%nBus,(i+1)%nBus)
+                fo.write('    <REFREC OBJGUID="%s" OLNETID="%s">\n'%(g,ol.replace("'","&apos;")))
+                fo.write('      <OBJGUID NAME="mRID" VALUE="_%s%07i"/>\n'%(typ,i))
+                fo.write('      <OBJGUID NAME="Terminal1" VALUE="_T%s%07i"/>\n'%(typ,i))
+                fo.write('    </REFREC>\n')
+            fo.write('  </REFDBTABLE>\n')
+        fo.write('</ASPENCIMREF>\n')
+#
+def checkMixedLength(ci,n=50):
+    """
+    lookups of keys one by one and in arrays of other widths than the stored keys
+    (short/long keys mixed, not found keys): same rows as the stored arrays
+    """
+    rng = np.random.default_rng(2)
+    ok = True
+    for k,fn,kr in [('ref_guid',ci.toMRID,'ref_mrid'),('ref_mrid',ci.toGUID,'ref_guid')]:
+        keys = np.asarray(getattr(ci,k))
+        if len(keys)==0:
+            continue
+        sel = rng.integers(0,len(keys),n)
+        q = [keys[i].decode('utf-8') for i in sel]
+        for i,q1 in zip(sel,q):
+            r = fn([q1])[0]
+            ok &= r!='' and fn([q1,q1+'#'*40])[0]==r
+        ok &= bool((fn(q+['?'])[:-1]!='').all()) and fn(['?'])[0]==''
+    if len(ci.bus_key):
+        key = np.asarray(ci.bus_key)[0].decode('utf-8')
+        m = __BUSID__.search(key)
+        ok &= ci.findBus([m.group(1)],[m.group(2)])[0]!='' and ci.findBus([m.group(1),'X'*60],[m.group(2),1])[0]!=''
+    return bool(ok)
+#
+def benchmark(nRec=500000,nLookup=1000000,prt=True):
+    """
+    synthetic CIMREF: build index, load (memory-mapped), bulk GUID => mRID / mRID => GUID / bus lookups
+    """
+    import tempfile,shutil
+    tmp = tempfile.mkdtemp()
+    try:
+        fref = os.path.join(tmp,'model.CIMREF')
+        makeSyntheticCIMREF(fref,nRec)
+        t = {}
+        t0 = time.time()
+        ci = CIMREF_INDEX(fref)
+        t['build'] = time.time()-t0
+        t0 = time.time()
+        ci = CIMREF_INDEX(fref)
+        t['load'] = time.time()-t0
+        rng = np.random.default_rng(1)
+        sel = rng.integers(0,len(ci.ref_guid),nLookup)
+        guids = np.asarray(ci.ref_guid)[sel]
+        t0 = time.time()
+        mrids = ci.toMRID(guids)
+        t['toMRID'] = time.time()-t0
+        t0 = time.time()
+        g2 = ci.toGUID(mrids)
+        t['toGUID'] = time.time()-t0
+        nb = len(ci.bus_key)
+        ib = rng.integers(0,nb,nLookup)
+        t0 = time.time()
+        gb = ci.findBus(['BUS%i'%i for i in ib],[[13.8,69,132][i%3] for i in ib])
+        t['findBus'] = time.time()-t0
+        t['ok'] = bool((g2==guids).all() and (gb!='').all())
+        t['mixed'] = checkMixedLength(ci)
+        if prt:
+            print('CimRefIndex benchmark: %i REFREC (%.1f MB), %i lookups'%(nRec,os.path.getsize(fref)/1e6,nLookup))
+            print('    build %.2fs, load %.3fs, toMRID %.2fs, toGUID %.2fs, findBus %.2fs (incl. keys), ok: %s, mixed length: %s'%\
+                  (t['build'],t['load'],t['toMRID'],t['toGUID'],t['findBus'],t['ok'],t['mixed']))
+        return t
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
@@ -12,7 +12,7 @@ __category__  = "OneLiner"
 __pyManager__ = "yes"
 __email__     = "support@aspeninc.com"
 __status__    = "Release"
-__version__   = "2.1.1"
+__version__   = "2.2.0"
 
 # IMPORT -----------------------------------------------------------------------
 import sys,os
@@ -27,7 +27,7 @@ import OlxAPI
 import OlxAPILib
 import OlxAPIConst
 import AppUtils
-from ctypes import c_int
+from ctypes import c_int,c_double,byref,create_string_buffer
 import sys,os,time
 import xml.etree.ElementTree as ET
 import tkinter as tk
@@ -126,6 +126,94 @@ def compare(va1,va0,valC):
     return a1,k
 
 #
+def compareArray(va1s,va0s,valC):
+    """
+    vectorized compare(): number of differences of each row (this run va1s[i], baseline va0s[i])
+    numbers: % deviation >= valC, strings: not equal
+    """
+    import numpy as np
+    n = len(va1s)
+    m = max([len(v) for v in va1s]+[len(v) for v in va0s]+[1])
+    k = np.zeros(n,dtype=np.int64)
+    for j in range(m):
+        c1 = [va[j] if j<len(va) else None for va in va1s]
+        c0 = [va[j] if j<len(va) else None for va in va0s]
+        a1,num1 = __floatColumn__(c1)
+        a0,num0 = __floatColumn__(c0)
+        num = num1 & num0
+        d = np.abs(a1-a0)
+        mn = np.minimum(np.abs(a1),np.abs(a0))
+        mx = np.maximum(np.abs(a1),np.abs(a0))
+        with np.errstate(divide='ignore',invalid='ignore'):
+            c = np.where(mn>0,d/mn*100,np.where(mx>0,d/mx*100,0.0))
+        k += num & (c>=valC)
+        # strings (one of the values is not a number), both values present
+        for i in np.nonzero(~num)[0]:
+            if j<len(va1s[i]) and j<len(va0s[i]) and str(c1[i])!=str(c0[i]):
+                k[i] += 1
+    return k
+#
+def __floatColumn__(col):
+    """ (float array, mask of values converted) of a list of values """
+    import numpy as np
+    if set(map(type,col))<=set([float,int]):
+        return np.array(col,dtype=float),np.ones(len(col),dtype=bool)
+    a = np.full(len(col),np.nan)
+    num = np.zeros(len(col),dtype=bool)
+    for i,x in enumerate(col):
+        try:
+            a[i] = float(x)
+            num[i] = True
+        except (ValueError,TypeError):
+            pass
+    return a,num
+#
+def groupFltArray(fa,nc,same=()):
+    """
+    pack arrays of fault options/connections (nonzero slots < nc) in groups of disjoint slots
+    same: slots that must be equal to be in the same group (fltOpt 12-14: auto seq. from/to, grounding admittance)
+    """
+    res,used = [],[]
+    for f1 in fa:
+        s1 = set([i for i in range(nc) if f1[i]])
+        for g,u in zip(res,used):
+            if u.isdisjoint(s1) and all([g[i]==f1[i] for i in same]):
+                for i in s1:
+                    g[i] = f1[i]
+                u.update(s1)
+                break
+        else:
+            res.append(list(f1))
+            used.append(s1)
+    return res
+#
+def benchmark(nRelay=5000,nFault=20,pDif=0.01,seed=1,prt=True):
+    """ compare of nRelay x nFault result rows: compare() by row vs compareArray """
+    import random
+    rnd = random.Random(seed)
+    va1s,va0s = [],[]
+    for i in range(nRelay*nFault):
+        v0 = ['%.1f'%rnd.uniform(0,50),round(rnd.uniform(0,2),3)]+[round(rnd.uniform(-180,5000),1) for j in range(12)]
+        v1 = v0[:]
+        if rnd.random()<pDif:
+            j = rnd.randrange(1,14)
+            v1[j] = round(v1[j]*1.05+0.1,1)
+        if rnd.random()<pDif/10:
+            v1[0] = 'NOP'
+        va1s.append(v1)
+        va0s.append(v0)
+    t0 = time.time()
+    k1 = [compare(va1,va0,0.1)[1] for va1,va0 in zip(va1s,va0s)]
+    t1 = time.time()
+    k2 = compareArray(va1s,va0s,0.1)
+    idx = [i for i in range(len(k2)) if k2[i]>0]
+    rows = [compare(va1s[i],va0s[i],0.1)[0] for i in idx]
+    t2 = time.time()
+    if prt:
+        print('FltDiffTool benchmark: %i rows, %i differing'%(len(va1s),len(idx)))
+        print('    compare by row %.3fs, compareArray + differing rows %.3fs, same counts: %s'%(t1-t0,t2-t1,k1==k2.tolist()))
+    return {'compare':t1-t0,'compareArray':t2-t1,'same':k1==k2.tolist()}
+#
 class FltDiffTool:
     def __init__(self,ft,bo=''):
         #
@@ -136,7 +224,7 @@ class FltDiffTool:
         #
 
         self.ws = AppUtils.ToolCSVExcell()
-        self.ws.readFile(fi=self.ft,delim=',')
+        self.ws.readFile(fi=self.ft,delim=',',readOnly=True) # config read in order, result sheet streamed (iterRows)
         #
         self.ws.selectSheet(nameSheet = "config")
         self.bo = bo
@@ -259,7 +347,27 @@ class FltDiffTool:
             except:
                 self.errData("Error Fault Description",row=self.rowFaultSpec[i],column=1,nc=4,sheet='config')
     #
-    def runDoFault(self):
+    def runDoFault(self,progress=None):
+        # one DoFault by group of fault locations and fault types with disjoint options
+        # progress(i,n): called after each DoFault
+        bhnd = self.bus0
+        if self.br0>0:
+            bhnd = self.br0
+        #
+        fltOpt = groupFltArray(self.fltOpt,12,same=[12,13,14])
+        fltConn = groupFltArray(self.fltConn,4)
+        n = len(self.rx)*len(fltOpt)*len(fltConn)
+        k,i = 0,0
+        for rx in self.rx:
+            for fltOpt1 in fltOpt:
+                for fltConn1 in fltConn:
+                    OlxAPILib.doFault(bhnd,fltConn1,fltOpt1,self.outageOpt,self.outageLst, rx[0], rx[1], clearPrev=1)
+                    k = self.getResult(k)
+                    i+=1
+                    if progress:
+                        progress(i,n)
+    #
+    def runDoFault_1(self):
         #
         bhnd = self.bus0
         if self.br0>0:
@@ -284,13 +392,15 @@ class FltDiffTool:
         return fdes
     #
     def getResult(self,k):
+        # all faults of the last simulation (SF_NEXT), numbered from k+1, returns the last number
         try:
             OlxAPILib.pick1stFault()
         except:
             return k
         #
-        k1 = k+1
+        k1 = k
         while True:
+            k1+=1
             s1 = OlxAPI.FaultDescriptionEx(0,2)
             fdes = getFdes(s1)
             sa = str(s1).splitlines()
@@ -302,13 +412,53 @@ class FltDiffTool:
             #
             self.get1UI_RQR(k1)
             #
-            if OlxAPIConst.OLXAPI_FAILURE==OlxAPI.PickFault(c_int(k1),c_int(9)):
+            if not OlxAPILib.pickNextFault():
                 break
-            k1+=1
-
         return k1
     #
     def get1UI_RQR(self,k1):
+        # currents/voltages of all relay groups read in buffers allocated once
+        nRound = 1
+        if not hasattr(self,'bufSC'):
+            self.bufSC = [(c_double*12)(0.0),(c_double*12)(0.0),(c_double*9)(0.0),(c_double*9)(0.0),\
+                          c_double(0.0),create_string_buffer(b'\000'*128)]
+        ci,ca,vm,va,tt,sx = self.bufSC
+        for i in range(len(self.relayGroup)):
+            rg1 = self.relayGroup[i]
+            ra1 = self.relay[i]
+            br1 = rg1[0]
+            key1 = str(k1)+"_"+rg1[2] + "_"
+            a1 = [k1,rg1[2],""]
+            #
+            if OlxAPIConst.OLXAPI_FAILURE==OlxAPI.GetSCCurrent(br1,ci,ca,4) or OlxAPIConst.OLXAPI_FAILURE==OlxAPI.GetSCVoltage(br1,vm,va,4):
+                raise OlxAPI.OlxAPIException(OlxAPI.ErrorString())
+            resBr1 = ["",""]
+            for m,a in [(ci[:3],ca[:3]),(vm[:3],va[:3])]:
+                for j in range(3):
+                    resBr1.append(round(m[j],nRound))
+                    resBr1.append(round(a[j],nRound))
+            #
+            if len(ra1)==0:
+                self.relayQR_ak_1.append(a1)
+                self.relayQR_key_1.append(key1)
+                self.relayQR_VAL_1[key1] = resBr1
+            #
+            for r1 in ra1:
+                v1 = resBr1[:]
+                #
+                key2 = key1 + r1[1]
+                a1 = [k1,rg1[2],r1[1]]
+                self.relayQR_ak_1.append(a1)
+                self.relayQR_key_1.append(key2)
+                #
+                if OlxAPIConst.OLXAPI_OK != OlxAPI.GetRelayTime(r1[0],c_double(1.0),c_int(1),byref(tt),sx):
+                    raise OlxAPI.OlxAPIException(OlxAPI.ErrorString())
+                v1[0] = (sx.value).decode("UTF-8")
+                v1[1]= round(tt.value,3)
+                #
+                self.relayQR_VAL_1[key2] = v1
+    #
+    def get1UI_RQR_1(self,k1):
         nRound = 1
         for i in range(len(self.relayGroup)):
             rg1 = self.relayGroup[i]
@@ -781,9 +931,10 @@ class FltDiffTool:
             self.errData("Value must be 'Fault No'",kr1,1,1,sheet='result')
 
         #
-        while True:
+        # rows streamed (no access cell by cell)
+        for vala in self.ws.iterRows(minRow=kr1+1,maxCol=17):
             kr1+=1
-            vala = self.ws.getValRowf(row=kr1,columnFr=1,leng=17)
+            vala = [('' if v is None else v) for v in vala]+['']*(17-len(vala))
             if vala[0]=="":
                 break
             #
@@ -805,6 +956,8 @@ class FltDiffTool:
                     else:
                         self.errData("Error: Not a number ("+vala[i]+")",kr1,i+1,1,sheet='result')
             self.relayQR_VAL_0[key1] = v1
+        else:
+            kr1+=1 # end of sheet
         #
         return kr1+1
     #
@@ -891,37 +1044,27 @@ class FltDiffTool:
             v1.extend(["This run","Baseline","% deviation"])
         ar2.append(v1)
         #
-        kdif = 0
-        #
+        # all rows compared at once, only rows with deviation (or not found) reported
+        ak,va1s,va0s = [],[],[]
         for i in range(len(self.relayQR_ak_1)):
-            a1 = self.relayQR_ak_1[i][:]
             key1 = self.relayQR_key_1[i]
-            va1 = self.relayQR_VAL_1[key1]
-            try:
-                va0 = self.relayQR_VAL_0[key1]
-            except:
-                va0 = []
-            #
-            c1,k = compare(va1,va0,valC)
-            a1.extend(c1)
-            kdif += k
-            #
-            ar2.append(a1)
-
+            ak.append(self.relayQR_ak_1[i])
+            va1s.append(self.relayQR_VAL_1[key1])
+            va0s.append(self.relayQR_VAL_0.get(key1,[]))
         # exist in baseline but not found in this run
         for i in range(len(self.relayQR_ak_0)):
-            a1 = self.relayQR_ak_0[i][:]
             key1 = self.relayQR_key_0[i]
-            va0 = self.relayQR_VAL_0[key1]
-            try:
-                va1 = self.relayQR_VAL_1[key1]
-            except:
-                va1 = []
-            if len(va1)==0:
-                c1,k = compare(va1,va0,valC)
-                a1.extend(c1)
-                kdif += k
-                #
+            if len(self.relayQR_VAL_1.get(key1,[]))==0:
+                ak.append(self.relayQR_ak_0[i])
+                va1s.append([])
+                va0s.append(self.relayQR_VAL_0[key1])
+        #
+        ka = compareArray(va1s,va0s,valC) if ak else []
+        kdif = int(sum(ka))
+        for i in range(len(ak)):
+            if ka[i]>0 or len(va1s[i])==0 or len(va0s[i])==0:
+                a1 = ak[i][:]
+                a1.extend(compare(va1s[i],va0s[i],valC)[0])
                 ar2.append(a1)
         #
         ar2.append([])
@@ -975,7 +1118,10 @@ class FltDiffTool:
             AppUtils.explorerDir(self.resFile[0], s1, PY_FILE) #open dir of fo
     #
     def run(self):
-        self.getData()
+        try:
+            self.getData()
+        finally:
+            self.ws.close() # template read: release the file
         #
         if len(self.sFaultSpec)>1:
             self.runSIMULATEFAULT()
@@ -1103,7 +1249,10 @@ class MainGUI(tk.Frame):
         try:
             self.progressUpdate(': Reading data...')
             dt = FltDiffTool(ARGVS.ft)
-            dt.getData()
+            try:
+                dt.getData()
+            finally:
+                dt.ws.close() # template read: release the file
             self.master.attributes('-topmost', True)
             v1 = 0
             #
@@ -1131,25 +1280,9 @@ class MainGUI(tk.Frame):
                 #
                 if dt.bo!='yes': # no review branch outages
                     dt.getFltOpt()
-                    #
-                    pMax = max(len(dt.rx)* len(dt.fltConn)* len(dt.fltOpt),1)
-                    sMax = "/"+str(pMax)
-                    bhnd = dt.bus0
-                    if dt.br0>0:
-                        bhnd = dt.br0
-                    #
-                    k = 0
-                    i = 0 # progress
-                    for rx in dt.rx:
-                        for fltConn in dt.fltConn:
-                            for fltOpt in dt.fltOpt:
-                                i+=1
-                                #
-                                OlxAPILib.doFault(bhnd,fltConn,fltOpt,dt.outageOpt,dt.outageLst, rx[0], rx[1], clearPrev=1)
-                                k = dt.getResult(k)
-                                #
-                                v1 = round(i/pMax*100)
-                                self.progressUpdate("Running: " +str(i) + sMax)
+                    # same batched DoFault as FltDiffTool.run()
+                    dt.runDoFault(progress=lambda i,n: self.progressUpdate("Running: %i/%i"%(i,n)))
+                    v1 = 100
             #
             if v1==100 or dt.bo=='yes':
                 self.progressUpdate("")
@@ -8,7 +8,7 @@ __license__   = "All rights reserved"
 __category__  = "Common"
 __email__     = "support@aspeninc.com"
 __status__    = "in Dev"
-__version__   = "1.1.4"
+__version__   = "1.2.0"
 
 import sys,os,time,csv
 PATH_FILE,PY_FILE = os.path.split(os.path.abspath(__file__))
@@ -26,6 +26,8 @@ PARSER_INPUTS.add_argument('-pcnt', help = ' (float) Pcnt duty threshold (with f
 PARSER_INPUTS.add_argument('-olxpath' , help = ' (str) Full pathname of the folder, where the ASPEN olxapi.dll is located',default = olxpath,type=str,metavar='')
 PARSER_INPUTS.add_argument('-olxpathpy' , help = ' (str) Full pathname of the folder where the OlxAPI Python wrapper OlxAPI.py and relevant libraries are located',default = olxpathpy,type=str,metavar='')
 PARSER_INPUTS.add_argument('-fo'  , help = ' (str) Output csv file path', default = '',type=str,metavar='')
+PARSER_INPUTS.add_argument('-np'  , help = ' (int) number of processes for faults (>1: OLR file opened in each process)', default = 1,type=int,metavar='')
+PARSER_INPUTS.add_argument('-ut'  , help = ' (int) unit test [0-ignore, 1-findNeibor compared with findNeibor_1 (with fb,fi)]', default = 0,type=int,metavar='')
 ARGVS = PARSER_INPUTS.parse_known_args()[0]
 sys.path.insert(0,ARGVS.olxpathpy)
 from OlxObj import *
@@ -49,6 +51,56 @@ def runFault(b1):
     i1p = FltSimResult[0].current()[0]
     return i3p,i1p
 #
+def runFaults(jobs,progress=None):
+    """
+    jobs: list of (gen GUID ('': no change),[bus GUID])
+    progress: function called after each bus
+    return by job list of (i3p,i1p) of bus faults with REFV of gen set to 0 (restored after)
+    """
+    res = []
+    for gGuid,bGuids in jobs:
+        g1 = OLCase.findOBJ(gGuid) if gGuid else None
+        if g1:
+            vo = g1.REFV
+            g1.REFV = 0
+            g1.postData()
+        r1 = []
+        for b in bGuids:
+            r1.append(runFault(OLCase.findOBJ(b)))
+            if progress:
+                progress()
+        res.append(r1)
+        if g1:
+            g1.REFV = vo
+            g1.postData()
+    return res
+#
+def __faultProcess__(args):
+    j,olxpath,olrFile,jobs = args
+    load_olxapi(olxpath,verbose=False)
+    OLCase.open(olrFile,1)
+    OLCase.setSystemParams({'nPrefaultV': '0'})
+    OLCase.setVerbose(0)
+    return j,runFaults(jobs)
+#
+def shardJobs(jobs,nShard,nMax):
+    """
+    jobs (gen GUID,[bus GUID],[key]) cut in units of nMax buses max,
+    units in nShard shards (largest first to the least loaded shard)
+    """
+    units = []
+    for g,ba,ka in jobs:
+        for i in range(0,len(ba),nMax):
+            units.append((g,ba[i:i+nMax],ka[i:i+nMax]))
+    units.sort(key=lambda u:-len(u[1]))
+    shards = [[] for i in range(min(nShard,len(units)))]
+    load = [0]*len(shards)
+    for u in units:
+        i = load.index(min(load))
+        shards[i].append(u)
+        load[i] += len(u[1])
+    return shards
+#
 class PG():
     def __init__(self):
         self.popup = tk.Toplevel(bg='SystemWindow')# SystemWindow sky blue
@@ -317,7 +369,7 @@ class MainGUI(tk.Frame):
             tier = self.ipTier.get()
             pcnt = self.ipPcnt.get()
             #
-            gs = GENSHARE(pbar)
+            gs = GENSHARE(pbar,ARGVS.np)
             gs.setOlxPath(olxpath)
             gs.setInput(fb,fi,pcnt,tier,fo)
             gs.findNeibor()
@@ -376,12 +428,14 @@ class MainGUI(tk.Frame):
     def flush(self):
         return
 class GENSHARE:
-    def __init__(self,pbar=None):
+    def __init__(self,pbar=None,nProcess=1):
         self.t0 = time.time()
         self.p0 = 0
         self.pbar = pbar
+        self.nProcess = max(1,nProcess)
     #
     def setOlxPath(self,olxpath):
+        self.olxpath = olxpath
         self.ver = load_olxapi(olxpath)
     #
     def setInput(self,fb,fi,pcnt,tier,fo):
@@ -427,6 +481,7 @@ class GENSHARE:
         OLCase.setSystemParams({'nPrefaultV': '0'})
         #
         self.lstBus = []
+        hBus = set()
         with open(fb, mode= 'r') as f:
             k1,k2 =0,0
             reader = csv.reader(f, delimiter=',')
@@ -459,7 +514,8 @@ class GENSHARE:
                             v2 = 0
                         #
                         if self.pcnt<v1 or self.pcnt<v2:
-                            if not b1.isInList(self.lstBus):
+                            if b1.__hnd__ not in hBus:
+                                hBus.add(b1.__hnd__)
                                 self.lstBus.append(b1)
                 #
                 if len(row)>2 and row[0]=='BUS_NO' and row[1]=='BUS':
@@ -493,6 +549,81 @@ class GENSHARE:
                 logging.info(s0+(str(k)+'/'+str(nf)).ljust(8)+str(int(k/nf*100)).ljust(3)+'%')
     #
     def findNeibor(self,pg=None):
+        """
+        neighbors of all buses in one multi-source BFS (findBusNeibor rules: tap buses crossed in the same tier),
+        bitmask of the buses of lstBus reaching each bus, terminals/TAP/GEN of each bus read once
+        generators of a bus listed by tier then by order found
+        """
+        t0 = time.time()
+        self.genNeibor = [[] for b1 in self.lstBus]
+        self.busWithGen = dict()
+        logging.info('\nFinding Neibor (tier=%i)'%self.tier)
+        #
+        data = {}   # bus hnd => (BUS,[neighbor BUS],tap,gen in service)
+        def busData(b1):
+            d = data.get(b1.__hnd__)
+            if d is None:
+                g1 = b1.GEN
+                d = data[b1.__hnd__] = [b1,None,b1.TAP>0,g1 if g1 and g1.FLAG==1 else None]
+            return d
+        def neibor(d):
+            if d[1] is None:
+                d[1] = []
+                for t1 in d[0].TERMINAL:
+                    d[1].append(t1.BUS2)
+                    b3 = t1.BUS3
+                    if b3:
+                        d[1].append(b3)
+            return d[1]
+        #
+        reach = {}  # bus hnd => bitmask of lstBus reaching the bus
+        for i,b1 in enumerate(self.lstBus):
+            busData(b1)
+            reach[b1.__hnd__] = 1<<i
+        frontier = dict(reach)
+        found = [(b1.__hnd__,1<<i) for i,b1 in enumerate(self.lstBus)] # (bus hnd,new bits) by tier, order found
+        for k in range(self.tier):
+            self.updateLabel(k+1,self.tier,0,'Find Neibor : ')
+            new = {}
+            stack = [(data[h],m) for h,m in frontier.items()]
+            stack.reverse()
+            while stack:
+                d,m = stack.pop()
+                for bn in neibor(d):
+                    hn = bn.__hnd__
+                    a = m & ~reach.get(hn,0)
+                    if a:
+                        reach[hn] = reach.get(hn,0)|a
+                        new[hn] = new.get(hn,0)|a
+                        dn = busData(bn)
+                        if dn[2]: # tap bus: neighbors in the same tier
+                            stack.append((dn,a))
+            if not new:
+                break
+            found.extend(new.items())
+            frontier = new
+        #
+        for h,a in found:
+            g1 = data[h][3]
+            if g1 is None:
+                continue
+            while a:
+                low = a & -a
+                i = low.bit_length()-1
+                a ^= low
+                self.genNeibor[i].append(g1)
+                try:
+                    self.busWithGen[g1.__hnd__].append(i)
+                except:
+                    self.busWithGen[g1.__hnd__] = [i]
+        for h1,ia in self.busWithGen.items():
+            self.busWithGen[h1] = [self.lstBus[i] for i in sorted(ia)]
+        for i,b1 in enumerate(self.lstBus):
+            if self.genNeibor[i]:
+                logging.info('\tFound %i GENERATOR '%len(self.genNeibor[i])+b1.toString())
+        self.tnei= time.time()-t0
+    #
+    def findNeibor_1(self,pg=None):
         t0 = time.time()
         self.genNeibor = []
         self.busWithGen = dict()
@@ -519,7 +650,72 @@ class GENSHARE:
                 logging.info('\tFound %i GENERATOR '%len(gn1)+b1.toString())
         self.tnei= time.time()-t0
     #
+    def checkNeibor(self):
+        """
+        findNeibor compared with findNeibor_1 (findBusNeibor bus by bus) on lstBus
+        same generators for each bus (order may differ: by tier), same buses for each generator
+        return list of differences (str)
+        """
+        self.findNeibor_1()
+        gn1 = [sorted([g1.__hnd__ for g1 in ga]) for ga in self.genNeibor]
+        bg1 = {h1:sorted([b1.__hnd__ for b1 in ba]) for h1,ba in self.busWithGen.items()}
+        self.findNeibor()
+        gn2 = [sorted([g1.__hnd__ for g1 in ga]) for ga in self.genNeibor]
+        bg2 = {h1:sorted([b1.__hnd__ for b1 in ba]) for h1,ba in self.busWithGen.items()}
+        res = []
+        for b1,v1,v2 in zip(self.lstBus,gn1,gn2):
+            if v1!=v2:
+                res.append('GENERATOR of '+b1.toString()+': %i/%i'%(len(v1),len(v2)))
+        for h1 in sorted(set(bg1.keys())|set(bg2.keys())):
+            if bg1.get(h1)!=bg2.get(h1):
+                res.append('BUS of '+GEN(hnd=h1).toString())
+        logging.info('\ncheckNeibor (tier=%i): %i buses, %i differences'%(self.tier,len(self.lstBus),len(res)))
+        for s1 in res:
+            logging.info('\t'+s1)
+        return res
+    #
     def runFault(self,var=[]):
+        """
+        faults of all buses, then with REFV=0 of each generator for its buses
+        nProcess>1: jobs in shards run by worker processes (OLR file opened in each process)
+        """
+        t0 = time.time()
+        self.resa = dict()
+        #
+        jobs = [('',[b1.GUID for b1 in self.lstBus],[str(b1.__hnd__) for b1 in self.lstBus])]
+        self.nf = len(self.lstBus)
+        for h1,ba1 in self.busWithGen.items():
+            g1 = GEN(hnd=h1)
+            logging.info('\t%i buses with '%len(ba1)+g1.toString())
+            jobs.append((g1.GUID,[b1.GUID for b1 in ba1],[str(h1)+'_'+str(b1.__hnd__) for b1 in ba1]))
+            self.nf+=len(ba1)
+        #
+        logging.info('\nRunning Fault')
+        nProcess = min(self.nProcess,self.nf)
+        #
+        k = 0
+        def collect(shard,res):
+            for u,r1 in zip(shard,res):
+                for key1,v1 in zip(u[2],r1):
+                    self.resa[key1] = v1
+        if nProcess<=1:
+            ka = [0]
+            def progress():
+                ka[0]+=1
+                self.updateLabel(ka[0],self.nf,1,'Run Fault : ')
+            collect(jobs,runFaults([u[:2] for u in jobs],progress))
+        else:
+            shards = shardJobs(jobs,4*nProcess,max(1,-(-self.nf//(4*nProcess))))
+            import multiprocessing
+            args = [(j,self.olxpath,self.fi,[u[:2] for u in shard]) for j,shard in enumerate(shards)]
+            with multiprocessing.Pool(nProcess) as pool:
+                for j,res in pool.imap_unordered(__faultProcess__,args):
+                    collect(shards[j],res)
+                    k+=sum([len(u[1]) for u in shards[j]])
+                    self.updateLabel(k,self.nf,1,'Run Fault : ')
+        self.trun = time.time()-t0
+    #
+    def runFault_1(self,var=[]):
         t0 = time.time()
         self.resa = dict()
         #
@@ -564,26 +760,27 @@ class GENSHARE:
         ares.append([])
         ares.append(['','','__3LG, (amps)__','','','','__1LG, phase A (amps)__'])
         ares.append(['Breaker bus','Generator','IA_real','IA_imag','IA_mag','','IA_real','IA_imag','IA_mag'])
-        #
+        # contributions of all (bus,generator) as arrays: base fault - fault with REFV=0, others = base - sum
+        import numpy as np
+        ia = np.array([self.resa[str(b1.__hnd__)] for b1 in self.lstBus],dtype=complex).reshape(-1,2)
+        ib = np.array([i for i in range(len(self.lstBus)) for g1 in self.genNeibor[i]],dtype=np.int64)
+        ig = np.array([self.resa[str(g1.__hnd__)+'_'+str(self.lstBus[i].__hnd__)] for i in range(len(self.lstBus)) for g1 in self.genNeibor[i]],dtype=complex).reshape(-1,2)
+        ir = ia[ib]-ig
+        ic = ia.copy()
+        np.subtract.at(ic,ib,ir)
+        #
+        k = 0
         for i in range(len(self.lstBus)):
             b1 = self.lstBus[i]
-            h1 = str(b1.__hnd__)
-            i3a = self.resa[h1][0]
-            i1a = self.resa[h1][1]
+            i3a,i1a = complex(ia[i,0]),complex(ia[i,1])
             ares.append( [b1.NAME+' '+toString(b1.KV)+'kV','',i3a.real,i3a.imag,abs(i3a),'',i1a.real,i1a.imag,abs(i1a)] )
             #
-            i3c,i1c = i3a,i1a
             for g1 in self.genNeibor[i]:
-                hgi = str(g1.__hnd__)+'_'+h1
-                i3 = self.resa[hgi][0]
-                i1 = self.resa[hgi][1]
-                i3r = i3a-i3
-                i1r = i1a-i1
-                i3c-= i3r
-                i1c-= i1r
-                #
+                i3r,i1r = complex(ir[k,0]),complex(ir[k,1])
+                k+=1
                 ares.append( ['',g1.toString(),i3r.real,i3r.imag,abs(i3r),'',i1r.real,i1r.imag,abs(i1r)] )
             #
+            i3c,i1c = complex(ic[i,0]),complex(ic[i,1])
             ares.append( ['','Others',toString(i3c.real),toString(i3c.imag),toString(abs(i3c)),'',toString(i1c.real),toString(i1c.imag),toString(abs(i1c))] )
         #
         if self.busNotFound:
@@ -606,9 +803,13 @@ class GENSHARE:
 #
 def run0GUI(): # with fb
     try:
-        gs = GENSHARE()
+        gs = GENSHARE(nProcess=ARGVS.np)
         gs.setOlxPath(ARGVS.olxpath)
         gs.setInput(ARGVS.fb,ARGVS.fi,ARGVS.pcnt,ARGVS.tier,ARGVS.fo)
+        if ARGVS.ut==1:
+            gs.checkNeibor()
+            logging.shutdown()
+            return
         # neibor
         gs.findNeibor()
         # run Fault
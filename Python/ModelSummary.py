@@ -0,0 +1,199 @@
+"""
+Purpose: Count-only statistics of OLR/OLX files without opening the case
+
+    Same dict as ASPENLib.getValSum (number of objects by type, baseMVA, AREA, ZONE):
+        - OLX : OBJCOUNT/SYSTEMPARAMS of the header (parse stopped at the first table)
+        - OLR : sidecar summary <folr>.sum.json (size/time of the OLR), made once from
+                an OLX of the same name (complete, not older than the OLR) or by olxapi.dll
+    OBJCOUNT names are the OBJTYPE of the OLX tables (ASPENLib.OBJTYPELIST): a count that
+    cannot be read is an Exception, not 0.
+    Results are also kept in memory for the process.
+
+    samples:
+        valSum = ModelSummary.summary('a.OLR',olxpath)
+        valSumA,valSumB = ModelSummary.summaryADX('a_DIFF.ADX',olxpath)
+        ModelSummary.benchmark()
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.1"
+
+import os,time,json
+
+SIDECAR = '.sum.json'
+# getValSum keys = OBJCOUNT names (OBJTYPE)
+VALSUM_KEYS = ['BUS','GEN','GENUNIT','GENW3','GENW4','LOAD','SHUNT','SHUNTUNIT','LINE','DCLINE2','SERIESRC',
+               'XFMR','XFMR3','SHIFTER','LTC','LTC3','ZCORRECT','MULINE','SWITCH','LOADUNIT','SVD','RLYGROUP',
+               'RLYOC','RLYDS','RLYD','RLYV','FUSE','RECLSR','CCGEN','BREAKER','SCHEME','AREA','ZONE']
+# all OBJCOUNT names (ASPENLib.OBJTYPELIST) + total
+OBJCOUNT_NAMES = set(VALSUM_KEYS+['COORDPAIR','COUNT'])
+__memo__ = {}
+#
+def summary(fi,olxpath='',encoding='iso8859-1',useDLL=True):
+    """
+    number of objects by type of OLR/OLX file fi (dict as ASPENLib.getValSum)
+        useDLL : False to raise an Exception instead of opening an OLR without summary
+                 (or an OLX whose header cannot be read)
+    """
+    fa = os.path.abspath(fi)
+    sig = signature(fa)
+    res = __memo__.get(fa)
+    if res is not None and res[0]==sig:
+        return dict(res[1])
+    if fa.upper().endswith('.OLX'):
+        try:
+            valSum = readOLX(fa,encoding)
+        except Exception:
+            if not useDLL:
+                raise
+            import ASPENLib # OLX header not readable: as getValSum
+            valSum = ASPENLib.getValSum(fa,olxpath)
+    else:
+        valSum = readSidecar(fa,sig)
+        if valSum is None:
+            folx = __sameOLX__(fa)
+            try:
+                valSum = readOLX(folx,encoding) if folx else None
+            except Exception:
+                if not useDLL:
+                    raise
+            if valSum is None:
+                if not useDLL:
+                    raise Exception('\nNo summary for: '+fi)
+                import ASPENLib # no OLX or OLX header not readable
+                valSum = ASPENLib.getValSum(fa,olxpath)
+            writeSidecar(fa,valSum,sig)
+    __memo__[fa] = (sig,valSum)
+    return dict(valSum)
+#
+def summaryADX(fadx,olxpath='',encoding='iso8859-1',useDLL=True):
+    """ (summary of FILEA,summary of FILEB) of ADX file, paths resolved as DataASPEN_ADX.getValFA/getValFB """
+    import AdxIndex
+    hd = AdxIndex.__header__(__head__(fadx))
+    return tuple([summary(resolvePath(fadx,hd.get('@'+k,'')),olxpath,encoding,useDLL) for k in ('FILEA','FILEB')])
+#
+def resolvePath(fadx,f):
+    """ f as written in the ADX, or f in the folder of the ADX """
+    if os.path.isfile(f):
+        return f
+    f1 = os.path.join(os.path.dirname(os.path.abspath(fadx)),os.path.basename(f.replace('\\','/')))
+    if not os.path.isfile(f1):
+        raise Exception('\nADX: '+fadx +'\n\n'+'Path name not found:\n'+f +'\nor:\n'+f1)
+    return f1
+#
+def readOLX(folx,encoding='iso8859-1'):
+    """
+    summary from OBJCOUNT/SYSTEMPARAMS of OLX header
+        Exception if OBJCOUNT or SYSTEMPARAMS BASEMVA is missing, if a name of OBJCOUNT is unknown
+        or if a key is missing while the counts do not add up to COUNT (omitted types are 0)
+    """
+    from OlxReader import readHeader
+    hd = readHeader(folx,encoding)
+    if not isinstance(hd.get('OBJCOUNT'),dict):
+        raise Exception('\nOBJCOUNT not found in OLX: '+folx)
+    oc = {k[1:]:v for k,v in hd['OBJCOUNT'].items() if k.startswith('@')}
+    unknown = sorted([k for k in oc if k not in OBJCOUNT_NAMES])
+    if unknown:
+        raise Exception('\nUnknown OBJCOUNT names in OLX: '+folx+'\n\t'+', '.join(unknown))
+    missing = [k for k in VALSUM_KEYS if k not in oc]
+    if missing and ('COUNT' not in oc or __int__(oc['COUNT'])!=sum([__int__(v) for k,v in oc.items() if k!='COUNT'])):
+        raise Exception('\nOBJCOUNT of OLX: '+folx+'\nkeys not found: '+', '.join(missing))
+    valSum = {k:__int__(oc.get(k,0)) for k in VALSUM_KEYS}
+    sp = hd.get('SYSTEMPARAMS')
+    v = sp.get('@BASEMVA') if isinstance(sp,dict) else None
+    if v is None:
+        raise Exception('\nSYSTEMPARAMS BASEMVA not found in OLX: '+folx)
+    valSum['baseMVA'] = float(v)
+    return valSum
+#
+def readSidecar(fi,sig=None):
+    """ summary of sidecar file, None if missing or fi changed """
+    try:
+        with open(fi+SIDECAR,'r') as f:
+            d = json.load(f)
+    except (OSError,ValueError):
+        return None
+    if d.get('version')!=__version__ or d.get('signature')!=(sig or signature(fi)):
+        return None
+    return d.get('valSum')
+#
+def writeSidecar(fi,valSum,sig=None):
+    """ write summary beside fi (ignored in read-only folder) """
+    try:
+        with open(fi+SIDECAR,'w') as f:
+            json.dump({'version':__version__,'signature':sig or signature(fi),'valSum':valSum},f)
+    except OSError:
+        pass
+#
+def signature(fi):
+    """ size and modification time of the file """
+    st = os.stat(fi)
+    return [st.st_size,st.st_mtime_ns]
+#
+def __sameOLX__(fi):
+    """ OLX file of same name, not older than fi and complete (__isOLX__) """
+    b = os.path.splitext(fi)[0]
+    for ext in ('.OLX','.olx'):
+        folx = b+ext
+        if os.path.isfile(folx) and os.path.getmtime(folx)>=os.path.getmtime(fi) and __isOLX__(folx):
+            return folx
+    return None
+#
+def __isOLX__(folx,size=4096):
+    """ ASPENOLXDB root at the start and closed at the end (not an other XML, not truncated) """
+    n = os.path.getsize(folx)
+    if n<len(b'<ASPENOLXDB></ASPENOLXDB>'):
+        return False
+    with open(folx,'rb') as f:
+        b0 = f.read(size)
+        f.seek(max(0,n-size))
+        b1 = f.read()
+    return b'<ASPENOLXDB' in b0 and b1.rstrip().endswith(b'</ASPENOLXDB>')
+#
+def __head__(f,size=1<<16):
+    """ bytes before the first CHANGEREC (or first size bytes) """
+    with open(f,'rb') as fi:
+        b = fi.read(size)
+    s = b.find(b'<CHANGEREC')
+    return b[:s] if s>=0 else b
+#
+def __int__(v):
+    try:
+        return int(v)
+    except (TypeError,ValueError):
+        return 0
+#
+def benchmark(nBus=200000,prt=True):
+    """
+    synthetic OLX: summary from OLX header, then OLR summary from the sidecar (new process memo)
+    """
+    import tempfile,shutil,OlxReader
+    tmp = tempfile.mkdtemp()
+    try:
+        folx,folr = os.path.join(tmp,'A.OLX'),os.path.join(tmp,'A.OLR')
+        OlxReader.makeSyntheticOLX(folx,nBus=nBus)
+        with open(folr,'wb') as f:
+            f.write(b'OLR')
+        os.utime(folx,None)
+        t = {}
+        t0 = time.time()
+        s1 = summary(folx)
+        t['OLX'] = time.time()-t0
+        t0 = time.time()
+        s2 = summary(folr,useDLL=False)
+        t['OLR first'] = time.time()-t0
+        __memo__.clear()
+        t0 = time.time()
+        s3 = summary(folr,useDLL=False)
+        t['OLR sidecar'] = time.time()-t0
+        t['same'] = s1==s2==s3
+        if prt:
+            print('ModelSummary benchmark: OLX %.1f MB, BUS=%i LINE=%i'%(os.path.getsize(folx)/1e6,s1['BUS'],s1['LINE']))
+            print('    OLX header %.1f ms, OLR first %.1f ms, OLR sidecar %.1f ms, same: %s'%(t['OLX']*1e3,t['OLR first']*1e3,t['OLR sidecar']*1e3,t['same']))
+        return t
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
@@ -23,7 +23,7 @@ __copyright__ = "Copyright 2024, Advanced Systems for Power Engineering Inc."
 __license__   = "All rights reserved"
 __category__  = "OneLiner"
 __pyManager__ = "yes"
-__version__   = "1.0.0"
+__version__   = "1.1.0"
 __email__     = "support@aspeninc.com"
 __status__    = "Release"
 
@@ -59,6 +59,45 @@ PARSER_INPUTS.add_argument('-None', help = 'Click Launch Button to run on the cu
 ARGVS = PARSER_INPUTS.parse_known_args()[0]
 
 # CORE--------------------------------------------------------------------------
+def run_checks(OlxObj,f,checks,fault_z=[999999.0,999999.0]):
+    """
+    run the checking functions, one prefault solution shared by all
+    (bus voltages, bus data and unit currents read once)
+
+    Inputs:
+        f: opened csv file, rows of each function written when it returns
+        checks: list of (function,options), option 'data' given as PREFAULT_DATA
+                is replaced by the shared data
+        fault_z: [R,X] of the fault of the prefault solution
+
+    Outputs:
+        summary: string of the summary of all functions
+        timing: list of (name,time) of the prefault solution and each function
+    """
+    import csv,time
+    writer = csv.writer(f,quoting=csv.QUOTE_ALL,lineterminator='\n')
+    anomaly_index = 1
+    full_summary = ''
+    timing = []
+    data = None
+    for func,options in checks:
+        options = dict(options)
+        if 'data' in options:
+            if data is None:
+                t0 = time.time()
+                data = options['data'](OlxObj,fault_z=fault_z)
+                timing.append(('prefault solution',time.time()-t0))
+            options['data'] = data
+        t0 = time.time()
+        summary,detail = func(OlxObj,**options)
+        full_summary += '%s\n'%(summary)
+        for k,v in detail.items():
+            writer.writerow([anomaly_index]+[str(x) for x in v.values()])
+            anomaly_index += 1
+        f.flush()
+        timing.append((func.__name__,time.time()-t0))
+    return full_summary,timing
+
 def run_prefault_check():
     
     # tools
@@ -88,6 +127,15 @@ def run_prefault_check():
         from prefault_check.check_gen_for_nonzero_prefault_current import check_gen_for_nonzero_prefault_current
         from prefault_check.check_gen_for_vref import check_gen_for_vref
         from prefault_check.check_xfmr_for_off_nominal_taps import check_xfmr_for_off_nominal_taps
+        from prefault_check.prefault_data import PREFAULT_DATA
+
+        # checking functions and their options (data: shared prefault data)
+        checks = [(check_ibr_for_nonzero_mw,{}),
+                  (check_vccs_for_nonzero_prefault_current,{'voltage_checkpoints_pu':(0.95,1.0,1.05),'data':PREFAULT_DATA}),
+                  (check_prefault_voltage_range,{'checking_range':(0.95,1.05),'data':PREFAULT_DATA}),
+                  (check_gen_for_nonzero_prefault_current,{'max_allowable_flow_mva':10.0,'data':PREFAULT_DATA}),
+                  (check_gen_for_vref,{'expected_gen_vref':1.0}),
+                  (check_xfmr_for_off_nominal_taps,{'expected_tap_min_max':(1.0,1.0)})]
 
         # return to original dir
         os.chdir(original_dir)
@@ -102,9 +150,6 @@ def run_prefault_check():
             if not output_file[-4:].lower() == '.csv':
                 output_file += '.csv'
 
-            # anomaly counter
-            anomaly_index = 1
-            
             # run the checking functions and create csv summary
             # open csv for reporting
             with open(output_file,'w') as f:
@@ -129,56 +174,13 @@ def run_prefault_check():
                 # write csv header row
                 f.write('item,function,object,area,zone,condition,quantity,expected,actual,notes\n')
 
-                # start summary string
-                full_summary = ''
-
-                # check_ibr_for_nonzero_mw
-                summary,detail = check_ibr_for_nonzero_mw(OlxObj)
-                full_summary += '%s\n'%(summary)
-                for k,v in detail.items():
-                    row_str = '"%s",'%(anomaly_index) + ','.join(['"' + str(x) + '"' for x in v.values()]) + '\n'
-                    f.write(row_str)
-                    anomaly_index += 1
-
-                # check_vccs_for_nonzero_prefault_current
-                summary,detail = check_vccs_for_nonzero_prefault_current(OlxObj, voltage_checkpoints_pu=(0.95,1.0,1.05))
-                full_summary += '%s\n'%(summary)
-                for k,v in detail.items():
-                    row_str = '"%s",'%(anomaly_index) + ','.join(['"' + str(x) + '"' for x in v.values()]) + '\n'
-                    f.write(row_str)
-                    anomaly_index += 1
-
-                # check_prefault_voltage_range
-                summary,detail = check_prefault_voltage_range(OlxObj, checking_range=(0.95,1.05))
-                full_summary += '%s\n'%(summary)
-                for k,v in detail.items():
-                    row_str = '"%s",'%(anomaly_index) + ','.join(['"' + str(x) + '"' for x in v.values()]) + '\n'
-                    f.write(row_str)
-                    anomaly_index += 1
-
-                # check_gen_for_nonzero_prefault_current
-                summary,detail = check_gen_for_nonzero_prefault_current(OlxObj, max_allowable_flow_mva=10.0)
-                full_summary += '%s\n'%(summary)
-                for k,v in detail.items():
-                    row_str = '"%s",'%(anomaly_index) + ','.join(['"' + str(x) + '"' for x in v.values()]) + '\n'
-                    f.write(row_str)
-                    anomaly_index += 1
-
-                # check_gen_for_vref
-                summary,detail = check_gen_for_vref(OlxObj, expected_gen_vref=1.0)
-                full_summary += '%s\n'%(summary)
-                for k,v in detail.items():
-                    row_str = '"%s",'%(anomaly_index) + ','.join(['"' + str(x) + '"' for x in v.values()]) + '\n'
-                    f.write(row_str)
-                    anomaly_index += 1
-
-                # check_xfmr_for_off_nominal_taps
-                summary,detail = check_xfmr_for_off_nominal_taps(OlxObj, expected_tap_min_max=(1.0,1.0))
-                full_summary += '%s\n'%(summary)
-                for k,v in detail.items():
-                    row_str = '"%s",'%(anomaly_index) + ','.join(['"' + str(x) + '"' for x in v.values()]) + '\n'
-                    f.write(row_str)
-                    anomaly_index += 1
+                # run all checking functions on the shared prefault data, rows streamed to csv
+                full_summary,timing = run_checks(OlxObj,f,checks)
+
+                # timing of each checking function
+                f.write('\n"function","time (s)"\n')
+                for name,dt in timing:
+                    f.write('"%s","%.3f"\n'%(name,dt))
                     
             # print summary
             print('\nASPEN OneLiner Prefault Voltage Check (Release V%s)'%(__version__))
@@ -192,6 +194,9 @@ def run_prefault_check():
             print('\nSummary')
             print('-'*50)
             print(full_summary)
+            for name,dt in timing:
+                print('%-45s %8.3fs'%(name,dt))
+            print()
             print('Report saved to:')
             print('%s\n\n'%(output_file))
 
@@ -1,5 +1,8 @@
+import numpy as np
+
 def check_vccs_for_nonzero_prefault_current(OlxObj,
-                                            voltage_checkpoints_pu=(0.95,1.0,1.05)):
+                                            voltage_checkpoints_pu=(0.95,1.0,1.05),
+                                            data=None):
     
     """
     Check for VCCS that have non-zero currents defined in the
@@ -17,6 +20,10 @@ def check_vccs_for_nonzero_prefault_current(OlxObj,
             tuple of per unit voltages that will be
             checked for non-zero current
 
+        data:
+            prefault_data.PREFAULT_DATA shared by the checking functions
+            (None: bus area and zone read from the objects)
+
     Outputs:
         summary: A printable string containing basic summary information
                  about the checking results
@@ -28,59 +35,25 @@ def check_vccs_for_nonzero_prefault_current(OlxObj,
     detail_dict = {}
     detail_index = 0
 
-    # function to check vccs output magnitude
-    def get_vccs_output(v,vccs_v,vccs_i,vccs_a):
-        # init output
-        vccs_i_out = 0.0
-
+    # function to check vccs output magnitude at all voltage points
+    # (linear interpolation in the table, value at the end points outside of the table)
+    def get_vccs_output(v_points,vccs_v,vccs_i,vccs_a):
         # strip away all-zero rows
         v_i_dict = {vv:ii for vv,ii,aa in zip(vccs_v,vccs_i,vccs_a) if not all([vv == 0.0,
                                                                                 ii == 0.0,
                                                                                 aa == 0.0])}
-        #print(v_i_dict)
-        vccs_v_max = max(v_i_dict.keys())
-        vccs_v_min = min(v_i_dict.keys())
-        
-        if v > vccs_v_max:
-            if v_i_dict[vccs_v_max] == 0.0:
-                vccs_i_out = 0.0
-            else:
-                vccs_i_out = v_i_dict[vccs_v_max] # i at max v
-        elif v < vccs_v_min:
-            if v_i_dict[vccs_v_min] == 0.0:
-                vccs_i_out = 0.0
-            else:
-                vccs_i_out = v_i_dict[vccs_v_min] # i at min v
-        else: # v in inside table domain
-            # v directly specified in table
-            if v in v_i_dict:
-                vccs_i_out = v_i_dict[v]
-            else:
-                # find nearest values above and below
-                for vv,ii in sorted(v_i_dict.items(),reverse=False):
-                    if vv >= v:
-                        v_up = vv
-                        i_up = ii
-                        break
-                for vv,ii in sorted(v_i_dict.items(),reverse=True):
-                    if vv <= v:
-                        v_down = vv
-                        i_down = ii
-                        break
-                # linear interpolation
-                slope = (i_up - i_down) / (v_up - v_down)
-                vccs_i_out = i_up - (v_up - v) * slope
-        return vccs_i_out
+        vv = sorted(v_i_dict.keys())
+        return np.interp(v_points,vv,[v_i_dict[v] for v in vv])
 
-    
+    v_points = np.asarray(voltage_checkpoints_pu,dtype=float)
     for gen in OlxObj.OLCase.CCGEN:
-        i_max_voltage_checkpoints_pu = max([abs(get_vccs_output(vv,gen.V,gen.I,gen.A)) for vv in voltage_checkpoints_pu])
+        i_max_voltage_checkpoints_pu = float(np.abs(get_vccs_output(v_points,gen.V,gen.I,gen.A)).max())
         if i_max_voltage_checkpoints_pu > 0.0:
-
+            bus = gen.BUS
             detail_dict[detail_index] = {'function':'check_vccs_for_nonzero_prefault_current(voltage_checkpoints_pu=%s)'%(str(voltage_checkpoints_pu)),
                                            'object':gen.toString(),
-                                           'area':gen.BUS.AREANO,
-                                           'zone':gen.BUS.ZONENO,
+                                           'area':bus.AREANO if data is None else data.area(bus),
+                                           'zone':bus.ZONENO if data is None else data.zone(bus),
                                            'condition':'vccs_prefault_current',
                                            'quantity':'gen.current.amps',
                                            'expected':0.0,
@@ -0,0 +1,84 @@
+import numpy as np
+
+class PREFAULT_DATA:
+
+    """
+    Shared prefault data of the checking functions: one prefault
+    solution (high impedance 3LG fault at the highest kV bus), all
+    bus data and bus voltages read once into arrays, unit currents
+    and bus neighbors read once on first use
+
+    Inputs:
+        OlxObj:
+            instance of the ASPEN OneLiner OlxObj API
+            where the OLCase object is already loaded
+
+        fault_z:
+            list of [R,X] of the fault impedance (Ohm)
+
+    Usage:
+        data = PREFAULT_DATA(OlxObj)
+        data.voltage_pu(bus), data.area(bus), data.current_pos(gen)
+    """
+
+    def __init__(self,OlxObj,fault_z=[999999.0,999999.0]):
+        self.OlxObj = OlxObj
+        self.fault_z = list(fault_z)
+        self.bus = list(OlxObj.OLCase.BUS)
+        self.bus_row = {b.__hnd__:i for i,b in enumerate(self.bus)}
+        self.bus_kv = np.array([b.KV for b in self.bus],dtype=float)
+        self.bus_area = np.array([b.AREANO for b in self.bus],dtype=np.int64)
+        self.bus_zone = np.array([b.ZONENO for b in self.bus],dtype=np.int64)
+        self.bus_name = [b.NAME for b in self.bus]
+        self.__neighbors = {}
+        self.__currents = {}
+
+        # high kV fault bus (first bus of highest kV)
+        fault_bus = self.bus[int(np.argmax(self.bus_kv))]
+        fault_spec = OlxObj.SPEC_FLT.Classical(obj=fault_bus,fltApp='BUS',fltConn='3LG',Z=self.fault_z)
+        OlxObj.OLCase.simulateFault(fault_spec,1) # (0/1) 1 = clear previous result flag
+        self.result = OlxObj.FltSimResult[0]
+        self.converged = self.result.CONVERGED
+
+        # positive sequence voltage of all buses (kV l-n), pu
+        self.bus_v = np.array([self.result.voltageSeq(b)[1] for b in self.bus],dtype=complex)
+        base = self.bus_kv/(3.0**(0.5))
+        self.bus_vpu = np.divide(np.abs(self.bus_v),base,out=np.zeros(len(base)),where=base>0)
+
+    def row(self,bus):
+        return self.bus_row[bus.__hnd__]
+
+    def voltage_pu(self,bus):
+        return float(self.bus_vpu[self.row(bus)])
+
+    def voltage_kv(self,bus):
+        return abs(complex(self.bus_v[self.row(bus)]))
+
+    def area(self,bus):
+        return int(self.bus_area[self.row(bus)])
+
+    def zone(self,bus):
+        return int(self.bus_zone[self.row(bus)])
+
+    def name(self,bus):
+        return self.bus_name[self.row(bus)]
+
+    def kv(self,bus):
+        return float(self.bus_kv[self.row(bus)])
+
+    def neighbors(self,bus,tiers=5):
+        """ number of buses within tiers of bus (cached by bus) """
+        k = (bus.__hnd__,tiers)
+        if k not in self.__neighbors:
+            self.__neighbors[k] = len(bus.findBusNeibor(tiers))
+        return self.__neighbors[k]
+
+    def current_pos(self,obj):
+        """ positive sequence current magnitude (amps) of a unit (currentSeq read once by object) """
+        k = obj.__hnd__
+        if k not in self.__currents:
+            self.__currents[k] = abs(self.result.currentSeq(obj)[1])
+        return self.__currents[k]
+
+def main():
+    pass
@@ -0,0 +1,264 @@
+"""
+Purpose: Vectorized inverse-time overcurrent curve evaluator (NumPy, no OlxAPI.dll)
+
+    Operating times of arrays of RLYOCG/RLYOCP relays x arrays of fault currents in one call,
+    for the standard inverse-time curves:
+
+        t = TIMEMULT*TDIAL*(A/(M^P-1)+B) + TIMEADD      M = Isec/PICKUPTAP
+
+        IEC 60255   : IEC-SI, IEC-VI, IEC-EI, IEC-LTI            (B=0)
+        IEEE C37.112: IEEE-MI, IEEE-VI, IEEE-EI
+        US          : U1 (MI), U2 (CO-8 I), U3 (CO-9 VI), U4 (CO-11 EI), U5 (CO-2 STI)
+
+    Instantaneous (INSTSETTING) and definite time (DTPICKUP/DTDELAY) elements are applied
+    with DTTIMEMULT/DTTIMEADD, MINTIME limits the inverse-time element.
+    Relays with a curve not in CURVES (library curves) give NaN: use GetRelayTime for these.
+
+    samples:
+        rl = OCCurve.OC_RELAYS.fromOLR()                 # all RLYOCG+RLYOCP of the opened case
+        t = rl.opTime([1000,2000,5000])                  # array nRelay x 3 (s), primary A
+        t = rl.opTime(Isec,secondary=True)               # Isec: array nRelay x nCurrent
+        OCCurve.recordRelayTime('SAMPLE30.OLR','SAMPLE30_RelayTime.csv',olxpath=olxpath)
+        err = OCCurve.checkRelayTime('SAMPLE30_RelayTime.csv',rtol=0.01)
+        err = OCCurve.checkRelayTime(OCCurve.FIXTURE)   # fixture OCCurve_ut_REF.csv (CO/U/IEEE/IEC curves)
+
+    OCCurve_ut_REF.csv has the format of recordRelayTime, one row by relay type and multiple of pickup,
+    TIME from the published curve equations (IEEE C37.112, US U1-U5 with CO-8/9/11/2 names, IEC 60255)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.1"
+
+import os,csv,re
+import numpy as np
+
+NO_TRIP = 9999.0 # same value as GetRelayTime for a relay that does not operate
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),'OCCurve_ut_REF.csv')
+#
+# name : (A, B, P)  t = TD*(A/(M^P-1)+B)
+CURVES = {
+'IEC-SI'  : (0.14   ,0.0    ,0.02),
+'IEC-VI'  : (13.5   ,0.0    ,1.0 ),
+'IEC-EI'  : (80.0   ,0.0    ,2.0 ),
+'IEC-LTI' : (120.0  ,0.0    ,1.0 ),
+'IEEE-MI' : (0.0515 ,0.114  ,0.02),
+'IEEE-VI' : (19.61  ,0.491  ,2.0 ),
+'IEEE-EI' : (28.2   ,0.1217 ,2.0 ),
+'U1'      : (0.0104 ,0.0226 ,0.02),
+'U2'      : (5.95   ,0.180  ,2.0 ),
+'U3'      : (3.88   ,0.0963 ,2.0 ),
+'U4'      : (5.64   ,0.02434,2.0 ),
+'U5'      : (0.00342,0.00262,0.02)}
+CURVE_NAMES = list(CURVES.keys())
+#
+# TYPE strings of relays => CURVES name (upper case, without space, '_' and '.')
+CURVE_ALIAS = {
+'SI':'IEC-SI','IECSI':'IEC-SI','IECSTANDARDINVERSE':'IEC-SI','IEC-A':'IEC-SI','C1':'IEC-SI',
+'VI':'IEC-VI','IECVI':'IEC-VI','IECVERYINVERSE':'IEC-VI','IEC-B':'IEC-VI','C2':'IEC-VI',
+'EI':'IEC-EI','IECEI':'IEC-EI','IECEXTREMELYINVERSE':'IEC-EI','IEC-C':'IEC-EI','C3':'IEC-EI',
+'LTI':'IEC-LTI','IECLTI':'IEC-LTI','IECLONGTIMEINVERSE':'IEC-LTI','C4':'IEC-LTI',
+'MI':'IEEE-MI','IEEEMI':'IEEE-MI','IEEEMODERATELYINVERSE':'IEEE-MI',
+'IEEEVI':'IEEE-VI','IEEEVERYINVERSE':'IEEE-VI',
+'IEEEEI':'IEEE-EI','IEEEEXTREMELYINVERSE':'IEEE-EI',
+'U-1':'U1',
+'CO-8':'U2','CO8':'U2','U-2':'U2',
+'CO-9':'U3','CO9':'U3','U-3':'U3',
+'CO-11':'U4','CO11':'U4','U-4':'U4',
+'CO-2':'U5','CO2':'U5','U-5':'U5','STI':'U5'}
+#
+OC_DTYPE = np.dtype([('curve'    ,'i2'), # index in CURVE_NAMES, -1 if not a standard curve
+                     ('ct'       ,'f8'), # CT ratio
+                     ('tap'      ,'f8'), # PICKUPTAP (sec. A)
+                     ('tdial'    ,'f8'),
+                     ('tmult'    ,'f8'),
+                     ('tadd'     ,'f8'),
+                     ('minTime'  ,'f8'),
+                     ('inst'     ,'f8'), # INSTSETTING (sec. A), 0: not used
+                     ('instDelay','f8'),
+                     ('dtPickup' ,'f8',5),
+                     ('dtDelay'  ,'f8',5),
+                     ('dtMult'   ,'f8'),
+                     ('dtAdd'    ,'f8')])
+#
+SETTING_FIELDS = ['TYPE','CT','PICKUPTAP','TDIAL','TIMEMULT','TIMEADD','MINTIME','INSTSETTING',\
+                  'DTPICKUP','DTDELAY','DTTIMEMULT','DTTIMEADD']
+#
+def curveName(sType):
+    """ CURVES name of a relay TYPE string, '' if not a standard curve """
+    s1 = re.sub(r'[\s_\.]','',str(sType).upper())
+    if s1 in CURVES:
+        return s1
+    if s1 in CURVE_ALIAS:
+        return CURVE_ALIAS[s1]
+    s2 = s1.replace('-','')
+    for k in CURVES.keys():
+        if k.replace('-','')==s2:
+            return k
+    return CURVE_ALIAS.get(s2,'')
+#
+class OC_RELAYS:
+    """
+    Settings of a list of overcurrent relays in columnar form
+
+        .guid : list of relay GUID (or user key)
+        .type : list of relay TYPE string
+        .data : structured array (OC_DTYPE)
+    """
+    def __init__(self,settings):
+        """
+        settings: list of dict with keys SETTING_FIELDS (+'GUID','INSTDELAY' optional)
+        """
+        self.guid = [s1.get('GUID','') for s1 in settings]
+        self.type = [str(s1.get('TYPE','')) for s1 in settings]
+        self.data = np.zeros(len(settings),dtype=OC_DTYPE)
+        for i,s1 in enumerate(settings):
+            c1 = curveName(s1.get('TYPE',''))
+            d = self.data[i:i+1]
+            d['curve'] = CURVE_NAMES.index(c1) if c1 else -1
+            d['ct'] = __float__(s1.get('CT'),1.0) or 1.0
+            d['tap'] = __float__(s1.get('PICKUPTAP'))
+            d['tdial'] = __float__(s1.get('TDIAL'))
+            d['tmult'] = __float__(s1.get('TIMEMULT'),1.0)
+            d['tadd'] = __float__(s1.get('TIMEADD'))
+            d['minTime'] = __float__(s1.get('MINTIME'))
+            d['inst'] = __float__(s1.get('INSTSETTING'))
+            d['instDelay'] = __float__(s1.get('INSTDELAY'))
+            d['dtPickup'] = __float5__(s1.get('DTPICKUP'))
+            d['dtDelay'] = __float5__(s1.get('DTDELAY'))
+            d['dtMult'] = __float__(s1.get('DTTIMEMULT'),1.0)
+            d['dtAdd'] = __float__(s1.get('DTTIMEADD'))
+    #
+    @staticmethod
+    def fromOLR(relays=None):
+        """
+        read settings of relays in the opened OLR file (OlxObj)
+        relays : list of OlxObj.RLYOCG/RLYOCP (None: all in network)
+        """
+        import OlxObj
+        import OlxAPILib
+        from OlxAPIConst import OG_dInstDelay,OP_dInstDelay
+        if relays is None:
+            relays = OlxObj.OLCase.RLYOCG+OlxObj.OLCase.RLYOCP
+        settings = []
+        for r1 in relays:
+            s1 = r1.getData(SETTING_FIELDS)
+            s1['GUID'] = r1.GUID
+            code = OG_dInstDelay if type(r1)==OlxObj.RLYOCG else OP_dInstDelay
+            s1['INSTDELAY'] = OlxAPILib.getEquipmentData([r1.__hnd__],code)[0]
+            settings.append(s1)
+        return OC_RELAYS(settings)
+    #
+    def __len__(self):
+        return len(self.data)
+    #
+    def opTime(self,current,secondary=False,noTrip=NO_TRIP):
+        """
+        Operating times of all relays
+
+        Parameters
+        ----------
+        current : array (nCurrent) same currents for all relays
+                  or array (nRelay x nCurrent) current of each relay
+        secondary : False: currents in primary A (divided by CT), True: secondary A
+
+        Returns
+        -------
+        array nRelay x nCurrent (s), noTrip if the relay does not operate,
+        NaN for relays with a curve not in CURVES
+        """
+        d = self.data
+        i1 = np.asarray(current,dtype=float)
+        if i1.ndim==1:
+            i1 = np.broadcast_to(i1,(len(d),len(i1)))
+        isec = i1 if secondary else i1/d['ct'][:,None]
+        #
+        cv = d['curve']
+        coef = np.array(list(CURVES.values())+[(np.nan,np.nan,np.nan)])
+        a,b,p = [coef[cv,k][:,None] for k in range(3)] # curve -1 => NaN
+        with np.errstate(divide='ignore',invalid='ignore',over='ignore'):
+            m = isec/d['tap'][:,None]
+            t = (d['tmult']*d['tdial'])[:,None]*(a/(np.power(m,p)-1.0)+b)+d['tadd'][:,None]
+            t = np.maximum(t,d['minTime'][:,None])
+            t = np.where(m>1.0,t,np.where(np.isnan(a),np.nan,noTrip))
+        # instantaneous and definite time elements
+        dm,da = d['dtMult'][:,None],d['dtAdd'][:,None]
+        inst = d['inst'][:,None]
+        t = np.where((inst>0)&(isec>=inst),np.minimum(t,dm*d['instDelay'][:,None]+da),t)
+        for k in range(5):
+            pk = d['dtPickup'][:,k][:,None]
+            t = np.where((pk>0)&(isec>=pk),np.minimum(t,dm*d['dtDelay'][:,k][:,None]+da),t)
+        return t
+#
+def __float__(v,default=0.0):
+    try:
+        return float(v)
+    except:
+        return default
+#
+def __float5__(v):
+    try:
+        return [float(v[k]) for k in range(5)]
+    except:
+        return [0.0]*5
+#
+def recordRelayTime(olrFile,fcsv,olxpath='',mults=[0.5,1.0,2.0],relays=None):
+    """
+    Record a fixture of GetRelayTime for RLYOCG/RLYOCP relays (requires OlxAPI.dll)
+
+    For each relay: close-in fault at its relay group (3LG for RLYOCP, 1LG:A for RLYOCG),
+    operating time and operating quantity (TOC=value, sec. A) for each multiplier.
+    """
+    import OlxObj
+    OlxObj.setVerbose(0)
+    OlxObj.OLCase.open(olrFile,1,olxpath=olxpath)
+    if relays is None:
+        relays = OlxObj.OLCase.RLYOCG+OlxObj.OLCase.RLYOCP
+    rl = OC_RELAYS.fromOLR(relays)
+    with open(fcsv,'w',newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['GUID']+SETTING_FIELDS+['INSTDELAY','MULT','ISEC','TIME','DEVICE'])
+        for i,r1 in enumerate(relays):
+            fc = '1LG:A' if type(r1)==OlxObj.RLYOCG else '3LG'
+            OlxObj.OLCase.simulateFault(OlxObj.SPEC_FLT.Classical(obj=r1.RLYGROUP,fltApp='Close-In',fltConn=fc),1)
+            s1 = r1.getData(SETTING_FIELDS)
+            row = [r1.GUID]+[(' '.join([str(v) for v in s1[k]]) if type(s1[k])==list else s1[k]) for k in SETTING_FIELDS]
+            row.append(float(rl.data['instDelay'][i]))
+            for mult in mults:
+                t,sx = OlxObj.FltSimResult[0].optime(r1,mult,0)
+                mt = re.search(r'(TOC|IOC)=([\d\.eE\+\-]+)',sx)
+                w.writerow(row+[mult,float(mt.group(2)) if mt else '',t,sx])
+#
+def readRelayTime(fcsv):
+    """ read fixture of recordRelayTime: (OC_RELAYS of rows, Isec array, GetRelayTime array) """
+    settings,isec,tdll = [],[],[]
+    with open(fcsv,'r') as f:
+        for r in csv.DictReader(f):
+            if not r['ISEC']:
+                continue
+            for k in ['DTPICKUP','DTDELAY']:
+                r[k] = r[k].split()
+            settings.append(r)
+            isec.append(float(r['ISEC']))
+            tdll.append(float(r['TIME']))
+    return OC_RELAYS(settings),np.array(isec),np.array(tdll)
+#
+def checkRelayTime(fcsv,rtol=0.01,prt=True):
+    """
+    compare opTime with a GetRelayTime fixture (recordRelayTime)
+    return max relative difference on relays with a standard curve
+    """
+    rl,isec,tdll = readRelayTime(fcsv)
+    t = rl.opTime(isec[:,None],secondary=True)[:,0]
+    ok = ~np.isnan(t)
+    tripA,tripB = t[ok]<NO_TRIP,tdll[ok]<NO_TRIP
+    err = np.abs(t[ok]-tdll[ok])/np.maximum(tdll[ok],1e-3)
+    err[tripA!=tripB] = np.inf
+    err[(~tripA)&(~tripB)] = 0.0
+    emax = float(np.max(err)) if len(err) else 0.0
+    if prt:
+        print('checkRelayTime: %i rows, %i standard curve, %i > rtol, max error %.3g'%(len(t),int(ok.sum()),int((err>rtol).sum()),emax))
+    return emax
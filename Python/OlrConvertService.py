@@ -0,0 +1,235 @@
+"""
+Purpose: Batch converter service OLR <=> OLX,DXT and 2 OLR/OLX => ADX
+
+    Jobs (same pi lists as ASPENLib.OlrConverter) run on a bounded pool of worker processes.
+    Each worker initializes its backend once (olxapi.dll stays loaded between jobs) instead
+    of one subprocess per large file.
+
+    A job is skipped if its output is still valid: a sidecar file <output>.conv.json keeps the
+    content hash (sha1) of the inputs and the size/time of the output written.
+    Each job reports status, time, peak memory of the worker and error.
+
+    Backends:
+        DLL_BACKEND(olxpath)        : olxapi.dll (ASPENLib.__OlrConverter), OLX+OLX=>ADX by OlxDiff
+        STANDIN_BACKEND(delay,perMB): no DLL, output = copy of inputs (tests/benchmarks on Linux)
+
+    samples:
+        jobs = [['a.OLR','a.OLX'],['b.OLR','b.DXT'],['a.OLR','b.OLR','ab.ADX']]
+        res = OlrConvertService.runJobs(jobs,OlrConvertService.DLL_BACKEND(olxpath),nProcess=3)
+        OlrConvertService.printReport(res)
+        OlrConvertService.benchmark(nJob=12,nProcess=4)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,sys,time,json,hashlib,shutil
+from collections import namedtuple
+
+CONVERT_RESULT = namedtuple('CONVERT_RESULT',['pi','status','time','peakMB','pid','error'])
+STATUS_DONE,STATUS_SKIPPED,STATUS_FAILED = 'done','skipped','failed'
+SIDECAR = '.conv.json'
+#
+class DLL_BACKEND:
+    """ conversion by olxapi.dll, initialized once per worker """
+    name = 'olxapi'
+    def __init__(self,olxpath=''):
+        self.olxpath = olxpath
+    #
+    def init(self):
+        import OlxAPI
+        OlxAPI.InitOlxAPI(self.olxpath,prt=False)
+    #
+    def convert(self,pi):
+        import ASPENLib
+        getattr(ASPENLib,'__OlrConverter')(pi,self.olxpath)
+#
+class STANDIN_BACKEND:
+    """
+    stand-in converter without DLL (output = inputs copied), for tests and benchmarks
+        delay : fixed time by job (s), as DLL file open
+        perMB : time by MB of inputs (s)
+    """
+    name = 'standin'
+    def __init__(self,delay=0.0,perMB=0.0):
+        self.delay = delay
+        self.perMB = perMB
+        self.nInit = 0
+    #
+    def init(self):
+        self.nInit += 1
+    #
+    def convert(self,pi):
+        size = sum([os.path.getsize(f) for f in pi[:-1]])
+        time.sleep(self.delay+self.perMB*size/1e6)
+        with open(pi[-1],'wb') as fo:
+            for f in pi[:-1]:
+                with open(f,'rb') as fi:
+                    shutil.copyfileobj(fi,fo)
+#
+__backend__ = None
+#
+def __initWorker__(backend):
+    global __backend__
+    __backend__ = backend
+    __backend__.init()
+#
+def runJobs(jobs,backend,nProcess=1,force=False,verbose=False):
+    """
+    run conversion jobs
+
+    Parameters
+    ----------
+    jobs     : list of pi [fi,fo] or [fi1,fi2,fadx] (ASPENLib.OlrConverter)
+    backend  : DLL_BACKEND or STANDIN_BACKEND
+    nProcess : max number of worker processes
+               (multiprocessing: call from if __name__ == '__main__' when nProcess>1)
+    force    : True to convert even if the output is valid
+
+    Returns
+    -------
+    list of CONVERT_RESULT (order of jobs)
+    """
+    res = [None]*len(jobs)
+    # largest jobs first for a better balance of the workers
+    order = sorted(range(len(jobs)),key=lambda i:-sum([__size__(f) for f in jobs[i][:-1]]))
+    args = [(i,list(jobs[i]),backend.name,force) for i in order]
+    if nProcess<=1 or len(jobs)<=1:
+        __initWorker__(backend)
+        for a1 in args:
+            i,r1 = __runJob__(a1)
+            res[i] = r1
+            if verbose:
+                __printResult__(r1)
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(min(nProcess,len(jobs)),initializer=__initWorker__,initargs=(backend,)) as pool:
+            for i,r1 in pool.imap_unordered(__runJob__,args):
+                res[i] = r1
+                if verbose:
+                    __printResult__(r1)
+    return res
+#
+def __runJob__(args):
+    i,pi,backendName,force = args
+    t0 = time.time()
+    try:
+        sig = __inputSignature__(pi,backendName)
+        if not force and isValid(pi,sig):
+            return i,CONVERT_RESULT(pi,STATUS_SKIPPED,time.time()-t0,peakRSS(),os.getpid(),'')
+        fside = pi[-1]+SIDECAR
+        if os.path.isfile(fside):
+            os.remove(fside)
+        __backend__.convert(pi)
+        if not os.path.isfile(pi[-1]):
+            raise Exception("OneLiner data conversion failed.")
+        st = os.stat(pi[-1])
+        sig['output'] = [st.st_size,st.st_mtime_ns]
+        with open(fside,'w') as f:
+            json.dump(sig,f)
+        return i,CONVERT_RESULT(pi,STATUS_DONE,time.time()-t0,peakRSS(),os.getpid(),'')
+    except Exception as err:
+        return i,CONVERT_RESULT(pi,STATUS_FAILED,time.time()-t0,peakRSS(),os.getpid(),str(err))
+#
+def isValid(pi,sig=None):
+    """ True if output pi[-1] exists and was converted from the same inputs (content hash) """
+    fo,fside = pi[-1],pi[-1]+SIDECAR
+    if not (os.path.isfile(fo) and os.path.isfile(fside)):
+        return False
+    try:
+        with open(fside,'r') as f:
+            old = json.load(f)
+    except ValueError:
+        return False
+    if sig is None:
+        sig = __inputSignature__(pi,old.get('backend'),old)
+    st = os.stat(fo)
+    return old.get('output')==[st.st_size,st.st_mtime_ns] and all([old.get(k)==sig[k] for k in ['version','backend','inputs']])
+#
+def __inputSignature__(pi,backendName,old=None):
+    """ sha1 of inputs (reused from the sidecar if size/time of the input did not change) """
+    if old is None:
+        try:
+            with open(pi[-1]+SIDECAR,'r') as f:
+                old = json.load(f)
+        except (OSError,ValueError):
+            old = {}
+    oldIn = {d[0]:d for d in old.get('inputs',[])}
+    inputs = []
+    for f in pi[:-1]:
+        fa = os.path.abspath(f)
+        st = os.stat(f)
+        d = oldIn.get(fa)
+        if d is None or d[1]!=st.st_size or d[2]!=st.st_mtime_ns:
+            d = [fa,st.st_size,st.st_mtime_ns,contentHash(f)]
+        inputs.append(list(d))
+    return {'version':__version__,'backend':backendName,'inputs':inputs}
+#
+def contentHash(f):
+    h = hashlib.sha1()
+    with open(f,'rb') as fi:
+        while True:
+            b = fi.read(1<<20)
+            if not b:
+                break
+            h.update(b)
+    return h.hexdigest()
+#
+def __size__(f):
+    try:
+        return os.path.getsize(f)
+    except OSError:
+        return 0
+#
+def peakRSS():
+    """ peak resident memory of the process (MB), None if not available """
+    from OlxReader import peakRSS
+    return peakRSS()
+#
+def __printResult__(r1):
+    pk = '%8.1f'%r1.peakMB if r1.peakMB is not None else '     n/a'
+    print('%-8s %8.2fs %s MB pid=%-6i %s %s'%(r1.status,r1.time,pk,r1.pid,' '.join([os.path.basename(f) for f in r1.pi]),r1.error))
+#
+def printReport(res):
+    """ table of job results and totals """
+    print('status       time  peak RSS  worker  job')
+    for r1 in res:
+        __printResult__(r1)
+    n = {s:len([r1 for r1 in res if r1.status==s]) for s in [STATUS_DONE,STATUS_SKIPPED,STATUS_FAILED]}
+    print('jobs: %i done, %i skipped, %i failed, sum of job time %.2fs'%(n[STATUS_DONE],n[STATUS_SKIPPED],n[STATUS_FAILED],sum([r1.time for r1 in res])))
+#
+def benchmark(nJob=12,sizeMB=20,delay=0.5,perMB=0.02,nProcess=4,prt=True):
+    """
+    stand-in backend on synthetic files: serial vs pool, then second run (all skipped)
+    """
+    import tempfile
+    tmp = tempfile.mkdtemp()
+    try:
+        jobs = []
+        for i in range(nJob):
+            fi = os.path.join(tmp,'f%i.OLR'%i)
+            with open(fi,'wb') as f:
+                f.write(os.urandom(int(sizeMB*1e6*(1+i%3)/2)))
+            jobs.append([fi,os.path.join(tmp,'f%i.OLX'%i)])
+        backend = STANDIN_BACKEND(delay,perMB)
+        t = {}
+        t0 = time.time()
+        runJobs(jobs,backend,nProcess=1,force=True)
+        t['serial'] = time.time()-t0
+        t0 = time.time()
+        runJobs(jobs,backend,nProcess=nProcess,force=True)
+        t['pool'] = time.time()-t0
+        t0 = time.time()
+        res = runJobs(jobs,backend,nProcess=nProcess)
+        t['cached'] = time.time()-t0
+        t['allSkipped'] = all([r1.status==STATUS_SKIPPED for r1 in res])
+        if prt:
+            print('OlrConvertService benchmark: %i jobs, serial %.2fs, pool(%i) %.2fs, second run %.2fs (all skipped: %s)'%\
+                  (nJob,t['serial'],nProcess,t['pool'],t['cached'],t['allSkipped']))
+        return t
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
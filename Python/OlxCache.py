@@ -0,0 +1,342 @@
+"""
+Purpose: Columnar on-disk cache of ASPEN OLX files
+
+    An OLX file is converted once (OlxReader) into one table per object type, with one
+    dictionary-encoded column per field:
+        <field>.codes.npy : int32 index in the dictionary of each record (-1: field not in record)
+        <field>.blob.npy  : dictionary, utf-8 values concatenated
+        <field>.off.npy   : dictionary, offsets of values in the decoded blob
+    All arrays are loaded memory-mapped: only the types and columns used are read.
+
+    The cache entry is keyed by the content hash of the OLX file and the parser version,
+    so a modified OLX file is converted again automatically. The cache folder is kept
+    under a size budget, least recently used entries are evicted first.
+
+    samples:
+        tb = OlxCache.load('SAMPLE30.OLX')                        # OLX_TABLES (converted if needed)
+        bus = tb.table('BUS')
+        kv = bus.float('BS_KVNOMINAL')                             # numpy array
+        area = bus.column('BS_AREANO')                             # numpy array of str
+        for d1 in tb.table('LINE').records(['TERMGUID1','TERMGUID2']):
+            ...
+        OlxCache.setCacheDir('c:/tmp/olxcache',budgetMB=4096)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,time,json,hashlib,shutil,tempfile
+from array import array
+import numpy as np
+import OlxReader
+
+PARSER_VERSION = 'OlxReader-%s/OlxCache-%s'%(OlxReader.__version__,__version__)
+CACHE_DIR = os.environ.get('OLXCACHE_DIR',os.path.join(tempfile.gettempdir(),'OlxCache'))
+CACHE_BUDGET_MB = 2048
+INDEX = 'index.json'
+#
+ATTR_OBJGUID = '__OBJGUID__'  # OBJGUID attribute of OLXREC
+ATTR_OLNETID = '__OLNETID__'  # OLNETID attribute of OLXREC
+#
+def setCacheDir(cacheDir,budgetMB=None):
+    """ folder of the cache and size budget (MB) """
+    global CACHE_DIR,CACHE_BUDGET_MB
+    CACHE_DIR = cacheDir
+    if budgetMB is not None:
+        CACHE_BUDGET_MB = budgetMB
+#
+class OLX_TABLE:
+    """
+    Columnar table of one object type (memory-mapped, columns loaded on first use)
+
+        .objtype : OBJTYPE
+        .n       : number of records
+        .fields  : list of field names (file order)
+        .olnet   : set of fields in OLNET (others are DATAFIELD)
+    """
+    def __init__(self,folder,objtype,meta):
+        self.folder = folder
+        self.objtype = objtype
+        self.n = meta['n']
+        self.fields = meta['fields']
+        self.olnet = set(meta['olnet'])
+        self.__json__ = set(meta['json'])
+        self.__codes__ = {}
+        self.__dicts__ = {}
+    #
+    def __path__(self,field,ext):
+        return os.path.join(self.folder,'%s.%s.npy'%(field,ext))
+    #
+    def codes(self,field):
+        """ int32 array: index in dictionary(field) of each record, -1 if missing """
+        try:
+            return self.__codes__[field]
+        except KeyError:
+            if self.n==0 or (field not in self.fields and field not in (ATTR_OBJGUID,ATTR_OLNETID)):
+                c1 = np.full(self.n,-1,dtype=np.int32)
+            else:
+                c1 = np.load(self.__path__(field,'codes'),mmap_mode='r')
+            self.__codes__[field] = c1
+            return c1
+    #
+    def dictionary(self,field):
+        """ list of distinct values of field """
+        try:
+            return self.__dicts__[field]
+        except KeyError:
+            if self.n==0 or (field not in self.fields and field not in (ATTR_OBJGUID,ATTR_OLNETID)):
+                d1 = []
+            else:
+                s1 = np.load(self.__path__(field,'blob')).tobytes().decode('utf-8')
+                off = np.load(self.__path__(field,'off'))
+                d1 = [s1[off[i]:off[i+1]] for i in range(len(off)-1)]
+                if field in self.__json__:
+                    d1 = [json.loads(v) for v in d1]
+            self.__dicts__[field] = d1
+            return d1
+    #
+    def column(self,field,missing=''):
+        """ array (object) of values of field """
+        d1 = np.array(self.dictionary(field)+[missing],dtype=object)
+        return d1[self.codes(field)] # code -1 => missing
+    #
+    def float(self,field,missing=np.nan):
+        """ float64 array of values of field (missing or not a number => missing) """
+        v = np.full(len(self.dictionary(field))+1,missing,dtype=float)
+        for i,s1 in enumerate(self.dictionary(field)):
+            try:
+                v[i] = float(s1)
+            except:
+                pass
+        return v[self.codes(field)]
+    #
+    def guid(self):
+        return self.column(ATTR_OBJGUID)
+    #
+    def records(self,fields=None):
+        """ iterate records as dict {field: value} (same as DataASPEN_OLX.get_DATA()) """
+        fields = self.fields if fields is None else [f for f in fields if f in self.fields]
+        cols = [(f,self.dictionary(f),np.asarray(self.codes(f))) for f in fields]
+        for i in range(self.n):
+            d = {}
+            for f,d1,c1 in cols:
+                k = c1[i]
+                if k>=0:
+                    d[f] = d1[k]
+            yield d
+    #
+    def olxrec(self,fields=None):
+        """ iterate records in the form of DataASPEN_OLX.xmlDict['OLXDBTABLE'][i]['OLXREC']
+            fields: columns read (None: all)
+        """
+        fields = self.fields if fields is None else [f for f in self.fields if f in fields]
+        fo = [f for f in fields if f in self.olnet]
+        fd = [f for f in fields if f not in self.olnet]
+        guid,olnetid = self.column(ATTR_OBJGUID),self.column(ATTR_OLNETID)
+        for i,d in enumerate(self.records(fields)):
+            r = {'@OBJTYPE':self.objtype,'@OLNETID':olnetid[i],'@OBJGUID':guid[i],\
+                 'OLNET':{'OLNETFIELD':[{'@NAME':f,'@VALUE':d[f]} for f in fo if f in d]}}
+            df = []
+            for f in fd:
+                if f in d:
+                    if f in self.__json__:
+                        df.append({'@NAME':f,'VALUE':d[f]})
+                    else:
+                        df.append({'@VALUE':d[f],'@NAME':f})
+            if df:
+                r['DATAFIELD'] = df if len(df)>1 else df[0]
+            yield r
+#
+class OLX_TABLES:
+    """
+    Cached OLX file
+
+        .header : same keys as DataASPEN_OLX.xmlDict without the tables
+        .types  : list of OBJTYPE in the file (file order)
+        .key    : cache key
+    """
+    def __init__(self,folder,meta):
+        self.folder = folder
+        self.key = os.path.basename(folder)
+        self.header = meta['header']
+        self.types = meta['types']
+        self.__meta__ = meta
+        self.__tables__ = {}
+    #
+    def table(self,objtype):
+        """ OLX_TABLE of objtype (empty table if no record) """
+        try:
+            return self.__tables__[objtype]
+        except KeyError:
+            m1 = self.__meta__['tables'].get(objtype,{'n':0,'fields':[],'olnet':[],'json':[]})
+            t1 = OLX_TABLE(os.path.join(self.folder,objtype),objtype,m1)
+            self.__tables__[objtype] = t1
+            return t1
+    #
+    def xmlDict(self):
+        """ rebuild the dict of DataASPEN_OLX.xmlDict (records generated on demand) """
+        x = dict(self.header)
+        x['OLXDBTABLE'] = [{'@NAME':t,'@RECCOUNT':str(self.table(t).n),'OLXREC':list(self.table(t).olxrec())} for t in self.types]
+        return x
+#
+def load(folx,encoding='iso8859-1',cacheDir=None,rebuild=False,verbose=False):
+    """
+    OLX_TABLES of folx, converted and stored in the cache if needed
+    """
+    cacheDir = cacheDir or CACHE_DIR
+    os.makedirs(cacheDir,exist_ok=True)
+    index = __readIndex__(cacheDir)
+    key = fileKey(folx,index)
+    folder = os.path.join(cacheDir,key)
+    fmeta = os.path.join(folder,'meta.json')
+    if rebuild or not os.path.isfile(fmeta):
+        t0 = time.time()
+        convert(folx,folder,encoding)
+        if verbose:
+            print('OlxCache: %s converted in %.2fs'%(folx,time.time()-t0))
+    with open(fmeta,'r') as f:
+        meta = json.load(f)
+    # LRU
+    index = __readIndex__(cacheDir)
+    st = os.stat(folx)
+    index[key] = {'source':os.path.abspath(folx),'size':st.st_size,'mtime':st.st_mtime,\
+                  'bytes':meta['bytes'],'lastUsed':time.time()}
+    __evict__(cacheDir,index,keep=key)
+    __writeIndex__(cacheDir,index)
+    return OLX_TABLES(folder,meta)
+#
+def fileKey(folx,index=None):
+    """ cache key: content hash of folx + parser version """
+    if index is not None:
+        # content hash is computed again only if size or modification time changed
+        st = os.stat(folx)
+        src = os.path.abspath(folx)
+        for k,v in index.items():
+            if v.get('source')==src and v.get('size')==st.st_size and v.get('mtime')==st.st_mtime:
+                return k
+    h = hashlib.sha1()
+    with open(folx,'rb') as f:
+        while True:
+            b = f.read(1<<20)
+            if not b:
+                break
+            h.update(b)
+    h.update(PARSER_VERSION.encode())
+    return h.hexdigest()
+#
+def convert(folx,folder,encoding='iso8859-1'):
+    """ OLX => columnar tables in folder """
+    tmp = folder+'.tmp%i'%os.getpid()
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    tables,types = {},[]
+    rd = OlxReader.OlxReader(folx,encoding=encoding)
+    for r in rd:
+        try:
+            t1 = tables[r.objtype]
+        except KeyError:
+            t1 = tables[r.objtype] = __TableBuilder__()
+            types.append(r.objtype)
+        t1.add(r)
+    meta = {'header':rd.header,'types':types,'tables':{},'parser':PARSER_VERSION,'source':os.path.abspath(folx)}
+    nb = 0
+    for t,t1 in tables.items():
+        meta['tables'][t],n1 = t1.save(os.path.join(tmp,t))
+        nb += n1
+    meta['bytes'] = nb
+    with open(os.path.join(tmp,'meta.json'),'w') as f:
+        json.dump(meta,f)
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.replace(tmp,folder)
+#
+class __TableBuilder__:
+    """ dictionary encoding of the columns of one type while reading """
+    def __init__(self):
+        self.n = 0
+        self.cols = {}    # field => (dict value=>code, array codes)
+        self.fields = []
+        self.olnet = set()
+        self.json = set()
+        for f in [ATTR_OBJGUID,ATTR_OLNETID]:
+            self.cols[f] = ({},array('i'))
+    #
+    def add(self,r):
+        n = self.n
+        self.__add1__(ATTR_OBJGUID,r.guid or '')
+        self.__add1__(ATTR_OLNETID,r.olnetid or '')
+        for i,(f,v) in enumerate(r.data.items()):
+            if f not in self.cols:
+                self.cols[f] = ({},array('i',[-1])*n)
+                self.fields.append(f)
+                if i<r.nOlnet:
+                    self.olnet.add(f)
+            if type(v)!=str:
+                v = json.dumps(v)
+                self.json.add(f)
+            self.__add1__(f,v)
+        self.n = n+1
+        for f,(d1,c1) in self.cols.items():
+            if len(c1)<self.n:
+                c1.append(-1)
+    #
+    def __add1__(self,f,v):
+        d1,c1 = self.cols[f]
+        try:
+            c1.append(d1[v])
+        except KeyError:
+            d1[v] = len(d1)
+            c1.append(d1[v])
+    #
+    def save(self,folder):
+        os.makedirs(folder)
+        nb = 0
+        for f,(d1,c1) in self.cols.items():
+            vals = list(d1.keys())
+            off = np.zeros(len(vals)+1,dtype=np.int64)
+            off[1:] = np.cumsum([len(v) for v in vals])
+            blob = np.frombuffer(''.join(vals).encode('utf-8'),dtype=np.uint8)
+            for ext,a in [['codes',np.frombuffer(c1,dtype=np.int32)],['blob',blob],['off',off]]:
+                fn = os.path.join(folder,'%s.%s.npy'%(f,ext))
+                np.save(fn,a)
+                nb += os.path.getsize(fn)
+        return {'n':self.n,'fields':self.fields,'olnet':sorted(self.olnet),'json':sorted(self.json)},nb
+#
+def __readIndex__(cacheDir):
+    try:
+        with open(os.path.join(cacheDir,INDEX),'r') as f:
+            return json.load(f)
+    except:
+        return {}
+#
+def __writeIndex__(cacheDir,index):
+    fi = os.path.join(cacheDir,INDEX)
+    with open(fi+'.tmp','w') as f:
+        json.dump(index,f,indent=1)
+    os.replace(fi+'.tmp',fi)
+#
+def __evict__(cacheDir,index,keep):
+    """ remove least recently used entries while the cache is over budget """
+    for k in list(index.keys()):
+        if not os.path.isdir(os.path.join(cacheDir,k)):
+            del index[k]
+    total = sum([v['bytes'] for v in index.values()])
+    for k in sorted(index.keys(),key=lambda k:index[k]['lastUsed']):
+        if total<=CACHE_BUDGET_MB*1048576:
+            break
+        if k==keep:
+            continue
+        shutil.rmtree(os.path.join(cacheDir,k),ignore_errors=True)
+        total -= index[k]['bytes']
+        del index[k]
+#
+def clear(cacheDir=None):
+    """ remove all entries of the cache """
+    cacheDir = cacheDir or CACHE_DIR
+    if os.path.isdir(cacheDir):
+        shutil.rmtree(cacheDir)
@@ -0,0 +1,405 @@
+"""
+Purpose: Native OLX-vs-OLX diff producing ADX (without DIFFANDMERGE of olxapi.dll)
+
+    Both OLX files are loaded from the columnar cache (OlxCache). For each object type:
+        - records are joined by OBJGUID, records not joined are matched by the identity
+          fields of OLNET (names, kV, circuit ID..., same idea as correctGUID/getGUID_FA_FB)
+        - terminal GUIDs of file B are translated to file A (buses matched by name/kV)
+        - a 64-bit hash of the field tuple of each record skips unchanged records,
+          fields are compared one by one only for records with a different hash
+        - CHANGEREC (MODIFY/DELETE/ADD) are written in the ADX format read by ASPENLib.DataASPEN_ADX
+    BUS is processed first (GUID translation), the other object types in parallel processes.
+
+    samples:
+        counts = OlxDiff.diff('A.OLX','B.OLX','A_DIFF.ADX',nProcess=4)
+        OlxDiff.benchmark(nBus=200000)      # 500k records
+        OlxDiff.checkDiff()                 # OlxDiff_ut_REF_A/B.OLX => same CHANGEREC as OlxDiff_ut_REF.ADX
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,time,json
+from xml.sax.saxutils import escape
+import numpy as np
+import OlxCache
+
+ACTIONS = ['MODIFY','DELETE','ADD']              # = ASPENLib.ACTION_ADX
+STAT = {'MODIFY':'MOD','DELETE':'DEL','ADD':'ADD'}
+TERM_FIELDS = ('TERMGUID','TERMBNO','TERMNAME','TERMKV') # OLNET fields given by the terminal buses
+KEY_SKIP = ('TERMGUID','TERMBNO','OBJGUID')      # OLNET fields not in the identity key
+HASH_MUL = np.uint64(1099511628211)
+HASH_MISSING = -7046029254386353131
+FIXTURE_A = os.path.join(os.path.dirname(os.path.abspath(__file__)),'OlxDiff_ut_REF_A.OLX')
+FIXTURE_B = os.path.join(os.path.dirname(os.path.abspath(__file__)),'OlxDiff_ut_REF_B.OLX')
+FIXTURE_ADX = os.path.join(os.path.dirname(os.path.abspath(__file__)),'OlxDiff_ut_REF.ADX')
+sTab = ['','\n    ','\n        ','\n            ','\n                ','\n                    ','\n                        ']
+#
+def diff(folxA,folxB,fadx,nProcess=1,encoding='iso8859-1',cacheDir=None,objtypes=None,verbose=False):
+    """
+    compare 2 OLX files => ADX file
+
+    Parameters
+    ----------
+    folxA,folxB : OLX files [A],[B]
+    fadx        : ADX file (output)
+    nProcess    : number of processes for the object types other than BUS
+                  (multiprocessing: call from if __name__ == '__main__' when nProcess>1)
+    objtypes    : object types in CHANGESTAT (None: ASPENLib.OBJTYPELIST)
+
+    Returns
+    -------
+    dict {OBJTYPE:{ACTION:count}} of changes
+    """
+    t0 = time.time()
+    tA = OlxCache.load(folxA,encoding=encoding,cacheDir=cacheDir,verbose=verbose)
+    tB = OlxCache.load(folxB,encoding=encoding,cacheDir=cacheDir,verbose=verbose)
+    if verbose:
+        print('OlxDiff: cache %.2fs'%(time.time()-t0))
+    types = tA.types+[t for t in tB.types if t not in tA.types]
+    #
+    src = [(tA.folder,tA.__meta__),(tB.folder,tB.__meta__)]
+    res = {}
+    busMap = {}
+    if 'BUS' in types:
+        res['BUS'] = __diffType__(tA,tB,'BUS',{})
+        busMap = res['BUS'].pop('busMap')
+    others = [t for t in types if t!='BUS']
+    args = [(src,t,busMap) for t in others]
+    if nProcess<=1 or len(others)<=1:
+        for a1 in args:
+            res[a1[1]] = __diffType__(tA,tB,a1[1],busMap)
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(min(nProcess,len(args))) as pool:
+            for t,r1 in pool.imap_unordered(__diffTypeProcess__,args):
+                res[t] = r1
+    #
+    counts = {t:res[t]['counts'] for t in types}
+    __writeADX__(fadx,folxA,folxB,tA.header,[res[t]['xml'] for t in types],counts,objtypes)
+    if verbose:
+        print('OlxDiff: %s %i changes in %.2fs'%(fadx,sum([sum(c.values()) for c in counts.values()]),time.time()-t0))
+    return counts
+#
+def __diffTypeProcess__(args):
+    src,objtype,busMap = args
+    tA = OlxCache.OLX_TABLES(*src[0])
+    tB = OlxCache.OLX_TABLES(*src[1])
+    return objtype,__diffType__(tA,tB,objtype,busMap)
+#
+class __Columns__:
+    """ values of one OLX_TABLE by record (dictionary + codes) """
+    def __init__(self,t1,fields,busMap=None):
+        self.t1 = t1
+        self.cols = []
+        for f in fields:
+            d1 = list(t1.dictionary(f))
+            if f in t1.__json__:
+                d1 = [json.dumps(v,sort_keys=True) for v in d1]
+            elif busMap and 'GUID' in f:
+                d1 = [busMap.get(v,v) for v in d1]
+            self.cols.append((f,d1,np.asarray(t1.codes(f))))
+    #
+    def hash(self):
+        """ uint64 hash of the field tuple of each record """
+        h = np.zeros(self.t1.n,dtype=np.uint64)
+        for f,d1,c1 in self.cols:
+            fh = np.array([hash(v) for v in d1]+[HASH_MISSING],dtype=np.int64).view(np.uint64)
+            h = (h*HASH_MUL)^fh[c1]
+        return h
+    #
+    def get(self,i):
+        """ {field:value} of record i """
+        d = {}
+        for f,d1,c1 in self.cols:
+            k = c1[i]
+            if k>=0:
+                d[f] = d1[k]
+        return d
+#
+def __diffType__(tA,tB,objtype,busMap):
+    """ CHANGEREC of one object type: {'xml':str,'counts':{action:n}} (+'busMap' for BUS) """
+    a,b = tA.table(objtype),tB.table(objtype)
+    fields = a.fields+[f for f in b.fields if f not in a.fields]
+    olnet = a.olnet|b.olnet
+    isBus = objtype=='BUS'
+    comp = [f for f in fields if f!='OBJGUID' and not (f.startswith('TERMGUID') or (not isBus and f.startswith(TERM_FIELDS)))]
+    # join by OBJGUID
+    ga,gb = a.guid().astype(str),b.guid().astype(str)
+    _,ia,ib = np.intersect1d(ga,gb,assume_unique=False,return_indices=True)
+    ia,ib = list(ia),list(ib)
+    # fallback by identity key of OLNET (names, kV, circuit ID...)
+    ua = np.setdiff1d(np.arange(a.n),ia)
+    ub = np.setdiff1d(np.arange(b.n),ib)
+    if len(ua) and len(ub):
+        key = [f for f in fields if f in olnet and not f.startswith(KEY_SKIP)]
+        if key:
+            ka,kb = __Columns__(a,key),__Columns__(b,key)
+            da = __uniqueKey__([(i,tuple(sorted(ka.get(i).items()))) for i in ua])
+            db = __uniqueKey__([(i,tuple(sorted(kb.get(i).items()))) for i in ub])
+            for k1,i in da.items():
+                j = db.get(k1)
+                if j is not None:
+                    ia.append(i)
+                    ib.append(j)
+            ua = np.setdiff1d(ua,ia)
+            ub = np.setdiff1d(ub,ib)
+    ia,ib = np.array(ia,dtype=np.int64),np.array(ib,dtype=np.int64)
+    res = {}
+    if isBus:
+        res['busMap'] = {gb[j]:ga[i] for i,j in zip(ia,ib) if gb[j]!=ga[i]}
+    # unchanged records skipped by hash
+    ca,cb = __Columns__(a,comp),__Columns__(b,comp,busMap)
+    chg = np.flatnonzero(ca.hash()[ia]!=cb.hash()[ib])
+    order = np.argsort(ia[chg],kind='stable')
+    mod = [(ia[chg][k],ib[chg][k]) for k in order]
+    # output
+    ta,tb = __Columns__(a,fields),__Columns__(b,fields,busMap) # ADD: terminal GUIDs of [A] as correctGUID
+    sa,sb = __Scope__(tA),__Scope__(tB)
+    for g1,g2 in busMap.items():
+        if g1 in sb.bus:
+            sb.bus[g2] = sb.bus[g1]
+    xml,counts = [],{}
+    oa,ob = a.column(OlxCache.ATTR_OLNETID),b.column(OlxCache.ATTR_OLNETID)
+    for action in ACTIONS:
+        n = 0
+        if action=='MODIFY':
+            for i,j in mod:
+                ra,rb = ca.get(i),cb.get(j)
+                chf = [(f,ra.get(f,''),rb.get(f,'')) for f in comp if ra.get(f)!=rb.get(f)]
+                if chf:
+                    r1 = ta.get(i)
+                    xml.append(__changeRec__(action,objtype,oa[i],ga[i],r1,olnet,sa.get(r1,isBus),chf))
+                    n += 1
+        elif action=='DELETE':
+            for i in ua:
+                r1 = ta.get(i)
+                xml.append(__changeRec__(action,objtype,oa[i],ga[i],r1,olnet,sa.get(r1,isBus),None))
+                n += 1
+        else:
+            for j in ub:
+                r1 = tb.get(j)
+                chf = [(f,r1[f]) for f in b.fields if f not in b.olnet and f in r1]
+                xml.append(__changeRec__(action,objtype,ob[j],gb[j],r1,olnet,sb.get(r1,isBus),chf))
+                n += 1
+        counts[action] = n
+    res['xml'] = ''.join(xml)
+    res['counts'] = counts
+    return res
+#
+def __uniqueKey__(items):
+    """ {key:index} of keys found only once """
+    d,dup = {},set()
+    for i,k in items:
+        if k in d:
+            dup.add(k)
+        else:
+            d[k] = i
+    for k in dup:
+        del d[k]
+    return d
+#
+class __Scope__:
+    """ OBJSCOPE (AREA,ZONE,BNO,KV,CKTID) of records from the BUS table of the same file """
+    def __init__(self,tables):
+        bt = tables.table('BUS')
+        self.bus = {}
+        if bt.n:
+            g,ar,zn = bt.guid(),bt.column('BS_AREANO'),bt.column('BS_ZONENO')
+            self.bus = {g[i]:(ar[i],zn[i]) for i in range(bt.n)}
+    #
+    def get(self,r1,isBus):
+        res = []
+        for k in range(1,5):
+            g = r1.get('TERMGUID%i'%k)
+            if g is None and not (isBus and k==1):
+                continue
+            if isBus:
+                az = (r1.get('BS_AREANO',''),r1.get('BS_ZONENO',''))
+            else:
+                az = self.bus.get(g,('',''))
+            for n1,v in [('AREA',az[0]),('ZONE',az[1]),('BNO',r1.get('TERMBNO%i'%k,'')),('KV',r1.get('TERMKV%i'%k,''))]:
+                if v!='':
+                    res.append((n1,v))
+        for n1 in ['CKTID','CKTID2']:
+            if n1 in r1:
+                res.append((n1,r1[n1]))
+        return res
+#
+def __attr__(v):
+    return escape(str(v),{'"':'&quot;'})
+#
+def __dict2xml__(tag,d,k):
+    """ dict (ASPENLib.xml2Dict format) => xml string """
+    if d is None:
+        return sTab[k]+'<%s/>'%tag
+    if type(d)==str:
+        return sTab[k]+'<%s>%s</%s>'%(tag,escape(d),tag)
+    att = ''.join([' %s="%s"'%(n[1:],__attr__(v)) for n,v in d.items() if n.startswith('@')])
+    ch = []
+    for n,v in d.items():
+        if n.startswith('@') or n=='#text':
+            continue
+        for v1 in (v if type(v)==list else [v]):
+            ch.append(__dict2xml__(n,v1,min(k+1,len(sTab)-1)))
+    if not ch and '#text' not in d:
+        return sTab[k]+'<%s%s/>'%(tag,att)
+    return sTab[k]+'<%s%s>%s%s%s</%s>'%(tag,att,escape(d.get('#text','')),''.join(ch),sTab[k] if ch else '',tag)
+#
+def __chfValue__(tag,v,k):
+    """ value of CHANGEFIELD: json (BK_OBJLST) => xml, else attribute """
+    if v.startswith('{') or v=='null':
+        try:
+            return __dict2xml__(tag,json.loads(v),k)
+        except ValueError:
+            pass
+    return None
+#
+def __changeRec__(action,objtype,olnetid,guid,r1,olnet,scope,chf):
+    s = [sTab[2]+'<CHANGEREC ACTION="%s" OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(action,objtype,__attr__(olnetid),__attr__(guid))]
+    s.append(sTab[3]+'<OLNET OBJTYPE="%s">'%objtype)
+    for f,v in r1.items():
+        if f in olnet:
+            s.append(sTab[4]+'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(f,__attr__(v)))
+    s.append(sTab[3]+'</OLNET>')
+    if scope:
+        s.append(sTab[3]+'<OBJSCOPE>')
+        for n1,v in scope:
+            s.append(sTab[4]+'<SCOPEFIELD NAME="%s" VALUE="%s"/>'%(n1,__attr__(v)))
+        s.append(sTab[3]+'</OBJSCOPE>')
+    for c1 in (chf or []):
+        f = c1[0]
+        if len(c1)==3:
+            xa,xb = __chfValue__('VALUEA',c1[1],4),__chfValue__('VALUEB',c1[2],4)
+            if xa is None or xb is None:
+                s.append(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s" VALUEA="%s" VALUEB="%s"/>'%(f,f,__attr__(c1[1]),__attr__(c1[2])))
+            else:
+                s.append(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s">'%(f,f)+xa+xb+sTab[3]+'</CHANGEFIELD>')
+        else:
+            x1 = __chfValue__('VALUE',c1[1],4)
+            if x1 is None:
+                s.append(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s" VALUE="%s"/>'%(f,f,__attr__(c1[1])))
+            else:
+                s.append(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s">'%(f,f)+x1+sTab[3]+'</CHANGEFIELD>')
+    s.append(sTab[2]+'</CHANGEREC>')
+    return ''.join(s)
+#
+def __writeADX__(fadx,folxA,folxB,header,xml,counts,objtypes):
+    if objtypes is None:
+        from ASPENLib import OBJTYPELIST as objtypes
+    objtypes = list(objtypes)+[t for t in counts if t not in objtypes]
+    total = sum([sum(c.values()) for c in counts.values()])
+    s0 = 'OLRVERSION="%s" DATETIME="%s" FILEA="%s" FILEB="%s" CHANGECOUNT="%i"'%(__attr__(header.get('@OLRVERSION','15.5')),\
+            time.strftime('%Y/%m/%d %H:%M:%S'),__attr__(os.path.abspath(folxA)),__attr__(os.path.abspath(folxB)),total)
+    s1 = ' '.join(['%s_%s="%i"'%(STAT[a],t,counts.get(t,{}).get(a,0)) for t in objtypes for a in ['ADD','MODIFY','DELETE']])
+    with open(fadx,'w',encoding='utf-8') as fo:
+        fo.write("<?xml version='1.0'?>\n")
+        fo.write('<ASPENOLX>')
+        fo.write(sTab[1]+'<OLXDIFF %s>'%s0)
+        fo.write(sTab[2]+'<CHANGESTAT %s/>'%s1)
+        for x1 in xml:
+            fo.write(x1)
+        fo.write(sTab[1]+'</OLXDIFF>')
+        fo.write('\n</ASPENOLX>\n')
+#
+def makeModifiedOLX(folxA,folxB,pModify=0.01,pDelete=0.005,pAdd=0.005,seed=1):
+    """
+    OLX [B] from a synthetic OLX [A] (OlxReader.makeSyntheticOLX: one element per line)
+    return {OBJTYPE:{ACTION:count}} of changes made
+    """
+    import random
+    random.seed(seed)
+    counts = {}
+    rec,skip,changed,done,objtype = [],False,False,False,''
+    with open(folxA,'r',encoding='utf-8') as fi, open(folxB,'w',encoding='utf-8') as fo:
+        for line in fi:
+            ls = line.strip()
+            if ls.startswith('<OLXREC '):
+                objtype = ls.split('OBJTYPE="')[1].split('"')[0]
+                c1 = counts.setdefault(objtype,{'MODIFY':0,'DELETE':0,'ADD':0})
+                r = random.random()
+                skip = r<pDelete
+                changed = (not skip) and r<pDelete+pModify
+                isAdd = (not skip and not changed) and r<pDelete+pModify+pAdd
+                done = False # one field modified by record
+                rec = [line]
+                continue
+            if rec:
+                if changed and not done and ls.startswith('<DATAFIELD VALUE="') and '_F' in ls:
+                    line = line.replace('VALUE="','VALUE="9',1)
+                    done = True
+                rec.append(line)
+                if ls=='</OLXREC>':
+                    if skip:
+                        c1['DELETE'] += 1
+                    else:
+                        fo.write(''.join(rec))
+                        if done:
+                            c1['MODIFY'] += 1
+                        if isAdd and objtype!='BUS':
+                            fo.write(''.join(rec).replace('{','{N',2))
+                            c1['ADD'] += 1
+                    rec = []
+                continue
+            fo.write(line)
+    return counts
+#
+def checkDiff(folxA=FIXTURE_A,folxB=FIXTURE_B,fref=FIXTURE_ADX,prt=True):
+    """
+    diff of folxA,folxB compared with the CHANGEREC of the reference ADX fref (read by ASPENLib.DataASPEN_ADX)
+    return list of differences (index,expected,found)
+    """
+    import tempfile,shutil,ASPENLib
+    tmp = tempfile.mkdtemp()
+    try:
+        fadx = os.path.join(tmp,'DIFF.ADX')
+        diff(folxA,folxB,fadx,cacheDir=os.path.join(tmp,'cache'))
+        va = []
+        for f in [fref,fadx]:
+            d1 = ASPENLib.DataASPEN_ADX(f)
+            d1.getAll_CHANGEREC()
+            va.append(d1.xmlDict['CHANGEREC'])
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
+    ref,found = va
+    err = []
+    for i in range(max(len(ref),len(found))):
+        v1 = ref[i] if i<len(ref) else None
+        v2 = found[i] if i<len(found) else None
+        if v1!=v2:
+            err.append((i+1,v1,v2))
+    if prt:
+        print('checkDiff: %i CHANGEREC, %i differences'%(len(found),len(err)))
+        for e in err:
+            print('\t',e)
+    return err
+#
+def benchmark(nBus=200000,linePerBus=1.5,nField=30,nProcess=1,prt=True):
+    """
+    diff of a synthetic OLX (nBus*(1+linePerBus) records) and a modified copy
+    (BUS are modified/deleted, LINE modified/deleted/added: deleted BUS => LINE on it keep old terminal GUIDs)
+    """
+    import tempfile,shutil,OlxReader
+    tmp = tempfile.mkdtemp()
+    try:
+        fA,fB,fadx = os.path.join(tmp,'A.OLX'),os.path.join(tmp,'B.OLX'),os.path.join(tmp,'A_DIFF.ADX')
+        OlxReader.makeSyntheticOLX(fA,nBus=nBus,linePerBus=linePerBus,nField=nField)
+        made = makeModifiedOLX(fA,fB)
+        cacheDir = os.path.join(tmp,'cache')
+        t0 = time.time()
+        OlxCache.load(fA,cacheDir=cacheDir)
+        OlxCache.load(fB,cacheDir=cacheDir)
+        t1 = time.time()
+        counts = diff(fA,fB,fadx,nProcess=nProcess,cacheDir=cacheDir,objtypes=['BUS','LINE'])
+        t2 = time.time()
+        same = counts==made
+        if prt:
+            print('OlxDiff benchmark: %i records, changes %s, same as made: %s'%(int(nBus*(1+linePerBus)),counts,same))
+            print('    OLX=>cache %.2fs, diff (cached) %.2fs, ADX %.1f MB'%(t1-t0,t2-t1,os.path.getsize(fadx)/1e6))
+        return {'cache':t1-t0,'diff':t2-t1,'same':same}
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
@@ -0,0 +1,326 @@
+"""
+Purpose: Indexed OLX DIFF model (ADX) with GUID/bus hash joins
+
+    Columnar form of ASPENLib.DataASPEN_ADX.get_OLX_DIFF_MODEL:
+        - CHANGEREC are read from the byte-offset index (AdxIndex), one object type at a time
+          (lazy: a type is parsed only when it is used)
+        - for each object type, one table by ADD/DELETE/FWDMODIFY/REVMODIFY:
+              keys (OBJGUID, new GUID for LTC/LTC3), columns field => list of values
+        - terminal GUIDs of file B are corrected to file A (as ASPENLib.correctGUID) by a
+          bus map "'name' kVkV" => (GUID,number) built once from olrmodel.busid_dict
+        - GUID => row hash map in each table
+
+    samples:
+        model = OlxDiffModel.OLX_DIFF_MODEL('diff.ADX',olrmodel)
+        t = model.table('ADD','LINE')                 # only LINE records are parsed
+        names = t.column('TERMNAME1')
+        data = t.row(t.find('{...guid...}'))
+        res = model.toDict()                          # = get_OLX_DIFF_MODEL()
+        OlxDiffModel.benchmark(nChange=100000)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,time,uuid
+from xml.etree import ElementTree as ET
+import numpy as np
+
+TABLES = ['ADD','DELETE','FWDMODIFY','REVMODIFY']     # keys of get_OLX_DIFF_MODEL
+NEWGUID_TYPES = ('LTC','LTC3')                          # no stable OBJGUID => new GUID
+NTERM = 4
+#
+class DIFF_TABLE:
+    """
+    changes of one object type for one action
+
+        .objtype  : object type
+        .action   : ADD/DELETE/FWDMODIFY/REVMODIFY
+        .keys     : list of GUID (key of get_OLX_DIFF_MODEL)
+        .fields   : list of field names (first seen order)
+        .cols     : dict field => list of values (None if not in the record)
+        .mask     : dict field => bool array (field in the record)
+    """
+    def __init__(self,objtype,action,keys,rows):
+        self.objtype = objtype
+        self.action = action
+        self.keys = keys
+        fields = {}
+        for r1 in rows:
+            for k in r1:
+                fields[k] = None
+        self.fields = list(fields)
+        self.cols = {f:[r1.get(f) for r1 in rows] for f in self.fields}
+        self.mask = {f:np.array([f in r1 for r1 in rows],dtype=bool) for f in self.fields}
+        self.__guidMap = None
+    #
+    def __len__(self):
+        return len(self.keys)
+    #
+    def column(self,name,default=None):
+        """ values of field name (default if not in the record) """
+        if name not in self.cols:
+            return [default]*len(self)
+        if default is None:
+            return self.cols[name]
+        return [v if m else default for v,m in zip(self.cols[name],self.mask[name])]
+    #
+    def find(self,guid):
+        """ row of guid (hash map), -1 if not found """
+        if self.__guidMap is None:
+            self.__guidMap = {k:i for i,k in enumerate(self.keys)}
+        return self.__guidMap.get(guid,-1)
+    #
+    def row(self,i):
+        """ record i as dict (data of get_OLX_DIFF_MODEL) """
+        return {f:self.cols[f][i] for f in self.fields if self.mask[f][i]}
+    #
+    def rows(self):
+        """ all records as dict """
+        cols = [(f,self.cols[f],self.mask[f]) for f in self.fields]
+        return [{f:c[i] for f,c,m in cols if m[i]} for i in range(len(self))]
+    #
+    def correctGUID(self,busMap):
+        """
+        terminal GUID of file B => file A (ASPENLib.correctGUID on all rows)
+            busMap : dict "'name' kVkV" => (GUID,bus number) of file A
+        """
+        if self.objtype=='BUS' and self.action=='ADD':
+            return
+        bno = [(self.cols[f],self.mask[f]) for f in ('BS_NO','BNO') if f in self.cols]
+        for t in range(1,NTERM+1):
+            fg,fn,fk,fb = 'TERMGUID%i'%t,'TERMNAME%i'%t,'TERMKV%i'%t,'TERMBNO%i'%t
+            if fg not in self.cols or fn not in self.cols or fk not in self.cols:
+                continue
+            cg,mg = self.cols[fg],self.mask[fg]
+            cn,mn = self.cols[fn],self.mask[fn]
+            ck,mk = self.cols[fk],self.mask[fk]
+            cb,mb = (self.cols[fb],self.mask[fb]) if fb in self.cols else (None,None)
+            for i in np.flatnonzero(mg & mn & mk):
+                a = busMap.get("'%s' %skV"%(cn[i],ck[i]))
+                if a is None or a[0]==cg[i]:
+                    continue
+                cg[i] = a[0]
+                if cb is not None and mb[i]:
+                    cb[i] = a[1]
+                for c,m in bno:
+                    if m[i]:
+                        c[i] = a[1]
+        if self.objtype=='BUS' and 'OBJGUID' in self.cols and 'TERMGUID1' in self.cols:
+            cg,mg,c1 = self.cols['OBJGUID'],self.mask['OBJGUID'],self.cols['TERMGUID1']
+            for i in np.flatnonzero(mg & self.mask['TERMGUID1']):
+                cg[i] = c1[i]
+#
+class OLX_DIFF_MODEL:
+    """
+    OLX DIFF model of one ADX file, object types loaded on demand
+
+        adx      : ADX file or ASPENLib.DataASPEN_ADX (its index is reused)
+        olrmodel : OLR model of file A (busid_dict) or None (no GUID correction)
+    """
+    def __init__(self,adx,olrmodel=None,encoding='utf-8'):
+        if isinstance(adx,str):
+            import AdxIndex
+            self.index = AdxIndex.ADX_INDEX(adx,encoding=encoding)
+        else:
+            self.index = adx.get_INDEX()
+        self.encoding = self.index.encoding
+        self.olrmodel = olrmodel
+        self.__busMap = None
+        self.__types = {}
+    #
+    @property
+    def types(self):
+        """ object types in the ADX file """
+        return list(self.index.types)
+    #
+    def busMap(self):
+        """ "'name' kVkV" => (GUID,bus number) of file A, built once """
+        if self.__busMap is None:
+            self.__busMap = {}
+            bd = getattr(self.olrmodel,'busid_dict',None) or {}
+            for k,node in bd.items():
+                try:
+                    self.__busMap[k] = (node.UUID,node.mRID)
+                except AttributeError:
+                    continue
+        return self.__busMap
+    #
+    def load(self,objtype):
+        """ dict ADD/DELETE/FWDMODIFY/REVMODIFY => DIFF_TABLE of objtype (parsed once) """
+        if objtype not in self.__types:
+            self.__types[objtype] = self.__loadType__(objtype)
+        return self.__types[objtype]
+    #
+    def table(self,action,objtype):
+        """ DIFF_TABLE of action (ADD/DELETE/FWDMODIFY/REVMODIFY) and objtype """
+        return self.load(objtype)[action]
+    #
+    def count(self,action=None,objtype=None):
+        """ number of CHANGEREC from the index (nothing parsed), action ADD/DELETE/MODIFY """
+        return self.index.count(action,objtype)
+    #
+    def find(self,guid,objtypes=None):
+        """ (action,objtype,row) of guid in the loaded types (or objtypes), None if not found """
+        for objtype in (objtypes or list(self.__types)):
+            tb = self.load(objtype)
+            for action in TABLES:
+                i = tb[action].find(guid)
+                if i>=0:
+                    return action,objtype,i
+        return None
+    #
+    def __loadType__(self,objtype):
+        keys = {a:[] for a in TABLES}
+        rows = {a:[] for a in TABLES}
+        idx = self.index
+        newGUID = objtype in NEWGUID_TYPES
+        with open(idx.fadx,'rb') as f:
+            for i in idx.select(objtype=objtype):
+                elem = ET.fromstring(idx.raw(i,f).decode(self.encoding,'ignore'))
+                action = elem.get('ACTION')
+                if action not in ('ADD','DELETE','MODIFY'):
+                    continue
+                key = '{%s}'%str(uuid.uuid4()) if newGUID else elem.get('OBJGUID')
+                base,(chfA,chfB) = __fields__(elem,action)
+                if action=='MODIFY':
+                    keys['FWDMODIFY'].append(key)
+                    keys['REVMODIFY'].append(key)
+                    rows['REVMODIFY'].append({**base,**chfA})
+                    rows['FWDMODIFY'].append({**base,**chfB})
+                else:
+                    keys[action].append(key)
+                    rows[action].append({**base,**chfA} if chfA else base)
+        res = {}
+        busMap = self.busMap()
+        for a in TABLES:
+            res[a] = DIFF_TABLE(objtype,a,keys[a],rows[a])
+            res[a].correctGUID(busMap)
+        return res
+    #
+    def toDict(self,objtypes=None):
+        """ {'ADD':{guid:[objtype,data]},'DELETE':..,'FWDMODIFY':..,'REVMODIFY':..} as get_OLX_DIFF_MODEL """
+        res = {a:{} for a in TABLES}
+        for objtype in (objtypes or self.types):
+            tb = self.load(objtype)
+            for a in TABLES:
+                d = res[a]
+                for k,r1 in zip(tb[a].keys,tb[a].rows()):
+                    d[k] = [objtype,r1]
+        return res
+#
+def __fields__(elem,action):
+    """
+    OLNETID+OLNETFIELD+SCOPEFIELD of a CHANGEREC element, CHANGEFIELD values
+        => base dict, (dict VALUE or VALUEA, dict VALUEB)
+    """
+    base = {'OLNETID':elem.get('OLNETID')}
+    scope,chfA,chfB = [],{},{}
+    for c in elem:
+        if c.tag=='OLNET':
+            for f1 in c:
+                if f1.tag=='OLNETFIELD' and 'NAME' in f1.attrib and 'VALUE' in f1.attrib:
+                    base[f1.attrib['NAME']] = f1.attrib['VALUE']
+        elif c.tag=='OBJSCOPE':
+            for f1 in c:
+                if f1.tag=='SCOPEFIELD' and 'NAME' in f1.attrib and 'VALUE' in f1.attrib:
+                    scope.append((f1.attrib['NAME'],f1.attrib['VALUE']))
+        elif c.tag=='CHANGEFIELD' and action!='DELETE':
+            nm = c.get('NAME')
+            if nm is None:
+                continue
+            if action=='ADD':
+                if 'VALUE' in c.attrib:
+                    chfA[nm] = c.attrib['VALUE']
+            else:
+                chfA[nm] = c.attrib['VALUEA'] if 'VALUEA' in c.attrib else __text__(c.find('VALUEA'))
+                chfB[nm] = c.attrib['VALUEB'] if 'VALUEB' in c.attrib else __text__(c.find('VALUEB'))
+    base.update(scope)
+    return base,(chfA,chfB)
+#
+def __text__(e):
+    """ text of element as OlxReader.elem2Dict (None if empty) """
+    if e is None:
+        return None
+    if len(e) or e.attrib:
+        from OlxReader import elem2Dict
+        return elem2Dict(e)
+    return e.text.strip() if e.text and e.text.strip() else None
+#
+class __Node__:
+    def __init__(self,UUID,mRID):
+        self.UUID = UUID
+        self.mRID = mRID
+#
+class __Model__:
+    def __init__(self,busid_dict):
+        self.busid_dict = busid_dict
+#
+def makeSyntheticADX(fadx,nChange=100000,nBus=20000,seed=1):
+    """
+    synthetic ADX with nChange CHANGEREC (BUS/LINE, ADD/DELETE/MODIFY)
+    returns olrmodel of file A (busid_dict) with other GUID than file B for half of the buses
+    """
+    import random
+    from OlxWriter import ADX_WRITER
+    rnd = random.Random(seed)
+    guidB = ['{B%07i-0000-0000-0000-000000000000}'%i for i in range(nBus)]
+    busid = {}
+    for i in range(nBus):
+        g = guidB[i] if i%2 else '{A%07i-0000-0000-0000-000000000000}'%i
+        busid["'BUS%i' 132kV"%i] = __Node__(g,str(i+1))
+    with ADX_WRITER(fadx,{'@FILEA':'A.OLR','@FILEB':'B.OLR'},{'@ADD_LINE':'0'}) as w:
+        for n in range(nChange):
+            action = ['MODIFY','DELETE','ADD'][rnd.randrange(3)]
+            i,j = rnd.randrange(nBus),rnd.randrange(nBus)
+            if n%5==0:
+                objtype = 'BUS'
+                olnet = [('OBJGUID',guidB[i]),('TERMGUID1',guidB[i]),('TERMBNO1',str(i+1)),('TERMNAME1','BUS%i'%i),('TERMKV1','132')]
+                olnetid = "[BUS] 'BUS%i' 132kV"%i
+                guid = guidB[i]
+            else:
+                objtype = 'LINE'
+                olnet = [('TERMGUID1',guidB[i]),('TERMBNO1',str(i+1)),('TERMNAME1','BUS%i'%i),('TERMKV1','132'),\
+                         ('TERMGUID2',guidB[j]),('TERMBNO2',str(j+1)),('TERMNAME2','BUS%i'%j),('TERMKV2','132'),('CKTID','%i'%(n%10))]
+                olnetid = "[LINE] 'BUS%i' 132kV-'BUS%i' 132kV %i"%(i,j,n%10)
+                guid = '{L%07i-0000-0000-0000-000000000000}'%n
+            cr = {'@ACTION':action,'@OBJTYPE':objtype,'@OLNETID':olnetid,'@OBJGUID':guid,
+                  'OLNET':{'OLNETFIELD':[{'@NAME':k,'@VALUE':v} for k,v in olnet]},
+                  'OBJSCOPE':{'SCOPEFIELD':[{'@NAME':'AREA','@VALUE':str(1+i%9)},{'@NAME':'ZONE','@VALUE':str(1+i%17)}]}}
+            if action=='ADD':
+                cr['CHANGEFIELD'] = [{'@LABEL':'F%i'%k,'@NAME':'F%i'%k,'@VALUE':'%.4f'%rnd.random()} for k in range(8)]
+            elif action=='MODIFY':
+                cr['CHANGEFIELD'] = [{'@LABEL':'R','@NAME':'R','@VALUEA':'%.4f'%rnd.random(),'@VALUEB':'%.4f'%rnd.random()}]
+            w.writeChangeRec(cr)
+    return __Model__(busid)
+#
+def benchmark(nChange=100000,prt=True):
+    """
+    synthetic ADX with nChange CHANGEREC: index, one type (lazy), all types (toDict)
+    """
+    import tempfile,shutil
+    tmp = tempfile.mkdtemp()
+    try:
+        fadx = os.path.join(tmp,'diff.ADX')
+        olrmodel = makeSyntheticADX(fadx,nChange=nChange)
+        t = {}
+        t0 = time.time()
+        model = OLX_DIFF_MODEL(fadx,olrmodel)
+        t['index'] = time.time()-t0
+        t0 = time.time()
+        model.load('BUS')
+        t['BUS'] = time.time()-t0
+        t0 = time.time()
+        res = model.toDict()
+        t['all'] = time.time()-t0
+        t['nModel'] = sum([len(v) for v in res.values()])
+        if prt:
+            print('OlxDiffModel benchmark: %i CHANGEREC (%.1f MB)'%(nChange,os.path.getsize(fadx)/1e6))
+            print('    index %.2fs, BUS only %.2fs, all types+toDict %.2fs, %i items'%(t['index'],t['BUS'],t['all'],t['nModel']))
+        return t
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
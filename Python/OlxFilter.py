@@ -0,0 +1,379 @@
+"""
+Purpose: Compiled filter engine for ASPEN OLX/ADX records
+
+    Filter specifications (area, zone, kV, bus number, circuit ID) are compiled once into
+    interval sets: membership is a binary search (record-at-a-time) or a bitset/searchsorted
+    lookup on arrays (vectorized), instead of 'in list' on expanded ranges.
+
+        INTERVAL_SET  : sorted disjoint integer intervals, from specs like [1,'5-10','20-99999']
+        OLX_FILTER    : compiled filter with the semantics of ASPENLib.FilterOptions.runFilter
+            .runFilter(cr1)         : CHANGEREC of ADX (same input/result as FilterOptions.runFilter)
+            .match(...)             : one record from its terminal lists (streaming)
+            .evalArrays(...)        : vectorized over arrays nRecord x nTerminal (NumPy)
+            .evalTable(...)         : vectorized over OlxCache tables (terminals from TERMGUIDx)
+
+    samples:
+        flt = OlxFilter.OLX_FILTER(area=['1-99999'],kv=[100,500],tie=True)
+        flt = OlxFilter.OLX_FILTER.fromOptions(filterOptions)   # ASPENLib.FilterOptions
+        ok = flt.runFilter(cr1)
+        mask = flt.evalTable(OlxCache.load('SAMPLE30.OLX'),'LINE')
+        OlxFilter.benchmark(nRecord=1000000)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import time
+from bisect import bisect_right
+
+TERMGUID = ['TERMGUID1','TERMGUID2','TERMGUID3','TERMGUID4']
+TERMKV   = ['TERMKV1','TERMKV2','TERMKV3','TERMKV4']
+TERMBNO  = ['TERMBNO1','TERMBNO2','TERMBNO3','TERMBNO4']
+CKTID    = ['CKTID','CKTID2']
+#
+class INTERVAL_SET:
+    """ set of integers as sorted disjoint closed intervals [lo_i,hi_i] """
+    def __init__(self,spec=None):
+        """
+        spec: list of int or str: 5, '5', '1-10', '1-10,20,30-40'
+        """
+        iv = []
+        for p in (spec or []):
+            for s1 in (p.split(',') if type(p)==str else [p]):
+                if type(s1)==str:
+                    s1 = s1.strip()
+                    if not s1:
+                        continue
+                    a = s1.split('-')
+                    if len(a)>1 and a[0]:
+                        # '1-5-10' => 1..10 as FilterOptions.__splitStr
+                        iv.append((int(a[0]),int(a[-1])))
+                        continue
+                iv.append((int(s1),int(s1)))
+        iv.sort()
+        self.lo,self.hi = [],[]
+        for a,b in iv:
+            if self.hi and a<=self.hi[-1]+1:
+                self.hi[-1] = max(self.hi[-1],b)
+            else:
+                self.lo.append(a)
+                self.hi.append(b)
+        self.__bitset__ = None
+    #
+    def __contains__(self,x):
+        i = bisect_right(self.lo,x)-1
+        return i>=0 and x<=self.hi[i]
+    #
+    def __len__(self):
+        """ number of intervals (0: empty set) """
+        return len(self.lo)
+    #
+    def __iter__(self):
+        for a,b in zip(self.lo,self.hi):
+            for x in range(a,b+1):
+                yield x
+    #
+    def __repr__(self):
+        return ','.join([('%i'%a if a==b else '%i-%i'%(a,b)) for a,b in zip(self.lo,self.hi)])
+    #
+    def size(self):
+        """ number of integers in the set """
+        return sum([b-a+1 for a,b in zip(self.lo,self.hi)])
+    #
+    def containsArray(self,x,bitsetMax=1<<20):
+        """ vectorized membership of integer array x (bitset if the set is bounded by bitsetMax) """
+        import numpy as np
+        x = np.asarray(x)
+        if not self.lo:
+            return np.zeros(x.shape,dtype=bool)
+        if 0<=self.lo[0] and self.hi[-1]<bitsetMax:
+            if self.__bitset__ is None:
+                bs = np.zeros(self.hi[-1]+2,dtype=bool)
+                for a,b in zip(self.lo,self.hi):
+                    bs[a:b+1] = True
+                self.__bitset__ = bs
+            bs = self.__bitset__
+            xi = np.clip(x,-1,len(bs)-1).astype(np.int64) # last item (hi+1) is False
+            return np.where(xi>=0,bs[xi],False)
+        lo,hi = np.array(self.lo),np.array(self.hi)
+        i = np.searchsorted(lo,x,side='right')-1
+        return (i>=0)&(x<=hi[np.maximum(i,0)])
+#
+class OLX_FILTER:
+    """
+    Compiled filter, same semantics as ASPENLib.FilterOptions.runFilter:
+        area/zone/BNO with tie: at least one terminal in the set (inside) / out of the set (outside)
+                      no tie  : all terminals in the set (inside) / out of the set (outside)
+        kv   : highest terminal kV in [kvmin,kvmax]
+        ckid : one of the circuit IDs in the list
+    """
+    def __init__(self,typ=[],action=[],area=[],inside_area=True,zone=[],inside_zone=True,tie=True,\
+                 kv=[],BNO=[],OBJGUID=[],ckid=[]):
+        self.typ = set(typ or [])
+        self.action = set(action or [])
+        self.area = INTERVAL_SET(area)
+        self.zone = INTERVAL_SET(zone)
+        self.BNO = INTERVAL_SET(BNO)
+        self.inside_area = inside_area
+        self.inside_zone = inside_zone
+        self.tie = tie
+        self.kv = [float(kv[0]),float(kv[-1])] if kv else []
+        self.OBJGUID = set(OBJGUID or [])
+        self.ckid = set(ckid or [])
+        self.allNetwork = not (self.typ or self.action or self.area or self.zone or self.kv or self.ckid or self.BNO or self.OBJGUID)
+    #
+    @staticmethod
+    def fromOptions(fo):
+        """ compile ASPENLib.FilterOptions (lists already expanded by __splitStr) """
+        return OLX_FILTER(typ=fo.typ,action=fo.action,area=__compact__(fo.area),inside_area=fo.inside_area,\
+                          zone=__compact__(fo.zone),inside_zone=fo.inside_zone,tie=fo.tie,kv=fo.kv,\
+                          BNO=__compact__(fo.BNO),OBJGUID=fo.OBJGUID,ckid=fo.ckid)
+    #
+    def __set__(self,vals,st,inside):
+        """ area/zone/BNO test on the terminals of one record """
+        if not vals:
+            return False
+        if inside:
+            if self.tie:
+                return any([v in st for v in vals])
+            return all([v in st for v in vals])
+        if self.tie:
+            return any([v not in st for v in vals])
+        return all([v not in st for v in vals])
+    #
+    def __areaZone__(self,objtype,olnetid):
+        """ special for AREA/ZONE objects (tested on their own number): True/False, None if not decided """
+        if self.BNO or self.ckid or self.OBJGUID or self.kv:
+            return None
+        if objtype=='AREA':
+            if self.area:
+                return (int(olnetid) in self.area)==self.inside_area
+            elif not self.zone:
+                return True
+        if objtype=='ZONE':
+            if self.zone:
+                return (int(olnetid) in self.zone)==self.inside_zone
+            elif not self.area:
+                return True
+        return None
+    #
+    def __terminals__(self,area,zone,bno,kv,ckid):
+        """ ckid/area/zone/BNO/kV tests on the terminals of one record """
+        if self.ckid and not any([c1 in self.ckid for c1 in ckid]):
+            return False
+        if self.area and not self.__set__(area,self.area,self.inside_area):
+            return False
+        if self.zone and not self.__set__(zone,self.zone,self.inside_zone):
+            return False
+        if self.BNO and not self.__set__(bno,self.BNO,True):
+            return False
+        if self.kv:
+            if not kv:
+                return False
+            kvmax = max(kv) # level kv of equipement is the kv max
+            if kvmax<self.kv[0] or kvmax>self.kv[1]:
+                return False
+        return True
+    #
+    def match(self,objtype,action=None,olnetid=None,area=[],zone=[],bno=[],kv=[],ckid=[],guid=None):
+        """ record-at-a-time test (terminal lists of the record) """
+        if self.allNetwork:
+            return True
+        if self.typ and objtype not in self.typ:
+            return False
+        if self.action and action not in self.action:
+            return False
+        if self.OBJGUID and guid is not None and guid not in self.OBJGUID:
+            return False
+        r = self.__areaZone__(objtype,olnetid)
+        if r is not None:
+            return r
+        return self.__terminals__(area,zone,bno,kv,ckid)
+    #
+    def runFilter(self,cr1):
+        """ CHANGEREC of ADX (dict of xml2Dict), same result as FilterOptions.runFilter """
+        if self.allNetwork:
+            return True
+        objtype1 = cr1['@OBJTYPE']
+        if self.typ and objtype1 not in self.typ:
+            return False
+        if self.action and cr1['@ACTION'] not in self.action:
+            return False
+        r = self.__areaZone__(objtype1,cr1['@OLNETID'])
+        if r is not None:
+            return r
+        scope = cr1['OBJSCOPE']
+        if scope==None:
+            return False
+        area,zone,bno,bkv,ckid = [],[],[],[],[]
+        for b1 in scope['SCOPEFIELD']:
+            n1 = b1['@NAME']
+            if n1=='AREA':
+                area.append(int(b1['@VALUE']))
+            elif n1=='ZONE':
+                zone.append(int(b1['@VALUE']))
+            elif n1=='BNO':
+                bno.append(int(b1['@VALUE']))
+            elif n1=='KV':
+                bkv.append(float(b1['@VALUE']))
+            elif n1=='CKTID' or n1=='CKTID2':
+                ckid.append(b1['@VALUE'])
+        return self.__terminals__(area,zone,bno,bkv,ckid)
+    #
+    def __setArray__(self,vals,st,inside):
+        """ vectorized area/zone/BNO test, vals: int array nRecord x nTerminal, -1 = no terminal """
+        import numpy as np
+        present = vals>=0
+        isin = st.containsArray(vals)
+        hit = isin if inside else ~isin
+        if self.tie:
+            return np.any(hit&present,axis=1)
+        return np.all(hit|~present,axis=1)&np.any(present,axis=1)
+    #
+    def evalArrays(self,objtype,n,area=None,zone=None,bno=None,kv=None,ckid=None,olnetid=None,action=None,guid=None):
+        """
+        vectorized filter over n records of one objtype
+
+        area,zone,bno : int arrays n x nTerminal (-1: no terminal)
+        kv            : float array n x nTerminal (NaN: no terminal)
+        ckid          : object array n x k of circuit IDs ('' : none)
+        olnetid       : int array n (AREA/ZONE objects)
+        action,guid   : object arrays n
+        return bool array n
+        """
+        import numpy as np
+        ok = np.ones(n,dtype=bool)
+        if self.allNetwork:
+            return ok
+        if self.typ and objtype not in self.typ:
+            return ~ok
+        if self.action:
+            ok &= np.array([a in self.action for a in action],dtype=bool) if action is not None else False
+        if self.OBJGUID and guid is not None:
+            ok &= np.array([g in self.OBJGUID for g in guid],dtype=bool)
+        if not (self.BNO or self.ckid or self.OBJGUID or self.kv) and olnetid is not None:
+            if objtype=='AREA':
+                if self.area:
+                    return ok&(self.area.containsArray(olnetid)==self.inside_area)
+                elif not self.zone:
+                    return ok
+            if objtype=='ZONE':
+                if self.zone:
+                    return ok&(self.zone.containsArray(olnetid)==self.inside_zone)
+                elif not self.area:
+                    return ok
+        if self.ckid:
+            ok &= np.any(np.isin(ckid,list(self.ckid)),axis=1) if ckid is not None else False
+        if self.area:
+            ok &= self.__setArray__(area,self.area,self.inside_area) if area is not None else False
+        if self.zone:
+            ok &= self.__setArray__(zone,self.zone,self.inside_zone) if zone is not None else False
+        if self.BNO:
+            ok &= self.__setArray__(bno,self.BNO,True) if bno is not None else False
+        if self.kv:
+            if kv is None:
+                return ok&False
+            with np.errstate(invalid='ignore'):
+                kvmax = np.nanmax(np.where(np.isnan(kv).all(axis=1)[:,None],-np.inf,kv),axis=1)
+            ok &= (kvmax>=self.kv[0])&(kvmax<=self.kv[1])
+        return ok
+    #
+    def evalTable(self,tables,objtype):
+        """
+        vectorized filter of one OBJTYPE of an OlxCache.OLX_TABLES
+        area/zone of terminals from the BUS table (BS_AREANO/BS_ZONENO by TERMGUIDx),
+        own number for AREA (AR_NO) and ZONE (ZN_NO) objects
+        """
+        import numpy as np
+        t1 = tables.table(objtype)
+        n = t1.n
+        if self.allNetwork:
+            return np.ones(n,dtype=bool)
+        if objtype=='BUS':
+            area = __intCol__(t1,['BS_AREANO'])
+            zone = __intCol__(t1,['BS_ZONENO'])
+        else:
+            bt = tables.table('BUS')
+            ba,bz = __intCol__(bt,['BS_AREANO'])[:,0],__intCol__(bt,['BS_ZONENO'])[:,0]
+            bi = {g:i for i,g in enumerate(bt.column('OBJGUID'))}
+            ti = np.full((n,len(TERMGUID)),-1,dtype=np.int64)
+            for k,f in enumerate(TERMGUID):
+                if f in t1.fields:
+                    d1 = np.array([bi.get(g,-1) for g in t1.dictionary(f)]+[-1],dtype=np.int64)
+                    ti[:,k] = d1[t1.codes(f)]
+            area = np.where(ti>=0,ba[ti],-1)
+            zone = np.where(ti>=0,bz[ti],-1)
+        olnetid = None
+        if objtype in ('AREA','ZONE'):
+            olnetid = __intCol__(t1,['AR_NO' if objtype=='AREA' else 'ZN_NO'])[:,0]
+            area = zone = olnetid[:,None]
+        bno = __intCol__(t1,TERMBNO)
+        kv = np.stack([t1.float(f) for f in TERMKV],axis=1)
+        ckid = np.stack([t1.column(f) for f in CKTID],axis=1)
+        guid = t1.column('OBJGUID') if self.OBJGUID else None
+        return self.evalArrays(objtype,n,area,zone,bno,kv,ckid,olnetid,None,guid)
+#
+def __compact__(la):
+    """ sorted list of int => interval specs ['a-b',...] """
+    la = sorted(set([int(x) for x in (la or [])]))
+    res = []
+    for x in la:
+        if res and res[-1][1]==x-1:
+            res[-1][1] = x
+        else:
+            res.append([x,x])
+    return ['%i-%i'%(a,b) for a,b in res]
+#
+def __intCol__(t1,fields):
+    """ int array n x len(fields) of an OlxCache table (-1: missing) """
+    import numpy as np
+    res = np.full((t1.n,len(fields)),-1,dtype=np.int64)
+    for k,f in enumerate(fields):
+        v = t1.float(f)
+        res[:,k] = np.where(np.isnan(v),-1,v).astype(np.int64)
+    return res
+#
+def benchmark(nRecord=1000000,nTerminal=2,prt=True):
+    """
+    wide range filters (area 1-99999 except one, kV range, bus numbers) over nRecord synthetic records:
+    list expansion + 'in list' (get_filter_range style) vs compiled record-at-a-time vs vectorized
+    """
+    import numpy as np
+    rng = np.random.default_rng(0)
+    area = rng.integers(1,100000,(nRecord,nTerminal))
+    zone = rng.integers(1,1000,(nRecord,nTerminal))
+    bno = rng.integers(1,500000,(nRecord,nTerminal))
+    kv = rng.choice([13.8,69.0,132.0,345.0,500.0],(nRecord,nTerminal))
+    spec = {'area':['1-50000','50002-99999'],'zone':['1-998'],'BNO':['1-400000'],'kv':[100,400],'tie':True}
+    res = {}
+    # expanded lists as get_filter_range
+    t0 = time.time()
+    la,lz,lb = [],[],[]
+    for s1,l1 in [[spec['area'],la],[spec['zone'],lz],[spec['BNO'],lb]]:
+        for p in s1:
+            a,b = p.split('-')
+            l1.extend(range(int(a),int(b)+1))
+    nList = min(nRecord,2000) # 'in list' is too slow for all records
+    al,zl,bl,kl = area[:nList].tolist(),zone[:nList].tolist(),bno[:nList].tolist(),kv[:nList].tolist()
+    r0 = [any([a in la for a in al[i]]) and any([z in lz for z in zl[i]]) and any([b in lb for b in bl[i]]) and 100<=max(kl[i])<=400 for i in range(nList)]
+    res['list'] = (time.time()-t0)*nRecord/nList
+    # compiled, record at a time
+    flt = OLX_FILTER(area=spec['area'],zone=spec['zone'],BNO=spec['BNO'],kv=spec['kv'],tie=True)
+    al,zl,bl,kl = area.tolist(),zone.tolist(),bno.tolist(),kv.tolist()
+    t0 = time.time()
+    r1 = [flt.match('LINE',None,None,al[i],zl[i],bl[i],kl[i]) for i in range(nRecord)]
+    res['record'] = time.time()-t0
+    # vectorized
+    t0 = time.time()
+    r2 = flt.evalArrays('LINE',nRecord,area,zone,bno,kv.astype(float))
+    res['vectorized'] = time.time()-t0
+    same = r1[:nList]==r0 and list(r2)==r1
+    if prt:
+        print('OlxFilter benchmark: %i records x %i terminals, same result: %s'%(nRecord,nTerminal,same))
+        print('    expanded list (est.) %.2fs, compiled record-at-a-time %.2fs, vectorized %.3fs'%(res['list'],res['record'],res['vectorized']))
+    res['same'] = same
+    return res
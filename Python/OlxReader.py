@@ -0,0 +1,268 @@
+"""
+Purpose: Streaming reader of ASPEN OLX files (constant memory)
+
+    ASPENLib.DataASPEN_OLX builds one nested dict of the whole OLX file. OlxReader
+    streams the file with iterparse and yields one record (OLXREC) at a time:
+    each element is cleared and detached from its parent once read, so memory does
+    not grow with the size of the file.
+
+    record = OLX_RECORD(objtype,guid,data,olnetid,nOlnet)
+        data    : {field name: value} of OLNETFIELD and DATAFIELD, same as the records
+                  of DataASPEN_OLX.get_DATA() (DATAFIELD with a VALUE element, e.g. BK_OBJLST1,
+                  is converted to the same nested dict)
+        olnetid : OLNETID attribute of OLXREC
+        nOlnet  : number of OLNETFIELD in data (first nOlnet items, in file order)
+
+    samples:
+        rd = OlxReader.OlxReader('SAMPLE30.OLX',types=['BUS','LINE'],fields={'BUS':['BS_AREANO','BS_KVNOMINAL']})
+        for r in rd:
+            print(r.objtype,r.guid,r.data)
+        print(rd.header['OBJCOUNT'],rd.stats)
+        data = OlxReader.getData('SAMPLE30.OLX',types=['BUS'])   # {OBJTYPE:[dict]}
+        OlxReader.benchmark(nBus=200000)                         # synthetic OLX: records/s, MB/s, peak RSS
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,sys,time
+from collections import namedtuple
+import xml.etree.ElementTree as ET
+
+OLX_RECORD = namedtuple('OLX_RECORD',['objtype','guid','data','olnetid','nOlnet'],defaults=['',0])
+#
+class OlxReader:
+    """
+    Streaming OLX reader
+
+        .header : dict of the top level elements before the tables, same keys as DataASPEN_OLX.xmlDict
+                  ('@OLRVERSION','@DATETIME','OBJCOUNT','SYSTEMPARAMS',...), filled while reading
+        .stats  : {'records','bytes','time'} of the last iteration
+    """
+    def __init__(self,folx,types=None,fields=None,encoding='iso8859-1',progress=None,progressStep=1<<22):
+        """
+        folx         : OLX file
+        types        : list of OBJTYPE to read (None: all)
+        fields       : {OBJTYPE: [field name]} projection of fields (OBJTYPE not in fields: all fields)
+        progress     : function(bytesRead,fileSize) called every progressStep bytes
+        """
+        self.folx = folx
+        self.types = set(types) if types else None
+        self.fields = {k:set(v) for k,v in fields.items()} if fields else {}
+        self.encoding = encoding
+        self.progress = progress
+        self.progressStep = progressStep
+        self.header = {}
+        self.stats = {'records':0,'bytes':0,'time':0.0}
+    #
+    def __iter__(self):
+        t0 = time.time()
+        fileSize = os.path.getsize(self.folx)
+        types,fields,progress = self.types,self.fields,self.progress
+        nRec,nextProgress = 0,self.progressStep
+        with open(self.folx,'rb') as source:
+            parser = ET.XMLParser(encoding=self.encoding)
+            root,tbl,skip = None,None,False
+            for event,elem in ET.iterparse(source,events=('start','end'),parser=parser):
+                if event=='start':
+                    if root is None:
+                        root = elem
+                        for k,v in elem.attrib.items():
+                            self.header['@'+k] = v
+                    elif elem.tag=='OLXDBTABLE':
+                        tbl = elem
+                        skip = types is not None and elem.get('NAME') not in types
+                    continue
+                tag = elem.tag
+                if tag=='OLXREC':
+                    if not skip:
+                        objtype = elem.get('OBJTYPE')
+                        d,n1 = __record__(elem,fields.get(objtype))
+                        yield OLX_RECORD(objtype,elem.get('OBJGUID'),d,elem.get('OLNETID'),n1)
+                        nRec += 1
+                    del tbl[:] # detach records already read
+                    if progress is not None and source.tell()>=nextProgress:
+                        progress(source.tell(),fileSize)
+                        nextProgress = source.tell()+self.progressStep
+                elif tag=='OLXDBTABLE':
+                    tbl = None
+                    root.remove(elem)
+                elif tbl is None and elem is not root and elem in root:
+                    # top level element before/between tables: OBJCOUNT, SYSTEMPARAMS, UDFTEMPLATE
+                    self.header[tag] = elem2Dict(elem)
+                    root.remove(elem)
+            self.stats = {'records':nRec,'bytes':fileSize,'time':time.time()-t0}
+            if progress is not None:
+                progress(fileSize,fileSize)
+    #
+    def records(self,objtype):
+        """ iterate records of one OBJTYPE """
+        for r in self:
+            if r.objtype==objtype:
+                yield r
+#
+def __record__(elem,proj):
+    """ OLXREC element => ({field name: value},number of OLNETFIELD) """
+    d = {}
+    olnet = elem.find('OLNET')
+    if olnet is not None:
+        for f in olnet:
+            n = f.get('NAME')
+            if proj is None or n in proj or n=='OBJGUID':
+                d[n] = f.get('VALUE')
+    nOlnet = len(d)
+    for f in elem.iterfind('DATAFIELD'):
+        n = f.get('NAME')
+        if proj is not None and n not in proj:
+            continue
+        v = f.get('VALUE')
+        if v is None:
+            v1 = f.find('VALUE')
+            if v1 is None:
+                continue
+            v = elem2Dict(v1)
+        d[n] = v
+    return d,nOlnet
+#
+def elem2Dict(elem):
+    """ element => dict, same conventions as ASPENLib.xmlparse ('@' attributes, list of repeated tags) """
+    d = {}
+    for k,v in elem.attrib.items():
+        d['@'+k] = v
+    for c in elem:
+        v = elem2Dict(c)
+        if c.tag in d:
+            if type(d[c.tag])==list:
+                d[c.tag].append(v)
+            else:
+                d[c.tag] = [d[c.tag],v]
+        else:
+            d[c.tag] = v
+    if elem.text and elem.text.strip():
+        if not d:
+            return elem.text.strip()
+        d['#text'] = elem.text.strip()
+    return d if d else None
+#
+def readHeader(folx,encoding='iso8859-1'):
+    """ header of OLX file (stop at the first table) """
+    with open(folx,'rb') as source:
+        header,root = {},None
+        for event,elem in ET.iterparse(source,events=('start','end'),parser=ET.XMLParser(encoding=encoding)):
+            if event=='start':
+                if root is None:
+                    root = elem
+                    for k,v in elem.attrib.items():
+                        header['@'+k] = v
+                elif elem.tag=='OLXDBTABLE':
+                    break
+            elif elem in root:
+                header[elem.tag] = elem2Dict(elem)
+                root.remove(elem)
+    return header
+#
+def getData(folx,types=None,fields=None,encoding='iso8859-1'):
+    """ {OBJTYPE:[dict]} of records, same as DataASPEN_OLX.get_DATA()[0] without filter """
+    data = {}
+    for r in OlxReader(folx,types=types,fields=fields,encoding=encoding):
+        try:
+            data[r.objtype].append(r.data)
+        except KeyError:
+            data[r.objtype] = [r.data]
+    return data
+#
+def peakRSS():
+    """ peak resident memory of the process (MB), None if not available """
+    try:
+        import resource
+        m = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return m/1024.0 if sys.platform!='darwin' else m/1048576.0
+    except ImportError:
+        pass
+    try:
+        import psutil
+        mi = psutil.Process().memory_info()
+        return getattr(mi,'peak_wset',mi.rss)/1048576.0
+    except ImportError:
+        return None
+#
+def makeSyntheticOLX(folx,nBus=10000,linePerBus=1.5,nField=30):
+    """ write a synthetic OLX file (BUS and LINE tables) for benchmarks """
+    import random
+    random.seed(0)
+    sTab = ['','\n    ','\n        ','\n            ','\n                ']
+    nLine = int(nBus*linePerBus)
+    with open(folx,'w',encoding='utf-8') as fo:
+        fo.write("<?xml version='1.0'?>\n")
+        fo.write('<ASPENOLXDB OLRVERSION="15.5" DATETIME="2024/01/01 00:00:00">')
+        fo.write(sTab[1]+'<OBJCOUNT COUNT="%i" BUS="%i" LINE="%i"/>'%(nBus+nLine,nBus,nLine))
+        fo.write(sTab[1]+'<SYSTEMPARAMS BASEMVA="100">')
+        fo.write(sTab[2]+'<FILECOMMENTS> synthetic </FILECOMMENTS>')
+        fo.write(sTab[1]+'</SYSTEMPARAMS>')
+        fo.write(sTab[1]+'<OLXDBTABLE NAME="BUS" RECCOUNT="%i">'%nBus)
+        for i in range(nBus):
+            fo.write(sTab[2]+'<OLXREC OBJTYPE="BUS" OLNETID="%i" OBJGUID="{B%011i}">'%(i,i))
+            fo.write(sTab[3]+'<OLNET>')
+            fo.write(sTab[4]+'<OLNETFIELD NAME="OBJGUID" VALUE="{B%011i}"/>'%i)
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMBNO1" VALUE="%i"/>'%(i+1))
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMKV1" VALUE="132"/>')
+            fo.write(sTab[3]+'</OLNET>')
+            fo.write(sTab[3]+'<DATAFIELD VALUE="BUS%i" NAME="BS_NAME"/>'%i)
+            fo.write(sTab[3]+'<DATAFIELD VALUE="%i" NAME="BS_AREANO"/>'%(i%20+1))
+            fo.write(sTab[3]+'<DATAFIELD VALUE="%i" NAME="BS_ZONENO"/>'%(i%50+1))
+            fo.write(sTab[3]+'<DATAFIELD VALUE="132" NAME="BS_KVNOMINAL"/>')
+            for k in range(nField-4):
+                fo.write(sTab[3]+'<DATAFIELD VALUE="%.4f" NAME="BS_F%i"/>'%(random.random(),k))
+            fo.write(sTab[2]+'</OLXREC>')
+        fo.write(sTab[1]+'</OLXDBTABLE>')
+        fo.write(sTab[1]+'<OLXDBTABLE NAME="LINE" RECCOUNT="%i">'%nLine)
+        for i in range(nLine):
+            b1,b2 = i%nBus,random.randrange(nBus)
+            fo.write(sTab[2]+'<OLXREC OBJTYPE="LINE" OLNETID="%i" OBJGUID="{L%011i}">'%(i,i))
+            fo.write(sTab[3]+'<OLNET>')
+            fo.write(sTab[4]+'<OLNETFIELD NAME="OBJGUID" VALUE="{L%011i}"/>'%i)
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMGUID1" VALUE="{B%011i}"/>'%b1)
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMGUID2" VALUE="{B%011i}"/>'%b2)
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMBNO1" VALUE="%i"/>'%(b1+1))
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMBNO2" VALUE="%i"/>'%(b2+1))
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMKV1" VALUE="132"/>')
+            fo.write(sTab[4]+'<OLNETFIELD NAME="TERMKV2" VALUE="132"/>')
+            fo.write(sTab[4]+'<OLNETFIELD NAME="CKTID" VALUE="1"/>')
+            fo.write(sTab[3]+'</OLNET>')
+            fo.write(sTab[3]+'<DATAFIELD VALUE="%.4f" NAME="LN_R"/>'%(random.random()*0.01))
+            fo.write(sTab[3]+'<DATAFIELD VALUE="%.4f" NAME="LN_X"/>'%(random.random()*0.1))
+            for k in range(nField-2):
+                fo.write(sTab[3]+'<DATAFIELD VALUE="%.4f" NAME="LN_F%i"/>'%(random.random(),k))
+            fo.write(sTab[2]+'</OLXREC>')
+        fo.write(sTab[1]+'</OLXDBTABLE>')
+        fo.write('\n</ASPENOLXDB>')
+#
+def benchmark(folx=None,nBus=100000,fields=None,prt=True):
+    """
+    throughput (records/s, MB/s) and peak RSS of OlxReader
+    folx : OLX file (None: synthetic file of nBus buses in the temp folder, deleted after)
+    """
+    import tempfile
+    tmp = folx is None
+    if tmp:
+        folx = os.path.join(tempfile.gettempdir(),'OlxReader_benchmark.OLX')
+        makeSyntheticOLX(folx,nBus=nBus)
+    rss0 = peakRSS()
+    rd = OlxReader(folx,fields=fields)
+    for r in rd:
+        pass
+    rss1 = peakRSS()
+    st = rd.stats
+    res = {'records':st['records'],'MB':st['bytes']/1048576.0,'time':st['time'],\
+           'records/s':st['records']/max(st['time'],1e-9),'MB/s':st['bytes']/1048576.0/max(st['time'],1e-9),\
+           'peakRSS_MB':rss1,'peakRSS_before_MB':rss0}
+    if prt:
+        print('OlxReader: %i records, %.1f MB in %.2fs: %.0f records/s, %.1f MB/s, peak RSS %s MB (before %s MB)'%(res['records'],\
+               res['MB'],res['time'],res['records/s'],res['MB/s'],'%.0f'%rss1 if rss1 else '?','%.0f'%rss0 if rss0 else '?'))
+    if tmp:
+        os.remove(folx)
+    return res
@@ -0,0 +1,328 @@
+"""
+Purpose: Streaming writer of ASPEN OLX and ADX files
+
+    Records are written as they are produced (OlxReader, AdxIndex, filters, xmlDict tables),
+    the whole model is never held in memory. Same output as the exporters of ASPENLib
+    (DataASPEN_OLX.export2XML/exportData2XML, DataASPEN_ADX.export2XML).
+
+    Counts written before the records (RECCOUNT of a table, OBJCOUNT of the file) are
+    taken from the caller when known, else the records are kept in a bounded buffer
+    that spills to a temporary file (bufferSize) until the counts are known.
+    Output is gzip compressed if the file name ends with .gz (or gz=True).
+
+    samples:
+        with OlxWriter.OLX_WRITER('out.OLX',header) as wr:       # header: DataASPEN_OLX.xmlDict / OlxReader.header
+            wr.beginTable('BUS')
+            wr.writeRecord('BUS',guid,olnetid,data,nOlnet)       # OlxReader.OLX_RECORD fields
+            wr.endTable()
+        OlxWriter.filterOLX('big.OLX','area1.OLX.gz',keep=lambda r: r.data.get('BS_AREANO')=='1',types=['BUS'])
+        OlxWriter.filterADX('diff.ADX','diff_LINE.ADX',objtype='LINE')
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import io,gzip,shutil,tempfile
+
+sTab = ['','\n    ','\n        ','\n            ','\n                ','\n                    ', '\n                        ']
+BUFFER_SIZE = 1<<24
+ADX_OPTIONS = ['OLRVERSION','DATETIME','FILEA','FILEB',
+               'COMP_BUSES', 'COMP_AREAZONES', 'COMP_GENS', 'COMP_LOADS', 'COMP_SHUNTS', 'COMP_SVDS',
+               'COMP_LINES', 'COMP_SHIFTERS', 'COMP_XFMRS', 'COMP_BREAKERS', 'COMP_MUS', 'COMP_OCRLYS',
+               'COMP_DSRLYS', 'COMP_SWITCHES', 'COMP_DCLINE2S', 'COMP_SCHEMES', 'COMP_DEVICES',
+               'EXTENT', 'CORRELATE', 'TIES', 'AZRANGE', 'KVRANGE',
+               'BOUNDARYID', 'TAGS', 'CHANGECOUNT']
+#
+def __esc__(v):
+    """ attribute value: only characters that break the XML are escaped """
+    v = str(v)
+    if '&' in v or '<' in v or '"' in v:
+        v = v.replace('&','&amp;').replace('<','&lt;').replace('"','&quot;')
+    return v
+#
+def __list__(v):
+    if v is None:
+        return []
+    return v if type(v)==list else [v]
+#
+def openText(fout,gz=None,bufferSize=BUFFER_SIZE):
+    """ text file (utf-8) for writing, gzip if gz or fout ends with .gz """
+    if gz is None:
+        gz = fout.lower().endswith('.gz')
+    if gz:
+        return io.TextIOWrapper(io.BufferedWriter(gzip.open(fout,'wb'),bufferSize),encoding='utf-8')
+    return open(fout,'w',encoding='utf-8',buffering=bufferSize)
+#
+def __spool__(bufferSize):
+    return tempfile.SpooledTemporaryFile(max_size=bufferSize,mode='w+',encoding='utf-8',newline='')
+#
+def __olnetList__(fo,tag,value,k):
+    """ <VALUE>/<VALUEA>/<VALUEB> with list of OLNET (BK_OBJLST1,BK_OBJLST2) """
+    olnets = __list__(value['OLNET']) if value else []
+    if not olnets:
+        fo.write(sTab[k]+'<%s/>'%tag)
+        return
+    fo.write(sTab[k]+'<%s>'%tag)
+    for elem in olnets:
+        fo.write(sTab[k+1]+'<OLNET OBJTYPE="%s">'%elem['@OBJTYPE'])
+        for obj1 in __list__(elem['OLNETFIELD']):
+            fo.write(sTab[k+2]+'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(obj1['@NAME'],__esc__(obj1['@VALUE'])))
+        fo.write(sTab[k+1]+'</OLNET>')
+    fo.write(sTab[k]+'</%s>'%tag)
+#
+class OLX_WRITER:
+    """
+    Streaming OLX writer
+
+        header   : dict with '@OLRVERSION','@DATETIME','SYSTEMPARAMS','UDFTEMPLATE' (and 'OBJCOUNT')
+        objcount : list of (name,value) of OBJCOUNT, None: computed from the records written
+                   (COUNT="total" then count of each table, as DataASPEN_OLX.exportData2XML)
+    """
+    def __init__(self,fout,header,objcount=None,gz=None,bufferSize=BUFFER_SIZE):
+        self.fo = openText(fout,gz,bufferSize)
+        self.header = header
+        self.objcount = objcount
+        self.bufferSize = bufferSize
+        self.counts = []        # [(table name, records)]
+        self.__table__ = None
+        if objcount is None:
+            self.__body__ = __spool__(bufferSize) # header written at close
+        else:
+            self.__writeHeader__(objcount)
+            self.__body__ = self.fo
+        self.__out__ = self.__body__
+    #
+    def __enter__(self):
+        return self
+    #
+    def __exit__(self,exc_type,exc_value,tb):
+        self.close()
+    #
+    def __writeHeader__(self,objcount):
+        fo,hd = self.fo,self.header
+        fo.write("<?xml version='1.0'?>\n")
+        fo.write('<ASPENOLXDB OLRVERSION="%s" DATETIME="%s">'%(hd['@OLRVERSION'],hd['@DATETIME']))
+        fo.write(sTab[1]+'<OBJCOUNT %s/>'%''.join(['%s="%s" '%(k,v) for k,v in objcount]))
+        if 'UDFTEMPLATE' in hd and hd['UDFTEMPLATE']:
+            fo.write(sTab[1]+'<UDFTEMPLATE>')
+            for olrxobj in __list__(hd['UDFTEMPLATE'].get('OLRXOBJ')):
+                fo.write(sTab[2]+'<OLRXOBJ OBJTYPE="%s">'%(olrxobj['@OBJTYPE']))
+                for udf in __list__(olrxobj.get('UDFIELD')):
+                    fo.write(sTab[3]+'<UDFIELD ROWNO="%s" FNAME="%s" LABEL="%s"/>'%(udf['@ROWNO'],__esc__(udf['@FNAME']),__esc__(udf['@LABEL'])))
+                fo.write(sTab[2]+'</OLRXOBJ>')
+            fo.write(sTab[1]+'</UDFTEMPLATE>')
+        s1,s2 = '',''
+        sp = hd.get('SYSTEMPARAMS')
+        if type(sp)==dict:
+            for key,value in sp.items():
+                if key != "FILECOMMENTS":
+                    s1 += '%s="%s" '%(key[1:],__esc__(value))
+                else:
+                    s2 = value if value is not None else ''
+        fo.write(sTab[1]+'<SYSTEMPARAMS %s>'%(s1))
+        fo.write(sTab[2]+'<FILECOMMENTS> %s </FILECOMMENTS>'%(s2.replace('&','&amp;').replace('<','&lt;')))
+        fo.write(sTab[1]+'</SYSTEMPARAMS>')
+    #
+    def beginTable(self,name,reccount=None):
+        """ start table OLXDBTABLE, reccount None: counted (records buffered until endTable) """
+        if self.__table__ is not None:
+            self.endTable()
+        self.__table__ = [name,reccount,0]
+        if reccount is None:
+            self.__out__ = __spool__(self.bufferSize)
+        else:
+            self.__out__ = self.__body__
+            self.__out__.write(sTab[1]+'<OLXDBTABLE NAME="%s" RECCOUNT="%s">'%(name,reccount))
+    #
+    def endTable(self):
+        if self.__table__ is None:
+            return
+        name,reccount,n = self.__table__
+        self.__table__ = None
+        if reccount is None:
+            sp,self.__out__ = self.__out__,self.__body__
+            if n>0: # empty table not written (exportData2XML)
+                self.__out__.write(sTab[1]+'<OLXDBTABLE NAME="%s" RECCOUNT="%s">'%(name,n))
+                sp.seek(0)
+                shutil.copyfileobj(sp,self.__out__)
+                self.__out__.write(sTab[1]+'</OLXDBTABLE>')
+            sp.close()
+        else:
+            self.__out__.write(sTab[1]+'</OLXDBTABLE>')
+        if n>0 or reccount is not None:
+            self.counts.append((name,n))
+    #
+    def writeOlxrec(self,olxrec,values=None):
+        """
+        one record in the form of DataASPEN_OLX.xmlDict['OLXDBTABLE'][i]['OLXREC'][j]
+        values: dict of DATAFIELD values replacing those of olxrec (DataASPEN_OLX.exportData2XML)
+        """
+        fo = self.__out__
+        fo.write(sTab[2]+'<OLXREC OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(olxrec['@OBJTYPE'],__esc__(olxrec['@OLNETID']),olxrec['@OBJGUID']))
+        fo.write(sTab[3]+'<OLNET>')
+        for olnetfield in __list__(olxrec['OLNET']['OLNETFIELD']):
+            fo.write(sTab[4]+'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(olnetfield['@NAME'],__esc__(olnetfield['@VALUE'])))
+        fo.write(sTab[3]+'</OLNET>')
+        for df in __list__(olxrec.get('DATAFIELD')):
+            n1 = df['@NAME']
+            if '@VALUE' in df:
+                v = values[n1] if values is not None else df['@VALUE']
+            else:
+                v = values.get(n1) if values is not None else df.get('VALUE')
+                if type(v)==str:
+                    v = None
+            self.__datafield__(n1,v)
+        fo.write(sTab[2]+'</OLXREC>')
+        self.__table__[2] += 1
+    #
+    def writeRecord(self,objtype,guid,olnetid,data,nOlnet):
+        """ one record from its fields (OlxReader.OLX_RECORD: first nOlnet items of data are OLNETFIELD) """
+        fo = self.__out__
+        fo.write(sTab[2]+'<OLXREC OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(objtype,__esc__(olnetid),guid))
+        fo.write(sTab[3]+'<OLNET>')
+        it = iter(data.items())
+        for i in range(nOlnet):
+            n1,v = next(it)
+            fo.write(sTab[4]+'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(n1,__esc__(v)))
+        fo.write(sTab[3]+'</OLNET>')
+        for n1,v in it:
+            self.__datafield__(n1,v)
+        fo.write(sTab[2]+'</OLXREC>')
+        self.__table__[2] += 1
+    #
+    def __datafield__(self,name,v):
+        fo = self.__out__
+        if v is None or type(v)==dict:
+            fo.write(sTab[3]+'<DATAFIELD NAME="%s">'%name)
+            __olnetList__(fo,'VALUE',v,4)
+            fo.write(sTab[3]+'</DATAFIELD>')
+        else:
+            fo.write(sTab[3]+'<DATAFIELD VALUE="%s" NAME="%s"/>'%(__esc__(v),name))
+    #
+    def close(self):
+        """ end of file, return the (closed) file object """
+        if self.fo.closed:
+            return self.fo
+        self.endTable()
+        if self.objcount is None:
+            total = sum([n for _,n in self.counts])
+            self.__writeHeader__([('COUNT',total)]+[(k,n) for k,n in self.counts if n>0])
+            self.__body__.seek(0)
+            shutil.copyfileobj(self.__body__,self.fo)
+            self.__body__.close()
+        self.fo.write('\n</ASPENOLXDB>')
+        self.fo.close()
+        return self.fo
+#
+class ADX_WRITER:
+    """
+    Streaming ADX writer
+
+        olxdiff    : dict of OLXDIFF attributes ('@' keys as DataASPEN_ADX.xmlDict)
+        changestat : dict of CHANGESTAT attributes ('@' keys)
+    """
+    def __init__(self,fout,olxdiff,changestat=None,gz=None,bufferSize=BUFFER_SIZE):
+        self.fo = openText(fout,gz,bufferSize)
+        info = {}
+        for key in ADX_OPTIONS:
+            if '@'+key in olxdiff:
+                info[key] = olxdiff['@'+key]
+            elif key == 'FILEA' or key == 'FILEB':
+                info[key] = ""
+            elif key == 'OLRVERSION':
+                info[key] = "15.5"
+        self.n = 0
+        self.fo.write("<?xml version='1.0'?>\n")
+        self.fo.write('<ASPENOLX>')
+        self.fo.write(sTab[1]+'<OLXDIFF %s>'%''.join(['%s="%s" '%(k,__esc__(v)) for k,v in info.items()]))
+        self.fo.write(sTab[2]+'<CHANGESTAT %s/>'%''.join(['%s="%s" '%(k[1:],v) for k,v in (changestat or {}).items()]))
+    #
+    def __enter__(self):
+        return self
+    #
+    def __exit__(self,exc_type,exc_value,tb):
+        self.close()
+    #
+    def writeChangeRec(self,changerec):
+        """ one CHANGEREC in the form of DataASPEN_ADX.xmlDict['CHANGEREC'][i] """
+        fo = self.fo
+        action = changerec['@ACTION']
+        fo.write(sTab[2]+'<CHANGEREC ACTION="%s" OBJTYPE="%s" OLNETID="%s" OBJGUID="%s">'%(action,changerec['@OBJTYPE'],__esc__(changerec['@OLNETID']),changerec['@OBJGUID']))
+        fo.write(sTab[3]+'<OLNET OBJTYPE="%s">'%changerec['@OBJTYPE'])
+        for olnetfield in __list__(changerec['OLNET']['OLNETFIELD']):
+            fo.write(sTab[4]+'<OLNETFIELD NAME="%s" VALUE="%s"/>'%(olnetfield['@NAME'],__esc__(olnetfield['@VALUE'])))
+        fo.write(sTab[3]+'</OLNET>')
+        objscope = changerec.get('OBJSCOPE')
+        if objscope:
+            fo.write(sTab[3]+'<OBJSCOPE>')
+            for scope in __list__(objscope['SCOPEFIELD']):
+                fo.write(sTab[4]+'<SCOPEFIELD NAME="%s" VALUE="%s"/>'%(scope['@NAME'],__esc__(scope['@VALUE'])))
+            fo.write(sTab[3]+'</OBJSCOPE>')
+        if action in ('MODIFY','ADD'):
+            for chf in __list__(changerec.get('CHANGEFIELD')):
+                label,name = __esc__(chf['@LABEL']),chf['@NAME']
+                if action=='MODIFY':
+                    if '@VALUEA' in chf:
+                        fo.write(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s" VALUEA="%s" VALUEB="%s"/>'%(label,name,__esc__(chf['@VALUEA']),__esc__(chf['@VALUEB'])))
+                    else:
+                        fo.write(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s">'%(label,name))
+                        __olnetList__(fo,'VALUEA',chf.get('VALUEA'),4)
+                        __olnetList__(fo,'VALUEB',chf.get('VALUEB'),4)
+                        fo.write(sTab[3]+'</CHANGEFIELD>')
+                else:
+                    if '@VALUE' in chf:
+                        fo.write(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s" VALUE="%s"/>'%(label,name,__esc__(chf['@VALUE'])))
+                    else:
+                        fo.write(sTab[3]+'<CHANGEFIELD LABEL="%s" NAME="%s">'%(label,name))
+                        __olnetList__(fo,'VALUE',chf.get('VALUE'),4)
+                        fo.write(sTab[3]+'</CHANGEFIELD>')
+        fo.write(sTab[2]+'</CHANGEREC>')
+        self.n += 1
+    #
+    def close(self):
+        if not self.fo.closed:
+            self.fo.write(sTab[1]+'</OLXDIFF>')
+            self.fo.write('\n</ASPENOLX>')
+            self.fo.close()
+        return self.fo
+#
+def filterOLX(folxIn,folxOut,keep=None,types=None,fields=None,encoding='iso8859-1',gz=None,bufferSize=BUFFER_SIZE):
+    """
+    streaming copy of the records of an OLX file kept by keep(OLX_RECORD) (None: all)
+    memory does not depend on the size of the file, return {OBJTYPE:records written}
+    """
+    import OlxReader
+    rd = OlxReader.OlxReader(folxIn,types=types,fields=fields,encoding=encoding)
+    wr = None
+    try:
+        for r in rd:
+            if wr is None:
+                wr = OLX_WRITER(folxOut,rd.header,gz=gz,bufferSize=bufferSize)
+            if wr.__table__ is None or wr.__table__[0]!=r.objtype:
+                wr.beginTable(r.objtype)
+            if keep is None or keep(r):
+                wr.writeRecord(r.objtype,r.guid,r.olnetid,r.data,r.nOlnet)
+        if wr is None:
+            wr = OLX_WRITER(folxOut,OlxReader.readHeader(folxIn,encoding),gz=gz,bufferSize=bufferSize)
+    finally:
+        if wr is not None:
+            wr.close()
+    return dict(wr.counts)
+#
+def filterADX(fadxIn,fadxOut,keep=None,action=None,objtype=None,area=None,zone=None,gz=None,bufferSize=BUFFER_SIZE):
+    """
+    streaming copy of the CHANGEREC of an ADX file selected by AdxIndex (action/objtype/area/zone)
+    and kept by keep(changerec dict) (e.g. FilterOptions.runFilter), return number of CHANGEREC written
+    """
+    import AdxIndex
+    idx = AdxIndex.ADX_INDEX(fadxIn)
+    hd = idx.header
+    with ADX_WRITER(fadxOut,hd,hd.get('CHANGESTAT'),gz=gz,bufferSize=bufferSize) as wr:
+        for cr1 in idx.iterRecords(action=action,objtype=objtype,area=area,zone=zone):
+            if keep is None or keep(cr1):
+                wr.writeChangeRec(cr1)
+    return wr.n
@@ -8,7 +8,7 @@ __category__  = "Common"
 __pyManager__ = "yes"
 __email__     = "support@aspeninc.com"
 __status__    = "Release"
-__version__   = "2.1.1"
+__version__   = "2.2.0"
 
 
 # IMPORT -----------------------------------------------------------------------
@@ -23,7 +23,9 @@ PARSER_INPUTS = argparse.ArgumentParser(epilog= "")
 PARSER_INPUTS.usage = 'PRC-023-4 Transmission Relay Loadability Check'
 PARSER_INPUTS.add_argument('-fCFG',help = '*(str) XML config file path (default=...\\PRC023_CONFIG.XML)',default = 'PRC023_CONFIG.XML',type=str, metavar='')
 PARSER_INPUTS.add_argument('-opath' , help = ' (str) Path name output folder',default = "", type=str, metavar='')
+PARSER_INPUTS.add_argument('-np' , help = ' (int) number of processes for simulations (>1: current case saved to a temporary OLR opened in each process)',default = 1, type=int, metavar='')
 PARSER_INPUTS.add_argument('-demo', help = ' (int) demo [0-ignore, 1-run demo]', default = 0,type=int,metavar='')
+PARSER_INPUTS.add_argument('-ut', help = ' (int) unit test [0-ignore, 1-run_1 and run on sample\\PRC023.OLR compared with PRC023_ut_REF.txt]', default = 0,type=int,metavar='')
 ARGVS = PARSER_INPUTS.parse_known_args()[0]
 
 
@@ -358,6 +360,291 @@ def weakSource(t1,e1):
     ic = abs(FltSimResult[0].current()[0])
     return ic,ti
 #
+def getSections(la):
+    """
+    enumerate line sections once (tapLineTool on each line not yet covered, then on the
+    opposite end), fetch all data of both ends that does not need a simulation
+    return list of sections, section = list of ends (1 or 2) in report order
+    """
+    covered = set()
+    res = []
+    for l1 in la:
+        if l1.FLAG==1:
+            e1,t2 = __end__(l1,covered)
+            if e1:
+                sec = [e1]
+                e2 = __end__(t2,covered)[0]
+                if e2:
+                    sec.append(e2)
+                res.append(sec)
+    return res
+#
+def __end__(l1,covered):
+    """ data of one end (as run1line without simulation), opposite TERMINAL """
+    if type(l1)!=TERMINAL:
+        if l1.HANDLE in covered:
+            return None,None
+    #
+    res = OLCase.tapLineTool(l1,tapSCAP=True)
+    mainLine = res['mainLine']
+    allPath = res['allPath']
+    remoteBus = res['remoteBus']
+    z10 = res['Z1'][0].imag
+    #
+    for a1 in allPath:
+        for t1 in a1:
+            covered.add(t1.EQUIPMENT.HANDLE)
+    if len(mainLine)>1:
+        return None,None # ignore for multi main line
+    #
+    ea = [t1.EQUIPMENT for t1 in mainLine[0]]
+    #
+    z1 = 0 # line inductive reactance
+    haveSeriesrc = False
+    for e1 in ea:
+        if type(e1)!=SWITCH:
+            x1 = e1.X
+            if x1>0: # reduced by the capacitive reactance
+                z1+=x1
+            else:
+                haveSeriesrc = True
+    if abs(z1)<=1e-4:
+        return None,None # ignore for short line
+    #
+    b1 = mainLine[0][0].BUS[0]
+    b2 = mainLine[0][0].BUS[1]
+    b3 = remoteBus[0]
+    kV = b1.kV
+    kname = ['SC' if type(e1).__name__=='SERIESRC' else type(e1).__name__  for e1 in ea]
+    for v1 in ['LINE','SWITCH','SC']:
+        k = sum(x==v1 for x in kname)
+        if k>1:
+            i1=1
+            for i in range(len(kname)):
+                if kname[i]==v1:
+                    kname[i]+=' '+str(i1)
+                    i1+=1
+    print('Checking:',mainLine[0][0].toString()[11:])
+    e = {'sum1':[kV,b1.NO,b1.NAME,b2.NO,b2.NAME,mainLine[0][0].CID,b3.NO,b3.NAME],\
+         'kV':kV,'z1':z1,'z10':z10,'haveSeriesrc':haveSeriesrc,\
+         'b1':(b1.GUID,b1.toString()),'b3':(b3.GUID,b3.toString()),\
+         'lines':[e1.GUID for e1 in ea if type(e1).__name__=='LINE'],\
+         'equipment':[],'ratings':[],'sc':[],'xfmr':None}
+    for i in range(len(ea)):
+        s1 = mainLine[0][i].toString()
+        e['equipment'].append(kname[i] + ': ' + s1[s1.find(']')+1:] + ' ' + ea[i].GUID)
+        if kname[i].startswith('LINE'):
+            rateg = ea[i].RATG
+            e['ratings'].append((kname[i],rateg[2],rateg[3]))
+        elif haveSeriesrc and kname[i].startswith('SC'):
+            try:
+                ri = float(ea[i].RATING)
+            except:
+                ri = 0
+            e['sc'].append((kname[i],ri))
+    # line-end fault (R1.5): terminal of the first equipment opposite to the local end
+    ta = ea[0].TERMINAL
+    k = 1 if ta[0].__hnd__==mainLine[0][0].__hnd__ else 0
+    e['weak'] = (ea[0].GUID,k,ta[k].toString()[11:])
+    # TRANSFORMER
+    ta = b3.TERMINAL
+    x = None
+    if len(ta)==2:
+        for ti in ta:
+            e1 = ti.EQUIPMENT
+            if type(e1) in {XFMR,XFMR3}:
+                x = e1
+    if x:
+        s1 = x.toString()
+        e['xfmr'] = ('TRANSFORMER: ' + s1[s1.find(']')+1:] + ' ' + x.GUID,x.MVA2,x.MVA3)
+    #
+    return e,mainLine[0][-1].OPPOSITE[0]
+#
+def simulateSections(sections):
+    """
+    simulations of the ends of sections (3LG faults of R1.3 shared by both ends of a section,
+    line-end fault of R1.5, generators of R1.7)
+    return list by section of list by end of (xS,xR,ic,MVAmaxG,gens)
+    """
+    res = []
+    for sec in sections:
+        cache = {}
+        r1 = []
+        for e in sec:
+            xS = __thevenin__(e['b1'][0],e['lines'],cache)
+            xR = __thevenin__(e['b3'][0],e['lines'],cache)
+            g,k,st = e['weak']
+            fs = SPEC_FLT.Classical(obj=OLCase.findOBJ(g).TERMINAL[k],fltApp='Line-end',fltConn='3LG',Z=[0,0])
+            OLCase.simulateFault(fs,1,verbose=False)
+            ic = abs(FltSimResult[0].current()[0])
+            MVAmaxG,ga1 = rate_generator(OLCase.findOBJ(e['b1'][0]))
+            r1.append((xS,xR,ic,MVAmaxG,[(g1.toString(),g1.GUID) for g1 in ga1]))
+        res.append(r1)
+    return res
+#
+def __thevenin__(busGuid,lines,cache):
+    """ X Thevenin at bus with the lines of the section removed (1e9: no source) """
+    k = (busGuid,tuple(sorted(lines)))
+    if k not in cache:
+        o1 = None
+        if lines:
+            o1 = OUTAGE(option='ALL',G=0)
+            o1.add_outageLst([OLCase.findOBJ(g) for g in lines])
+        fs = SPEC_FLT.Classical(obj=OLCase.findOBJ(busGuid),fltApp='BUS',fltConn='3LG',Z=[0,0],outage=o1)
+        OLCase.simulateFault(fs,1,verbose=False)
+        x = FltSimResult[0].Thevenin[0].imag
+        cache[k] = 1e9 if abs(x)>10000 else x
+    return cache[k]
+#
+def saveSnapshot(folder):
+    """
+    save the case in memory (with unsaved edits) to folder/PRC023_snapshot.OLR
+    the current case stays open, the workers of -np>1 open the snapshot
+    """
+    import OlxAPI
+    fn = os.path.join(folder,'PRC023_snapshot.OLR')
+    if OLXAPI_FAILURE==OlxAPI.SaveDataFile(fn):
+        raise Exception(ErrorString())
+    return fn
+#
+def __simulateProcess__(args):
+    j,olrFile,sections = args
+    import OlxObj
+    OlxObj.setVerbose(0)
+    OLCase.open(olrFile,1)
+    return j,simulateSections(sections)
+#
+def checkEnds(ends,sims,config,baseMVA):
+    """
+    loadability checks R1.1-R1.10 of all ends in one vectorized pass
+    return summary rows, detail rows (same as run1line)
+    """
+    import numpy as np
+    n = len(ends)
+    kV = np.array([e['kV'] for e in ends],dtype=float)
+    z1 = np.array([e['z1'] for e in ends],dtype=float)
+    z10 = np.array([e['z10'] for e in ends],dtype=float)
+    xS = np.array([s[0] for s in sims],dtype=float)
+    xR = np.array([s[1] for s in sims],dtype=float)
+    ic = np.array([s[2] for s in sims],dtype=float)
+    mvaG = np.array([s[3] for s in sims],dtype=float)
+    mva2 = np.array([e['xfmr'][1] if e['xfmr'] else 0 for e in ends],dtype=float)
+    mva3 = np.array([e['xfmr'][2] if e['xfmr'] else 0 for e in ends],dtype=float)
+    def minRate(a):
+        return min([r for r in a if r>0]+[1e9])
+    r11 = np.array([minRate([r[1] for r in e['ratings']]) for e in ends],dtype=float)
+    r12 = np.array([minRate([r[2] for r in e['ratings']]) for e in ends],dtype=float)
+    rsc = np.array([minRate([r[1] for r in e['sc']]) for e in ends],dtype=float)
+    # R1.3, R1.4 theoretical power transfer
+    sq3 = np.sqrt(3)
+    pmax10 = 1.0/z10 * baseMVA
+    pmax1 = 1.0/z1 * baseMVA
+    x1Ohm = z1 * kV*kV/baseMVA
+    x1Ohm0 = z10 * kV*kV/baseMVA
+    pmax20 = (1.05*kV)**2/(xS+xR+x1Ohm0)
+    pmax2 = (1.05*kV)**2/(xS+xR+x1Ohm)
+    imax1 = pmax1/sq3/kV*1000
+    imax10 = pmax10/sq3/kV*1000
+    imax2 = pmax2/sq3/kV*1000
+    imax20 = pmax20/sq3/kV*1000
+    both = (xS<1e9) & (xR<1e9)
+    r13 = np.where(both,np.minimum(imax10,imax20),imax10)*1.15
+    r142 = np.where(both,np.minimum(imax1,imax2),imax1)
+    r14 = np.where(rsc<1e9,np.maximum(rsc,r142),r142)*1.15
+    imaxG = mvaG/sq3/kV*1000
+    im2 = mva2 /sq3/kV *1000
+    im3 = mva3 /sq3/kV *1000
+    r110 = np.maximum(np.where(im2>0,im2*1.5,0),np.where(im3>0,im3*1.15,0))
+    v = {'r11':r11,'r12':r12,'r13':r13,'r14':r14,'r110':r110,'pmax1':pmax1,'pmax10':pmax10,'pmax2':pmax2,'pmax20':pmax20,\
+         'imax1':imax1,'imax10':imax10,'imax2':imax2,'imax20':imax20,'imaxG':imaxG,'im2':im2,'im3':im3}
+    v = {k:a.tolist() for k,a in v.items()}
+    #
+    ar0,ard = [],[]
+    for i in range(n):
+        e,s = ends[i],sims[i]
+        kr = i+1
+        def rnd(k,nr=nprec):
+            return round(v[k][i],nr)
+        ad = [[kr,'EQUIPMENT']]+[[kr,'',s1] for s1 in e['equipment']]
+        ad2 = [[kr,'R1.1: Line Thermal rating (Rating %s)'%config['Line thermal rating']]]
+        ad2.extend([[kr,'',k1+' (amps)',r1] for k1,r1,r2 in e['ratings']])
+        sr11 = round(v['r11'][i]*1.5,nprec) if v['r11'][i]<1e9 else 'N/A'
+        sr12 = round(v['r12'][i]*1.15,nprec) if v['r12'][i]<1e9 else 'N/A'
+        ad2.append([kr,'','FACILITY R1.1=min(RATING)*1.5',sr11])
+        ad2.append([kr,'R1.2: Line 15-minute Rating (Rating %s)'%config['Line 15-minute rating']])
+        ad2.extend([[kr,'',k1+' (amps)',r2] for k1,r1,r2 in e['ratings']])
+        ad2.append([kr,'','FACILITY R1.2=min(RATING)*1.15',sr12])
+        #
+        ad2.append([kr,'R1.3: Maximum Theoretical Power Transfer Limit'])
+        ad2.append([kr,'','Xl line reactance (pu)',round(e['z10'],6)])
+        ad2.append([kr,'','Pmax R1.3.1 (MW)',rnd('pmax10')])
+        ad2.append([kr,'','Imax R1.3.1 (amps)',rnd('imax10')])
+        ad2.append([kr,'','Xs @'+e['b1'][1] +'(Ohm)',round(s[0],nprec) if s[0]<1e9 else 'infinite'])
+        ad2.append([kr,'','Xr @'+e['b3'][1]+'(Ohm)',round(s[1],nprec) if s[1]<1e9 else 'infinite'])
+        ad2.append([kr,'','Pmax R1.3.2 (MW)',rnd('pmax20')])
+        ad2.append([kr,'','Imax R1.3.2 (amps)',rnd('imax20')])
+        sr13 = rnd('r13')
+        ad2.append([kr,'','FACILITY R1.3=min(Imax R1.3.1 , Imax R1.3.2)*1.15',sr13])
+        #
+        sr14 = 'N/A'
+        ad2.append([kr,'R1.4: Series-compensated Line'])
+        if e['haveSeriesrc']:
+            ad2.extend([[kr,'',k1+' RATING (amps)',ri if ri>0 else 'N/A'] for k1,ri in e['sc']])
+            ad2.append([kr,'','Xl full line inductive reactance (pu)',round(e['z1'],6)])
+            ad2.append([kr,'','Pmax R1.4.2.1 (MW)',rnd('pmax1')])
+            ad2.append([kr,'','Imax R1.4.2.1 (amps)',rnd('imax1')])
+            ad2.append([kr,'','Pmax R1.4.2.2 (MW)',rnd('pmax2')])
+            ad2.append([kr,'','Imax R1.4.2.2 (amps)',rnd('imax2')])
+            sr14 = rnd('r14')
+            ad2.append([kr,'','FACILITY R1.4=MAX(MIN(SC RATING),MIN(Imax R1.4.2.1 , R1.4.2.2))*1.15',sr14])
+        else:
+            ad2.append([kr,'','FACILITY R1.4',sr14])
+        #
+        ad2.append([kr,'R1.5: Weak Source Systems'])
+        ad2.append([kr,'','IFault 3LG EOL @'+e['weak'][2] + ' (amps)',round(s[2],nprec)])
+        sr15 = round(s[2]*1.7,nprec)
+        if sr15==0:
+            sr15 ='N/A'
+        ad2.append([kr,'','FACILITY R1.5=IFault*1.7 (amps)',sr15])
+        sr16 = 'N/A'
+        ad2.append([kr,'R1.6: Not used'])
+        ad2.append([kr,'','FACILITY R1.6',sr16])
+        #
+        sr17 = 'N/A'
+        ad2.append([kr,'R1.7: Generation Remote to Load'])
+        if s[4]:
+            for k1,(sg,gg) in enumerate(s[4]):
+                ad.append([kr,'','GENERATOR '+ str(k1+1) + ': ' + sg[sg.find(']')+1:] + ' ' + gg])
+            sr17 = round(1.15*v['imaxG'][i],nprec)
+            ad2.append([kr,'','MVA max (MVA Rate *2) @'+e['b1'][1] +' (MVA)',s[3]])
+            ad2.append([kr,'','Imax (amps)',rnd('imaxG')])
+            ad2.append([kr,'','FACILITY R1.7=Imax*1.15 (amps)',sr17])
+        else:
+            ad2.append([kr,'','FACILITY R1.7',sr17])
+        #
+        sr18,sr19 = 'N/A','N/A'
+        ad2.append([kr,'R1.8: Bulk system-end of transmission lines, Load remote to the system'])
+        ad2.append([kr,'','FACILITY R1.8 ',sr18])
+        ad2.append([kr,'R1.9: Load-end of transmission lines, Load remote to the bulk system'])
+        ad2.append([kr,'','FACILITY R1.9 ',sr19])
+        #
+        sr110 = 'N/A'
+        ad2.append([kr,'R1.10: Transformer Overcurrent Protection'])
+        if e['xfmr']:
+            ad.append([kr,'',e['xfmr'][0]])
+            ad2.append([kr,'','MVA nameplate rating (%s)'%config['Transformer nameplate rating'],e['xfmr'][1]])
+            ad2.append([kr,'','Imax1 (nameplate rating as amps)',rnd('im2')])
+            ad2.append([kr,'','MVA emergency rating (%s)'%config['Transformer emergency rating'],e['xfmr'][2]])
+            ad2.append([kr,'','Imax2 (Emergency Rating as amps)',rnd('im3')])
+            sr110 = rnd('r110') if v['r110'][i]>0 else 'N/A'
+            ad2.append([kr,'','FACILITY R1.10 = MAX(Imax1*1.5,Imax2*1.15) (amps)',sr110])
+        else:
+            ad2.append([kr,'','FACILITY R1.10',sr110])
+        #
+        ard.extend(ad+ad2)
+        ar0.append([kr]+e['sum1']+[sr11,sr12,sr13,sr14,sr15,sr16,sr17,sr18,sr19,sr110])
+    return ar0,ard
+#
 def writeCSV(fn,ha,ar):
     f1 = open(fn, "w")
     fwriter = csv.writer(f1,quotechar='"', lineterminator="\n")
@@ -401,7 +688,41 @@ def run():
     ARGVS.fCFG = os.path.abspath(ARGVS.fCFG)
     #
     config = readConfigFile(ARGVS.fCFG)
-    ## scope
+    la = getLines(config)
+    #
+    t0 = time.time()
+    sections = getSections(la)
+    t1 = time.time()
+    # simulations by shard of sections (worker processes open a snapshot of the case read-only)
+    nProcess = max(1,min(ARGVS.np,len(sections)))
+    if nProcess==1:
+        sims = simulateSections(sections)
+    else:
+        import multiprocessing,tempfile,shutil
+        tmp = tempfile.mkdtemp()
+        try:
+            olrFile = saveSnapshot(tmp)
+            n1 = (len(sections)+nProcess-1)//nProcess
+            args = [(j,olrFile,sections[i:i+n1]) for j,i in enumerate(range(0,len(sections),n1))]
+            sims = [None]*len(args)
+            with multiprocessing.Pool(nProcess) as pool:
+                for j,r1 in pool.imap_unordered(__simulateProcess__,args):
+                    sims[j] = r1
+        finally:
+            shutil.rmtree(tmp,ignore_errors=True)
+        sims = [r1 for r2 in sims for r1 in r2]
+    t2 = time.time()
+    ends = [e for sec in sections for e in sec]
+    ar0,ard = checkEnds(ends,[r1 for sec in sims for r1 in sec],config,OLCase.BASEMVA)
+    t3 = time.time()
+    fsum,fdet = writeReport(config,ar0,ard)
+    t4 = time.time()
+    print('Timing: sections %.2fs, simulations %.2fs (%i process), checks %.2fs, report %.2fs (%i sections, %i ends)'\
+          %(t1-t0,t2-t1,nProcess,t3-t2,t4-t3,len(sections),len(ends)))
+    return fsum,fdet
+#
+def getLines(config):
+    """ lines in scope of config """
     try:
         OLCase.applyScope(areaNum = config['AREA'],zoneNum = config['ZONE'],kV =[200,1000],verbose=False)
     except Exception as err:
@@ -413,6 +734,15 @@ def run():
         OLCase.applyScope(areaNum = config['AREA'],zoneNum = config['ZONE'],kV =[0,200],verbose=False)       
         ltags = OLCase.findOBJByTag(config['TAGS'],['LINE'])
         la.extend(ltags)
+    return la
+#
+def run_1():
+    OLCase.checkInit(PY_FILE) # check if ASPEN OLR file is opened
+
+    ARGVS.fCFG = os.path.abspath(ARGVS.fCFG)
+    #
+    config = readConfigFile(ARGVS.fCFG)
+    la = getLines(config)
     #
     ar0 = [] # summary
     ard = [] # details
@@ -428,6 +758,9 @@ def run():
                 ar0.append(r1['sum1'])
                 ard.extend(r1['details1'])
                 #break
+    return writeReport(config,ar0,ard)
+#
+def writeReport(config,ar0,ard):
     #
     header = [  ['PRC-023 FACILITY LOADABILITY LIMITS'],\
         ['Date',time.asctime()],\
@@ -454,8 +787,49 @@ def run():
     #
     print('CSV summary report:',fsum)
     print('CSV details report:',fdet)
+    return fsum,fdet
 
 
+def unit_test():
+    """
+    run_1 (line by line) and run (sections, vectorized checks) on sample\\PRC023.OLR:
+    summary and detail rows must be identical, rows of run compared with PRC023_ut_REF.txt
+    (rows of Date/OLR File/Config File not compared)
+    """
+    import tempfile,shutil
+    fi = os.path.join(PATH_FILE,'sample','PRC023.OLR')
+    OLCase.open(fi,1)
+    ARGVS.fCFG = os.path.join(PATH_FILE,'PRC023_CONFIG.XML')
+    tmp = tempfile.mkdtemp()
+    try:
+        rows = []
+        for k,f in enumerate([run_1,run]):
+            ARGVS.opath = os.path.join(tmp,str(k))
+            rows.append([__reportRows__(fn) for fn in f()])
+    finally:
+        shutil.rmtree(tmp,ignore_errors=True)
+    sres = '\nOLR file: '+os.path.basename(fi)
+    for k,s1 in enumerate(['SUMMARY','DETAILS']):
+        same = rows[0][k]==rows[1][k]
+        sres += '\n%s run_1==run: %s (%i rows)'%(s1,same,len(rows[1][k]))
+        if not same:
+            for i in range(max(len(rows[0][k]),len(rows[1][k]))):
+                if rows[0][k][i:i+1]!=rows[1][k][i:i+1]:
+                    sres += '\n\tfirst difference in row %i'%(i+1)
+                    break
+    for a1 in rows[1]:
+        sres += '\n'+'\n'.join([','.join(r1) for r1 in a1])
+    if not os.path.isfile(os.path.join(PATH_FILE,'PRC023_ut_REF.txt')): # reference recorded once with olxapi.dll
+        fres = os.path.join(PATH_FILE,'PRC023_ut.txt')
+        AppUtils.saveString2File(fres,'UNIT TEST: '+PY_FILE+'\n'+sres)
+        print('\nNo PRC023_ut_REF.txt: result saved in '+fres+' (check run_1==run, then rename)')
+        return False
+    return AppUtils.unit_test_compare(PATH_FILE,PY_FILE,sres)
+#
+def __reportRows__(fn):
+    with open(fn,'r') as f:
+        return [r1 for r1 in csv.reader(f) if not (r1 and r1[0] in {'Date','OLR File','Config File'})]
+#
 def run_demo():
     if ARGVS.demo==1:
         fi = PATH_FILE+'\\PRC023.OLR'
@@ -470,6 +844,8 @@ def run_demo():
 
 
 def main():
+    if ARGVS.ut>0:
+        return unit_test()
     if ARGVS.demo>0:
         return run_demo()
     return run()
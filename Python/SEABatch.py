@@ -0,0 +1,301 @@
+"""
+Purpose: Stepped-Event Analysis (SEA) batch runner
+
+    Run a list of SEA scenarios (breaker-failure, CHECKRELAYOPERATIONSEA-style studies)
+    once each and materialize all steps into one compact structured array:
+
+        scenario, step, time, currentMax, eventFlag, eventDesc, faultDesc, tripped
+
+    String columns (event/fault description, tripped devices) are stored as
+    indices in a shared string table, so repeated descriptions cost nothing.
+
+    OlxAPI has no structured list of tripped devices for a SEA step (SEARES['breaker'],
+    SEARES['device'] are empty in OlxObj): tripped devices are the 1LPF device strings
+    ([OCRLYG], [DSRLYP], [FUSE], [BREAKER],...) found in the event description.
+    checkTripped() compares the parser with EventDesc strings in SEABatch_ut_REF.csv,
+    recordEventDesc() records such strings with OlxAPI.dll.
+
+    Scenario (dict):
+        'obj'       : (str) GUID or 1LPF string of BUS/RLYGROUP/TERMINAL
+                      "{1bdfa3eb-2992-40cf-8d12-eb7f9f484126}"
+                      "[RELAYGROUP] 2 'CLAYTOR' 132 kV-6 'NEVADA' 132 kV 1 L"
+        'fltApp'    : (str) 'Bus', 'Close-In', 'xx%'
+        'fltConn'   : (str) '3LG','1LG:A',...
+        'deviceOpt' : [int]*7 (default [1]*7)
+        'tiers'     : (int) (default 5)
+        'Z'         : [R,X] (default [0,0])
+        'events'    : [[time,fltConn,[R,X]],...] additional user-defined events (default [])
+        'name'      : (str) optional label of the scenario
+
+    samples:
+        sc = [{'obj':"[BUS] 6 'NEVADA' 132 kV",'fltApp':'Bus','fltConn':'1LG:A'},
+              {'obj':t1GUID,'fltApp':'15%','fltConn':'3LG','events':[[0.01,'2LG:AB',[0,0]]]}]
+        res = SEABatch.runSEABatch('SAMPLE30.OLR',sc,olxpath=olxpath,nProcess=4)
+        for r in res.scenario(1):
+            print(r['time'],r['currentMax'],res.tripped(r))
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,time,csv,re
+import numpy as np
+from ctypes import c_int, c_double, byref, cast, c_char_p, create_string_buffer
+import OlxAPI
+import OlxObj
+from OlxAPIConst import OLXAPI_FAILURE
+
+FIXTURE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)),'SEABatch_ut_REF.csv')
+# 1LPF tags of devices that can trip in SEA
+DEVICE_TAGS = ['OCRLYG','OCRLYP','DSRLYG','DSRLYP','DEVICEDIFF','DEVICEVR','FUSE','RECLSRG','RECLSRP','BREAKER','SCHEME']
+__RE_DEVICE__ = re.compile(r'\[(?:%s)\].*'%'|'.join(DEVICE_TAGS))
+
+SEA_DTYPE = np.dtype([('scenario'  ,'i4'), # index of scenario in input list
+                      ('step'      ,'i2'), # SEA step (1 = initial user-defined event)
+                      ('time'      ,'f8'), # event time stamp [s]
+                      ('currentMax','f8'), # highest phase fault current magnitude at this step [A]
+                      ('eventFlag' ,'i1'), # 1 if user-defined event
+                      ('eventDesc' ,'i4'), # index in string table
+                      ('faultDesc' ,'i4'), # index in string table
+                      ('tripped'   ,'i4')])# index in string table ('\n'-joined list of tripped devices)
+#
+class SEA_RESULT:
+    """
+    Compact SEA results of a batch
+
+        .data    : structured array (SEA_DTYPE), sorted by (scenario,step)
+        .strings : string table referenced by eventDesc/faultDesc/tripped
+        .names   : name of each scenario
+        .errors  : {scenario index: error message} for scenarios that failed
+        .stopped : index of the scenario that triggered early termination (None if not)
+        .timing  : {'total':s, 'simulate':s, 'read':s}
+    """
+    def __init__(self,names):
+        self.data = np.zeros(0,dtype=SEA_DTYPE)
+        self.strings = ['']
+        self.names = names
+        self.errors = {}
+        self.stopped = None
+        self.timing = {'total':0.0,'simulate':0.0,'read':0.0}
+    #
+    def scenario(self,k):
+        """ rows of scenario k (view) """
+        i1,i2 = np.searchsorted(self.data['scenario'],[k,k+1])
+        return self.data[i1:i2]
+    #
+    def nStep(self):
+        """ number of steps per scenario (array) """
+        return np.bincount(self.data['scenario'],minlength=len(self.names))
+    #
+    def eventDesc(self,r):
+        return self.strings[r['eventDesc']]
+    #
+    def faultDesc(self,r):
+        return self.strings[r['faultDesc']]
+    #
+    def tripped(self,r):
+        """ list of devices tripped at the step of row r """
+        s1 = self.strings[r['tripped']]
+        return s1.split('\n') if s1 else []
+    #
+    def toCSV(self,fcsv):
+        with open(fcsv,'w',newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['Scenario','Name','Step','Time(s)','CurrentMax(A)','EventFlag','EventDesc','FaultDesc','Tripped'])
+            for r in self.data:
+                w.writerow([int(r['scenario'])+1,self.names[r['scenario']],int(r['step']),float(r['time']),\
+                            float(r['currentMax']),int(r['eventFlag']),self.eventDesc(r),self.faultDesc(r),\
+                            ';'.join(self.tripped(r))])
+            for k,e in sorted(self.errors.items()):
+                w.writerow([k+1,self.names[k],0,'','','','ERROR: '+e,'',''])
+#
+def runSEABatch(olrFile,scenarios,olxpath='',nProcess=1,maxSteps=0,stopFunc=None,verbose=False):
+    """
+    Run a batch of SEA scenarios
+
+    Parameters
+    ----------
+    olrFile : str
+        OLR file, opened read-only (in each worker process if nProcess>1).
+    scenarios : list of dict
+        SEA scenarios (see module doc).
+    olxpath : str
+        Full path name of the folder, where the ASPEN olxapi.dll is located.
+    nProcess : int
+        Number of worker processes. Scenarios are split into nProcess contiguous shards,
+        each worker loads the DLL and the OLR once. The calling script must be guarded by
+        if __name__ == '__main__' when nProcess>1.
+    maxSteps : int
+        0: read all steps, >0: read at most maxSteps steps per scenario.
+    stopFunc : function(scenario,rows,strings) -> bool, optional
+        Called after each scenario with its rows. Return True to stop the batch
+        (early termination). Must be a module level function if nProcess>1.
+
+    Returns
+    -------
+    SEA_RESULT
+
+    """
+    t0 = time.time()
+    names = [sc.get('name','') or sc['obj'] for sc in scenarios]
+    res = SEA_RESULT(names)
+    #
+    nProcess = max(1,min(nProcess,len(scenarios)))
+    if nProcess==1:
+        OlxObj.OLCase.open(olrFile,1,olxpath=olxpath)
+        shards = [__runShard__(0,scenarios,maxSteps,stopFunc,verbose)]
+    else:
+        import multiprocessing
+        n1 = (len(scenarios)+nProcess-1)//nProcess
+        args = []
+        for i in range(0,len(scenarios),n1):
+            args.append((os.path.abspath(olrFile),olxpath,i,scenarios[i:i+n1],maxSteps,stopFunc,verbose))
+        with multiprocessing.Pool(nProcess) as pool:
+            shards = pool.map(__runShardProcess__,args)
+    #
+    __mergeShards__(res,shards)
+    res.timing['total'] = time.time()-t0
+    return res
+#
+def __runShardProcess__(args):
+    olrFile,olxpath,k0,scenarios,maxSteps,stopFunc,verbose = args
+    OlxObj.setVerbose(0)
+    OlxObj.OLCase.open(olrFile,1,olxpath=olxpath)
+    return __runShard__(k0,scenarios,maxSteps,stopFunc,verbose)
+#
+def __runShard__(k0,scenarios,maxSteps,stopFunc,verbose):
+    """ run scenarios in the current process, return (rows,strings,errors,stopped,timing) """
+    strings,dictStr = [''],{'':0}
+    def sid(s1):
+        try:
+            return dictStr[s1]
+        except KeyError:
+            dictStr[s1] = len(strings)
+            strings.append(s1)
+            return dictStr[s1]
+    #
+    rows,errors,stopped = [],{},None
+    tSim,tRead = 0.0,0.0
+    # buffers are allocated once and reused for all steps of all scenarios
+    dTime,dCurrent,nUserEvent = c_double(0),c_double(0),c_int(0)
+    szEventDesc = create_string_buffer(b'\000'*512*4)
+    szFaultDesc = create_string_buffer(b'\000'*512*50)
+    #
+    for i,sc in enumerate(scenarios):
+        k = k0+i
+        t1 = time.time()
+        try:
+            __simulate1__(sc)
+        except Exception as e:
+            errors[k] = str(e).strip()
+            continue
+        t2 = time.time()
+        tSim += t2-t1
+        nStep = OlxAPI.GetSteppedEvent(c_int(0),byref(dTime),byref(dCurrent),byref(nUserEvent),szEventDesc,szFaultDesc)-1
+        if maxSteps>0:
+            nStep = min(nStep,maxSteps)
+        rows1 = []
+        for step in range(1,nStep+1):
+            OlxAPI.GetSteppedEvent(c_int(step),byref(dTime),byref(dCurrent),byref(nUserEvent),szEventDesc,szFaultDesc)
+            sEvent = OlxAPI.decode(cast(szEventDesc,c_char_p).value)
+            sFault = OlxAPI.decode(cast(szFaultDesc,c_char_p).value)
+            rows1.append((k,step,dTime.value,dCurrent.value,nUserEvent.value,sid(sEvent),sid(sFault),sid(__trippedDevices__(sEvent))))
+        tRead += time.time()-t2
+        rows.extend(rows1)
+        if verbose:
+            print('SEA %i/%i: %i steps'%(k+1,k0+len(scenarios),nStep))
+        #
+        if stopFunc is not None and stopFunc(k,np.array(rows1,dtype=SEA_DTYPE),strings):
+            stopped = k
+            break
+    return np.array(rows,dtype=SEA_DTYPE),strings,errors,stopped,(tSim,tRead)
+#
+def __simulate1__(sc):
+    """ run DoSteppedEvent for one scenario (without building OlxObj.FltSimResult) """
+    o1 = OlxObj.OLCase.findOBJ(sc['obj'])
+    if o1 is None:
+        raise Exception('Object not found: '+str(sc['obj']))
+    sp = [OlxObj.SPEC_FLT.SEA(obj=o1,fltApp=sc['fltApp'],fltConn=sc['fltConn'],deviceOpt=sc.get('deviceOpt',[1]*7),\
+                              tiers=sc.get('tiers',5),Z=sc.get('Z',[0,0]))]
+    for ev in sc.get('events',[]):
+        sp.append(OlxObj.SPEC_FLT.SEA_EX(time=ev[0],fltConn=ev[1],Z=ev[2]))
+    #
+    param = sp[0].getData()
+    for i in range(1,len(sp)):
+        param1 = sp[i].getData()
+        k = 4*i
+        param['fltOpt'][k] = param1['fltOpt']
+        param['fltOpt'][k+1] = param1['time']
+        param['fltOpt'][k+2] = param1['Z'][0]
+        param['fltOpt'][k+3] = param1['Z'][1]
+    if OLXAPI_FAILURE == OlxAPI.DoSteppedEvent(param['hnd'],param['fltOpt'],param['runOpt'],param['tiers']):
+        raise Exception(OlxAPI.ErrorString())
+#
+def __trippedDevices__(sEvent):
+    """ 1LPF strings of devices in the event description, one per line, in order, without duplicates """
+    res = []
+    for s1 in sEvent.splitlines():
+        m = __RE_DEVICE__.search(s1)
+        if m:
+            d1 = m.group().strip()
+            if d1 not in res:
+                res.append(d1)
+    return '\n'.join(res)
+#
+def checkTripped(fcsv=FIXTURE_CSV,prt=True):
+    """
+    compare __trippedDevices__ with the expected tripped devices (';'-joined) of EventDesc strings in fcsv
+    return list of differences (row,expected,found)
+    """
+    err = []
+    with open(fcsv,newline='',encoding='utf-8') as f:
+        for i,r in enumerate(csv.DictReader(f)):
+            v1 = r['Tripped'].split(';') if r['Tripped'] else []
+            v2 = __trippedDevices__(r['EventDesc'])
+            v2 = v2.split('\n') if v2 else []
+            if v1!=v2:
+                err.append((i+1,v1,v2))
+    if prt:
+        print('checkTripped: %i differences'%len(err))
+        for e in err:
+            print('\t',e)
+    return err
+#
+def recordEventDesc(olrFile,scenarios,fcsv,olxpath=''):
+    """ record EventDesc of all steps of scenarios with OlxAPI.dll => CSV for checkTripped (Tripped column to be checked by hand) """
+    res = runSEABatch(olrFile,scenarios,olxpath=olxpath)
+    with open(fcsv,'w',newline='',encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['EventDesc','Tripped'])
+        for r in res.data:
+            w.writerow([res.eventDesc(r),';'.join(res.tripped(r))])
+#
+def __mergeShards__(res,shards):
+    """ merge shard results: remap string indices, keep scenario order, apply early termination """
+    arrays = []
+    for rows,strings,errors,stopped,timing in shards:
+        remap = np.zeros(len(strings),dtype='i4')
+        dictStr = {s1:i for i,s1 in enumerate(res.strings)}
+        for i,s1 in enumerate(strings):
+            if s1 not in dictStr:
+                dictStr[s1] = len(res.strings)
+                res.strings.append(s1)
+            remap[i] = dictStr[s1]
+        for c1 in ['eventDesc','faultDesc','tripped']:
+            rows[c1] = remap[rows[c1]]
+        arrays.append(rows)
+        res.errors.update(errors)
+        if stopped is not None and (res.stopped is None or stopped<res.stopped):
+            res.stopped = stopped
+        res.timing['simulate'] += timing[0]
+        res.timing['read'] += timing[1]
+    #
+    data = np.concatenate(arrays) if arrays else np.zeros(0,dtype=SEA_DTYPE)
+    if res.stopped is not None:# same result as serial run: nothing after the stopping scenario
+        data = data[data['scenario']<=res.stopped]
+        res.errors = {k:v for k,v in res.errors.items() if k<=res.stopped}
+    res.data = data[np.lexsort((data['step'],data['scenario']))]
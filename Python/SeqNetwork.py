@@ -0,0 +1,654 @@
+"""
+Purpose: Sequence-network fault screening engine (NumPy/SciPy, no OlxAPI.dll)
+
+    Build positive-, negative- and zero-sequence bus admittance matrices from an
+    OLX export (ASPENLib.DataASPEN_OLX), factorize each matrix once (sparse LU)
+    and compute Thevenin impedances and bolted 3LG/1LG fault currents for all buses.
+
+    Modeled: LINE (pi model), SERIESRC, SWITCH (closed), XFMR, XFMR3 (winding connections
+    and grounding impedances), GENUNIT, SHUNTUNIT and mutual coupling groups (MULINE).
+    Not modeled: loads, GENW3/GENW4/CCGEN (inverter based resources), DC lines, phase shift angles.
+
+    Branch outages (N-1, N-1-1) are screened by rank-k Sherman-Morrison-Woodbury updates
+    of the factorized Zbus columns (faultOutage), without refactorization.
+
+    samples:
+        sn = SeqNetwork.SEQ_NETWORK(ASPENLib.DataASPEN_OLX('SAMPLE30.OLX'))
+        res = sn.faultAllBus()             # dict of arrays: 'BUS','KV','Z1','Z2','Z0','I3LG','I1LG'
+        res = sn.faultOutage([[l1],[l2],[l1,l2]],buses=[b1,b2])  # 'I3LG','I1LG': nContingency x nBus
+        err = sn.compareDoFault(SeqNetwork.readDoFault('SAMPLE30_DoFault.csv'),rtol=0.02)
+        err = SeqNetwork.checkDoFault()    # fixture SeqNetwork_ut_REF.OLX/.csv
+
+    SeqNetwork_ut_REF.OLX is a 3-bus model (generator, two coupled parallel lines, GY-D transformer),
+    SeqNetwork_ut_REF.csv has the format of recordDoFault, currents from the hand reduction of the
+    sequence networks (re-record with recordDoFault on the OLR of the OLX to check against OneLiner)
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import os,time,csv,math
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spl
+
+# OLX DATAFIELD names used by the engine (impedances in pu on system base unless noted)
+OLX_FIELDS = {
+'BUS'      : {'KV':'BS_KVNOMINAL'},
+'LINE'     : {'R':'LN_R','X':'LN_X','R0':'LN_R0','X0':'LN_X0','G1':'LN_G1','B1':'LN_B1','G2':'LN_G2','B2':'LN_B2',
+              'G10':'LN_G10','B10':'LN_B10','G20':'LN_G20','B20':'LN_B20','INSERVICE':'LN_INSERVICE'},
+'SERIESRC' : {'R':'SC_R','X':'SC_X','R0':'SC_R0','X0':'SC_X0','INSERVICE':'SC_INSERVICE','BYPASS':'SC_BYPASS'},
+'SWITCH'   : {'STATUS':'SW_STATUS','INSERVICE':'SW_INSERVICE'},
+'XFMR'     : {'R':'XR_R','X':'XR_X','R0':'XR_R0','X0':'XR_X0','B':'XR_B','B0':'XR_B0',
+              'RG1':'XR_RG1','XG1':'XR_XG1','RG2':'XR_RG2','XG2':'XR_XG2',   # grounding impedances (Ohm)
+              'CFG1':'XR_CONFIG1','CFG2':'XR_CONFIG2','TAP1':'XR_PRITAP','TAP2':'XR_SECTAP','INSERVICE':'XR_INSERVICE'},
+'XFMR3'    : {'RPS':'X3_RPS','XPS':'X3_XPS','RPT':'X3_RPT','XPT':'X3_XPT','RST':'X3_RST','XST':'X3_XST',
+              'R0PS':'X3_R0PS','X0PS':'X3_X0PS','R0PT':'X3_R0PT','X0PT':'X3_X0PT','R0ST':'X3_R0ST','X0ST':'X3_X0ST',
+              'RG1':'X3_RG1','XG1':'X3_XG1','RG2':'X3_RG2','XG2':'X3_XG2','RG3':'X3_RG3','XG3':'X3_XG3',
+              'CFG1':'X3_CONFIGP','CFG2':'X3_CONFIGS','CFG3':'X3_CONFIGT',
+              'TAP1':'X3_PRITAP','TAP2':'X3_SECTAP','TAP3':'X3_TERTAP','INSERVICE':'X3_INSERVICE'},
+'GENUNIT'  : {'R1':'GU_RSUB','X1':'GU_XSUB','R2':'GU_RNEG','X2':'GU_XNEG','R0':'GU_RZERO','X0':'GU_XZERO',
+              'RN':'GU_RZ','XN':'GU_XZ','MVA':'GU_MVA','ONLINE':'GU_ONLINE'},                # pu on unit MVA base
+'SHUNTUNIT': {'G':'SU_G','B':'SU_B','G0':'SU_G0','B0':'SU_B0','ONLINE':'SU_ONLINE'},
+'MULINE'   : {'R':'MU_R','X':'MU_X'},
+}
+#
+FIXTURE_OLX = os.path.join(os.path.dirname(os.path.abspath(__file__)),'SeqNetwork_ut_REF.OLX')
+FIXTURE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)),'SeqNetwork_ut_REF.csv')
+#
+SEQ = ['Z1','Z2','Z0']
+Y_EPS = 1e-8 # admittance to ground added on every node: isolated islands => Z~1e8 pu, I~0
+#
+class SEQ_NETWORK:
+    """
+    Sequence networks of an OLX model
+
+        .bus     : list of bus GUID (index = bus number in the matrices)
+        .busIdx  : {bus GUID: index}
+        .kV      : array of nominal kV of buses
+        .nNode   : number of nodes (buses + XFMR3 star points)
+        .Y       : {'Z1':csc,'Z2':csc,'Z0':csc} bus admittance matrices
+        .stamps  : {'Z1':[],'Z2':[],'Z0':[]} list of element stamps (nodes,Ysmall,OBJGUID)
+        .branch  : {OBJGUID: {'Z1':[stamp index],'Z2':[..],'Z0':[..]}}
+        .data    : data_olx of the model (kept to rebuild outaged models)
+    """
+    def __init__(self,olx,baseMVA=100.0,fields=OLX_FIELDS,lineShunt=False,prt=False):
+        """
+        olx       : ASPENLib.DataASPEN_OLX object or data_olx dict {OBJTYPE:[dict]} from get_DATA()
+        baseMVA   : system base MVA
+        lineShunt : True to include line and transformer charging/shunt admittances
+        """
+        t0 = time.time()
+        self.baseMVA = float(baseMVA)
+        self.fields = fields
+        self.lineShunt = lineShunt
+        self.timing = {}
+        data = olx if type(olx)==dict else olx.get_DATA()[0]
+        self.data = data
+        self.__build__(data)
+        self.timing['build'] = time.time()-t0
+        t0 = time.time()
+        self.lu = {s1:spl.splu(self.Y[s1]) for s1 in SEQ}
+        self.timing['factorize'] = time.time()-t0
+        self.__zdiag__ = None
+        if prt:
+            print('SEQ_NETWORK: %i buses, %i nodes, build %.2fs, factorize %.2fs'%(len(self.bus),self.nNode,self.timing['build'],self.timing['factorize']))
+    #
+    def __f__(self,d1,typ,key,default=0.0):
+        try:
+            return float(d1[self.fields[typ][key]])
+        except:
+            return default
+    #
+    def __s__(self,d1,typ,key,default=''):
+        try:
+            return str(d1[self.fields[typ][key]]).strip().upper()
+        except:
+            return default
+    #
+    def __addStamp__(self,seq,guid,nodes,ys):
+        self.stamps[seq].append((np.array(nodes,dtype=np.int64),np.array(ys,dtype=complex),guid))
+        self.branch.setdefault(guid,{s1:[] for s1 in SEQ})[seq].append(len(self.stamps[seq])-1)
+    #
+    def __addSeries__(self,seqs,guid,i,j,z,ysh1=0,ysh2=0):
+        if abs(z)<1e-12:
+            z = 1e-6j # zero impedance branch (switch, bypassed series cap)
+        y = 1.0/z
+        for s1 in seqs:
+            self.__addStamp__(s1,guid,[i,j],[[y+ysh1,-y],[-y,y+ysh2]])
+    #
+    def __addShunt__(self,seq,guid,i,y):
+        self.__addStamp__(seq,guid,[i],[[y]])
+    #
+    def __zg__(self,d1,typ,kr,kx,kv):
+        """ grounding impedance Ohm => pu """
+        z = complex(self.__f__(d1,typ,kr),self.__f__(d1,typ,kx))
+        return z*self.baseMVA/(kv*kv) if kv>0 else 0j
+    #
+    def __build__(self,data):
+        self.bus,self.busIdx,kv = [],{},[]
+        for d1 in data.get('BUS',[]):
+            self.busIdx[d1['OBJGUID']] = len(self.bus)
+            self.bus.append(d1['OBJGUID'])
+            k1 = self.__f__(d1,'BUS','KV',0.0)
+            if k1==0.0:
+                try:
+                    k1 = float(d1['TERMKV1'])
+                except:
+                    pass
+            kv.append(k1)
+        self.kV = np.array(kv)
+        self.nNode = len(self.bus)
+        self.stamps = {s1:[] for s1 in SEQ}
+        self.branch = {}
+        self.lineKey = {} # (TERMGUID1,TERMGUID2,CKTID) => LINE OBJGUID
+        bi = self.busIdx
+        zeroLine = {}     # LINE OBJGUID => (i,j,Z0) for mutual coupling groups
+        # LINE
+        for d1 in data.get('LINE',[]):
+            if self.__f__(d1,'LINE','INSERVICE',1.0)==0:
+                continue
+            try:
+                i,j = bi[d1['TERMGUID1']],bi[d1['TERMGUID2']]
+            except KeyError:
+                continue
+            g = d1['OBJGUID']
+            z1 = complex(self.__f__(d1,'LINE','R'),self.__f__(d1,'LINE','X'))
+            z0 = complex(self.__f__(d1,'LINE','R0'),self.__f__(d1,'LINE','X0'))
+            ysh1,ysh2,ysh10,ysh20 = 0,0,0,0
+            if self.lineShunt:
+                ysh1  = complex(self.__f__(d1,'LINE','G1') ,self.__f__(d1,'LINE','B1'))
+                ysh2  = complex(self.__f__(d1,'LINE','G2') ,self.__f__(d1,'LINE','B2'))
+                ysh10 = complex(self.__f__(d1,'LINE','G10'),self.__f__(d1,'LINE','B10'))
+                ysh20 = complex(self.__f__(d1,'LINE','G20'),self.__f__(d1,'LINE','B20'))
+            self.__addSeries__(['Z1','Z2'],g,i,j,z1,ysh1,ysh2)
+            zeroLine[g] = (i,j,z0,ysh10,ysh20)
+            ck = d1.get('CKTID','')
+            self.lineKey[(d1['TERMGUID1'],d1['TERMGUID2'],ck)] = g
+            self.lineKey[(d1['TERMGUID2'],d1['TERMGUID1'],ck)] = g
+        # SERIESRC
+        for d1 in data.get('SERIESRC',[]):
+            if self.__f__(d1,'SERIESRC','INSERVICE',1.0)==0:
+                continue
+            try:
+                i,j = bi[d1['TERMGUID1']],bi[d1['TERMGUID2']]
+            except KeyError:
+                continue
+            byp = self.__f__(d1,'SERIESRC','BYPASS',0.0)!=0
+            z1 = 0j if byp else complex(self.__f__(d1,'SERIESRC','R'),self.__f__(d1,'SERIESRC','X'))
+            z0 = 0j if byp else complex(self.__f__(d1,'SERIESRC','R0'),self.__f__(d1,'SERIESRC','X0'))
+            self.__addSeries__(['Z1','Z2'],d1['OBJGUID'],i,j,z1)
+            self.__addSeries__(['Z0'],d1['OBJGUID'],i,j,z0)
+        # SWITCH (closed)
+        for d1 in data.get('SWITCH',[]):
+            if self.__f__(d1,'SWITCH','INSERVICE',1.0)==0 or self.__f__(d1,'SWITCH','STATUS',1.0)==0:
+                continue
+            try:
+                i,j = bi[d1['TERMGUID1']],bi[d1['TERMGUID2']]
+            except KeyError:
+                continue
+            self.__addSeries__(SEQ,d1['OBJGUID'],i,j,0j)
+        # XFMR
+        for d1 in data.get('XFMR',[]):
+            self.__buildXFMR__(d1)
+        # XFMR3
+        for d1 in data.get('XFMR3',[]):
+            self.__buildXFMR3__(d1)
+        # GENUNIT
+        for d1 in data.get('GENUNIT',[]):
+            if self.__f__(d1,'GENUNIT','ONLINE',1.0)==0:
+                continue
+            try:
+                i = bi[d1['TERMGUID1']]
+            except KeyError:
+                continue
+            mva = self.__f__(d1,'GENUNIT','MVA',self.baseMVA) or self.baseMVA
+            k = self.baseMVA/mva
+            z1 = k*complex(self.__f__(d1,'GENUNIT','R1'),self.__f__(d1,'GENUNIT','X1'))
+            z2 = k*complex(self.__f__(d1,'GENUNIT','R2'),self.__f__(d1,'GENUNIT','X2'))
+            z0 = k*complex(self.__f__(d1,'GENUNIT','R0'),self.__f__(d1,'GENUNIT','X0'))
+            zn = k*complex(self.__f__(d1,'GENUNIT','RN'),self.__f__(d1,'GENUNIT','XN'))
+            for s1,z in [['Z1',z1],['Z2',z2],['Z0',z0+3*zn]]:
+                if abs(z)>1e-12:
+                    self.__addShunt__(s1,d1['OBJGUID'],i,1.0/z)
+        # SHUNTUNIT
+        for d1 in data.get('SHUNTUNIT',[]):
+            if self.__f__(d1,'SHUNTUNIT','ONLINE',1.0)==0:
+                continue
+            try:
+                i = bi[d1['TERMGUID1']]
+            except KeyError:
+                continue
+            y1 = complex(self.__f__(d1,'SHUNTUNIT','G'),self.__f__(d1,'SHUNTUNIT','B'))
+            y0 = complex(self.__f__(d1,'SHUNTUNIT','G0'),self.__f__(d1,'SHUNTUNIT','B0'))
+            self.__addShunt__('Z1',d1['OBJGUID'],i,y1)
+            self.__addShunt__('Z2',d1['OBJGUID'],i,y1)
+            self.__addShunt__('Z0',d1['OBJGUID'],i,y0)
+        # zero sequence of lines, with mutual coupling groups
+        self.__buildMutual__(data.get('MULINE',[]),zeroLine)
+        #
+        self.Y = {s1:self.__assemble__(s1) for s1 in SEQ}
+    #
+    def __tap__(self,d1,typ,k,i):
+        """ off-nominal tap ratio (tap kV / bus nominal kV) """
+        t = self.__f__(d1,typ,'TAP%i'%k,0.0)
+        return t/self.kV[i] if t>0 and self.kV[i]>0 else 1.0
+    #
+    def __buildXFMR__(self,d1):
+        typ = 'XFMR'
+        if self.__f__(d1,typ,'INSERVICE',1.0)==0:
+            return
+        try:
+            i,j = self.busIdx[d1['TERMGUID1']],self.busIdx[d1['TERMGUID2']]
+        except KeyError:
+            return
+        g = d1['OBJGUID']
+        z1 = complex(self.__f__(d1,typ,'R'),self.__f__(d1,typ,'X'))
+        z0 = complex(self.__f__(d1,typ,'R0'),self.__f__(d1,typ,'X0'))
+        if abs(z1)<1e-12:
+            z1 = 1e-6j
+        t = self.__tap__(d1,typ,1,i)/self.__tap__(d1,typ,2,j)
+        y = 1.0/z1
+        ysh = complex(0,self.__f__(d1,typ,'B'))/2 if self.lineShunt else 0
+        for s1 in ['Z1','Z2']:
+            self.__addStamp__(s1,g,[i,j],[[y/(t*t)+ysh,-y/t],[-y/t,y+ysh]])
+        # zero sequence by winding connections
+        c1,c2 = self.__s__(d1,typ,'CFG1','G')[:1],self.__s__(d1,typ,'CFG2','G')[:1]
+        zg1 = self.__zg__(d1,typ,'RG1','XG1',self.kV[i])
+        zg2 = self.__zg__(d1,typ,'RG2','XG2',self.kV[j])
+        gr1,gr2 = c1 in ['G','E'],c2 in ['G','E']
+        if gr1 and gr2:
+            self.__addSeries__(['Z0'],g,i,j,z0+3*zg1+3*zg2)
+        elif gr1 and c2=='D':
+            self.__addShunt__('Z0',g,i,1.0/(z0+3*zg1) if abs(z0+3*zg1)>1e-12 else 1e6)
+        elif c1=='D' and gr2:
+            self.__addShunt__('Z0',g,j,1.0/(z0+3*zg2) if abs(z0+3*zg2)>1e-12 else 1e6)
+    #
+    def __buildXFMR3__(self,d1):
+        typ = 'XFMR3'
+        if self.__f__(d1,typ,'INSERVICE',1.0)==0:
+            return
+        try:
+            ba = [self.busIdx[d1['TERMGUID%i'%k]] for k in [1,2,3]]
+        except KeyError:
+            return
+        g = d1['OBJGUID']
+        c = lambda r,x: complex(self.__f__(d1,typ,r),self.__f__(d1,typ,x))
+        zps,zpt,zst = c('RPS','XPS'),c('RPT','XPT'),c('RST','XST')
+        z0ps,z0pt,z0st = c('R0PS','X0PS'),c('R0PT','X0PT'),c('R0ST','X0ST')
+        zw  = [(zps+zpt-zst)/2,(zps+zst-zpt)/2,(zpt+zst-zps)/2]
+        zw0 = [(z0ps+z0pt-z0st)/2,(z0ps+z0st-z0pt)/2,(z0pt+z0st-z0ps)/2]
+        n0 = self.nNode # star point
+        self.nNode += 1
+        for k in range(3):
+            i = ba[k]
+            t = self.__tap__(d1,typ,k+1,i)
+            z = zw[k] if abs(zw[k])>1e-12 else 1e-6j
+            y = 1.0/z
+            for s1 in ['Z1','Z2']:
+                self.__addStamp__(s1,g,[i,n0],[[y/(t*t),-y/t],[-y/t,y]])
+            cf = self.__s__(d1,typ,'CFG%i'%(k+1),'G')[:1]
+            z0 = zw0[k]+3*self.__zg__(d1,typ,'RG%i'%(k+1),'XG%i'%(k+1),self.kV[i])
+            if cf in ['G','E']:
+                self.__addSeries__(['Z0'],g,i,n0,z0)
+            elif cf=='D':
+                self.__addShunt__('Z0',g,n0,1.0/z0 if abs(z0)>1e-12 else 1e6)
+    #
+    def __buildMutual__(self,mulines,zeroLine):
+        """ lines coupled by MULINE are grouped (union-find), each group is stamped with inv(Zprim) """
+        parent = {g:g for g in zeroLine}
+        def find(g):
+            while parent[g]!=g:
+                parent[g] = parent[parent[g]]
+                g = parent[g]
+            return g
+        pairs = []
+        for d1 in mulines:
+            try:
+                l1 = self.lineKey[(d1['TERMGUID1'],d1['TERMGUID2'],d1.get('CKTID',''))]
+                l2 = self.lineKey[(d1['TERMGUID3'],d1['TERMGUID4'],d1.get('CKTID2',''))]
+            except KeyError:
+                continue
+            zm = complex(self.__f__(d1,'MULINE','R'),self.__f__(d1,'MULINE','X'))
+            # mutual sign follows the orientation of the line terminals
+            s1 = 1 if zeroLine[l1][0]==self.busIdx[d1['TERMGUID1']] else -1
+            s2 = 1 if zeroLine[l2][0]==self.busIdx[d1['TERMGUID3']] else -1
+            pairs.append((l1,l2,s1*s2*zm))
+            parent[find(l1)] = find(l2)
+        groups = {}
+        for g in zeroLine:
+            groups.setdefault(find(g),[]).append(g)
+        gpairs = {}
+        for l1,l2,zm in pairs:
+            gpairs.setdefault(find(l1),[]).append((l1,l2,zm))
+        self.muGroup = {}  # LINE OBJGUID => group key
+        self.muData = {}   # group key => (lines,Zprim)
+        self.__muStamp__ = {} # group key => index of the group stamp in stamps['Z0']
+        for gk,lines in groups.items():
+            if len(lines)==1:
+                i,j,z0,ysh1,ysh2 = zeroLine[lines[0]]
+                self.__addSeries__(['Z0'],lines[0],i,j,z0,ysh1,ysh2)
+                continue
+            zp = np.diag([zeroLine[l1][2] for l1 in lines]).astype(complex)
+            li = {l1:k for k,l1 in enumerate(lines)}
+            for l1,l2,zm in gpairs.get(gk,[]):
+                zp[li[l1],li[l2]] += zm
+                zp[li[l2],li[l1]] += zm
+            self.muData[gk] = (lines,zp)
+            for l1 in lines:
+                self.muGroup[l1] = gk
+                i,j,z0,ysh1,ysh2 = zeroLine[l1]
+                if ysh1 or ysh2:
+                    self.__addStamp__('Z0',l1,[i,j],[[ysh1,0],[0,ysh2]])
+            nodes,ys = self.__mutualStamp__(lines,zp,zeroLine)
+            # the group stamp is registered on every line of the group
+            self.stamps['Z0'].append((nodes,ys,gk))
+            self.__muStamp__[gk] = len(self.stamps['Z0'])-1
+            for l1 in lines:
+                self.branch.setdefault(l1,{s1:[] for s1 in SEQ})['Z0'].append(len(self.stamps['Z0'])-1)
+        self.zeroLine = zeroLine
+    #
+    def __mutualStamp__(self,lines,zp,zeroLine):
+        nodes = sorted(set([zeroLine[l1][0] for l1 in lines]+[zeroLine[l1][1] for l1 in lines]))
+        ni = {n:k for k,n in enumerate(nodes)}
+        a = np.zeros((len(lines),len(nodes)))
+        for k,l1 in enumerate(lines):
+            a[k,ni[zeroLine[l1][0]]] = 1
+            a[k,ni[zeroLine[l1][1]]] = -1
+        ys = a.T @ np.linalg.inv(zp) @ a
+        return np.array(nodes,dtype=np.int64),ys
+    #
+    def __assemble__(self,seq):
+        ri,ci,va = [np.arange(self.nNode)],[np.arange(self.nNode)],[np.full(self.nNode,Y_EPS,dtype=complex)]
+        for nodes,ys,_ in self.stamps[seq]:
+            n = len(nodes)
+            ri.append(np.repeat(nodes,n))
+            ci.append(np.tile(nodes,n))
+            va.append(ys.ravel())
+        return sp.csc_matrix((np.concatenate(va),(np.concatenate(ri),np.concatenate(ci))),shape=(self.nNode,self.nNode))
+    #
+    def zColumns(self,seq,nodes):
+        """ columns of Zbus for the given nodes (dense nNode x len(nodes)) """
+        b = np.zeros((self.nNode,len(nodes)),dtype=complex)
+        b[nodes,np.arange(len(nodes))] = 1.0
+        return self.lu[seq].solve(b)
+    #
+    def zDiag(self,chunk=256):
+        """ Thevenin impedances of all buses {'Z1':array,'Z2':array,'Z0':array} (pu) """
+        if self.__zdiag__ is not None:
+            return self.__zdiag__
+        nb = len(self.bus)
+        res = {s1:np.zeros(nb,dtype=complex) for s1 in SEQ}
+        t0 = time.time()
+        for s1 in SEQ:
+            for k in range(0,nb,chunk):
+                idx = np.arange(k,min(k+chunk,nb))
+                x = self.zColumns(s1,idx)
+                res[s1][idx] = x[idx,np.arange(len(idx))]
+        self.timing['zdiag'] = time.time()-t0
+        self.__zdiag__ = res
+        return res
+    #
+    def faultCurrent(self,zd,vpre=1.0,zf=0j):
+        """ bolted (or through zf pu) 3LG and 1LG fault currents in A from Thevenin impedances zd """
+        ibase = np.where(self.kV>0,self.baseMVA*1e3/(math.sqrt(3)*np.where(self.kV>0,self.kV,1)),0.0)
+        i3 = np.abs(vpre/(zd['Z1']+zf))*ibase
+        i1 = np.abs(3*vpre/(zd['Z1']+zd['Z2']+zd['Z0']+3*zf))*ibase
+        return i3,i1
+    #
+    def faultAllBus(self,vpre=1.0,zf=0j):
+        """
+        Thevenin impedances and fault currents for all buses
+
+        Returns
+        -------
+        dict: 'BUS' (GUID), 'KV', 'Z1','Z2','Z0' (pu), 'I3LG','I1LG' (A)
+        """
+        zd = self.zDiag()
+        i3,i1 = self.faultCurrent(zd,vpre,zf)
+        return {'BUS':self.bus,'KV':self.kV,'Z1':zd['Z1'],'Z2':zd['Z2'],'Z0':zd['Z0'],'I3LG':i3,'I1LG':i1}
+    #
+    def compareDoFault(self,records,rtol=0.02,vpre=1.0):
+        """
+        Validate against recorded DoFault results
+
+        records : {bus GUID: {'3LG':A,'1LG':A}} (see readDoFault/recordDoFault)
+        return  : list of [bus GUID, fault, I DoFault, I engine, relative error] outside tolerance
+        """
+        res = self.faultAllBus(vpre)
+        err = []
+        for g,r1 in records.items():
+            try:
+                i = self.busIdx[g]
+            except KeyError:
+                err.append([g,'BUS',None,None,None])
+                continue
+            for f1,v1 in [['3LG',res['I3LG'][i]],['1LG',res['I1LG'][i]]]:
+                if f1 in r1 and r1[f1]>0:
+                    e = abs(v1-r1[f1])/r1[f1]
+                    if e>rtol:
+                        err.append([g,f1,r1[f1],float(v1),e])
+        return err
+    #
+    def outageDelta(self,seq,outage):
+        """
+        Change of the admittance matrix when the branches in outage are removed
+
+        outage : list of branch OBJGUID (LINE,SERIESRC,SWITCH,XFMR,XFMR3)
+        return : (nodes,dY) dense dY on the nodes touched by the outage
+        """
+        ol = set(outage)
+        nodes,parts,done = {},[],set()
+        for g in ol:
+            for k in self.branch.get(g,{}).get(seq,[]):
+                if k in done:
+                    continue # group stamp shared by several outaged lines
+                done.add(k)
+                n1,ys,gk = self.stamps[seq][k]
+                if seq=='Z0' and self.__muStamp__.get(gk)==k:
+                    lines,zp = self.muData[gk]
+                    keep = [i for i,l1 in enumerate(lines) if l1 not in ol]
+                    parts.append((n1,-ys,gk))
+                    if keep:
+                        n2,ys2 = self.__mutualStamp__([lines[i] for i in keep],zp[np.ix_(keep,keep)],self.zeroLine)
+                        parts.append((n2,ys2,gk))
+                else:
+                    parts.append((n1,-ys,g))
+        for n1,_,_ in parts:
+            for n in n1:
+                nodes.setdefault(int(n),len(nodes))
+        dy = np.zeros((len(nodes),len(nodes)),dtype=complex)
+        for n1,ys,_ in parts:
+            pos = [nodes[int(n)] for n in n1]
+            dy[np.ix_(pos,pos)] += ys
+        return np.array(list(nodes.keys()),dtype=np.int64),dy
+    #
+    def faultOutage(self,contingencies,buses=None,vpre=1.0,zf=0j,chunk=256,memMB=256):
+        """
+        Fault currents for branch outage contingencies, without refactorization
+
+        Zbus columns of the nodes touched by a batch of contingencies are computed from the
+        factorized matrices, then each contingency is a rank-k Sherman-Morrison-Woodbury update:
+            Z' = Z - Z[:,S] inv(I + dY Z[S,S]) dY Z[S,:]
+
+        Parameters
+        ----------
+        contingencies : list of list of branch OBJGUID
+            N-1: [[l1],[l2],...] N-1-1: [[l1,l2],...]
+        buses : list of bus GUID to monitor (None: all buses)
+        memMB : size bound of the dense block Z[rows,S] of one batch of contingencies (MB)
+
+        Returns
+        -------
+        dict: 'BUS' (GUID monitored), 'I3LG','I1LG' (A, array nContingency x nBus),
+              'Z1','Z2','Z0' (pu, same shape)
+        """
+        t0 = time.time()
+        mon = np.arange(len(self.bus)) if buses is None else np.array([self.busIdx[g] for g in buses],dtype=np.int64)
+        res = {'BUS':[self.bus[i] for i in mon]}
+        # nodes S of one batch: len(rows) x len(S) complex <= memMB
+        maxNodes = max(8,int(memMB*1048576/16/max(1,len(mon))))
+        rpos = np.full(self.nNode,-1,dtype=np.int64)
+        cpos = np.full(self.nNode,-1,dtype=np.int64)
+        for s1 in SEQ:
+            deltas = [self.outageDelta(s1,c1) for c1 in contingencies]
+            # Z[mon,mon] diagonal from the existing factorization
+            z0 = np.zeros(len(mon),dtype=complex)
+            if self.__zdiag__ is not None:
+                z0[:] = self.__zdiag__[s1][mon]
+            else:
+                for k in range(0,len(mon),chunk):
+                    idx = mon[k:k+chunk]
+                    z0[k:k+chunk] = self.zColumns(s1,idx)[idx,np.arange(len(idx))]
+            #
+            zc = np.zeros((len(contingencies),len(mon)),dtype=complex)
+            for c0,c1 in batchNodes([d[0] for d in deltas],maxNodes):
+                sall = np.unique(np.concatenate([deltas[i][0] for i in range(c0,c1)]+[np.zeros(0,dtype=np.int64)]))
+                rows = np.unique(np.concatenate([mon,sall]))
+                rpos[rows] = np.arange(len(rows))
+                cpos[sall] = np.arange(len(sall))
+                # Z[rows,sall] of the batch
+                zr = np.zeros((len(rows),len(sall)),dtype=complex)
+                for k in range(0,len(sall),chunk):
+                    zr[:,k:k+chunk] = self.zColumns(s1,sall[k:k+chunk])[rows,:]
+                rm = rpos[mon]
+                for i in range(c0,c1):
+                    nodes,dy = deltas[i]
+                    if len(nodes)==0:
+                        zc[i] = z0
+                        continue
+                    cm = zr[np.ix_(rm,cpos[nodes])]
+                    zss = zr[np.ix_(rpos[nodes],cpos[nodes])]
+                    m = np.linalg.solve(np.eye(len(nodes))+dy@zss,dy)
+                    zc[i] = z0-np.sum((cm@m)*cm,axis=1)
+                rpos[rows] = -1
+                cpos[sall] = -1
+            res[s1] = zc
+        ibase = np.where(self.kV[mon]>0,self.baseMVA*1e3/(math.sqrt(3)*np.where(self.kV[mon]>0,self.kV[mon],1)),0.0)
+        res['I3LG'] = np.abs(vpre/(res['Z1']+zf))*ibase
+        res['I1LG'] = np.abs(3*vpre/(res['Z1']+res['Z2']+res['Z0']+3*zf))*ibase
+        self.timing['outage'] = time.time()-t0
+        return res
+    #
+    def faultOutageRefactor(self,contingency,buses=None,vpre=1.0,zf=0j,chunk=256):
+        """
+        reference solution of one contingency (to check faultOutage):
+        SEQ_NETWORK rebuilt from the model without the branches in outage
+        """
+        ol = set(contingency)
+        data = {t:[d1 for d1 in v if d1.get('OBJGUID') not in ol] for t,v in self.data.items()}
+        sn = SEQ_NETWORK(data,self.baseMVA,self.fields,self.lineShunt)
+        mon = np.arange(len(sn.bus)) if buses is None else np.array([sn.busIdx[g] for g in buses],dtype=np.int64)
+        zd = {s1:np.zeros(len(mon),dtype=complex) for s1 in SEQ}
+        for s1 in SEQ:
+            for k in range(0,len(mon),chunk):
+                idx = mon[k:k+chunk]
+                zd[s1][k:k+chunk] = sn.zColumns(s1,idx)[idx,np.arange(len(idx))]
+        ibase = np.where(sn.kV[mon]>0,sn.baseMVA*1e3/(math.sqrt(3)*np.where(sn.kV[mon]>0,sn.kV[mon],1)),0.0)
+        i3 = np.abs(vpre/(zd['Z1']+zf))*ibase
+        i1 = np.abs(3*vpre/(zd['Z1']+zd['Z2']+zd['Z0']+3*zf))*ibase
+        return i3,i1
+    #
+    def faultOutageRefactor_1(self,contingency,buses=None,vpre=1.0,zf=0j):
+        """ reference solution of one contingency by full refactorization (to check faultOutage) """
+        mon = np.arange(len(self.bus)) if buses is None else np.array([self.busIdx[g] for g in buses],dtype=np.int64)
+        zd = {}
+        for s1 in SEQ:
+            nodes,dy = self.outageDelta(s1,contingency)
+            y = self.Y[s1]
+            if len(nodes):
+                n = len(nodes)
+                y = y+sp.csc_matrix((dy.ravel(),(np.repeat(nodes,n),np.tile(nodes,n))),shape=y.shape)
+            b = np.zeros((self.nNode,len(mon)),dtype=complex)
+            b[mon,np.arange(len(mon))] = 1.0
+            zd[s1] = spl.splu(y.tocsc()).solve(b)[mon,np.arange(len(mon))]
+        ibase = np.where(self.kV[mon]>0,self.baseMVA*1e3/(math.sqrt(3)*np.where(self.kV[mon]>0,self.kV[mon],1)),0.0)
+        i3 = np.abs(vpre/(zd['Z1']+zf))*ibase
+        i1 = np.abs(3*vpre/(zd['Z1']+zd['Z2']+zd['Z0']+3*zf))*ibase
+        return i3,i1
+    #
+    def checkOutage(self,contingencies,buses=None):
+        """ max relative difference between faultOutage and the rebuilt outaged models """
+        res = self.faultOutage(contingencies,buses)
+        err = 0.0
+        for i,c1 in enumerate(contingencies):
+            i3,i1 = self.faultOutageRefactor(c1,buses)
+            for a,b in [[res['I3LG'][i],i3],[res['I1LG'][i],i1]]:
+                ok = b>1e-3
+                if ok.any():
+                    err = max(err,float(np.max(np.abs(a[ok]-b[ok])/b[ok])))
+        return err
+#
+def batchNodes(nodes,maxNodes):
+    """
+    split contingencies in batches [(c0,c1)] of consecutive contingencies
+    touching at most maxNodes distinct nodes (a larger contingency is alone in its batch)
+    nodes : list of node arrays of each contingency
+    """
+    res,c0,seen = [],0,set()
+    for i,n1 in enumerate(nodes):
+        new = seen.union(n1.tolist())
+        if len(new)>maxNodes and i>c0:
+            res.append((c0,i))
+            c0,new = i,set(n1.tolist())
+        seen = new
+    if c0<len(nodes):
+        res.append((c0,len(nodes)))
+    return res
+#
+def benchmarkOutage(sn,nContingency=10000,buses=None,seed=0):
+    """ time faultOutage for nContingency random N-1 branch outages of network sn """
+    import random
+    random.seed(seed)
+    br = [g for g,v in sn.branch.items() if any(len(sn.stamps['Z1'][k][0])>1 for k in v['Z1'])]
+    cont = [[random.choice(br)] for _ in range(nContingency)]
+    t0 = time.time()
+    res = sn.faultOutage(cont,buses)
+    dt = time.time()-t0
+    print('faultOutage: %i contingencies x %i buses in %.2fs (%.1f contingencies/s)'%(nContingency,len(res['BUS']),dt,nContingency/dt))
+    return dt
+#
+def readDoFault(fcsv):
+    """ read recorded DoFault results (CSV: BUS GUID,3LG(A),1LG(A)) """
+    res = {}
+    with open(fcsv,'r') as f:
+        for row in csv.reader(f):
+            try:
+                res[row[0]] = {'3LG':float(row[1]),'1LG':float(row[2])}
+            except:
+                pass # header
+    return res
+#
+def checkDoFault(folx=FIXTURE_OLX,fcsv=FIXTURE_CSV,rtol=0.001,prt=True):
+    """
+    compare faultAllBus of the model folx with DoFault results fcsv (readDoFault)
+    return list of differences outside rtol (compareDoFault)
+    """
+    import ASPENLib
+    sn = SEQ_NETWORK(ASPENLib.DataASPEN_OLX(folx))
+    rec = readDoFault(fcsv)
+    err = sn.compareDoFault(rec,rtol=rtol)
+    if prt:
+        print('checkDoFault: %i buses, %i differences > %g'%(len(rec),len(err),rtol))
+        for e in err:
+            print('\t',e)
+    return err
+#
+def recordDoFault(olrFile,fcsv,olxpath=''):
+    """ record bolted 3LG/1LG:A bus fault currents (A) of all buses with OlxAPI.dll => CSV for readDoFault """
+    import OlxObj
+    OlxObj.OLCase.open(olrFile,1,olxpath=olxpath)
+    with open(fcsv,'w',newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['BUS','3LG(A)','1LG(A)'])
+        for b1 in OlxObj.OLCase.BUS:
+            va = []
+            for fc in ['3LG','1LG:A']:
+                fs = OlxObj.SPEC_FLT.Classical(obj=b1,fltApp='Bus',fltConn=fc,Z=[0,0])
+                OlxObj.OLCase.simulateFault(fs,1)
+                va.append(abs(OlxObj.FltSimResult[0].current()[0]))
+            w.writerow([b1.GUID]+va)
@@ -0,0 +1,210 @@
+"""
+Purpose: Tie lines/branches between areas or zones, vectorized
+
+    Bus area/zone array and branch terminal index array (one getData by bus and by branch),
+    ties found in one pass over the arrays:
+        td = TieDetect.TIE_DATA.fromCase(OLCase,'AREANO',TieDetect.LINE_TYPES)
+        idx = td.ties(azNum)                # rows of tie branches (azNum=0: all)
+        sres = td.report(azNum,'LINE')      # same text as tielines.pyw
+        td.readZ(idx)                       # R+jX of tie branches only
+        az,count,adm = td.matrix()          # N-area interface matrices
+        sres += td.reportInterface()        # count, sum |1/Z|, min |Z| by pair of areas
+        TieDetect.benchmark()
+"""
+__author__    = "ASPEN Inc."
+__copyright__ = "Copyright 2024, Advanced System for Power Engineering Inc."
+__license__   = "All rights reserved"
+__category__  = "Common"
+__email__     = "support@aspeninc.com"
+__status__    = "Release"
+__version__   = "1.0.0"
+
+import numpy as np
+
+LINE_TYPES = ['LINE']
+BRANCH_TYPES = ['LINE','SWITCH','SERIESRC','SHIFTER','XFMR','XFMR3']
+# impedance fields (R,X) by branch type (SWITCH: no impedance)
+Z_FIELDS = {'LINE':('R','X'),'XFMR':('R','X'),'SERIESRC':('R','X'),'SHIFTER':('RP','XP'),'XFMR3':('RPS','XPS')}
+#
+class TIE_DATA:
+    """
+    arrays of buses and branches
+        .busAZ  : area/zone of buses (int)
+        .brType : index in .types of branches
+        .brBus  : bus index of branch terminals (n x 3, -1 if no 3rd terminal)
+        .brZ    : R+jX of branches (nan if no impedance)
+        .brObj  : branch objects (None if made from arrays), for names
+    """
+    def __init__(self,busAZ,brBus,brType=None,brZ=None,types=None,brObj=None):
+        self.busAZ = np.asarray(busAZ,dtype=np.int64)
+        self.brBus = np.asarray(brBus,dtype=np.int64).reshape(len(brBus),-1) if len(brBus) else np.zeros((0,2),dtype=np.int64)
+        n = len(self.brBus)
+        self.brType = np.zeros(n,dtype=np.int64) if brType is None else np.asarray(brType,dtype=np.int64)
+        self.brZ = np.full(n,np.nan+0j) if brZ is None else np.asarray(brZ,dtype=np.complex128)
+        self.types = types or ['LINE']
+        self.brObj = brObj
+        self.__names = {}
+    #
+    @staticmethod
+    def fromCase(case,az='AREANO',types=BRANCH_TYPES):
+        """ arrays of OlxObj.OLCase, az: 'AREANO' or 'ZONENO' """
+        buses = case.BUS
+        row = {b.__hnd__:i for i,b in enumerate(buses)}
+        busAZ = [b.getData(az) for b in buses]
+        brBus,brType,brObj = [],[],[]
+        for k,t in enumerate(types):
+            for br1 in getattr(case,t):
+                bs = [row.get(b.__hnd__,-1) for b in br1.getData('BUS')]
+                brBus.append((bs+[-1,-1,-1])[:3])
+                brType.append(k)
+                brObj.append(br1)
+        return TIE_DATA(busAZ,brBus,brType,None,list(types),brObj)
+    #
+    def readZ(self,idx):
+        """ R+jX of branches idx (getData, nan if no impedance) """
+        if self.brObj is None:
+            return
+        for i in idx:
+            zf = Z_FIELDS.get(self.types[self.brType[i]])
+            if zf:
+                try:
+                    self.brZ[i] = complex(self.brObj[i].getData(zf[0]),self.brObj[i].getData(zf[1]))
+                except Exception:
+                    pass
+    #
+    def terminalAZ(self):
+        """ area/zone of branch terminals (n x 3), -1 for missing terminal """
+        b = self.brBus
+        return np.where(b>=0,self.busAZ[np.maximum(b,0)],-1)
+    #
+    def ties(self,azNum=0):
+        """ rows of branches with terminals in different area/zone (azNum!=0: one terminal in azNum) """
+        a = self.terminalAZ()
+        valid = self.brBus>=0
+        amin = np.where(valid,a,np.iinfo(np.int64).max).min(axis=1)
+        amax = np.where(valid,a,np.iinfo(np.int64).min).max(axis=1)
+        tie = amin!=amax
+        if azNum!=0:
+            tie &= ((a==azNum)&valid).any(axis=1)
+        return np.nonzero(tie)[0]
+    #
+    def name(self,i):
+        """ toString() of branch i (cached) """
+        s = self.__names.get(i)
+        if s is None:
+            if self.brObj is not None:
+                s = self.brObj[i].toString()
+            else:
+                s = '[%s] %i'%(self.types[self.brType[i]],i)
+            self.__names[i] = s
+        return s
+    #
+    def report(self,azNum=0,lnBr='LINE',az='AREANO'):
+        """ text report (as tielines.pyw) """
+        sres = "Tie %s report:\nNo   ,%s1 ,%s2 ,"%(lnBr,az,az)
+        a = self.terminalAZ()
+        valid = self.brBus>=0
+        res = [sres]
+        for k,i in enumerate(self.ties(azNum)):
+            ba = sorted(a[i][valid[i]].tolist())
+            res.append('\n'+str(k+1).ljust(5)+''.join([','+str(b1).ljust(8) for b1 in ba])+','+self.name(i))
+        return ''.join(res)
+    #
+    def pairs(self,idx=None):
+        """ (branch row,area1,area2) of tie branches, one row by pair of different areas (3 for XFMR3) """
+        if idx is None:
+            idx = self.ties()
+        a = self.terminalAZ()[idx]
+        valid = self.brBus[idx]>=0
+        rows,a1,a2 = [],[],[]
+        for p,q in [(0,1),(0,2),(1,2)]:
+            m = valid[:,p] & valid[:,q] & (a[:,p]!=a[:,q])
+            rows.append(idx[m])
+            a1.append(np.minimum(a[m,p],a[m,q]))
+            a2.append(np.maximum(a[m,p],a[m,q]))
+        return np.concatenate(rows),np.concatenate(a1),np.concatenate(a2)
+    #
+    def matrix(self,idx=None):
+        """
+        N-area interface matrices of tie branches
+            returns (az,count,adm): az sorted area/zone numbers, count[i,j] number of ties,
+            adm[i,j] sum of |1/Z| of ties with impedance (symmetric)
+        """
+        rows,a1,a2 = self.pairs(idx)
+        az = np.unique(self.busAZ)
+        i1,i2 = np.searchsorted(az,a1),np.searchsorted(az,a2)
+        n = len(az)
+        count = np.zeros((n,n),dtype=np.int64)
+        np.add.at(count,(i1,i2),1)
+        z = self.brZ[rows]
+        y = np.zeros(len(z))
+        ok = np.isfinite(z) & (z!=0)
+        y[ok] = np.abs(1/z[ok])
+        adm = np.zeros((n,n))
+        np.add.at(adm,(i1,i2),y)
+        return az,count+count.T,adm+adm.T
+    #
+    def summary(self,idx=None):
+        """ list of [az1,az2,count,sum |1/Z|,min |Z|] by pair of areas with ties """
+        rows,a1,a2 = self.pairs(idx)
+        z = np.abs(self.brZ[rows])
+        res = []
+        if len(rows)==0:
+            return res
+        key = a1*(int(self.busAZ.max())+1)+a2
+        order = np.argsort(key,kind='stable')
+        key,a1,a2,z = key[order],a1[order],a2[order],z[order]
+        start = np.r_[0,np.nonzero(np.diff(key))[0]+1]
+        for s,e in zip(start,np.r_[start[1:],len(key)]):
+            zz = z[s:e][np.isfinite(z[s:e]) & (z[s:e]>0)]
+            res.append([int(a1[s]),int(a2[s]),int(e-s),float((1/zz).sum()) if len(zz) else 0.0,float(zz.min()) if len(zz) else float('nan')])
+        return res
+    #
+    def reportInterface(self,idx=None,az='AREANO'):
+        """ text of summary by pair of areas (tie branches idx) """
+        res = ["\n\nInterface report:\n%s1 ,%s2 ,COUNT ,SUM |1/Z| ,MIN |Z|"%(az,az)]
+        for a1,a2,n,y,z in self.summary(idx):
+            res.append('\n%s,%s,%s,%s,%s'%(str(a1).ljust(8),str(a2).ljust(8),str(n).ljust(6),str(round(y,4)).ljust(10),round(z,6)))
+        return ''.join(res)
+#
+def makeSynthetic(nBus=1000000,nArea=100,nBranch=None,seed=1):
+    """ TIE_DATA of a synthetic network (areas in blocks, 2% of branches random) """
+    rnd = np.random.default_rng(seed)
+    nBranch = nBranch or int(nBus*1.5)
+    busAZ = np.arange(nBus)*nArea//nBus+1
+    b1 = rnd.integers(0,nBus,nBranch)
+    b2 = np.clip(b1+rnd.integers(-50,50,nBranch),0,nBus-1)
+    far = rnd.random(nBranch)<0.02
+    b2[far] = rnd.integers(0,nBus,far.sum())
+    b3 = np.where(rnd.random(nBranch)<0.01,rnd.integers(0,nBus,nBranch),-1)
+    brZ = rnd.uniform(0.001,0.01,nBranch)+1j*rnd.uniform(0.01,0.1,nBranch)
+    return TIE_DATA(busAZ,np.stack([b1,b2,b3],axis=1),np.where(b3>=0,5,0),brZ,BRANCH_TYPES)
+#
+def benchmark(nBus=1000000,nArea=100,prt=True):
+    """ ties, report, matrices on a synthetic network; loop per branch (as tielines.pyw) on 1/10 """
+    import time
+    td = makeSynthetic(nBus,nArea)
+    t = {}
+    t0 = time.time()
+    idx = td.ties()
+    t['ties'] = time.time()-t0
+    t0 = time.time()
+    td.report(nArea//2)
+    t['report'] = time.time()-t0
+    t0 = time.time()
+    az,count,adm = td.matrix(idx)
+    t['matrix'] = time.time()-t0
+    # per branch loop (as tielines.pyw) over python lists
+    n = len(td.brBus)//10
+    bb,ba = td.brBus[:n].tolist(),td.busAZ.tolist()
+    t0 = time.time()
+    k = 0
+    for bs in bb:
+        a = sorted([ba[b] for b in bs if b>=0])
+        if a[0]!=a[-1]:
+            k += 1
+    t['loop 1/10'] = time.time()-t0
+    if prt:
+        print('TieDetect benchmark: %i buses, %i branches, %i areas, %i ties, %i area pairs'%(nBus,len(td.brBus),nArea,len(idx),(count>0).sum()//2))
+        print('    '+', '.join(['%s %.3fs'%(k1,v) for k1,v in t.items()]))
+    return t
@@ -10,12 +10,13 @@ __category__  = "Common"
 __pyManager__ = "Yes"
 __email__     = "support@aspeninc.com"
 __status__    = "Released"
-__version__   = "2.1.1"
+__version__   = "2.2.0"
 
 
 # IMPORT -----------------------------------------------------------------------
 from OlxObj import *
 import AppUtils
+import TieDetect
 import os
 import tkinter as tk
 from tkinter import ttk
@@ -125,6 +126,21 @@ class GUI(tk.Frame):
         self.LnBr = "BRANCH"
        #
     def run_OK(self):
+        azNum= int(self.cb.get())
+        types = TieDetect.LINE_TYPES if self.LnBr=='LINE' else TieDetect.BRANCH_TYPES
+        td = TieDetect.TIE_DATA.fromCase(OLCase,self.az,types)
+        idx = td.ties(azNum)
+        sres = td.report(azNum,self.LnBr,self.az)
+        td.readZ(idx)
+        sres += td.reportInterface(idx,self.az)
+
+        ARGVS.fr = AppUtils.get_file_out(fo=ARGVS.fr, fi=OLCase.olrFile , subf='' , ad='_'+PY_FILE[:-4] , ext='.csv')
+        AppUtils.saveString2File(ARGVS.fr,sres)
+        s1 = '\nReport file had been saved in:\n%s'%ARGVS.fr
+        AppUtils.explorerDir(ARGVS.fr, s1, PY_FILE) #open dir of fo
+        self.cancel()
+    #
+    def run_OK_1(self):
         azNum= int(self.cb.get())
         sres = "Tie %s report:\nNo   ,%s1 ,%s2 ,"%(self.LnBr,self.az,self.az)
 